@@ -1,5 +1,7 @@
 from flask import Blueprint, jsonify, render_template, request, session, Response
 from database.latency_db import OrderLatency, latency_session
+from database.log_writer import get_log_writer
+from utils.order_gateway import get_gateway_stats
 from utils.session import check_session_validity
 from limiter import limiter
 from utils.logging import get_logger
@@ -232,6 +234,28 @@ def get_broker_stats(broker):
         logger.error(f"Error fetching broker stats: {e}")
         return jsonify({'error': str(e)}), 500
 
+@latency_bp.route('/api/gateway', methods=['GET'])
+@check_session_validity
+@limiter.limit("60/minute")
+def get_gateway_metrics():
+    """API endpoint to get order gateway queue depth and wait times per broker"""
+    try:
+        return jsonify(get_gateway_stats())
+    except Exception as e:
+        logger.error(f"Error fetching order gateway stats: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@latency_bp.route('/api/log_writer', methods=['GET'])
+@check_session_validity
+@limiter.limit("60/minute")
+def get_log_writer_metrics():
+    """API endpoint to get the buffered log writer queue depth and row counters"""
+    try:
+        return jsonify(get_log_writer().get_stats())
+    except Exception as e:
+        logger.error(f"Error fetching log writer stats: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @latency_bp.route('/export', methods=['GET'])
 @check_session_validity
 @limiter.limit("10/minute")
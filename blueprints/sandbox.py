@@ -1,8 +1,6 @@
 from flask import Blueprint, render_template, jsonify, request, flash, redirect, url_for, session
 from database.sandbox_db import (
-    get_config, set_config, get_all_configs,
-    SandboxOrders, SandboxTrades, SandboxPositions,
-    SandboxHoldings, SandboxFunds, db_session
+    get_config, set_config, get_all_configs
 )
 from utils.session import check_session_validity
 from utils.logging import get_logger
@@ -67,7 +65,9 @@ def sandbox_config():
                 'title': 'Update Intervals (seconds)',
                 'configs': {
                     'order_check_interval': configs.get('order_check_interval', {}),
-                    'mtm_update_interval': configs.get('mtm_update_interval', {})
+                    'order_execution_mode': configs.get('order_execution_mode', {}),
+                    'mtm_update_interval': configs.get('mtm_update_interval', {}),
+                    'quote_cache_seconds': configs.get('quote_cache_seconds', {})
                 }
             }
         }
@@ -111,25 +111,30 @@ def update_config():
             # If starting_capital was updated, update all user funds immediately
             if config_key == 'starting_capital':
                 try:
-                    from database.sandbox_db import SandboxFunds, db_session
+                    from sandbox.state_store import get_state_store
                     from decimal import Decimal
 
                     new_capital = Decimal(str(config_value))
+                    store = get_state_store()
 
                     # Update all user funds with new starting capital
                     # This resets their balance to the new capital value
-                    funds = SandboxFunds.query.all()
-                    for fund in funds:
-                        # Calculate what the new available balance should be
-                        # New available = new_capital - used_margin + total_pnl
-                        fund.total_capital = new_capital
-                        fund.available_balance = new_capital - fund.used_margin + fund.total_pnl
-
-                    db_session.commit()
-                    logger.info(f"Updated {len(funds)} user funds with new starting capital: ₹{new_capital}")
+                    updated = 0
+                    for state in store.users():
+                        with state.lock:
+                            fund = state.funds
+                            if fund is None:
+                                continue
+                            # Calculate what the new available balance should be
+                            # New available = new_capital - used_margin + total_pnl
+                            fund.total_capital = new_capital
+                            fund.available_balance = new_capital - fund.used_margin + fund.total_pnl
+                            store.save(fund)
+                            updated += 1
+
+                    logger.info(f"Updated {updated} user funds with new starting capital: ₹{new_capital}")
                 except Exception as e:
                     logger.error(f"Error updating user funds with new capital: {e}")
-                    db_session.rollback()
 
             # If square-off time was updated, reload the schedule automatically
             if config_key.endswith('square_off_time'):
@@ -143,6 +148,19 @@ def update_config():
                 except Exception as e:
                     logger.error(f"Error auto-reloading square-off schedule: {e}")
 
+            # If the order execution mode was updated, restart the execution engine to apply it
+            if config_key == 'order_execution_mode':
+                try:
+                    from sandbox.execution_thread import (
+                        is_execution_engine_running, start_execution_engine, stop_execution_engine
+                    )
+                    if is_execution_engine_running():
+                        stop_execution_engine()
+                        start_execution_engine()
+                        logger.info(f"Execution engine restarted in {config_value} mode")
+                except Exception as e:
+                    logger.error(f"Error restarting execution engine: {e}")
+
             # If reset day or reset time was updated, reload the schedule automatically
             if config_key in ['reset_day', 'reset_time']:
                 try:
@@ -186,7 +204,9 @@ def reset_config():
             'reset_day': 'Sunday',
             'reset_time': '00:00',
             'order_check_interval': '5',
+            'order_execution_mode': 'poll',
             'mtm_update_interval': '5',
+            'quote_cache_seconds': '2',
             'nse_bse_square_off_time': '15:15',
             'cds_bcd_square_off_time': '16:45',
             'mcx_square_off_time': '23:30',
@@ -204,62 +224,47 @@ def reset_config():
 
         # Clear all sandbox data for the current user
         try:
-            # Delete all orders
-            deleted_orders = SandboxOrders.query.filter_by(user_id=user_id).delete()
-            logger.info(f"Deleted {deleted_orders} sandbox orders for user {user_id}")
-
-            # Delete all trades
-            deleted_trades = SandboxTrades.query.filter_by(user_id=user_id).delete()
-            logger.info(f"Deleted {deleted_trades} sandbox trades for user {user_id}")
-
-            # Delete all positions
-            deleted_positions = SandboxPositions.query.filter_by(user_id=user_id).delete()
-            logger.info(f"Deleted {deleted_positions} sandbox positions for user {user_id}")
-
-            # Delete all holdings
-            deleted_holdings = SandboxHoldings.query.filter_by(user_id=user_id).delete()
-            logger.info(f"Deleted {deleted_holdings} sandbox holdings for user {user_id}")
-
-            # Reset funds to starting capital
-            from decimal import Decimal
-            from datetime import datetime
-            import pytz
-
-            fund = SandboxFunds.query.filter_by(user_id=user_id).first()
-            starting_capital = Decimal(default_configs['starting_capital'])
-
-            if fund:
-                # Reset existing fund
-                fund.total_capital = starting_capital
-                fund.available_balance = starting_capital
-                fund.used_margin = Decimal('0.00')
-                fund.unrealized_pnl = Decimal('0.00')
-                fund.realized_pnl = Decimal('0.00')
-                fund.total_pnl = Decimal('0.00')
-                fund.last_reset_date = datetime.now(pytz.timezone('Asia/Kolkata'))
-                fund.reset_count = (fund.reset_count or 0) + 1
-                logger.info(f"Reset sandbox funds for user {user_id}")
-            else:
-                # Create new fund record
-                fund = SandboxFunds(
-                    user_id=user_id,
-                    total_capital=starting_capital,
-                    available_balance=starting_capital,
-                    used_margin=Decimal('0.00'),
-                    unrealized_pnl=Decimal('0.00'),
-                    realized_pnl=Decimal('0.00'),
-                    total_pnl=Decimal('0.00'),
-                    last_reset_date=datetime.now(pytz.timezone('Asia/Kolkata')),
-                    reset_count=1
-                )
-                db_session.add(fund)
-                logger.info(f"Created new sandbox funds for user {user_id}")
-
-            db_session.commit()
+            from sandbox.state_store import get_state_store, FundsState, ist_now
+            store = get_state_store()
+            state = store.user(user_id)
+
+            with state.lock:
+                # Delete all orders, trades, positions and holdings
+                deleted = store.clear_user(user_id)
+                logger.info(f"Deleted sandbox data for user {user_id}: {deleted}")
+
+                # Reset funds to starting capital
+                from decimal import Decimal
+
+                fund = state.funds
+                starting_capital = Decimal(default_configs['starting_capital'])
+
+                if fund:
+                    # Reset existing fund
+                    fund.total_capital = starting_capital
+                    fund.available_balance = starting_capital
+                    fund.used_margin = Decimal('0.00')
+                    fund.unrealized_pnl = Decimal('0.00')
+                    fund.realized_pnl = Decimal('0.00')
+                    fund.total_pnl = Decimal('0.00')
+                    fund.last_reset_date = ist_now()
+                    fund.reset_count = (fund.reset_count or 0) + 1
+                    store.save(fund)
+                    logger.info(f"Reset sandbox funds for user {user_id}")
+                else:
+                    # Create new fund record
+                    store.set_funds(FundsState(
+                        user_id=user_id,
+                        total_capital=starting_capital,
+                        available_balance=starting_capital,
+                        last_reset_date=ist_now(),
+                        reset_count=1
+                    ))
+                    logger.info(f"Created new sandbox funds for user {user_id}")
+
             logger.info(f"Successfully reset all sandbox data for user {user_id}")
 
         except Exception as e:
-            db_session.rollback()
             logger.error(f"Error clearing sandbox data: {str(e)}\n{traceback.format_exc()}")
             raise
 
@@ -328,7 +333,7 @@ def validate_config(config_key, config_value):
         # Validate numeric values
         if config_key in ['starting_capital', 'equity_mis_leverage', 'equity_cnc_leverage',
                           'futures_leverage', 'option_buy_leverage', 'option_sell_leverage',
-                          'order_check_interval', 'mtm_update_interval']:
+                          'order_check_interval', 'mtm_update_interval', 'quote_cache_seconds']:
             try:
                 value = float(config_value)
                 if value < 0:
@@ -355,6 +360,10 @@ def validate_config(config_key, config_value):
                     if value < 0 or value > 60:
                         return 'MTM update interval must be between 0-60 seconds (0 = manual only)'
 
+                if config_key == 'quote_cache_seconds':
+                    if value > 30:
+                        return 'Quote cache must be between 0-30 seconds'
+
             except ValueError:
                 return f'{config_key} must be a valid number'
 
@@ -369,6 +378,11 @@ def validate_config(config_key, config_value):
             except:
                 return 'Time must be in HH:MM format'
 
+        # Validate order execution mode
+        if config_key == 'order_execution_mode':
+            if config_value not in ['poll', 'tick']:
+                return 'Order execution mode must be poll or tick'
+
         # Validate day of week
         if config_key == 'reset_day':
             valid_days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
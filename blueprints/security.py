@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify, render_template, request, flash, redirect, url_for
-from database.traffic_db import IPBan, Error404Tracker, InvalidAPIKeyTracker, logs_session
+from database.traffic_db import IPBan, Error404Tracker, InvalidAPIKeyTracker, logs_session, flush_security_trackers
 from database.settings_db import get_security_settings, set_security_settings
 from utils.session import check_session_validity
 from limiter import limiter
@@ -213,6 +213,8 @@ def clear_404_tracker():
         if not ip_address:
             return jsonify({'error': 'IP address is required'}), 400
 
+        # Write pending counts first so none of them survive the clear
+        flush_security_trackers()
         tracker = Error404Tracker.query.filter_by(ip_address=ip_address).first()
         if tracker:
             logs_session.delete(tracker)
@@ -233,6 +235,8 @@ def clear_404_tracker():
 def security_stats():
     """Get security statistics"""
     try:
+        flush_security_trackers()
+
         # Count banned IPs
         total_bans = IPBan.query.count()
         permanent_bans = IPBan.query.filter_by(is_permanent=True).count()
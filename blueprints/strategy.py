@@ -11,18 +11,13 @@ from database.auth_db import get_api_key_for_tradingview
 from utils.session import check_session_validity, is_session_valid
 from limiter import limiter
 import json
-from datetime import datetime, time
+from datetime import datetime
 import pytz
 from apscheduler.schedulers.background import BackgroundScheduler
 from utils.logging import get_logger
-import requests
+from services.webhook_dispatch_service import get_webhook_dispatcher
 import os
 import uuid
-import time as time_module
-import queue
-import threading
-from collections import deque
-from time import time
 import re
 
 logger = get_logger(__name__)
@@ -44,9 +39,6 @@ scheduler = BackgroundScheduler(
 )
 scheduler.start()
 
-# Get base URL from environment or default to localhost
-BASE_URL = os.getenv('HOST_SERVER', 'http://127.0.0.1:5000')
-
 # Valid exchanges
 VALID_EXCHANGES = ['NSE', 'BSE', 'NFO', 'CDS', 'BFO', 'BCD', 'MCX', 'NCDEX']
 
@@ -66,94 +58,9 @@ EXCHANGE_PRODUCTS = {
 DEFAULT_EXCHANGE = 'NSE'
 DEFAULT_PRODUCT = 'MIS'
 
-# Separate queues for different order types
-regular_order_queue = queue.Queue()  # For placeorder (up to 10/sec)
-smart_order_queue = queue.Queue()    # For placesmartorder (1/sec)
-
-# Order processor state
-order_processor_running = False
-order_processor_lock = threading.Lock()
-
-# Rate limiting state for regular orders
-last_regular_orders = deque(maxlen=10)  # Track last 10 regular order timestamps
-
-def process_orders():
-    """Background task to process orders from both queues with rate limiting"""
-    global order_processor_running
-    
-    while True:
-        try:
-            # Process smart orders first (1 per second)
-            try:
-                smart_order = smart_order_queue.get_nowait()
-                if smart_order is None:  # Poison pill
-                    break
-                
-                try:
-                    response = requests.post(f'{BASE_URL}/api/v1/placesmartorder', json=smart_order['payload'])
-                    if response.ok:
-                        logger.info(f'Smart order placed for {smart_order["payload"]["symbol"]} in strategy {smart_order["payload"]["strategy"]}')
-                    else:
-                        logger.error(f'Error placing smart order for {smart_order["payload"]["symbol"]}: {response.text}')
-                except Exception as e:
-                    logger.error(f'Error placing smart order: {str(e)}')
-                
-                # Always wait 1 second after smart order
-                time_module.sleep(1)
-                continue  # Start next iteration
-                
-            except queue.Empty:
-                pass  # No smart orders, continue to regular orders
-            
-            # Process regular orders (up to 10 per second)
-            now = time()
-            
-            # Clean up old timestamps
-            while last_regular_orders and now - last_regular_orders[0] > 1:
-                last_regular_orders.popleft()
-            
-            # Process regular orders if under rate limit
-            if len(last_regular_orders) < 10:
-                try:
-                    regular_order = regular_order_queue.get_nowait()
-                    if regular_order is None:  # Poison pill
-                        break
-                    
-                    try:
-                        response = requests.post(f'{BASE_URL}/api/v1/placeorder', json=regular_order['payload'])
-                        if response.ok:
-                            logger.info(f'Regular order placed for {regular_order["payload"]["symbol"]} in strategy {regular_order["payload"]["strategy"]}')
-                            last_regular_orders.append(now)
-                        else:
-                            logger.error(f'Error placing regular order for {regular_order["payload"]["symbol"]}: {response.text}')
-                    except Exception as e:
-                        logger.error(f'Error placing regular order: {str(e)}')
-                    
-                except queue.Empty:
-                    pass  # No regular orders
-            
-            # Small sleep to prevent CPU spinning
-            time_module.sleep(0.1)
-            
-        except Exception as e:
-            logger.error(f'Error in order processor: {str(e)}')
-            time_module.sleep(1)  # Sleep on error to prevent rapid retries
-
-def ensure_order_processor():
-    """Ensure the order processor is running"""
-    global order_processor_running
-    with order_processor_lock:
-        if not order_processor_running:
-            threading.Thread(target=process_orders, daemon=True).start()
-            order_processor_running = True
-
 def queue_order(endpoint, payload):
-    """Add order to appropriate queue"""
-    ensure_order_processor()
-    if endpoint == 'placesmartorder':
-        smart_order_queue.put({'payload': payload})
-    else:
-        regular_order_queue.put({'payload': payload})
+    """Queue order for rate limited, in-process placement"""
+    get_webhook_dispatcher().submit(endpoint, payload, source='strategy')
 
 def validate_strategy_times(start_time, end_time, squareoff_time):
     """Validate strategy time settings"""
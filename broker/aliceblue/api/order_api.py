@@ -8,6 +8,8 @@ from database.token_db import get_br_symbol, get_oa_symbol
 from broker.aliceblue.mapping.transform_data import transform_data , map_product_type, reverse_map_product_type, transform_modify_order_data
 from utils.config import get_broker_api_key , get_broker_api_secret
 from utils.logging import get_logger
+from utils.order_state import get_cached_book
+from utils.order_batch import cancel_orders, close_positions, close_positions_failed
 
 logger = get_logger(__name__)
 
@@ -90,7 +92,7 @@ def get_open_position(tradingsymbol, exchange, product,auth):
     tradingsymbol = get_br_symbol(tradingsymbol,exchange)
 
 
-    position_data = get_positions(auth)
+    position_data = get_cached_book('positions', get_positions, auth)
 
     if isinstance(position_data, dict):
         if position_data['stat'] == 'Not_Ok' :
@@ -284,6 +286,7 @@ def close_all_positions(current_api_key,auth):
 
 
     if positions_response:
+        exit_orders = []
         # Loop through each position to close
         for position in positions_response:
             # Skip if net quantity is zero
@@ -310,12 +313,13 @@ def close_all_positions(current_api_key,auth):
 
             logger.info(f"{place_order_payload}")
 
-            # Place the order to close the position
-            _, api_response, _ =   place_order_api(place_order_payload,AUTH_TOKEN)
+            # Queue the order to close the position
+            exit_orders.append(place_order_payload)
 
-            logger.info(f"{api_response}")
-            
-            # Note: Ensure place_order_api handles any errors and logs accordingly
+        # Square off concurrently, within the broker's order limits
+        report = close_positions('aliceblue', exit_orders, lambda payload: place_order_api(payload, AUTH_TOKEN))
+        if report.failed:
+            return close_positions_failed(report)
 
     return {'status': 'success', "message": "All Open Positions SquaredOff"}, 200
 
@@ -429,16 +433,10 @@ def cancel_all_orders_api(data,auth):
     orders_to_cancel = [order for order in order_book_response
                         if order['Status'] in ['open', 'trigger pending']]
     logger.info(f"{orders_to_cancel}")
-    canceled_orders = []
-    failed_cancellations = []
-
-    # Cancel the filtered orders
-    for order in orders_to_cancel:
-        orderid = order['Nstordno']
-        cancel_response, status_code = cancel_order(orderid,AUTH_TOKEN)
-        if status_code == 200:
-            canceled_orders.append(orderid)
-        else:
-            failed_cancellations.append(orderid)
+
+    # Cancel the filtered orders concurrently, within the broker's order limits
+    canceled_orders, failed_cancellations = cancel_orders(
+        'aliceblue', [order['Nstordno'] for order in orders_to_cancel],
+        lambda orderid: cancel_order(orderid, AUTH_TOKEN))
     
     return canceled_orders, failed_cancellations
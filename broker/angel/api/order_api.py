@@ -6,6 +6,8 @@ from database.token_db import get_token , get_br_symbol, get_symbol
 from broker.angel.mapping.transform_data import transform_data , map_product_type, reverse_map_product_type, transform_modify_order_data
 from utils.httpx_client import get_httpx_client
 from utils.logging import get_logger
+from utils.order_state import get_cached_book
+from utils.order_batch import cancel_orders, close_positions, close_positions_failed
 
 logger = get_logger(__name__)
 
@@ -66,7 +68,7 @@ def get_holdings(auth):
 def get_open_position(tradingsymbol, exchange, producttype,auth):
     #Convert Trading Symbol from OpenAlgo Format to Broker Format Before Search in OpenPosition
     tradingsymbol = get_br_symbol(tradingsymbol,exchange)
-    positions_data = get_positions(auth)
+    positions_data = get_cached_book('positions', get_positions, auth)
 
     logger.debug(f"{positions_data}")
 
@@ -237,6 +239,7 @@ def close_all_positions(current_api_key,auth):
         return {"message": "No Open Positions Found"}, 200
 
     if positions_response['status']:
+        exit_orders = []
         # Loop through each position to close
         for position in positions_response['data']:
             # Skip if net quantity is zero
@@ -266,16 +269,13 @@ def close_all_positions(current_api_key,auth):
 
             logger.info(f"{place_order_payload}")
 
-            # Place the order to close the position
-            res, response, orderid =   place_order_api(place_order_payload,auth)
+            # Queue the order to close the position
+            exit_orders.append(place_order_payload)
 
-            # logger.info(f"{res}")
-            # logger.info(f"{response}")
-            # logger.info(f"{orderid}")
-
-
-            
-            # Note: Ensure place_order_api handles any errors and logs accordingly
+        # Square off concurrently, within the broker's order limits
+        report = close_positions('angel', exit_orders, lambda payload: place_order_api(payload, auth))
+        if report.failed:
+            return close_positions_failed(report)
 
     return {'status': 'success', "message": "All Open Positions SquaredOff"}, 200
 
@@ -388,16 +388,10 @@ def cancel_all_orders_api(data,auth):
     orders_to_cancel = [order for order in order_book_response.get('data', [])
                         if order['status'] in ['open', 'trigger pending']]
     #logger.info(f"{orders_to_cancel}")
-    canceled_orders = []
-    failed_cancellations = []
-
-    # Cancel the filtered orders
-    for order in orders_to_cancel:
-        orderid = order['orderid']
-        cancel_response, status_code = cancel_order(orderid,auth)
-        if status_code == 200:
-            canceled_orders.append(orderid)
-        else:
-            failed_cancellations.append(orderid)
+
+    # Cancel the filtered orders concurrently, within the broker's order limits
+    canceled_orders, failed_cancellations = cancel_orders(
+        'angel', [order['orderid'] for order in orders_to_cancel],
+        lambda orderid: cancel_order(orderid, auth))
     
     return canceled_orders, failed_cancellations
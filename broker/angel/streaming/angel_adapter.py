@@ -21,6 +21,10 @@ from .angel_mapping import AngelExchangeMapper, AngelCapabilityRegistry
 class AngelWebSocketAdapter(BaseBrokerWebSocketAdapter):
     """Angel-specific implementation of the WebSocket adapter"""
     
+    # SmartAPI allows 1000 tokens per session, so one frame never needs more
+    max_instruments_per_session = 1000
+    max_instruments_per_frame = max_instruments_per_session
+    
     def __init__(self):
         super().__init__()
         self.logger = logging.getLogger("angel_websocket")
@@ -188,6 +192,8 @@ class AngelWebSocketAdapter(BaseBrokerWebSocketAdapter):
         
         # Store subscription for reconnection
         with self.lock:
+            if correlation_id not in self.subscriptions and len(self.subscriptions) >= self.max_instruments_per_session:
+                return self._session_limit_response()
             self.subscriptions[correlation_id] = {
                 'symbol': symbol,
                 'exchange': exchange,
@@ -219,6 +225,121 @@ class AngelWebSocketAdapter(BaseBrokerWebSocketAdapter):
             is_fallback=is_fallback
         )
     
+    def subscribe_bulk(self, instruments: List[tuple], mode: int = 2, depth_level: int = 5) -> List[Dict[str, Any]]:
+        """
+        Subscribe to many instruments with bulk token resolution, sending the
+        tokens grouped by exchange type in frames of max_instruments_per_frame
+        
+        Args:
+            instruments: (symbol, exchange) pairs
+            mode: Subscription mode - 1:LTP, 2:Quote, 3:Snap Quote (Depth)
+            depth_level: Market depth level (5, 20, 30)
+            
+        Returns:
+            List[Dict]: One response per instrument
+        """
+        if mode not in [1, 2, 3]:
+            return [self._create_error_response("INVALID_MODE",
+                                                f"Invalid mode {mode}. Must be 1 (LTP), 2 (Quote), or 3 (Depth)")] * len(instruments)
+        if mode == 3 and depth_level not in [5]:
+            return [self._create_error_response("INVALID_DEPTH",
+                                                f"Invalid depth level {depth_level}. Must be 5")] * len(instruments)
+        
+        responses = []
+        tokens = []
+        with self.lock:
+            capacity = self.max_instruments_per_session - len(self.subscriptions)
+            
+            for (symbol, exchange), token_info in zip(instruments, self.resolve_instruments(instruments)):
+                if not token_info:
+                    responses.append(self._create_error_response(
+                        "SYMBOL_NOT_FOUND", f"Symbol {symbol} not found for exchange {exchange}"))
+                    continue
+                
+                correlation_id = f"{symbol}_{exchange}_{mode}"
+                if correlation_id not in self.subscriptions:
+                    if capacity <= 0:
+                        responses.append(self._session_limit_response())
+                        continue
+                    capacity -= 1
+                
+                actual_depth = depth_level
+                is_fallback = False
+                if mode == 3 and not AngelCapabilityRegistry.is_depth_level_supported(exchange, depth_level):
+                    actual_depth = AngelCapabilityRegistry.get_fallback_depth_level(exchange, depth_level)
+                    is_fallback = True
+                
+                exchange_type = AngelExchangeMapper.get_exchange_type(token_info['brexchange'])
+                self.subscriptions[correlation_id] = {
+                    'symbol': symbol,
+                    'exchange': exchange,
+                    'brexchange': token_info['brexchange'],
+                    'token': token_info['token'],
+                    'mode': mode,
+                    'depth_level': depth_level,
+                    'actual_depth': actual_depth,
+                    'token_list': [{"exchangeType": exchange_type, "tokens": [token_info['token']]}],
+                    'is_fallback': is_fallback
+                }
+                tokens.append((exchange_type, token_info['token']))
+                responses.append(self._create_success_response(
+                    'Subscription requested', symbol=symbol, exchange=exchange, mode=mode,
+                    requested_depth=depth_level, actual_depth=actual_depth, is_fallback=is_fallback
+                ))
+        
+        if self.connected and self.ws_client:
+            try:
+                self._send_subscribe_frames(mode, tokens)
+            except Exception as e:
+                self.logger.error(f"Error bulk subscribing {len(tokens)} tokens: {e}")
+                return [self._create_error_response("SUBSCRIPTION_ERROR", str(e))] * len(instruments)
+        
+        return responses
+    
+    def _send_subscribe_frames(self, mode: int, tokens: List[tuple]) -> None:
+        """Subscribe (exchange_type, token) pairs in frames of max_instruments_per_frame tokens"""
+        for number, frame in enumerate(self.iter_frames(tokens)):
+            self.ws_client.subscribe(f"bulk_{mode}_{number}", mode, self._build_token_list(frame))
+    
+    def _session_limit_response(self) -> Dict[str, Any]:
+        return self._create_error_response(
+            "SESSION_LIMIT", f"Angel allows {self.max_instruments_per_session} subscriptions per session")
+    
+    def unsubscribe_bulk(self, instruments: List[tuple], mode: int = 2) -> List[Dict[str, Any]]:
+        """Unsubscribe from many instruments in frames of max_instruments_per_frame tokens"""
+        responses = []
+        tokens = []
+        with self.lock:
+            for symbol, exchange in instruments:
+                subscription = self.subscriptions.pop(f"{symbol}_{exchange}_{mode}", None)
+                if subscription is None:
+                    responses.append(self._create_error_response(
+                        "NOT_SUBSCRIBED", f"Not subscribed to {symbol}.{exchange}"))
+                    continue
+                
+                exchange_type = AngelExchangeMapper.get_exchange_type(subscription['brexchange'])
+                tokens.append((exchange_type, subscription['token']))
+                responses.append(self._create_success_response(
+                    f"Unsubscribed from {symbol}.{exchange}", symbol=symbol, exchange=exchange, mode=mode))
+        
+        if self.connected and self.ws_client:
+            for number, frame in enumerate(self.iter_frames(tokens)):
+                try:
+                    self.ws_client.unsubscribe(f"bulk_{mode}_{number}", mode, self._build_token_list(frame))
+                except Exception as e:
+                    self.logger.error(f"Error bulk unsubscribing {len(frame)} tokens: {e}")
+                    return [self._create_error_response("UNSUBSCRIPTION_ERROR", str(e))] * len(instruments)
+        
+        return responses
+    
+    @staticmethod
+    def _build_token_list(tokens: List[tuple]) -> List[Dict[str, Any]]:
+        """Group (exchange_type, token) pairs into Angel's tokenList format"""
+        grouped = {}
+        for exchange_type, token in tokens:
+            grouped.setdefault(exchange_type, []).append(token)
+        return [{"exchangeType": exchange_type, "tokens": group} for exchange_type, group in grouped.items()]
+    
     def unsubscribe(self, symbol: str, exchange: str, mode: int = 2) -> Dict[str, Any]:
         """
         Unsubscribe from market data
@@ -274,14 +395,19 @@ class AngelWebSocketAdapter(BaseBrokerWebSocketAdapter):
         self.logger.info("Connected to Angel WebSocket")
         self.connected = True
         
-        # Resubscribe to existing subscriptions if reconnecting
+        # Resubscribe to existing subscriptions if reconnecting, in the frames subscribe_bulk sends
+        tokens_by_mode = {}
         with self.lock:
-            for correlation_id, sub in self.subscriptions.items():
-                try:
-                    self.ws_client.subscribe(correlation_id, sub["mode"], sub["token_list"])
-                    self.logger.info(f"Resubscribed to {sub['symbol']}.{sub['exchange']}")
-                except Exception as e:
-                    self.logger.error(f"Error resubscribing to {sub['symbol']}.{sub['exchange']}: {e}")
+            for sub in self.subscriptions.values():
+                exchange_type = AngelExchangeMapper.get_exchange_type(sub['brexchange'])
+                tokens_by_mode.setdefault(sub['mode'], []).append((exchange_type, sub['token']))
+        
+        for mode, tokens in tokens_by_mode.items():
+            try:
+                self._send_subscribe_frames(mode, tokens)
+                self.logger.info(f"Resubscribed to {len(tokens)} instruments in mode {mode}")
+            except Exception as e:
+                self.logger.error(f"Error resubscribing {len(tokens)} instruments in mode {mode}: {e}")
     
     def _on_error(self, wsapp, error) -> None:
         """Callback for WebSocket errors"""
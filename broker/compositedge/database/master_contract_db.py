@@ -18,6 +18,7 @@ from database.auth_db import get_auth_token
 from extensions import socketio  # Import SocketIO
 from utils.httpx_client import get_httpx_client
 from broker.compositedge.baseurl import MARKET_DATA_URL
+from database.master_contract_utils import copy_symtokens
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -58,27 +59,7 @@ def delete_symtoken_table():
     db_session.commit()
 
 def copy_from_dataframe(df):
-    logger.info("Performing Bulk Insert")
-    # Convert DataFrame to a list of dictionaries
-    data_dict = df.to_dict(orient='records')
-
-    # Retrieve existing tokens to filter them out from the insert
-    existing_tokens = {result.token for result in db_session.query(SymToken.token).all()}
-
-    # Filter out data_dict entries with tokens that already exist
-    filtered_data_dict = [row for row in data_dict if row['token'] not in existing_tokens]
-
-    # Insert in bulk the filtered records
-    try:
-        if filtered_data_dict:  # Proceed only if there's anything to insert
-            db_session.bulk_insert_mappings(SymToken, filtered_data_dict)
-            db_session.commit()
-            logger.info(f"Bulk insert completed successfully with {len(filtered_data_dict)} new records.")
-        else:
-            logger.info("No new records to insert.")
-    except Exception as e:
-        logger.error(f"Error during bulk insert: {e}")
-        db_session.rollback()
+    copy_symtokens(db_session, SymToken, df)
 
 def download_csv_compositedge_data(output_path):
     logger.info("Downloading Master Contract CSV Files")
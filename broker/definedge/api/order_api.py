@@ -6,6 +6,8 @@ from database.token_db import get_token, get_br_symbol, get_oa_symbol
 from broker.definedge.mapping.transform_data import transform_data, map_product_type, reverse_map_product_type, transform_modify_order_data
 from utils.httpx_client import get_httpx_client
 from utils.logging import get_logger
+from utils.order_state import get_cached_book
+from utils.order_batch import cancel_orders, close_positions
 
 logger = get_logger(__name__)
 
@@ -75,7 +77,7 @@ def get_open_position(tradingsymbol, exchange, product, auth):
     logger.info(f"=== GET OPEN POSITION ===")
     logger.info(f"Looking for: Symbol={tradingsymbol}, Exchange={exchange}, Product={product}")
     
-    positions_data = get_positions(auth)
+    positions_data = get_cached_book('positions', get_positions, auth)
     logger.info(f"Raw positions response: {positions_data}")
     
     net_qty = '0'
@@ -384,6 +386,7 @@ def close_all_positions(current_api_key, auth):
     # Track results
     closed_positions = []
     failed_positions = []
+    exit_orders = []
     
     # Loop through each position to close
     for position in positions_to_close:
@@ -426,22 +429,8 @@ def close_all_positions(current_api_key, auth):
             
             logger.info(f"Square-off order payload: {place_order_payload}")
             
-            # Place the order to close the position
-            res, response, orderid = place_order_api(place_order_payload, auth)
-            
-            if orderid:
-                closed_positions.append({
-                    'symbol': tradingsymbol,
-                    'quantity': quantity,
-                    'orderid': orderid
-                })
-                logger.info(f"✓ Successfully placed square-off order for {tradingsymbol}, Order ID: {orderid}")
-            else:
-                failed_positions.append({
-                    'symbol': tradingsymbol,
-                    'error': response.get('message', 'Unknown error')
-                })
-                logger.error(f"✗ Failed to square-off {tradingsymbol}: {response}")
+            # Queue the order to close the position
+            exit_orders.append((tradingsymbol, quantity, place_order_payload))
                 
         except Exception as e:
             logger.error(f"Exception while closing position {position}: {str(e)}")
@@ -450,6 +439,25 @@ def close_all_positions(current_api_key, auth):
                 'error': str(e)
             })
     
+    # Square off concurrently, within the broker's order limits
+    report = close_positions('definedge', [payload for _, _, payload in exit_orders],
+                             lambda payload: place_order_api(payload, auth))
+    for (tradingsymbol, quantity, _), result in zip(exit_orders, report.results):
+        if result['status'] == 'success':
+            closed_positions.append({
+                'symbol': tradingsymbol,
+                'quantity': quantity,
+                'orderid': result['response'][2]
+            })
+        elif 'response' in result:
+            response = result['response'][1]
+            failed_positions.append({
+                'symbol': tradingsymbol,
+                'error': response.get('message', 'Unknown error') if isinstance(response, dict) else str(response)
+            })
+        else:
+            failed_positions.append({'symbol': tradingsymbol, 'error': result['error']})
+    
     # Log summary
     logger.info("=== CLOSE ALL POSITIONS SUMMARY ===")
     logger.info(f"Positions closed: {len(closed_positions)}")
@@ -639,30 +647,18 @@ def cancel_all_orders_api(data, auth):
     if orders_to_cancel:
         logger.debug(f"Orders to cancel: {[order.get('order_id') or order.get('norenordno') or order.get('orderid') for order in orders_to_cancel]}")
     
-    canceled_orders = []
-    failed_cancellations = []
-
-    # Cancel the filtered orders
+    # Try different field names for order ID
+    orderids = []
     for order in orders_to_cancel:
-        # Try different field names for order ID
         orderid = order.get('order_id') or order.get('norenordno') or order.get('orderid')
-        
         if orderid:
-            logger.info(f"Attempting to cancel order: {orderid}")
-            try:
-                cancel_response, status_code = cancel_order(orderid, auth)
-                
-                if status_code == 200:
-                    canceled_orders.append(orderid)
-                    logger.info(f"✓ Successfully cancelled order: {orderid}")
-                else:
-                    failed_cancellations.append(orderid)
-                    logger.error(f"✗ Failed to cancel order: {orderid}, Response: {cancel_response}")
-            except Exception as e:
-                failed_cancellations.append(orderid)
-                logger.error(f"✗ Exception while cancelling order {orderid}: {str(e)}")
+            orderids.append(orderid)
         else:
             logger.warning(f"Order missing ID field: {order}")
+
+    # Cancel the filtered orders concurrently, within the broker's order limits
+    canceled_orders, failed_cancellations = cancel_orders(
+        'definedge', orderids, lambda orderid: cancel_order(orderid, auth))
     
     # Log summary
     logger.info(f"=== CANCEL ALL ORDERS SUMMARY ===")
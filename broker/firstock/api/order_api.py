@@ -4,6 +4,8 @@ from database.auth_db import get_auth_token
 from database.token_db import get_token, get_br_symbol, get_symbol
 from broker.firstock.mapping.transform_data import transform_data, map_product_type, reverse_map_product_type, transform_modify_order_data
 from utils.logging import get_logger
+from utils.order_state import get_cached_book
+from utils.order_batch import cancel_orders, close_positions
 from utils.httpx_client import get_httpx_client
 
 # Initialize logger
@@ -133,7 +135,7 @@ def get_open_position(tradingsymbol, exchange, producttype, auth):
     # Convert product type to Firstock format
     producttype = map_product_type(producttype)
     
-    positions_data = get_positions(auth)
+    positions_data = get_cached_book('positions', get_positions, auth)
     net_qty = '0'
     
     if positions_data.get('status') == 'success':
@@ -324,6 +326,7 @@ def close_all_positions(current_api_key, auth):
         positions = [positions]
 
     # Loop through each position to close
+    exit_orders = []
     for position in positions:
         try:
             net_qty = position.get('netQuantity', '0')
@@ -356,20 +359,24 @@ def close_all_positions(current_api_key, auth):
                 "disclosed_quantity": "0"
             }
 
-            # Place the order to close the position
-            res, response, orderid = place_order_api(place_order_payload, auth)
-            
-            if response and response.get('status') == 'success':
-                positions_closed += 1
-            else:
-                positions_failed += 1
-                error_msg = response.get('error', {}).get('message') if response else 'Unknown error'
-                error_messages.append(f"Failed to close position for {symbol}: {error_msg}")
+            # Queue the order to close the position
+            exit_orders.append(place_order_payload)
 
         except Exception as e:
             positions_failed += 1
             error_messages.append(f"Error processing position: {str(e)}")
 
+    # Square off concurrently, within the broker's order limits
+    report = close_positions('firstock', exit_orders, lambda payload: place_order_api(payload, auth))
+    for result in report.results:
+        response = result.get('response', (None, None, None))[1]
+        if response and response.get('status') == 'success':
+            positions_closed += 1
+        else:
+            positions_failed += 1
+            error_msg = response.get('error', {}).get('message') if response else result.get('error', 'Unknown error')
+            error_messages.append(f"Failed to close position for {result['key']}: {error_msg}")
+
     # Prepare response message
     response = {
         "status": "success" if positions_failed == 0 else "partial",
@@ -549,17 +556,11 @@ def cancel_all_orders_api(data,auth):
     orders_to_cancel = [order for order in order_book_response.get('data', [])
                         if order['status'] in ['OPEN', 'TRIGGER_PENDING']]
     #logger.info(f"{orders_to_cancel}")
-    canceled_orders = []
-    failed_cancellations = []
-
-    # Cancel the filtered orders
-    for order in orders_to_cancel:
-        orderid = order['orderNumber']
-        cancel_response, status_code = cancel_order(orderid,auth)
-        if status_code == 200:
-            canceled_orders.append(orderid)
-        else:
-            failed_cancellations.append(orderid)
+
+    # Cancel the filtered orders concurrently, within the broker's order limits
+    canceled_orders, failed_cancellations = cancel_orders(
+        'firstock', [order['orderNumber'] for order in orders_to_cancel],
+        lambda orderid: cancel_order(orderid, auth))
     
     return canceled_orders, failed_cancellations
 
@@ -5,6 +5,7 @@ from sqlalchemy import create_engine, Column, Integer, String, Float, Sequence,
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from extensions import socketio
+from database.master_contract_utils import copy_symtokens
 from utils.logging import get_logger
 from utils.httpx_client import get_httpx_client
 
@@ -46,21 +47,7 @@ def delete_symtoken_table():
     db_session.commit()
 
 def copy_from_dataframe(df):
-    logger.info("Performing Bulk Insert")
-    data_dict = df.to_dict(orient='records')
-    existing_tokens = {result.token for result in db_session.query(SymToken.token).all()}
-    filtered_data_dict = [row for row in data_dict if row['token'] not in existing_tokens]
-
-    try:
-        if filtered_data_dict:
-            db_session.bulk_insert_mappings(SymToken, filtered_data_dict)
-            db_session.commit()
-            logger.info(f"Bulk insert completed successfully with {len(filtered_data_dict)} new records.")
-        else:
-            logger.info("No new records to insert.")
-    except Exception as e:
-        logger.error(f"Error during bulk insert: {e}")
-        db_session.rollback()
+    copy_symtokens(db_session, SymToken, df)
 
 # Firstock URLs for downloading symbol files
 firstock_urls = {
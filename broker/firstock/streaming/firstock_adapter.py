@@ -18,6 +18,7 @@ load_dotenv()
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../../'))
 
 from websocket_proxy.base_adapter import BaseBrokerWebSocketAdapter
+from utils.order_state import get_order_state, notify_order_update
 from websocket_proxy.mapping import SymbolMapper
 from .firstock_mapping import FirstockExchangeMapper
 from .firstock_websocket import FirstockWebSocket
@@ -433,6 +434,8 @@ class FirstockWebSocketAdapter(BaseBrokerWebSocketAdapter):
         """Callback when connection is closed"""
         self.logger.info("Firstock WebSocket connection closed")
         self.connected = False
+        # Order updates stop with the connection, cached books fall back to the short window
+        get_order_state().set_order_stream('firstock', self.auth_token, False)
     
     def _on_message(self, ws, message) -> None:
         """Callback for text messages from the WebSocket"""
@@ -712,10 +715,11 @@ class FirstockWebSocketAdapter(BaseBrokerWebSocketAdapter):
     
     def _process_order_update(self, data: Dict[str, Any]) -> None:
         """Process order update from Firstock"""
-        # This can be implemented if order updates via WebSocket are needed
         self.logger.debug(f"Received order update: {data}")
+        # The next orderbook/orderstatus/smart order read fetches the new state
+        notify_order_update('firstock', self.auth_token)
     
     def _process_position_update(self, data: Dict[str, Any]) -> None:
         """Process position update from Firstock"""
-        # This can be implemented if position updates via WebSocket are needed
-        self.logger.debug(f"Received position update: {data}")
\ No newline at end of file
+        self.logger.debug(f"Received position update: {data}")
+        notify_order_update('firstock', self.auth_token)
\ No newline at end of file
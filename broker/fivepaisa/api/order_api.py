@@ -8,6 +8,8 @@ from database.token_db import get_token, get_br_symbol, get_symbol, get_oa_symbo
 from broker.fivepaisa.mapping.transform_data import transform_data, map_product_type, reverse_map_product_type, transform_modify_order_data
 from broker.fivepaisa.mapping.transform_data import map_exchange, map_exchange_type, reverse_map_exchange
 from utils.logging import get_logger
+from utils.order_state import get_cached_book
+from utils.order_batch import cancel_orders, close_positions, close_positions_failed
 
 logger = get_logger(__name__)
 
@@ -189,7 +191,7 @@ def get_open_position(tradingsymbol: str, exchange: str, Exch: str, ExchType: st
         # Convert Trading Symbol from OpenAlgo Format to Broker Format Before Search in OpenPosition
         token = int(get_token(tradingsymbol, exchange))  # Convert token to integer
         tradingsymbol = get_br_symbol(tradingsymbol, exchange)
-        positions_data = get_positions(auth)
+        positions_data = get_cached_book('positions', get_positions, auth)
         
         logger.debug("Token : ", token)
         logger.debug("Product Type : ", producttype)
@@ -377,6 +379,7 @@ def close_all_positions(current_api_key: str, auth: str) -> Dict[str, Any]:
         return {"message": "No Open Positions Found"}, 200
 
     if positions_response['body']['NetPositionDetail']:
+        exit_orders = []
         # Loop through each position to close
         for position in positions_response['body']['NetPositionDetail']:
             # Skip if net quantity is zero
@@ -406,16 +409,13 @@ def close_all_positions(current_api_key: str, auth: str) -> Dict[str, Any]:
 
             logger.info(f"{place_order_payload}")
 
-            # Place the order to close the position
-            res, response, orderid =   place_order_api(place_order_payload,auth)
+            # Queue the order to close the position
+            exit_orders.append(place_order_payload)
 
-            # logger.info(f"{res}")
-            # logger.info(f"{response}")
-            # logger.info(f"{orderid}")
-
-
-            
-            # Note: Ensure place_order_api handles any errors and logs accordingly
+        # Square off concurrently, within the broker's order limits
+        report = close_positions('fivepaisa', exit_orders, lambda payload: place_order_api(payload, auth))
+        if report.failed:
+            return close_positions_failed(report)
 
     return {'status': 'success', "message": "All Open Positions SquaredOff"}, 200
 
@@ -612,24 +612,10 @@ def cancel_all_orders_api(data: Dict[str, Any], auth: str) -> Dict[str, Any]:
             if order['OrderStatus'] in ['Pending', 'Modified']
         ]
         
-        canceled_orders = []
-        failed_cancellations = []
-
-        # Cancel each filtered order using shared client
-        for order in orders_to_cancel:
-            try:
-                orderid = order['BrokerOrderId']
-                cancel_response, status_code = cancel_order(orderid, auth)
-                
-                if status_code == 200:
-                    canceled_orders.append(orderid)
-                else:
-                    failed_cancellations.append(orderid)
-                    logger.info(f"Failed to cancel order {orderid}: {cancel_response.get('message')}")
-                    
-            except Exception as e:
-                logger.info(f"Error cancelling order {order['BrokerOrderId']}: {e}")
-                failed_cancellations.append(order['BrokerOrderId'])
+        # Cancel the filtered orders concurrently, within the broker's order limits
+        canceled_orders, failed_cancellations = cancel_orders(
+            'fivepaisa', [order['BrokerOrderId'] for order in orders_to_cancel],
+            lambda orderid: cancel_order(orderid, auth))
         
         return canceled_orders, failed_cancellations
         
@@ -5,6 +5,8 @@ from database.token_db import get_br_symbol, get_oa_symbol
 from broker.fyers.mapping.transform_data import transform_data, map_product_type, reverse_map_product_type, transform_modify_order_data
 from utils.httpx_client import get_httpx_client
 from utils.logging import get_logger
+from utils.order_state import get_cached_book
+from utils.order_batch import cancel_orders
 
 logger = get_logger(__name__)
 
@@ -85,7 +87,7 @@ def get_open_position(tradingsymbol, exchange, product,auth):
     tradingsymbol = get_br_symbol(tradingsymbol,exchange)
     
 
-    positions_data = get_positions(auth)
+    positions_data = get_cached_book('positions', get_positions, auth)
     net_qty = '0'
 
     if positions_data and positions_data.get('s') and positions_data.get('netPositions'):
@@ -439,22 +441,17 @@ def cancel_all_orders_api(data, auth):
 
     logger.debug(f"Found {len(orders_to_cancel)} open orders to cancel.")
     
-    canceled_orders = []
-    failed_cancellations = []
-
+    orderids = []
     for order in orders_to_cancel:
         orderid = order.get('id')
         if not orderid:
             logger.warning(f"Skipping order with no ID: {order}")
             continue
-            
-        cancel_response, status_code = cancel_order(orderid, AUTH_TOKEN)
-        if status_code == 200:
-            logger.info(f"Successfully canceled order {orderid}.")
-            canceled_orders.append(orderid)
-        else:
-            logger.warning(f"Failed to cancel order {orderid}: {cancel_response.get('message', 'Unknown reason')}")
-            failed_cancellations.append(orderid)
+        orderids.append(orderid)
+
+    # Cancel the filtered orders concurrently, within the broker's order limits
+    canceled_orders, failed_cancellations = cancel_orders(
+        'fyers', orderids, lambda orderid: cancel_order(orderid, AUTH_TOKEN))
     
     return canceled_orders, failed_cancellations
 
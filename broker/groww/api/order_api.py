@@ -23,6 +23,9 @@ from broker.groww.mapping.transform_data import (
     ORDER_STATUS_NEW, ORDER_STATUS_ACKED, ORDER_STATUS_APPROVED, ORDER_STATUS_CANCELLED
 )
 from utils.logging import get_logger
+from utils.order_state import get_cached_book
+from utils.order_batch import OrderTask, close_positions, run_order_batch
+from utils.order_gateway import PRIORITY_CANCEL
 
 logger = get_logger(__name__)
 
@@ -1139,7 +1142,7 @@ def get_open_position(tradingsymbol, exchange, product, auth):
     """
     # Convert Trading Symbol from OpenAlgo Format to Broker Format Before Search
     tradingsymbol = get_br_symbol(tradingsymbol, exchange)
-    positions_data = get_positions(auth)
+    positions_data = get_cached_book('positions', get_positions, auth)
     net_qty = '0'
     
     # Check if we received positions data in expected format
@@ -1784,6 +1787,7 @@ def close_all_positions(token=None, auth=None):
         
         logger.info(f"Total positions to process: {len(positions)}")
         
+        exit_orders = []
         for position in positions:
             try:
                 # Extensive logging of position details
@@ -1842,39 +1846,8 @@ def close_all_positions(token=None, auth=None):
 
                 logger.info(f"Prepared square-off order payload: {json.dumps(place_order_payload, indent=2)}")
                 
-                # Place the order
-                res, api_response, order_id = place_order_api(place_order_payload, auth)
-                logger.info(f"Square-off response: {api_response}, order_id: {order_id}")
-                
-                # Enhanced logging for detailed tracking
-                result_entry = {
-                    'symbol': trading_symbol,
-                    'segment': segment,
-                    'quantity': quantity,
-                    'action': action,
-                    'order_id': order_id,
-                    'response': api_response,
-                    'exchange': exchange,
-                    'product': product
-                }
-                
-                # Handle 400 Bad Request more gracefully
-                if api_response and api_response.get('status') == 'success':
-                    success_count += 1
-                    result_entry['status'] = 'success'
-                    logger.info(f"Successfully closed position {trading_symbol} in {segment} segment")
-                elif api_response and api_response.get('message', '').startswith('API error: 400'):
-                    # Specific handling for 400 Bad Request
-                    logger.error(f"400 Bad Request for {trading_symbol}. Possible symbol mismatch or invalid order parameters.")
-                    failure_count += 1
-                    result_entry['status'] = 'error'
-                    result_entry['error_details'] = 'Invalid order parameters'
-                else:
-                    failure_count += 1
-                    result_entry['status'] = 'failed'
-                    logger.error(f"Failed to close position {trading_symbol} in {segment} segment: {api_response}")
-                
-                detailed_results.append(result_entry)
+                # Queue the order
+                exit_orders.append((segment, place_order_payload))
                     
             except Exception as e:
                 logger.error(f"Error processing position {position}: {str(e)}")
@@ -1886,6 +1859,53 @@ def close_all_positions(token=None, auth=None):
                     'status': 'error',
                     'error_message': str(e)
                 })
+
+        # Square off concurrently, within the broker's order limits
+        report = close_positions('groww', [payload for _, payload in exit_orders],
+                                 lambda payload: place_order_api(payload, auth))
+        for (segment, payload), result in zip(exit_orders, report.results):
+            trading_symbol = payload['symbol']
+            if 'response' not in result:
+                failure_count += 1
+                detailed_results.append({
+                    'symbol': trading_symbol,
+                    'status': 'error',
+                    'error_message': result['error']
+                })
+                continue
+
+            res, api_response, order_id = result['response']
+            logger.info(f"Square-off response: {api_response}, order_id: {order_id}")
+
+            # Enhanced logging for detailed tracking
+            result_entry = {
+                'symbol': trading_symbol,
+                'segment': segment,
+                'quantity': int(payload['quantity']),
+                'action': payload['action'],
+                'order_id': order_id,
+                'response': api_response,
+                'exchange': payload['exchange'],
+                'product': payload['product']
+            }
+
+            # Handle 400 Bad Request more gracefully
+            if api_response and api_response.get('status') == 'success':
+                success_count += 1
+                result_entry['status'] = 'success'
+                logger.info(f"Successfully closed position {trading_symbol} in {segment} segment")
+            elif api_response and api_response.get('message', '').startswith('API error: 400'):
+                # Specific handling for 400 Bad Request
+                logger.error(f"400 Bad Request for {trading_symbol}. Possible symbol mismatch or invalid order parameters.")
+                failure_count += 1
+                result_entry['status'] = 'error'
+                result_entry['error_details'] = 'Invalid order parameters'
+            else:
+                failure_count += 1
+                result_entry['status'] = 'failed'
+                logger.error(f"Failed to close position {trading_symbol} in {segment} segment: {api_response}")
+
+            detailed_results.append(result_entry)
                 
         msg = f"Squared off {success_count} positions. Failed: {failure_count}"
         logger.info(msg)
@@ -2538,99 +2558,115 @@ def cancel_all_orders_api(data, auth):
                 
         logger.info(f"Found {cancellable_count} cancellable orders out of {len(orders)} total orders")
         
-        # Process each order for cancellation
+        # Collect the cancellable orders with their segment
+        to_cancel = []
         for order in orders:
             order_status = order.get('order_status', order.get('status', ''))
             
             if order_status.upper() in [s.upper() for s in cancellable_statuses]:
-                try:
-                    # Get order ID
-                    orderid = None
-                    for key in ['groww_order_id', 'orderid', 'order_id', 'id']:
-                        if key in order:
-                            orderid = order[key]
-                            break
-                    
-                    if not orderid:
-                        logger.warning(f"Could not find order ID in order: {order}")
-                        continue
-                    
-                    # Determine segment for the order
-                    segment = None
-                    if 'segment' in order:
-                        segment_value = order['segment']
-                        if segment_value == 'CASH':
-                            segment = SEGMENT_CASH
-                        elif segment_value in ['FNO', 'F&O', 'OPTIONS', 'FUTURES']:
-                            segment = SEGMENT_FNO
-                        elif segment_value == 'CURRENCY':
-                            segment = SEGMENT_CURRENCY
-                        elif segment_value == 'COMMODITY':
-                            segment = SEGMENT_COMMODITY
-                    
-                    # Use our enhanced cancel_order function which returns (response_data, status_code)
-                    cancel_result = cancel_order(orderid, auth, segment)
-                    
-                    # Make sure the result is properly unpacked
-                    if isinstance(cancel_result, tuple) and len(cancel_result) >= 1:
-                        cancel_response = cancel_result[0]  # Get just the response data
-                    else:
-                        cancel_response = cancel_result  # Direct assignment if not a tuple
-                    
-                    logger.info(f"Cancel response type for order {orderid}: {type(cancel_response).__name__}")
-                    
-                    # Check if response is a dictionary and has status field
-                    if isinstance(cancel_response, dict) and cancel_response.get('status') == 'success':
-                        # Create the result object with order details
-                        cancelled_item = {
-                            'order_id': orderid,
-                            'status': cancel_response.get('order_status', 'CANCELLED'),
-                            'message': cancel_response.get('message', 'Successfully cancelled')
-                        }
-                        
-                        # Get and include symbol in the OpenAlgo format
-                        if 'symbol' in order:
-                            broker_symbol = order.get('symbol', '')
-                            
-                            # For NFO symbols that have spaces, convert to OpenAlgo format
-                            exchange = order.get('exchange', 'NSE')
-                            if exchange == 'NFO' and ' ' in broker_symbol:
-                                try:
-                                    from broker.groww.database.master_contract_db import format_groww_to_openalgo_symbol
-                                    openalgo_symbol = format_groww_to_openalgo_symbol(broker_symbol, exchange)
-                                    if openalgo_symbol:
-                                        cancelled_item['symbol'] = openalgo_symbol
-                                        cancelled_item['brsymbol'] = broker_symbol  # Keep original broker symbol for reference
-                                        logger.info(f"Transformed cancelled order symbol for UI: {broker_symbol} -> {openalgo_symbol}")
-                                except Exception as e:
-                                    logger.error(f"Error converting symbol for cancelled order: {e}")
-                                    cancelled_item['symbol'] = broker_symbol
-                            else:
+                # Get order ID
+                orderid = None
+                for key in ['groww_order_id', 'orderid', 'order_id', 'id']:
+                    if key in order:
+                        orderid = order[key]
+                        break
+                
+                if not orderid:
+                    logger.warning(f"Could not find order ID in order: {order}")
+                    continue
+                
+                # Determine segment for the order
+                segment = None
+                if 'segment' in order:
+                    segment_value = order['segment']
+                    if segment_value == 'CASH':
+                        segment = SEGMENT_CASH
+                    elif segment_value in ['FNO', 'F&O', 'OPTIONS', 'FUTURES']:
+                        segment = SEGMENT_FNO
+                    elif segment_value == 'CURRENCY':
+                        segment = SEGMENT_CURRENCY
+                    elif segment_value == 'COMMODITY':
+                        segment = SEGMENT_COMMODITY
+
+                to_cancel.append((order, orderid, segment))
+
+        def cancel_one(order, orderid, segment):
+            """Cancel one order, returning (cancelled item, None) or (None, failure item)"""
+            try:
+                # Use our enhanced cancel_order function which returns (response_data, status_code)
+                cancel_result = cancel_order(orderid, auth, segment)
+
+                # Make sure the result is properly unpacked
+                if isinstance(cancel_result, tuple) and len(cancel_result) >= 1:
+                    cancel_response = cancel_result[0]  # Get just the response data
+                else:
+                    cancel_response = cancel_result  # Direct assignment if not a tuple
+
+                logger.info(f"Cancel response type for order {orderid}: {type(cancel_response).__name__}")
+
+                # Check if response is a dictionary and has status field
+                if isinstance(cancel_response, dict) and cancel_response.get('status') == 'success':
+                    # Create the result object with order details
+                    cancelled_item = {
+                        'order_id': orderid,
+                        'status': cancel_response.get('order_status', 'CANCELLED'),
+                        'message': cancel_response.get('message', 'Successfully cancelled')
+                    }
+
+                    # Get and include symbol in the OpenAlgo format
+                    if 'symbol' in order:
+                        broker_symbol = order.get('symbol', '')
+
+                        # For NFO symbols that have spaces, convert to OpenAlgo format
+                        exchange = order.get('exchange', 'NSE')
+                        if exchange == 'NFO' and ' ' in broker_symbol:
+                            try:
+                                from broker.groww.database.master_contract_db import format_groww_to_openalgo_symbol
+                                openalgo_symbol = format_groww_to_openalgo_symbol(broker_symbol, exchange)
+                                if openalgo_symbol:
+                                    cancelled_item['symbol'] = openalgo_symbol
+                                    cancelled_item['brsymbol'] = broker_symbol  # Keep original broker symbol for reference
+                                    logger.info(f"Transformed cancelled order symbol for UI: {broker_symbol} -> {openalgo_symbol}")
+                            except Exception as e:
+                                logger.error(f"Error converting symbol for cancelled order: {e}")
                                 cancelled_item['symbol'] = broker_symbol
-                        
-                        # Get symbol from cancel_response if available
-                        elif 'symbol' in cancel_response:
-                            cancelled_item['symbol'] = cancel_response['symbol']
-                            if 'brsymbol' in cancel_response:
-                                cancelled_item['brsymbol'] = cancel_response['brsymbol']
-                                
-                        cancelled_orders.append(cancelled_item)
-                        logger.info(f"Successfully cancelled order {orderid}")
-                    else:
-                        failed_to_cancel.append({
-                            'order_id': orderid,
-                            'message': cancel_response.get('message', 'Failed to cancel'),
-                            'details': str(cancel_response)
-                        })
-                        logger.warning(f"Failed to cancel order {orderid}")
-                        
-                except Exception as e:
-                    logger.error(f"Error cancelling order {orderid if orderid else 'Unknown'}: {e}")
-                    failed_to_cancel.append({
-                        'order_id': orderid if orderid else 'Unknown',
-                        'message': 'Failed to cancel due to exception',
-                        'details': str(e)
-                    })
+                        else:
+                            cancelled_item['symbol'] = broker_symbol
+
+                    # Get symbol from cancel_response if available
+                    elif 'symbol' in cancel_response:
+                        cancelled_item['symbol'] = cancel_response['symbol']
+                        if 'brsymbol' in cancel_response:
+                            cancelled_item['brsymbol'] = cancel_response['brsymbol']
+
+                    logger.info(f"Successfully cancelled order {orderid}")
+                    return cancelled_item, None
+                else:
+                    logger.warning(f"Failed to cancel order {orderid}")
+                    return None, {
+                        'order_id': orderid,
+                        'message': cancel_response.get('message', 'Failed to cancel'),
+                        'details': str(cancel_response)
+                    }
+
+            except Exception as e:
+                logger.error(f"Error cancelling order {orderid if orderid else 'Unknown'}: {e}")
+                return None, {
+                    'order_id': orderid if orderid else 'Unknown',
+                    'message': 'Failed to cancel due to exception',
+                    'details': str(e)
+                }
+
+        # Cancel concurrently, within the broker's order limits
+        report = run_order_batch('groww', 'cancel_all', [
+            OrderTask(orderid, lambda args=(order, orderid, segment): cancel_one(*args), PRIORITY_CANCEL)
+            for order, orderid, segment in to_cancel], succeeded=lambda response: response[0] is not None)
+        for result in report.results:
+            cancelled_item, failed_item = result['response']
+            if cancelled_item is not None:
+                cancelled_orders.append(cancelled_item)
+            else:
+                failed_to_cancel.append(failed_item)
         
         # Prepare success response even if some orders failed
         response = {
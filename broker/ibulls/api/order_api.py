@@ -8,6 +8,8 @@ from broker.ibulls.mapping.transform_data import transform_data , map_product_ty
 from utils.httpx_client import get_httpx_client
 from broker.ibulls.baseurl import INTERACTIVE_URL
 from utils.logging import get_logger
+from utils.order_state import get_cached_book
+from utils.order_batch import cancel_orders, close_positions, close_positions_failed
 
 logger = get_logger(__name__)
 
@@ -62,7 +64,7 @@ def get_open_position(tradingsymbol, exchange, producttype, auth):
     """
     # Convert Trading Symbol from OpenAlgo Format to Broker Format Before Search in OpenPosition
     tradingsymbol = get_br_symbol(tradingsymbol, exchange)
-    positions_data = get_positions(auth)
+    positions_data = get_cached_book('positions', get_positions, auth)
 
     net_qty = '0'
 
@@ -292,6 +294,7 @@ def close_all_positions(current_api_key,auth):
     if not positions_list:
         return {"message": "No Open Positions Found"}, 200
 
+    exit_orders = []
     # If response has positions
     for position in positions_list:
         # Skip if net quantity is zero
@@ -323,16 +326,13 @@ def close_all_positions(current_api_key,auth):
             "orderUniqueIdentifier": "openalgo"
         }
 
-        # Place the order to close the position
-        res, response, orderid =   place_order_api(place_order_payload,auth)
+        # Queue the order to close the position
+        exit_orders.append(place_order_payload)
 
-        # logger.info(f"{res}")
-        # logger.info(f"{response}")
-        # logger.info(f"{orderid}")
-
-
-            
-            # Note: Ensure place_order_api handles any errors and logs accordingly
+    # Square off concurrently, within the broker's order limits
+    report = close_positions('ibulls', exit_orders, lambda payload: place_order_api(payload, auth))
+    if report.failed:
+        return close_positions_failed(report)
 
     return {'status': 'success', "message": "All Open Positions SquaredOff"}, 200
 
@@ -433,18 +433,10 @@ def cancel_all_orders_api(data,auth):
         if order["OrderStatus"] in ["New", "Trigger Pending"]
     ]
     logger.info(f"Orders to cancel: {orders_to_cancel}")
-    canceled_orders = []
-    failed_cancellations = []
-
-    # Cancel the filtered orders
-    for order in orders_to_cancel:
-        orderid = order['AppOrderID']
-        cancel_response, status_code = cancel_order(orderid,auth)
-        if status_code == 200:
-            logger.info(f"Canceled order {orderid}")
-            canceled_orders.append(orderid)
-        else:
-            logger.error(f"Failed to cancel order {orderid}")
-            failed_cancellations.append(orderid)
+
+    # Cancel the filtered orders concurrently, within the broker's order limits
+    canceled_orders, failed_cancellations = cancel_orders(
+        'ibulls', [order['AppOrderID'] for order in orders_to_cancel],
+        lambda orderid: cancel_order(orderid, auth))
     
     return canceled_orders, failed_cancellations
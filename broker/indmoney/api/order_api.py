@@ -9,6 +9,8 @@ from broker.indmoney.mapping.transform_data import map_exchange_type, map_exchan
 from utils.httpx_client import get_httpx_client
 from broker.indmoney.api.baseurl import get_url
 from utils.logging import get_logger
+from utils.order_state import get_cached_book
+from utils.order_batch import cancel_orders, close_positions, close_positions_failed
 
 logger = get_logger(__name__)
 
@@ -239,7 +241,7 @@ def get_open_position(tradingsymbol, exchange, product, auth):
 
     #Convert Trading Symbol from OpenAlgo Format to Broker Format Before Search in OpenPosition
     tradingsymbol = get_br_symbol(tradingsymbol,exchange)
-    positions_response = get_positions(auth)
+    positions_response = get_cached_book('positions', get_positions, auth)
     net_qty = '0'
     # logger.info(f"Positions response: {positions_response}")
     
@@ -463,6 +465,7 @@ def close_all_positions(current_api_key,auth):
         return {"message": "No Open Positions Found"}, 200
 
     if all_positions:
+        exit_orders = []
         # Loop through each position to close
         for position in all_positions:
             if not isinstance(position, dict):
@@ -517,12 +520,13 @@ def close_all_positions(current_api_key,auth):
 
             logger.debug(f"Close position payload: {place_order_payload}")
 
-            # Place the order to close the position
-            _, api_response, _ =   place_order_api(place_order_payload,AUTH_TOKEN)
+            # Queue the order to close the position
+            exit_orders.append(place_order_payload)
 
-            logger.debug(f"Close position response: {api_response}")
-            
-            # Note: Ensure place_order_api handles any errors and logs accordingly
+        # Square off concurrently, within the broker's order limits
+        report = close_positions('indmoney', exit_orders, lambda payload: place_order_api(payload, AUTH_TOKEN))
+        if report.failed:
+            return close_positions_failed(report)
 
     return {'status': 'success', "message": "All Open Positions SquaredOff"}, 200
 
@@ -635,16 +639,10 @@ def cancel_all_orders_api(data,auth):
     orders_to_cancel = [order for order in order_book_response
                         if order['status'] in ['PENDING', 'O-PENDING', 'SL-PENDING']]
     logger.info(f"Orders to cancel: {orders_to_cancel}")
-    canceled_orders = []
-    failed_cancellations = []
-
-    # Cancel the filtered orders
-    for order in orders_to_cancel:
-        orderid = order['id']
-        cancel_response, status_code = cancel_order(orderid,AUTH_TOKEN)
-        if status_code == 200:
-            canceled_orders.append(orderid)
-        else:
-            failed_cancellations.append(orderid)
+
+    # Cancel the filtered orders concurrently, within the broker's order limits
+    canceled_orders, failed_cancellations = cancel_orders(
+        'indmoney', [order['id'] for order in orders_to_cancel],
+        lambda orderid: cancel_order(orderid, AUTH_TOKEN))
     
     return canceled_orders, failed_cancellations
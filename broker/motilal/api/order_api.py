@@ -6,6 +6,8 @@ from database.token_db import get_token , get_br_symbol, get_symbol, get_symbol_
 from broker.motilal.mapping.transform_data import transform_data , map_product_type, reverse_map_product_type, transform_modify_order_data, map_exchange, reverse_map_exchange
 from utils.httpx_client import get_httpx_client
 from utils.logging import get_logger
+from utils.order_state import get_cached_book
+from utils.order_batch import cancel_orders, close_positions, close_positions_failed
 
 logger = get_logger(__name__)
 
@@ -101,7 +103,7 @@ def get_open_position(tradingsymbol, exchange, producttype,auth):
     tradingsymbol = get_br_symbol(tradingsymbol,exchange)
     # Map exchange from OpenAlgo format to Motilal format for comparison
     motilal_exchange = map_exchange(exchange)
-    positions_data = get_positions(auth)
+    positions_data = get_cached_book('positions', get_positions, auth)
 
     logger.debug(f"{positions_data}")
 
@@ -347,6 +349,7 @@ def close_all_positions(current_api_key,auth):
         return {"message": "No Open Positions Found"}, 200
 
     if positions_response.get('status') == 'SUCCESS':
+        exit_orders = []
         # Loop through each position to close
         for position in positions_response['data']:
             # Calculate net quantity from buy and sell quantities
@@ -388,16 +391,13 @@ def close_all_positions(current_api_key,auth):
 
             logger.info(f"{place_order_payload}")
 
-            # Place the order to close the position
-            res, response, orderid =   place_order_api(place_order_payload,auth)
+            # Queue the order to close the position
+            exit_orders.append(place_order_payload)
 
-            # logger.info(f"{res}")
-            # logger.info(f"{response}")
-            # logger.info(f"{orderid}")
-
-
-
-            # Note: Ensure place_order_api handles any errors and logs accordingly
+        # Square off concurrently, within the broker's order limits
+        report = close_positions('motilal', exit_orders, lambda payload: place_order_api(payload, auth))
+        if report.failed:
+            return close_positions_failed(report)
 
     return {'status': 'success', "message": "All Open Positions SquaredOff"}, 200
 
@@ -612,17 +612,10 @@ def cancel_all_orders_api(data,auth):
     orders_to_cancel = [order for order in order_book_response.get('data', [])
                         if order.get('orderstatus', '').lower() in ['confirm', 'sent', 'open']]
     #logger.info(f"{orders_to_cancel}")
-    canceled_orders = []
-    failed_cancellations = []
-
-    # Cancel the filtered orders
-    for order in orders_to_cancel:
-        # Motilal uses uniqueorderid
-        orderid = order['uniqueorderid']
-        cancel_response, status_code = cancel_order(orderid,auth)
-        if status_code == 200:
-            canceled_orders.append(orderid)
-        else:
-            failed_cancellations.append(orderid)
+
+    # Cancel the filtered orders concurrently, within the broker's order limits
+    canceled_orders, failed_cancellations = cancel_orders(
+        'motilal', [order['uniqueorderid'] for order in orders_to_cancel],
+        lambda orderid: cancel_order(orderid, auth))
 
     return canceled_orders, failed_cancellations
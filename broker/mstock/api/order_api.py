@@ -6,6 +6,8 @@ from database.token_db import get_token, get_symbol
 from broker.mstock.mapping.transform_data import transform_data, map_product_type, reverse_map_product_type, transform_modify_order_data, get_mstock_symbol
 from utils.httpx_client import get_httpx_client
 from utils.logging import get_logger
+from utils.order_state import get_cached_book
+from utils.order_batch import close_positions, close_positions_failed
 
 logger = get_logger(__name__)
 
@@ -97,7 +99,7 @@ def get_open_position(tradingsymbol, exchange, producttype, auth):
         logger.warning(f"Token not found for {tradingsymbol} on {exchange}")
         return '0'
 
-    positions_data = get_positions(auth)
+    positions_data = get_cached_book('positions', get_positions, auth)
 
     logger.info(f"Looking for position: symboltoken={token}, exchange={exchange}, producttype={producttype}")
     logger.info(f"Positions data: {positions_data}")
@@ -288,6 +290,7 @@ def close_all_positions(current_api_key, auth):
         logger.info(f"Closing {len(positions_response['data'])} positions")
 
         # Loop through each position to close
+        exit_orders = []
         for position in positions_response['data']:
             # Convert netqty to int (API returns string like "-500")
             try:
@@ -341,13 +344,13 @@ def close_all_positions(current_api_key, auth):
 
             logger.info(f"Square off payload: {place_order_payload}")
 
-            # Place the order to close the position
-            try:
-                res, response, orderid = place_order_api(place_order_payload, auth)
-                logger.info(f"Position closed - OrderID: {orderid}, Response: {response}")
-            except Exception as e:
-                logger.error(f"Error closing position for {symbol}: {e}")
-                continue
+            # Queue the order to close the position
+            exit_orders.append(place_order_payload)
+
+        # Square off concurrently, within the broker's order limits
+        report = close_positions('mstock', exit_orders, lambda payload: place_order_api(payload, auth))
+        if report.failed:
+            return close_positions_failed(report)
 
     return {'status': 'success', "message": "All Open Positions SquaredOff"}, 200
 
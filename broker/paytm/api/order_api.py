@@ -14,6 +14,8 @@ from broker.paytm.mapping.transform_data import (
     reverse_map_order_type
 )
 from utils.logging import get_logger
+from utils.order_state import get_cached_book
+from utils.order_batch import OrderTask, cancel_orders, run_order_batch
 
 logger = get_logger(__name__)
 
@@ -106,7 +108,7 @@ def get_open_positionss(tradingsymbol, exchange, product, auth):
     # We assume valid security IDs are numeric strings
     
     # Get raw positions data first
-    positions_data = get_positions(auth)
+    positions_data = get_cached_book('positions', get_positions, auth)
     net_qty = '0'
     
     logger.debug("=== Position Check Details ===")
@@ -197,7 +199,7 @@ def get_open_position(tradingsymbol, exchange, producttype,auth):
     target_symbol = tradingsymbol
     
     #tradingsymbol = get_br_symbol(tradingsymbol,exchange)
-    positions_data = get_positions(auth)
+    positions_data = get_cached_book('positions', get_positions, auth)
 
     net_qty = '0'
 
@@ -377,6 +379,7 @@ def close_all_positions(current_api_key, auth):
         logger.info(f"Found {total_positions} positions")
         
         # Loop through each position to close
+        exit_tasks = []
         for position in positions_response['data']:
             # Get quantity - handle different field names
             net_qty = position.get('net_qty', position.get('netQty', '0'))
@@ -439,21 +442,26 @@ def close_all_positions(current_api_key, auth):
             logger.info(f"Placing Order: {order_payload}")
             
             # Place the order directly without transform
-            response = get_api_response(
-                endpoint="/orders/v1/place/regular",
-                auth=AUTH_TOKEN,
-                method="POST",
-                payload=json.dumps(order_payload)
-            )
-            
-            logger.debug(f"Payload for closing order: {json.dumps(order_payload)}")
+            exit_tasks.append(OrderTask(
+                f"{pos_security_id} ({pos_display_name})",
+                lambda order_payload=order_payload: get_api_response(
+                    endpoint="/orders/v1/place/regular",
+                    auth=AUTH_TOKEN,
+                    method="POST",
+                    payload=json.dumps(order_payload)
+                )))
+
+        # Square off concurrently, within the broker's order limits
+        report = run_order_batch('paytm', 'close_all', exit_tasks,
+                                 succeeded=lambda response: response.get('status') == 'success')
+        for result in report.results:
+            response = result.get('response') or {}
             logger.debug(f"Response from closing order: {response}")
-            
-            if response.get('status') == 'success':
-                logger.info(f"Successfully closed position for {pos_security_id} ({pos_display_name})")
+            if result['status'] == 'success':
+                logger.info(f"Successfully closed position for {result['key']}")
                 successful_closes += 1
             else:
-                logger.error(f"Failed to close position for {pos_security_id} ({pos_display_name}): {response.get('message', 'Unknown error')}")
+                logger.error(f"Failed to close position for {result['key']}: {response.get('message', result.get('error', 'Unknown error'))}")
                 failed_closes += 1
 
     # Report on success/failures
@@ -584,16 +592,10 @@ def cancel_all_orders_api(data, auth):
     orders_to_cancel = [order for order in order_book_response.get('data', [])
                         if order['status'] in ['Pending']]
     logger.info(f"{orders_to_cancel}")
-    canceled_orders = []
-    failed_cancellations = []
-
-    # Cancel the filtered orders
-    for order in orders_to_cancel:
-        orderid = order['order_no']
-        cancel_response, status_code = cancel_order(orderid, auth)
-        if status_code == 200:
-            canceled_orders.append(orderid)
-        else:
-            failed_cancellations.append(orderid)
+
+    # Cancel the filtered orders concurrently, within the broker's order limits
+    canceled_orders, failed_cancellations = cancel_orders(
+        'paytm', [order['order_no'] for order in orders_to_cancel],
+        lambda orderid: cancel_order(orderid, auth))
 
     return canceled_orders, failed_cancellations
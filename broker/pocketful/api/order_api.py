@@ -6,6 +6,8 @@ from database.token_db import get_br_symbol, get_oa_symbol
 from database.auth_db import Auth, db_session
 from broker.pocketful.mapping.transform_data import transform_data, map_product_type, reverse_map_product_type, transform_modify_order_data
 from utils.logging import get_logger
+from utils.order_state import get_cached_book
+from utils.order_batch import cancel_orders, close_positions
 
 logger = get_logger(__name__)
 
@@ -509,7 +511,7 @@ def get_open_position(tradingsymbol, exchange, product, auth):
     logger.debug(f"DEBUG - Fetching open position for {tradingsymbol} on {exchange} with product {product}")
     
     # Get positions data
-    positions_data = get_positions(auth)
+    positions_data = get_cached_book('positions', get_positions, auth)
     
     # Check if positions data is available and contains positions
     if positions_data and positions_data.get('status') == 'success' and positions_data.get('data'):
@@ -722,6 +724,7 @@ def close_all_positions(current_api_key, auth):
         failed_closes = []
         
         # Process each position
+        exit_orders = []
         for position in positions:
             try:
                 logger.debug(f"DEBUG - Position details: {position}")
@@ -755,36 +758,40 @@ def close_all_positions(current_api_key, auth):
                 
                 logger.debug(f"DEBUG - Placing order to close position: {place_order_payload}")
                 
-                # Try to place the order
-                try:
-                    status, api_response, orderid = place_order_api(place_order_payload, auth)
-                    logger.debug(f"DEBUG - Order response: {api_response}")
-                    
-                    if status:
-                        closed_count += 1
-                        successful_closes.append({
-                            "symbol": symbol,
-                            "orderid": orderid,
-                            "quantity": quantity,
-                            "action": action
-                        })
-                    else:
-                        failed_closes.append({
-                            "symbol": symbol,
-                            "error": api_response.get('message', 'Unknown error')
-                        })
-                except Exception as order_error:
-                    logger.error(f"DEBUG - Error placing order: {order_error}")
-                    failed_closes.append({
-                        "symbol": symbol,
-                        "error": str(order_error)
-                    })
+                exit_orders.append((symbol, place_order_payload))
             except Exception as pos_error:
                 logger.error(f"DEBUG - Error processing position: {pos_error}")
                 failed_closes.append({
                     "symbol": position.get('trading_symbol', 'Unknown'),
                     "error": str(pos_error)
                 })
+
+        # Place the orders concurrently, within the broker's order limits
+        report = close_positions('pocketful', [payload for _, payload in exit_orders],
+                                 lambda payload: place_order_api(payload, auth))
+        for (symbol, payload), result in zip(exit_orders, report.results):
+            if 'response' not in result:
+                failed_closes.append({
+                    "symbol": symbol,
+                    "error": result['error']
+                })
+                continue
+            status, api_response, orderid = result['response']
+            logger.debug(f"DEBUG - Order response: {api_response}")
+            
+            if status:
+                closed_count += 1
+                successful_closes.append({
+                    "symbol": symbol,
+                    "orderid": orderid,
+                    "quantity": int(payload['quantity']),
+                    "action": payload['action']
+                })
+            else:
+                failed_closes.append({
+                    "symbol": symbol,
+                    "error": api_response.get('message', 'Unknown error')
+                })
         
         # Return a summary of the operation
         if closed_count > 0:
@@ -1037,10 +1044,8 @@ def cancel_all_orders_api(data, auth):
     if orders_to_cancel:
         logger.info(f"DEBUG - Order IDs to cancel: {[order.get('order_id', 'Unknown') for order in orders_to_cancel]}")
     
-    canceled_orders = []
+    orderids = []
     failed_cancellations = []
-
-    # Cancel the filtered orders
     for order in orders_to_cancel:
         # Try multiple possible order ID fields
         possible_order_id_fields = ['oms_order_id', 'order_id', 'id', 'orderId', 'nnf_id', 'exchangeOrderId']
@@ -1061,23 +1066,15 @@ def cancel_all_orders_api(data, auth):
             logger.debug(f"DEBUG - Could not find valid order ID in order: {order}")
             failed_cancellations.append("unknown_id")
             continue
-            
-        logger.debug(f"DEBUG - Attempting to cancel order: {orderid}")
-        try:
-            cancel_response, status_code = cancel_order(orderid, AUTH_TOKEN)
-            
-            # Check both status code and response status
-            if status_code == 200 and (cancel_response.get('status') == 'success' or 'success' in str(cancel_response).lower()):
-                logger.debug(f"DEBUG - Successfully cancelled order: {orderid}")
-                canceled_orders.append(orderid)
-            else:
-                error_msg = cancel_response.get('message', 'Unknown error')
-                logger.error(f"DEBUG - Failed to cancel order {orderid}: {error_msg}")
-                failed_cancellations.append(orderid)
-                
-        except Exception as e:
-            logger.debug(f"DEBUG - Exception while cancelling order {orderid}: {e}")
-            failed_cancellations.append(orderid)
+        orderids.append(orderid)
+
+    # Cancel the filtered orders concurrently, within the broker's order limits.
+    # Check both status code and response status
+    canceled_orders, failed = cancel_orders(
+        'pocketful', orderids, lambda orderid: cancel_order(orderid, AUTH_TOKEN),
+        succeeded=lambda result: result[1] == 200 and (
+            result[0].get('status') == 'success' or 'success' in str(result[0]).lower()))
+    failed_cancellations.extend(failed)
     
     logger.error(f"DEBUG - Cancel all orders summary: {len(canceled_orders)} cancelled, {len(failed_cancellations)} failed")
     return canceled_orders, failed_cancellations
@@ -2,12 +2,15 @@ import os
 import requests
 import zipfile
 import io
+import numpy as np
 import pandas as pd
-from datetime import datetime
 from sqlalchemy import create_engine, Column, Integer, String, Float, Sequence, Index
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from extensions import socketio  # Import SocketIO
+from database.master_contract_utils import (
+    copy_symtokens, derivative_symbols, format_expiry, normalize_strike
+)
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -51,27 +54,7 @@ def delete_symtoken_table():
     db_session.commit()
 
 def copy_from_dataframe(df):
-    logger.info("Performing Bulk Insert")
-    # Convert DataFrame to a list of dictionaries
-    data_dict = df.to_dict(orient='records')
-
-    # Retrieve existing token-exchange combinations to filter them out from the insert
-    existing_token_exchange = {(result.token, result.exchange) for result in db_session.query(SymToken.token, SymToken.exchange).all()}
-
-    # Filter out data_dict entries with token-exchange combinations that already exist
-    filtered_data_dict = [row for row in data_dict if (row['token'], row['exchange']) not in existing_token_exchange]
-
-    # Insert in bulk the filtered records
-    try:
-        if filtered_data_dict:  # Proceed only if there's anything to insert
-            db_session.bulk_insert_mappings(SymToken, filtered_data_dict)
-            db_session.commit()
-            logger.info(f"Bulk insert completed successfully with {len(filtered_data_dict)} new records.")
-        else:
-            logger.info("No new records to insert.")
-    except Exception as e:
-        logger.error(f"Error during bulk insert: {e}")
-        db_session.rollback()
+    copy_symtokens(db_session, SymToken, df, key_columns=('token', 'exchange'))
 
 # Define the shoonya URLs for downloading the symbol files
 shoonya_urls = {
@@ -134,22 +117,11 @@ def process_shoonya_nse_data(output_path):
     # Add missing columns to ensure DataFrame matches the database structure
     df['symbol'] = df['brsymbol']  # Initialize 'symbol' with 'brsymbol'
 
-    # Apply transformation for OpenAlgo symbols
-    def get_openalgo_symbol(broker_symbol):
-        # Separate by hyphen and apply logic for EQ and BE
-        if '-EQ' in broker_symbol:
-            return broker_symbol.replace('-EQ', '')
-        elif '-BE' in broker_symbol:
-            return broker_symbol.replace('-BE', '')
-        else:
-            # For other symbols (including index), OpenAlgo symbol remains the same as broker symbol
-            return broker_symbol
-
-    # Update the 'symbol' column
-    df['symbol'] = df['brsymbol'].apply(get_openalgo_symbol)
+    # OpenAlgo symbols drop the -EQ / -BE series suffix, index symbols stay as they are
+    df['symbol'] = df['brsymbol'].str.replace(r'-(?:EQ|BE)', '', regex=True)
 
     # Define Exchange: 'NSE' for EQ and BE, 'NSE_INDEX' for indexes
-    df['exchange'] = df.apply(lambda row: 'NSE_INDEX' if row['instrumenttype'] == 'INDEX' else 'NSE', axis=1)
+    df['exchange'] = np.where(df['instrumenttype'] == 'INDEX', 'NSE_INDEX', 'NSE')
     df['brexchange'] = df['exchange']  # Broker exchange is the same as exchange
 
     # Set empty columns for 'expiry' and fill -1 for 'strike' where the data is missing
@@ -157,7 +129,7 @@ def process_shoonya_nse_data(output_path):
     df['strike'] = -1  # Set default value -1 for strike price where missing
 
     # Ensure the instrument type is consistent
-    df['instrumenttype'] = df['instrumenttype'].apply(lambda x: 'EQ' if x in ['EQ', 'BE'] else x)
+    df['instrumenttype'] = df['instrumenttype'].replace('BE', 'EQ')
 
     # Handle missing or invalid numeric values in 'lotsize' and 'tick_size'
     df['lotsize'] = pd.to_numeric(df['lotsize'], errors='coerce').fillna(0).astype(int)  # Convert to int, default to 0
@@ -193,61 +165,22 @@ def process_shoonya_nfo_data(output_path):
     # Rename columns to match your schema
     df.columns = ['exchange', 'token', 'lotsize', 'name', 'brsymbol', 'expiry', 'instrumenttype', 'optiontype', 'strike', 'tick_size']
 
-    # Add missing columns to ensure DataFrame matches the database structure
-    df['expiry'] = df['expiry'].fillna('')  # Fill expiry with empty strings if missing
-    df['strike'] = df['strike'].fillna('-1')  # Fill strike with -1 if missing
-
-    # Define a function to format the expiry date as DD-MMM-YY
-    def format_expiry_date(date_str):
-        try:
-            # Parse the input date and format it as DD-MMM-YY
-            date_obj = datetime.strptime(date_str, '%d-%b-%Y')
-            return date_obj.strftime('%d-%b-%y').upper()
-        except ValueError:
-            logger.info(f"Invalid expiry date format: {date_str}")
-            return None
+    # Strike prices as numbers, -1 where missing
+    df['strike'] = normalize_strike(df['strike'])
 
-    # Apply the expiry date format
-    df['expiry'] = df['expiry'].apply(format_expiry_date)
+    # Format the expiry date as DD-MMM-YY
+    df['expiry'] = format_expiry(df['expiry'], '%d-%b-%Y')
 
     # Replace the 'XX' option type with 'FUT' for futures
-    df['instrumenttype'] = df.apply(lambda row: 'FUT' if row['optiontype'] == 'XX' else row['optiontype'], axis=1)
+    df['instrumenttype'] = df['optiontype'].replace('XX', 'FUT')
 
     # Format the symbol column based on the instrument type
-    def format_symbol(row):
-        # Convert hyphenated date to compact format for symbol
-        expiry_date = row['expiry']
-        if expiry_date and isinstance(expiry_date, str):
-            compact_expiry = expiry_date.replace('-', '')
-        else:
-            compact_expiry = ''
-            
-        if row['instrumenttype'] == 'FUT':
-            return f"{row['name']}{compact_expiry}FUT"
-        else:
-            # Ensure strike prices are either integers or floats
-            formatted_strike = int(row['strike']) if float(row['strike']).is_integer() else row['strike']
-            return f"{row['name']}{compact_expiry}{formatted_strike}{row['instrumenttype']}"
-
-    df['symbol'] = df.apply(format_symbol, axis=1)
+    df['symbol'] = derivative_symbols(df['name'], df['expiry'], df['instrumenttype'], df['strike']).fillna(df['brsymbol'])
 
     # Define Exchange
     df['exchange'] = 'NFO'
     df['brexchange'] = df['exchange']
 
-    # Ensure strike prices are handled as either float or int
-    def handle_strike_price(strike):
-        try:
-            if float(strike).is_integer():
-                return int(float(strike))  # Return as integer if no decimal
-            else:
-                return float(strike)  # Return as float if decimal exists
-        except (ValueError, TypeError):
-            return -1  # If there's an error or it's empty, return -1
-
-    # Apply the function to strike column
-    df['strike'] = df['strike'].apply(handle_strike_price)
-
     # Reorder the columns to match the database structure
     columns_to_keep = ['symbol', 'brsymbol', 'name', 'exchange', 'brexchange', 'token', 'expiry', 'strike', 'lotsize', 'instrumenttype', 'tick_size']
     df_filtered = df[columns_to_keep]
@@ -271,65 +204,25 @@ def process_shoonya_cds_data(output_path):
 
     df = df[df['token'] > 100] # Filter out CDS tokens with less than 100 digits to avioid dummy entries or index values that are not actual CDS tokens
 
-    # Add missing columns to ensure DataFrame matches the database structure
-    df['expiry'] = df['expiry'].fillna('')  # Fill expiry with empty strings if missing
-    df['strike'] = df['strike'].fillna('-1')  # Fill strike with -1 if missing
-
-    # Define a function to format the expiry date as DD-MMM-YY
-    def format_expiry_date(date_str):
-        try:
-            return datetime.strptime(date_str, '%d-%b-%Y').strftime('%d-%b-%y').upper()
-        except ValueError:
-            logger.info(f"Invalid expiry date format: {date_str}")
-            return None
+    # Strike prices as numbers, -1 where missing
+    df['strike'] = normalize_strike(df['strike'])
 
-    # Apply the expiry date format
-    df['expiry'] = df['expiry'].apply(format_expiry_date)
+    # Format the expiry date as DD-MMM-YY
+    df['expiry'] = format_expiry(df['expiry'], '%d-%b-%Y')
 
     # Replace the 'XX' option type with 'FUT' for futures
-    df['instrumenttype'] = df.apply(lambda row: 'FUT' if row['optiontype'] == 'XX' else row['instrumenttype'], axis=1)
+    df['instrumenttype'] = df['instrumenttype'].mask(df['optiontype'] == 'XX', 'FUT')
 
     # Update instrumenttype to 'CE' or 'PE' based on the option type
-    df['instrumenttype'] = df.apply(lambda row: row['optiontype'] if row['instrumenttype'] == 'OPTCUR' else row['instrumenttype'], axis=1)
+    df['instrumenttype'] = df['instrumenttype'].mask(df['instrumenttype'] == 'OPTCUR', df['optiontype'])
 
     # Format the symbol column based on the instrument type
-    def format_symbol(row):
-        # Convert hyphenated date to compact format for symbol
-        expiry_date = row['expiry']
-        if expiry_date and isinstance(expiry_date, str):
-            compact_expiry = expiry_date.replace('-', '')
-        else:
-            compact_expiry = ''
-            
-        if row['instrumenttype'] == 'FUT':
-            return f"{row['name']}{compact_expiry}FUT"
-        else:
-            # Format strike price: remove .0 if it's a whole number
-            strike = row['strike']
-            if isinstance(strike, (int, float)):
-                if float(strike).is_integer():
-                    strike = int(float(strike))
-            return f"{row['name']}{compact_expiry}{strike}{row['instrumenttype']}"
-
-    df['symbol'] = df.apply(format_symbol, axis=1)
+    df['symbol'] = derivative_symbols(df['name'], df['expiry'], df['instrumenttype'], df['strike']).fillna(df['brsymbol'])
 
     # Define Exchange
     df['exchange'] = 'CDS'
     df['brexchange'] = df['exchange']
 
-    # Ensure strike prices are handled as either float or int
-    def handle_strike_price(strike):
-        try:
-            if float(strike).is_integer():
-                return int(float(strike))  # Return as integer if no decimal
-            else:
-                return float(strike)  # Return as float if decimal exists
-        except (ValueError, TypeError):
-            return -1  # If there's an error or it's empty, return -1
-
-    # Apply the function to strike column
-    df['strike'] = df['strike'].apply(handle_strike_price)
-
     # Reorder the columns to match the database structure
     columns_to_keep = ['symbol', 'brsymbol', 'name', 'exchange', 'brexchange', 'token', 'expiry', 'strike', 'lotsize', 'instrumenttype', 'tick_size']
     df_filtered = df[columns_to_keep]
@@ -351,65 +244,25 @@ def process_shoonya_mcx_data(output_path):
     # Rename columns to match your schema
     df.columns = ['exchange', 'token', 'lotsize', 'gngd', 'name', 'brsymbol', 'expiry', 'instrumenttype', 'optiontype', 'strike', 'tick_size']
 
-    # Add missing columns to ensure DataFrame matches the database structure
-    df['expiry'] = df['expiry'].fillna('')  # Fill expiry with empty strings if missing
-    df['strike'] = df['strike'].fillna('-1')  # Fill strike with -1 if missing
-
-    # Define a function to format the expiry date as DD-MMM-YY
-    def format_expiry_date(date_str):
-        try:
-            return datetime.strptime(date_str, '%d-%b-%Y').strftime('%d-%b-%y').upper()
-        except ValueError:
-            logger.info(f"Invalid expiry date format: {date_str}")
-            return None
+    # Strike prices as numbers, -1 where missing
+    df['strike'] = normalize_strike(df['strike'])
 
-    # Apply the expiry date format
-    df['expiry'] = df['expiry'].apply(format_expiry_date)
+    # Format the expiry date as DD-MMM-YY
+    df['expiry'] = format_expiry(df['expiry'], '%d-%b-%Y')
 
     # Replace the 'XX' option type with 'FUT' for futures
-    df['instrumenttype'] = df.apply(lambda row: 'FUT' if row['optiontype'] == 'XX' else row['instrumenttype'], axis=1)
+    df['instrumenttype'] = df['instrumenttype'].mask(df['optiontype'] == 'XX', 'FUT')
 
     # Update instrumenttype to 'CE' or 'PE' based on the option type
-    df['instrumenttype'] = df.apply(lambda row: row['optiontype'] if row['instrumenttype'] == 'OPTFUT' else row['instrumenttype'], axis=1)
+    df['instrumenttype'] = df['instrumenttype'].mask(df['instrumenttype'] == 'OPTFUT', df['optiontype'])
 
     # Format the symbol column based on the instrument type
-    def format_symbol(row):
-        # Convert hyphenated date to compact format for symbol
-        expiry_date = row['expiry']
-        if expiry_date and isinstance(expiry_date, str):
-            compact_expiry = expiry_date.replace('-', '')
-        else:
-            compact_expiry = ''
-            
-        if row['instrumenttype'] == 'FUT':
-            return f"{row['name']}{compact_expiry}FUT"
-        else:
-            # Format strike price: remove .0 if it's a whole number
-            strike = row['strike']
-            if isinstance(strike, (int, float)):
-                if float(strike).is_integer():
-                    strike = int(float(strike))
-            return f"{row['name']}{compact_expiry}{strike}{row['instrumenttype']}"
-
-    df['symbol'] = df.apply(format_symbol, axis=1)
+    df['symbol'] = derivative_symbols(df['name'], df['expiry'], df['instrumenttype'], df['strike']).fillna(df['brsymbol'])
 
     # Define Exchange
     df['exchange'] = 'MCX'
     df['brexchange'] = df['exchange']
 
-    # Ensure strike prices are handled as either float or int
-    def handle_strike_price(strike):
-        try:
-            if float(strike).is_integer():
-                return int(float(strike))  # Return as integer if no decimal
-            else:
-                return float(strike)  # Return as float if decimal exists
-        except (ValueError, TypeError):
-            return -1  # If there's an error or it's empty, return -1
-
-    # Apply the function to strike column
-    df['strike'] = df['strike'].apply(handle_strike_price)
-
     # Reorder the columns to match the database structure
     columns_to_keep = ['symbol', 'brsymbol', 'name', 'exchange', 'brexchange', 'token', 'expiry', 'strike', 'lotsize', 'instrumenttype', 'tick_size']
     df_filtered = df[columns_to_keep]
@@ -434,13 +287,6 @@ def process_shoonya_bse_data(output_path):
     # Add missing columns to ensure DataFrame matches the database structure
     df['symbol'] = df['brsymbol']  # Initialize 'symbol' with 'brsymbol'
 
-    # Apply transformation for OpenAlgo symbols (no special logic needed here)
-    def get_openalgo_symbol(broker_symbol):
-        return broker_symbol
-
-    # Update the 'symbol' column
-    df['symbol'] = df['brsymbol'].apply(get_openalgo_symbol)
-
     # Set Exchange: 'BSE' for all rows initially
     df['exchange'] = 'BSE'
     df['brexchange'] = df['exchange']  # Broker exchange is the same as exchange
@@ -522,74 +368,24 @@ def process_shoonya_bfo_data(output_path):
     # Rename columns to match your schema
     df.columns = ['exchange', 'token', 'lotsize', 'name', 'brsymbol', 'expiry', 'instrumenttype', 'optiontype', 'strike', 'tick_size']
 
-    # Add missing columns to ensure DataFrame matches the database structure
-    df['expiry'] = df['expiry'].fillna('')  # Fill expiry with empty strings if missing
-    df['strike'] = df['strike'].fillna('-1')  # Fill strike with -1 if missing
-
-    # Define a function to format the expiry date as DD-MMM-YY
-    def format_expiry_date(date_str):
-        try:
-            return datetime.strptime(date_str, '%d-%b-%Y').strftime('%d-%b-%y').upper()
-        except ValueError:
-            logger.info(f"Invalid expiry date format: {date_str}")
-            return None
-
-    # Apply the expiry date format
-    df['expiry'] = df['expiry'].apply(format_expiry_date)
+    # Strike prices as numbers, -1 where missing
+    df['strike'] = normalize_strike(df['strike'])
 
-    # Extract the 'name' from the 'TradingSymbol'
-    def extract_name(tradingsymbol):
-        import re
-        match = re.match(r'([A-Za-z]+)', tradingsymbol)
-        return match.group(1) if match else tradingsymbol
+    # Format the expiry date as DD-MMM-YY
+    df['expiry'] = format_expiry(df['expiry'], '%d-%b-%Y')
 
-    # Apply name extraction
-    df['name'] = df['brsymbol'].apply(extract_name)
+    # Extract the 'name' (leading letters) from the 'TradingSymbol'
+    df['name'] = df['brsymbol'].str.extract(r'^([A-Za-z]+)', expand=False).fillna(df['brsymbol'])
 
     # Extract the instrument type (CE, PE, FUT) from TradingSymbol
-    def extract_instrument_type(tradingsymbol):
-        if tradingsymbol.endswith('FUT'):
-            return 'FUT'
-        elif tradingsymbol.endswith('CE'):
-            return 'CE'
-        elif tradingsymbol.endswith('PE'):
-            return 'PE'
-        else:
-            return 'UNKNOWN'  # Handle cases where the suffix is not FUT, CE, or PE
-
-    # Apply instrument type extraction
-    df['instrumenttype'] = df['brsymbol'].apply(extract_instrument_type)
-
-    # Ensure strike prices are handled as either float or int
-    def handle_strike_price(strike):
-        try:
-            if float(strike).is_integer():
-                return int(float(strike))  # Return as integer if no decimal
-            else:
-                return float(strike)  # Return as float if decimal exists
-        except (ValueError, TypeError):
-            return -1  # If there's an error or it's empty, return -1
-
-    df['strike'] = df['strike'].apply(handle_strike_price)
-
-    # Format the symbol column based on the instrument type and correctly handle the strike price
-    def format_symbol(row):
-        # Convert hyphenated date to compact format for symbol
-        expiry_date = row['expiry']
-        if expiry_date and isinstance(expiry_date, str):
-            compact_expiry = expiry_date.replace('-', '')
-        else:
-            compact_expiry = ''
-            
-        if row['instrumenttype'] == 'FUT':
-            return f"{row['name']}{compact_expiry}FUT"
-        else:
-            # Correctly format the strike price based on whether it's an integer or a float
-            formatted_strike = f"{int(row['strike'])}" if isinstance(row['strike'], int) else f"{row['strike']:.2f}".rstrip('0').rstrip('.')
-            return f"{row['name']}{compact_expiry}{formatted_strike}{row['instrumenttype']}"
-
-    # Apply the symbol format
-    df['symbol'] = df.apply(format_symbol, axis=1)
+    df['instrumenttype'] = np.select(
+        [df['brsymbol'].str.endswith('FUT'), df['brsymbol'].str.endswith('CE'), df['brsymbol'].str.endswith('PE')],
+        ['FUT', 'CE', 'PE'],
+        default='UNKNOWN'  # Handle cases where the suffix is not FUT, CE, or PE
+    )
+
+    # Format the symbol column based on the instrument type
+    df['symbol'] = derivative_symbols(df['name'], df['expiry'], df['instrumenttype'], df['strike']).fillna(df['brsymbol'])
 
     # Define Exchange and Broker Exchange
     df['exchange'] = 'BFO'
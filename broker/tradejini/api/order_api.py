@@ -10,6 +10,9 @@ from ..mapping.order_data import transform_tradebook_data, transform_holdings_da
 
 from utils.httpx_client import get_httpx_client
 from utils.logging import get_logger
+from utils.order_state import get_cached_book
+from utils.order_batch import OrderTask, close_positions, run_order_batch
+from utils.order_gateway import PRIORITY_CANCEL
 
 logger = get_logger(__name__)
 
@@ -688,7 +691,7 @@ def get_open_position(tradingsymbol, exchange, producttype, auth):
             mapped_product = map_product_type(producttype)
         
         # Get positions from TradeJini API
-        positions_response = get_positions(auth)
+        positions_response = get_cached_book('positions', get_positions, auth)
         if not positions_response or not isinstance(positions_response, dict):
             logger.error(f"get_open_position - Invalid positions response: {positions_response}")
             return '0'
@@ -1137,6 +1140,7 @@ def close_all_positions(current_api_key, auth):
         success_count = 0
         failed_count = 0
         
+        exit_orders = []
         for position in positions:
             try:
                 net_quantity = int(position.get('netqty', position.get('quantity', 0)))
@@ -1180,20 +1184,29 @@ def close_all_positions(current_api_key, auth):
                 }
                 
                 logger.debug(f"close_all_positions - Placing order: {order_data}")
-                res, response, orderid = place_order_api(order_data, auth)
-                
-                if response.get('status') == 'success' and orderid:
-                    logger.info(f"close_all_positions - Successfully closed position for {symbol} with order {orderid}")
-                    success_count += 1
-                else:
-                    error_msg = response.get('message', 'Unknown error')
-                    logger.error(f"close_all_positions - Failed to close position for {symbol}: {error_msg}")
-                    failed_count += 1
+                exit_orders.append(order_data)
                     
             except Exception as e:
                 error_msg = str(e)
                 logger.error(f"close_all_positions - Error processing position {position}: {error_msg}")
                 failed_count += 1
+
+        # Place the orders concurrently, within the broker's order limits
+        report = close_positions('tradejini', exit_orders, lambda payload: place_order_api(payload, auth))
+        for result in report.results:
+            symbol = result['key']
+            if 'response' not in result:
+                logger.error(f"close_all_positions - Error closing position for {symbol}: {result['error']}")
+                failed_count += 1
+                continue
+            res, response, orderid = result['response']
+            if response.get('status') == 'success' and orderid:
+                logger.info(f"close_all_positions - Successfully closed position for {symbol} with order {orderid}")
+                success_count += 1
+            else:
+                error_msg = response.get('message', 'Unknown error')
+                logger.error(f"close_all_positions - Failed to close position for {symbol}: {error_msg}")
+                failed_count += 1
         
         # Prepare final response in OpenAlgo format
         if success_count > 0 or failed_count == 0:
@@ -1317,6 +1330,7 @@ def cancel_all_orders_api(data, auth):
             logger.debug(f"cancel_all_orders_api - Found {len(orders)} orders")
             logger.debug(f"cancel_all_orders_api - First order example: {orders[0] if orders else 'No orders'}")
             
+            order_ids = []
             for order in orders:
                 # Get order data - could be directly in order or in order['data']
                 order_data = order.get('data', order)
@@ -1332,33 +1346,47 @@ def cancel_all_orders_api(data, auth):
                 # Check if order status indicates it's open and can be canceled
                 # Convert status to uppercase for case-insensitive comparison
                 if status.upper() in ['OPEN', 'TRIGGER PENDING', 'MODIFIED', 'PENDING']:
-                    logger.debug(f"cancel_all_orders_api - Cancelling order: {order_id}")
-                    
-                    try:
-                        cancel_response, status_code = cancel_order(order_id, auth)
-                        logger.debug(f"cancel_all_orders_api - Cancel response: {cancel_response}, status: {status_code}")
-                        
-                        # Check for success in response
-                        if cancel_response and status_code in [200, 201, 202]:
-                            if (isinstance(cancel_response, list) and cancel_response[0].get('stat') == 'Ok') or \
-                               (isinstance(cancel_response, dict) and cancel_response.get('stat') == 'Ok'):
-                                canceled_orders.append(order_id)
-                                logger.info(f"cancel_all_orders_api - Successfully canceled order: {order_id}")
-                            else:
-                                error_msg = "Unknown error structure"
-                                if isinstance(cancel_response, list) and len(cancel_response) > 0:
-                                    error_msg = cancel_response[0].get('data', {}).get('msg', 'Unknown error')
-                                elif isinstance(cancel_response, dict):
-                                    error_msg = cancel_response.get('data', {}).get('msg', 'Unknown error')
-                                
-                                logger.error(f"cancel_all_orders_api - Failed to cancel order {order_id}: {error_msg}")
-                                failed_cancellations.append({"orderId": order_id, "error": error_msg})
+                    order_ids.append(order_id)
+
+            def cancel_one(order_id):
+                """Cancel one order, returning (order id, None) or (None, failure)"""
+                logger.debug(f"cancel_all_orders_api - Cancelling order: {order_id}")
+                try:
+                    cancel_response, status_code = cancel_order(order_id, auth)
+                    logger.debug(f"cancel_all_orders_api - Cancel response: {cancel_response}, status: {status_code}")
+
+                    # Check for success in response
+                    if cancel_response and status_code in [200, 201, 202]:
+                        if (isinstance(cancel_response, list) and cancel_response[0].get('stat') == 'Ok') or \
+                           (isinstance(cancel_response, dict) and cancel_response.get('stat') == 'Ok'):
+                            logger.info(f"cancel_all_orders_api - Successfully canceled order: {order_id}")
+                            return order_id, None
                         else:
-                            logger.error(f"cancel_all_orders_api - Failed to cancel order {order_id}: Bad status code {status_code}")
-                            failed_cancellations.append({"orderId": order_id, "error": f"Bad status code: {status_code}"})
-                    except Exception as e:
-                        logger.error(f"cancel_all_orders_api - Exception while cancelling order {order_id}: {str(e)}")
-                        failed_cancellations.append({"orderId": order_id, "error": str(e)})
+                            error_msg = "Unknown error structure"
+                            if isinstance(cancel_response, list) and len(cancel_response) > 0:
+                                error_msg = cancel_response[0].get('data', {}).get('msg', 'Unknown error')
+                            elif isinstance(cancel_response, dict):
+                                error_msg = cancel_response.get('data', {}).get('msg', 'Unknown error')
+
+                            logger.error(f"cancel_all_orders_api - Failed to cancel order {order_id}: {error_msg}")
+                            return None, {"orderId": order_id, "error": error_msg}
+                    else:
+                        logger.error(f"cancel_all_orders_api - Failed to cancel order {order_id}: Bad status code {status_code}")
+                        return None, {"orderId": order_id, "error": f"Bad status code: {status_code}"}
+                except Exception as e:
+                    logger.error(f"cancel_all_orders_api - Exception while cancelling order {order_id}: {str(e)}")
+                    return None, {"orderId": order_id, "error": str(e)}
+
+            # Cancel concurrently, within the broker's order limits
+            report = run_order_batch(
+                'tradejini', 'cancel_all', [OrderTask(order_id, lambda order_id=order_id: cancel_one(order_id), PRIORITY_CANCEL) for order_id in order_ids],
+                succeeded=lambda response: response[0] is not None)
+            for result in report.results:
+                canceled_id, failure = result['response']
+                if canceled_id is not None:
+                    canceled_orders.append(canceled_id)
+                else:
+                    failed_cancellations.append(failure)
             
             message = f"Canceled {len(canceled_orders)} orders. Failed to cancel {len(failed_cancellations)} orders."
             logger.info(f"cancel_all_orders_api - {message}")
@@ -6,6 +6,8 @@ from database.auth_db import get_auth_token
 from database.token_db import get_token, get_br_symbol, get_symbol
 from broker.upstox.mapping.transform_data import transform_data, map_product_type, reverse_map_product_type, transform_modify_order_data
 from utils.logging import get_logger
+from utils.order_state import get_cached_book
+from utils.order_batch import cancel_orders, close_positions, close_positions_failed
 
 logger = get_logger(__name__)
 
@@ -92,7 +94,7 @@ def get_open_position(tradingsymbol, exchange, product, auth):
     logger.debug(f"Getting open position for {tradingsymbol} on {exchange} with product {product}")
     try:
         br_symbol = get_br_symbol(tradingsymbol, exchange)
-        positions_data = get_positions(auth)
+        positions_data = get_cached_book('positions', get_positions, auth)
         net_qty = '0'
 
         if positions_data and positions_data.get('status') == 'success' and positions_data.get('data'):
@@ -227,6 +229,7 @@ def close_all_positions(current_api_key, auth):
             logger.info("No open positions found to close.")
             return {"message": "No Open Positions Found"}, 200
 
+        exit_orders = []
         for position in positions_response['data']:
             if int(position.get('quantity', 0)) == 0:
                 continue
@@ -250,8 +253,12 @@ def close_all_positions(current_api_key, auth):
                 "quantity": str(quantity)
             }
             logger.debug(f"Closing position with payload: {place_order_payload}")
-            _, api_response, _ = place_order_api(place_order_payload, auth)
-            logger.info(f"Close position response for {symbol}: {api_response}")
+            exit_orders.append(place_order_payload)
+
+        # Square off concurrently, within the broker's order limits
+        report = close_positions('upstox', exit_orders, lambda payload: place_order_api(payload, auth))
+        if report.failed:
+            return close_positions_failed(report)
 
         logger.info("Successfully initiated closing of all open positions.")
         return {'status': 'success', "message": "All Open Positions SquaredOff"}, 200
@@ -330,15 +337,9 @@ def cancel_all_orders_api(data, auth):
             return [], []
 
         logger.debug(f"Found {len(orders_to_cancel)} orders to cancel: {[o['order_id'] for o in orders_to_cancel]}")
-        canceled_orders, failed_cancellations = [], []
-
-        for order in orders_to_cancel:
-            orderid = order['order_id']
-            cancel_response, status_code = cancel_order(orderid, auth)
-            if status_code == 200:
-                canceled_orders.append(orderid)
-            else:
-                failed_cancellations.append(orderid)
+        canceled_orders, failed_cancellations = cancel_orders(
+            'upstox', [order['order_id'] for order in orders_to_cancel],
+            lambda orderid: cancel_order(orderid, auth))
         
         logger.info(f"Canceled {len(canceled_orders)} orders. Failed to cancel {len(failed_cancellations)} orders.")
         return canceled_orders, failed_cancellations
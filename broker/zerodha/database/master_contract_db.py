@@ -15,6 +15,9 @@ from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from database.auth_db import get_auth_token
 from extensions import socketio  # Import SocketIO
+from database.master_contract_utils import (
+    copy_symtokens, derivative_symbols, format_expiry, rename_index_symbols
+)
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -57,27 +60,7 @@ def delete_symtoken_table():
     db_session.commit()
 
 def copy_from_dataframe(df):
-    logger.info("Performing Bulk Insert")
-    # Convert DataFrame to a list of dictionaries
-    data_dict = df.to_dict(orient='records')
-
-    # Retrieve existing tokens to filter them out from the insert
-    existing_tokens = {result.token for result in db_session.query(SymToken.token).all()}
-
-    # Filter out data_dict entries with tokens that already exist
-    filtered_data_dict = [row for row in data_dict if row['token'] not in existing_tokens]
-
-    # Insert in bulk the filtered records
-    try:
-        if filtered_data_dict:  # Proceed only if there's anything to insert
-            db_session.bulk_insert_mappings(SymToken, filtered_data_dict)
-            db_session.commit()
-            logger.info(f"Bulk insert completed successfully with {len(filtered_data_dict)} new records.")
-        else:
-            logger.info("No new records to insert.")
-    except Exception as e:
-        logger.error(f"Error during bulk insert: {e}")
-        db_session.rollback()
+    copy_symtokens(db_session, SymToken, df)
 
 
 def download_csv_zerodha_data(output_path):
@@ -133,27 +116,6 @@ def download_csv_zerodha_data(output_path):
         raise
 
 
-def reformat_symbol(row):
-    symbol = row['symbol']
-    instrument_type = row['instrumenttype']
-    
-    if instrument_type == 'FUT':
-        # For FUT, remove the spaces and append 'FUT' at the end
-        parts = symbol.split(' ')
-        if len(parts) == 5:  # Make sure the symbol has the correct format
-            symbol = parts[0] + parts[2] + parts[3] + parts[4] + parts[1]
-    elif instrument_type in ['CE', 'PE']:
-        # For CE/PE, rearrange the parts and remove spaces
-        parts = symbol.split(' ')
-        if len(parts) == 6:  # Make sure the symbol has the correct format
-            symbol = parts[0] + parts[3] + parts[4] + parts[5] + parts[1] + parts[2]
-    else:
-        symbol = symbol  # No change for other instrument types
-
-    return symbol
-
-
-
 def process_zerodha_csv(path):
     """
     Processes the Zerodha CSV file to fit the existing database schema and performs exchange name mapping.
@@ -184,7 +146,7 @@ def process_zerodha_csv(path):
     df.loc[(df['segment'] == 'INDICES') & (df['exchange'] == 'CDS'), 'exchange'] = 'CDS_INDEX'
 
     # Format expiry date
-    df['expiry'] = pd.to_datetime(df['expiry']).dt.strftime('%d-%b-%y').str.upper()
+    df['expiry'] = format_expiry(df['expiry']).fillna('')
 
     # Combine instrument_token and exchange_token
     df['token'] = df['instrument_token'].astype(str) + '::::' + df['exchange_token'].astype(str)
@@ -204,34 +166,14 @@ def process_zerodha_csv(path):
     })
 
     df['brsymbol'] = df['symbol']
-    df['symbol'] = df.apply(reformat_symbol, axis=1)
     df['brexchange'] = df['exchange']
 
-    # Fill NaN values in the 'expiry' column with an empty string
-    df['expiry'] = df['expiry'].fillna('')
-    
-    # Futures Symbol Update 
-    df.loc[(df['instrumenttype'] == 'FUT'), 'symbol'] = df['name'] + df['expiry'].str.replace('-', '', regex=False) + 'FUT'
-    
-    # Options Symbol Update 
-
-    def format_strike(strike):
-        # Convert the string to a float, then to an integer, and finally back to a string.
-        return str(int(float(strike)))
-
+    # Futures and options symbols (NAME + DDMMMYY + FUT / NAME + DDMMMYY + STRIKE + CE/PE),
+    # strikes are truncated to whole numbers as Kite symbols have always been mapped
+    derivatives = derivative_symbols(df['name'], df['expiry'], df['instrumenttype'], np.trunc(df['strike']))
+    df['symbol'] = derivatives.fillna(df['symbol'])
 
-    df.loc[(df['instrumenttype'] == 'CE'), 'symbol'] = df['name'] + df['expiry'].str.replace('-', '', regex=False) + df['strike'].apply(format_strike) + df['instrumenttype']
-    df.loc[(df['instrumenttype'] == 'PE'), 'symbol'] = df['name'] + df['expiry'].str.replace('-', '', regex=False) + df['strike'].apply(format_strike) + df['instrumenttype']
-
-    df['symbol'] = df['symbol'].replace({
-    'NIFTY 50': 'NIFTY',
-    'NIFTY NEXT 50': 'NIFTYNXT50',
-    'NIFTY FIN SERVICE': 'FINNIFTY',
-    'NIFTY BANK': 'BANKNIFTY',
-    'NIFTY MID SELECT': 'MIDCPNIFTY',
-    'INDIA VIX': 'INDIAVIX',
-    'SNSX50': 'SENSEX50'
-    })
+    df['symbol'] = rename_index_symbols(df['symbol'])
 
     return df
     
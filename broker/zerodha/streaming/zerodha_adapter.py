@@ -14,7 +14,7 @@ import time
 from typing import Dict, List, Optional, Set, Any, Callable
 
 from websocket_proxy.base_adapter import BaseBrokerWebSocketAdapter
-from database.token_db import get_token
+from database.token_db import get_token, get_tokens_bulk
 from database.auth_db import get_auth_token
 
 # Import the WebSocket client
@@ -26,6 +26,8 @@ class ZerodhaWebSocketAdapter(BaseBrokerWebSocketAdapter):
     Properly implements OpenAlgo WebSocket proxy interface with correct topic formatting.
     """
     
+    max_instruments_per_frame = ZerodhaWebSocket.MAX_TOKENS_PER_SUBSCRIBE
+    
     def __init__(self):
         """Initialize the Zerodha WebSocket adapter"""
         super().__init__()
@@ -253,25 +255,9 @@ class ZerodhaWebSocketAdapter(BaseBrokerWebSocketAdapter):
             if not token_data:
                 return {'status': 'error', 'message': f'Token not found for {symbol} on {exchange}'}
             
-            # Extract token (handle different formats)
-            if isinstance(token_data, dict):
-                token = token_data.get('token')
-            elif isinstance(token_data, str):
-                # Handle formats like "738561::::2885" or "738561:2885"
-                if '::::' in token_data:
-                    token = token_data.split('::::')[0]
-                elif ':' in token_data:
-                    token = token_data.split(':')[0]
-                else:
-                    token = token_data
-            else:
-                token = str(token_data)
-            
-            # Convert to integer
-            try:
-                token = int(token)
-            except ValueError:
-                return {'status': 'error', 'message': f'Invalid token format: {token}'}
+            token = self._parse_token(token_data)
+            if token is None:
+                return {'status': 'error', 'message': f'Invalid token format: {token_data}'}
             
             # Map mode to Zerodha format
             zerodha_mode = self.mode_map.get(mode, ZerodhaWebSocket.MODE_QUOTE)
@@ -319,6 +305,113 @@ class ZerodhaWebSocketAdapter(BaseBrokerWebSocketAdapter):
             self.logger.error(f"Error subscribing to {exchange}:{symbol}: {e}")
             return {'status': 'error', 'message': str(e)}
     
+    def subscribe_bulk(self, instruments: List[tuple], mode: int = 2, depth_level: int = 5) -> List[Dict[str, Any]]:
+        """
+        Subscribe to many instruments with one token lookup pass and a single
+        queued token list; the WebSocket client sends it in frames of
+        MAX_TOKENS_PER_SUBSCRIBE tokens
+        
+        Args:
+            instruments: (symbol, exchange) pairs
+            mode: Subscription mode (1=LTP, 2=Quote, 3=Full)
+            depth_level: Market depth level (for compatibility, not used in Zerodha)
+        """
+        if not self.ws_client:
+            return [{'status': 'error', 'message': 'WebSocket client not initialized'}] * len(instruments)
+        
+        if not self.running:
+            return [{'status': 'error', 'message': 'WebSocket not connected. Call connect() first.'}] * len(instruments)
+        
+        zerodha_mode = self.mode_map.get(mode, ZerodhaWebSocket.MODE_QUOTE)
+        responses = []
+        tokens = []
+        token_exchange_map = {}
+        
+        with self.lock:
+            capacity = ZerodhaWebSocket.MAX_INSTRUMENTS_PER_CONNECTION - len(self.subscribed_symbols)
+            
+            for (symbol, exchange), token_data in zip(instruments, get_tokens_bulk(list(instruments))):
+                token = self._parse_token(token_data) if token_data else None
+                if token is None:
+                    responses.append({'status': 'error', 'message': f'Token not found for {symbol} on {exchange}'})
+                    continue
+                
+                key = f"{exchange}:{symbol}"
+                if key not in self.subscribed_symbols:
+                    if capacity <= 0:
+                        responses.append({
+                            'status': 'error',
+                            'message': f'Zerodha allows {ZerodhaWebSocket.MAX_INSTRUMENTS_PER_CONNECTION} instruments per connection'
+                        })
+                        continue
+                    capacity -= 1
+                
+                subscription_exchange = 'NSE' if exchange == 'NSE_INDEX' else exchange
+                self.subscribed_symbols[key] = {
+                    'exchange': exchange,
+                    'symbol': symbol,
+                    'token': token,
+                    'mode': mode,
+                    'mapped_exchange': subscription_exchange
+                }
+                self.token_to_symbol[token] = (symbol, exchange)
+                token_exchange_map[token] = exchange
+                tokens.append(token)
+                responses.append({'status': 'success', 'message': f'Subscribed to {symbol}'})
+        
+        if tokens:
+            self.ws_client.set_token_exchange_mapping(token_exchange_map)
+            self.ws_client.subscribe_tokens(tokens, zerodha_mode)
+            self.logger.info(f"📦 Bulk subscribing {len(tokens)} tokens in {zerodha_mode} mode")
+        
+        return responses
+    
+    def unsubscribe_bulk(self, instruments: List[tuple], mode: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Unsubscribe from many instruments, sending the tokens in frames of MAX_TOKENS_PER_SUBSCRIBE"""
+        responses = []
+        tokens = []
+        
+        with self.lock:
+            for symbol, exchange in instruments:
+                subscription = self.subscribed_symbols.pop(f"{exchange}:{symbol}", None)
+                if subscription is None:
+                    responses.append({'status': 'error', 'message': f'Not subscribed to {symbol}'})
+                    continue
+                
+                self.token_to_symbol.pop(subscription['token'], None)
+                tokens.append(subscription['token'])
+                responses.append({'status': 'success', 'message': f'Unsubscribed from {symbol}'})
+        
+        if tokens and self.ws_client:
+            for frame in self.iter_frames(tokens):
+                asyncio.run_coroutine_threadsafe(self.ws_client.unsubscribe(frame), self.ws_client.loop)
+            self.logger.info(f"✅ Unsubscribed from {len(tokens)} instruments")
+        
+        return responses
+    
+    @staticmethod
+    def _parse_token(token_data) -> Optional[int]:
+        """Instrument token as an integer, None when it cannot be parsed"""
+        # Extract token (handle different formats)
+        if isinstance(token_data, dict):
+            token = token_data.get('token')
+        elif isinstance(token_data, str):
+            # Handle formats like "738561::::2885" or "738561:2885"
+            if '::::' in token_data:
+                token = token_data.split('::::')[0]
+            elif ':' in token_data:
+                token = token_data.split(':')[0]
+            else:
+                token = token_data
+        else:
+            token = str(token_data)
+        
+        # Convert to integer
+        try:
+            return int(token)
+        except (TypeError, ValueError):
+            return None
+    
     def unsubscribe(self, symbol: str, exchange: str, mode: Optional[int] = None, depth_level: Optional[int] = None) -> Dict[str, Any]:
         """Unsubscribe from market data for a symbol
         
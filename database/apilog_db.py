@@ -10,6 +10,7 @@ from sqlalchemy.pool import NullPool
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import pytz
+from database.log_writer import get_log_writer
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -65,10 +66,11 @@ def async_log_order(api_type,request_data, response_data):
         ist = pytz.timezone('Asia/Kolkata')
         now_ist = datetime.now(ist)
 
-        order_log = OrderLog(api_type=api_type,request_data=request_json, response_data=response_json, created_at=now_ist)
-        db_session.add(order_log)
-        db_session.commit()
+        get_log_writer().enqueue(db_session, OrderLog, {
+            'api_type': api_type,
+            'request_data': request_json,
+            'response_data': response_json,
+            'created_at': now_ist
+        })
     except Exception as e:
         logger.error(f"Error saving order log: {e}")
-    finally:
-        db_session.remove()
@@ -2,7 +2,9 @@
 
 import os
 import base64
-from sqlalchemy import create_engine, UniqueConstraint
+import hashlib
+import hmac
+from sqlalchemy import create_engine, UniqueConstraint, inspect, text
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean
@@ -128,12 +130,54 @@ class ApiKeys(Base):
     user_id = Column(String, nullable=False, unique=True)
     api_key_hash = Column(Text, nullable=False)  # For verification
     api_key_encrypted = Column(Text, nullable=False)  # For retrieval
+    api_key_fingerprint = Column(String(64), nullable=True, index=True)  # For lookup (HMAC-SHA256)
     created_at = Column(DateTime(timezone=True), default=func.now())
     order_mode = Column(String(20), default='auto')  # 'auto' or 'semi_auto'
 
 def init_db():
     from database.db_init_helper import init_db_with_logging
     init_db_with_logging(Base, engine, "Auth DB", logger)
+    ensure_api_key_fingerprints()
+
+def get_api_key_fingerprint(api_key):
+    """
+    Keyed fingerprint of an API key (HMAC-SHA256 with the pepper).
+    Indexed in api_keys so verification looks up one row instead of trying every hash.
+    """
+    return hmac.new(PEPPER.encode(), api_key.encode(), hashlib.sha256).hexdigest()
+
+def ensure_api_key_fingerprints():
+    """
+    Add the fingerprint column to an existing api_keys table and fill it for
+    keys stored before fingerprints existed (decrypted from api_key_encrypted).
+
+    upgrade/migrate_api_key_fingerprint.py does the same as a migration; this
+    startup check is the fallback for databases it has not been run on.
+    """
+    try:
+        columns = [col['name'] for col in inspect(engine).get_columns('api_keys')]
+        if 'api_key_fingerprint' not in columns:
+            with engine.connect() as conn:
+                conn.execute(text("ALTER TABLE api_keys ADD COLUMN api_key_fingerprint VARCHAR(64)"))
+                conn.execute(text(
+                    "CREATE INDEX ix_api_keys_api_key_fingerprint ON api_keys (api_key_fingerprint)"
+                ))
+                conn.commit()
+            logger.info("Auth DB: Added api_key_fingerprint column to api_keys")
+
+        pending = ApiKeys.query.filter(ApiKeys.api_key_fingerprint.is_(None)).all()
+        for api_key_obj in pending:
+            api_key = decrypt_token(api_key_obj.api_key_encrypted)
+            if api_key:
+                api_key_obj.api_key_fingerprint = get_api_key_fingerprint(api_key)
+        if pending:
+            db_session.commit()
+            logger.info(f"Auth DB: Fingerprinted {len(pending)} API key(s)")
+    except Exception as e:
+        logger.error(f"Error populating API key fingerprints: {e}")
+        db_session.rollback()
+    finally:
+        db_session.remove()
 
 def encrypt_token(token):
     """Encrypt auth token"""
@@ -301,15 +345,20 @@ def upsert_api_key(user_id, api_key):
     # Encrypt for retrieval
     encrypted_key = encrypt_token(api_key)
 
+    # Fingerprint for lookup
+    fingerprint = get_api_key_fingerprint(api_key)
+
     api_key_obj = ApiKeys.query.filter_by(user_id=user_id).first()
     if api_key_obj:
         api_key_obj.api_key_hash = hashed_key
         api_key_obj.api_key_encrypted = encrypted_key
+        api_key_obj.api_key_fingerprint = fingerprint
     else:
         api_key_obj = ApiKeys(
             user_id=user_id,
             api_key_hash=hashed_key,
-            api_key_encrypted=encrypted_key
+            api_key_encrypted=encrypted_key,
+            api_key_fingerprint=fingerprint
         )
         db_session.add(api_key_obj)
     db_session.commit()
@@ -349,11 +398,12 @@ def verify_api_key(provided_api_key):
     - Invalid keys cached for 5min (prevents brute force)
     - Valid keys cached for 1hr (balances security vs performance)
     - Cache invalidated on key regeneration
+    - Cache miss costs one indexed fingerprint lookup and at most one Argon2
+      verification, independent of the number of users
     """
     from flask import request, has_request_context
     from utils.ip_helper import get_real_ip
     from database.traffic_db import InvalidAPIKeyTracker
-    import hashlib
 
     # Generate secure cache key (SHA256 hash of API key)
     # Security: Never store plaintext API key in cache
@@ -370,16 +420,23 @@ def verify_api_key(provided_api_key):
         logger.debug(f"API key verified from cache for user_id: {user_id}")
         return user_id
 
-    # Step 3: Cache miss - perform expensive Argon2 verification
+    # Step 3: Cache miss - find the key by fingerprint, then verify its Argon2 hash
     peppered_key = provided_api_key + PEPPER
     try:
-        # Query all API keys
-        api_keys = ApiKeys.query.all()
+        fingerprint = get_api_key_fingerprint(provided_api_key)
+        api_key_obj = ApiKeys.query.filter_by(api_key_fingerprint=fingerprint).first()
+        if api_key_obj:
+            candidates = [api_key_obj]
+        else:
+            # Keys not fingerprinted yet (stored before the column existed)
+            candidates = ApiKeys.query.filter(ApiKeys.api_key_fingerprint.is_(None)).all()
 
-        # Try to verify against each stored hash
-        for api_key_obj in api_keys:
+        for api_key_obj in candidates:
             try:
                 ph.verify(api_key_obj.api_key_hash, peppered_key)
+                if api_key_obj.api_key_fingerprint is None:
+                    api_key_obj.api_key_fingerprint = fingerprint
+                    db_session.commit()
                 # Valid key found - cache it
                 verified_api_key_cache[cache_key] = api_key_obj.user_id
                 logger.debug(f"API key verified and cached for user_id: {api_key_obj.user_id}")
@@ -451,8 +508,6 @@ def get_auth_token_broker(provided_api_key, include_feed_token=False):
     - Cache cleared on credential changes
     - TTL based on session expiry time
     """
-    import hashlib
-
     # Generate cache key
     cache_key = f"{hashlib.sha256(provided_api_key.encode()).hexdigest()}_{include_feed_token}"
 
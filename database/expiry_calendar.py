@@ -0,0 +1,175 @@
+"""
+Expiry calendar of the active broker's derivatives
+
+Built once from the symbol cache when the master contract loads: for every
+underlying (exchange, name) the futures and options expiries, parsed, sorted
+and classified as weekly or monthly. Expiry lookups and "nearest N expiries"
+queries are then answered from memory instead of scanning SymToken rows.
+
+An expiry is monthly when it is the last expiry of its calendar month for that
+underlying and instrument kind, weekly otherwise.
+"""
+
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from database.symbol_table import SymbolTable
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+FUTURES = 'futures'
+OPTIONS = 'options'
+
+WEEKLY = 'weekly'
+MONTHLY = 'monthly'
+
+# Instrument types of each kind across exchanges (NFO/BFO, MCX, CDS)
+INSTRUMENT_KINDS = {
+    'FUT': FUTURES, 'FUTIDX': FUTURES, 'FUTSTK': FUTURES, 'FUTCOM': FUTURES,
+    'FUTENR': FUTURES, 'FUTCUR': FUTURES, 'FUTIRC': FUTURES,
+    'CE': OPTIONS, 'PE': OPTIONS, 'OPTIDX': OPTIONS, 'OPTSTK': OPTIONS,
+    'OPTFUT': OPTIONS, 'OPTCUR': OPTIONS, 'OPTIRC': OPTIONS,
+}
+
+
+@dataclass(frozen=True)
+class Expiry:
+    """One expiry of an underlying"""
+    expiry: str       # As stored in the master contract (DD-MMM-YY)
+    expiry_date: date
+    expiry_type: str  # weekly or monthly
+
+    @property
+    def code(self) -> str:
+        """Expiry as used in symbols (DDMMMYY)"""
+        return self.expiry.replace('-', '').upper()
+
+
+def parse_expiry(expiry: str) -> Optional[date]:
+    """Date of a DD-MMM-YY (or DD-MMM-YYYY / DDMMMYY) expiry, None when unparseable"""
+    for date_format in ('%d-%b-%y', '%d-%b-%Y', '%d%b%y'):
+        try:
+            return datetime.strptime(expiry, date_format).date()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def classify_expiries(expiries: Iterable[str]) -> List[Expiry]:
+    """Parse, sort and classify expiry strings of one underlying and kind (unparseable ones dropped)"""
+    parsed = sorted(
+        (expiry_date, expiry) for expiry, expiry_date in ((e, parse_expiry(e)) for e in set(expiries))
+        if expiry_date is not None
+    )
+    result = []
+    for index, (expiry_date, expiry) in enumerate(parsed):
+        following = parsed[index + 1][0] if index + 1 < len(parsed) else None
+        monthly = following is None or (following.year, following.month) != (expiry_date.year, expiry_date.month)
+        result.append(Expiry(expiry, expiry_date, MONTHLY if monthly else WEEKLY))
+    return result
+
+
+def select_expiries(expiries: List[Expiry], count: Optional[int] = None, expiry_type: Optional[str] = None,
+                    on: Optional[date] = None) -> List[Expiry]:
+    """
+    Filter sorted expiries by type and, with count, keep the next count
+    expiries on or after on (today by default)
+    """
+    if expiry_type:
+        expiries = [e for e in expiries if e.expiry_type == expiry_type]
+    if count is not None:
+        start = bisect_left([e.expiry_date for e in expiries], on or date.today())
+        expiries = expiries[start:start + count]
+    return expiries
+
+
+class ExpiryCalendar:
+    """Sorted, classified expiries per (exchange, underlying, kind)"""
+
+    def __init__(self, table: SymbolTable):
+        self.table = table
+        raw: Dict[Tuple[str, str, str], set] = defaultdict(set)
+        for exchange, name, expiry, instrumenttype in table.chain_combinations():
+            kind = INSTRUMENT_KINDS.get(instrumenttype)
+            if kind and expiry:
+                raw[(exchange, name, kind)].add(expiry)
+
+        self._expiries: Dict[Tuple[str, str, str], List[Expiry]] = {}
+        self._dates: Dict[Tuple[str, str, str], List[date]] = {}
+        for key, expiries in raw.items():
+            classified = classify_expiries(expiries)
+            if len(classified) < len(expiries):
+                logger.debug(f"Skipped {len(expiries) - len(classified)} unparseable expiries of {key}")
+            self._expiries[key] = classified
+            self._dates[key] = [e.expiry_date for e in classified]
+
+        self.underlyings = len({(exchange, name) for exchange, name, _ in self._expiries})
+
+    def expiries(self, name: str, exchange: str, kind: str = OPTIONS,
+                 expiry_type: Optional[str] = None) -> List[Expiry]:
+        """All expiries of an underlying in chronological order"""
+        expiries = self._expiries.get((exchange, name, kind), [])
+        return [e for e in expiries if e.expiry_type == expiry_type] if expiry_type else list(expiries)
+
+    def nearest(self, name: str, exchange: str, kind: str = OPTIONS, count: int = 1,
+                expiry_type: Optional[str] = None, on: Optional[date] = None) -> List[Expiry]:
+        """The next count expiries on or after on (today by default)"""
+        key = (exchange, name, kind)
+        if expiry_type:
+            return select_expiries(self._expiries.get(key, []), count, expiry_type, on)
+        start = bisect_left(self._dates.get(key, []), on or date.today())
+        return self._expiries.get(key, [])[start:start + count]
+
+    def find(self, name: str, exchange: str, expiry: str, kind: str = OPTIONS) -> Optional[Expiry]:
+        """The expiry with the given date (DD-MMM-YY or DDMMMYY), None when not listed"""
+        expiry_date = parse_expiry(expiry)
+        key = (exchange, name, kind)
+        dates = self._dates.get(key, [])
+        index = bisect_left(dates, expiry_date) if expiry_date else len(dates)
+        if index < len(dates) and dates[index] == expiry_date:
+            return self._expiries[key][index]
+        return None
+
+    def has_underlying(self, name: str, exchange: str, kind: str = OPTIONS) -> bool:
+        return (exchange, name, kind) in self._expiries
+
+
+_calendar: Optional[ExpiryCalendar] = None
+_calendar_lock = threading.Lock()
+
+
+def build_expiry_calendar(table: SymbolTable) -> ExpiryCalendar:
+    """Build the calendar for a symbol table and make it the active one"""
+    global _calendar
+    calendar = ExpiryCalendar(table)
+    with _calendar_lock:
+        _calendar = calendar
+    logger.info(f"Expiry calendar built for {calendar.underlyings} underlyings")
+    return calendar
+
+
+def get_expiry_calendar() -> Optional[ExpiryCalendar]:
+    """
+    The calendar of the loaded symbol cache, rebuilt if the cache was reloaded
+    without the master contract hook. None when the symbol cache is not loaded.
+    """
+    from database.token_db_enhanced import get_cache
+
+    cache = get_cache()
+    if not (cache.cache_loaded and cache.is_cache_valid()):
+        return None
+    calendar = _calendar
+    if calendar is None or calendar.table is not cache.table:
+        calendar = build_expiry_calendar(cache.table)
+    return calendar
+
+
+def clear_expiry_calendar() -> None:
+    global _calendar
+    with _calendar_lock:
+        _calendar = None
@@ -0,0 +1,238 @@
+# database/history_cache_db.py
+"""
+Local columnar cache of historical candles, stored in DuckDB.
+
+Candles are keyed by (broker, exchange, symbol, interval). Alongside the candles the
+cache records which calendar days (IST) have been downloaded. A request therefore
+only needs the days that are not covered yet. Only completed days are cached; the
+current day is always fetched from the broker.
+
+A downloaded range without any candles (holidays, days before listing, or a
+broker that returned nothing) is only trusted for HISTORY_CACHE_EMPTY_TTL_HOURS
+(default 24), after which it is downloaded again.
+"""
+
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+import pandas as pd
+import pytz
+
+from utils.logging import get_logger
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+HISTORY_CACHE_PATH = os.getenv('HISTORY_CACHE_PATH', 'db/history_cache.duckdb')
+HISTORY_CACHE_ENABLED = os.getenv('HISTORY_CACHE_ENABLED', 'True').lower() == 'true'
+HISTORY_CACHE_EMPTY_TTL = float(os.getenv('HISTORY_CACHE_EMPTY_TTL_HOURS', '24')) * 3600
+
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'oi']
+
+IST = pytz.timezone('Asia/Kolkata')
+
+DateRange = Tuple[date, date]
+
+
+def merge_ranges(ranges: List[DateRange]) -> List[DateRange]:
+    """Merge overlapping and adjacent day ranges"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_ranges(start: date, end: date, covered: List[DateRange]) -> List[DateRange]:
+    """Return the parts of [start, end] that are not inside the covered ranges"""
+    missing = []
+    cursor = start
+    for covered_start, covered_end in merge_ranges(covered):
+        if covered_end < cursor:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > cursor:
+            missing.append((cursor, covered_start - timedelta(days=1)))
+        cursor = max(cursor, covered_end + timedelta(days=1))
+    if cursor <= end:
+        missing.append((cursor, end))
+    return missing
+
+
+def split_range(start: date, end: date, days: int) -> List[DateRange]:
+    """Split [start, end] into consecutive chunks of at most `days` days"""
+    chunks = []
+    while start <= end:
+        chunk_end = min(start + timedelta(days=days - 1), end)
+        chunks.append((start, chunk_end))
+        start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def day_bounds(start: date, end: date) -> Tuple[int, int]:
+    """Epoch seconds of the first and last second of an IST day range"""
+    first = IST.localize(datetime(start.year, start.month, start.day))
+    last = IST.localize(datetime(end.year, end.month, end.day)) + timedelta(days=1)
+    return int(first.timestamp()), int(last.timestamp()) - 1
+
+
+class HistoryCache:
+    """Thread-safe DuckDB store of candles and downloaded day ranges"""
+
+    def __init__(self, path: str = HISTORY_CACHE_PATH, empty_ttl: float = HISTORY_CACHE_EMPTY_TTL):
+        self.path = path
+        self.empty_ttl = empty_ttl
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = duckdb.connect(self.path)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS candles (
+                    broker VARCHAR, exchange VARCHAR, symbol VARCHAR, interval VARCHAR,
+                    timestamp BIGINT, open DOUBLE, high DOUBLE, low DOUBLE, close DOUBLE,
+                    volume BIGINT, oi BIGINT
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS coverage (
+                    broker VARCHAR, exchange VARCHAR, symbol VARCHAR, interval VARCHAR,
+                    start_date DATE, end_date DATE
+                )
+            """)
+            # Ranges that returned no candles, covered until expires_at (epoch seconds)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS empty_coverage (
+                    broker VARCHAR, exchange VARCHAR, symbol VARCHAR, interval VARCHAR,
+                    start_date DATE, end_date DATE, expires_at BIGINT
+                )
+            """)
+            logger.info(f"History cache opened at {self.path}")
+        return self._conn
+
+    def _coverage(self, conn, key) -> List[DateRange]:
+        rows = conn.execute(
+            "SELECT start_date, end_date FROM coverage "
+            "WHERE broker = ? AND exchange = ? AND symbol = ? AND interval = ?",
+            list(key)
+        ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def _empty_coverage(self, conn, key) -> List[DateRange]:
+        rows = conn.execute(
+            "SELECT start_date, end_date FROM empty_coverage "
+            "WHERE broker = ? AND exchange = ? AND symbol = ? AND interval = ? AND expires_at > ?",
+            list(key) + [int(time.time())]
+        ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def missing_ranges(self, key, start: date, end: date) -> List[DateRange]:
+        """Day ranges within [start, end] that have not been downloaded yet"""
+        with self._lock:
+            conn = self._connect()
+            return subtract_ranges(start, end, self._coverage(conn, key) + self._empty_coverage(conn, key))
+
+    def store(self, key, start: date, end: date, df: pd.DataFrame) -> None:
+        """
+        Replace the candles of a downloaded day range and mark it covered
+
+        A range without candles is covered for empty_ttl seconds only, so a
+        broker that briefly returned nothing does not leave a permanent gap.
+        """
+        low, high = day_bounds(start, end)
+        frame = df.reindex(columns=CANDLE_COLUMNS)
+        frame['oi'] = frame['oi'].fillna(0)
+        frame = frame[(frame['timestamp'] >= low) & (frame['timestamp'] <= high)]
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                conn.execute(
+                    "DELETE FROM candles WHERE broker = ? AND exchange = ? AND symbol = ? "
+                    "AND interval = ? AND timestamp BETWEEN ? AND ?",
+                    list(key) + [low, high]
+                )
+                if len(frame):
+                    conn.register('incoming_candles', frame)
+                    conn.execute(
+                        "INSERT INTO candles SELECT ?, ?, ?, ?, timestamp, open, high, low, close, "
+                        "CAST(volume AS BIGINT), CAST(oi AS BIGINT) FROM incoming_candles",
+                        list(key)
+                    )
+                    conn.unregister('incoming_candles')
+
+                if len(frame):
+                    covered = merge_ranges(self._coverage(conn, key) + [(start, end)])
+                    conn.execute(
+                        "DELETE FROM coverage WHERE broker = ? AND exchange = ? AND symbol = ? AND interval = ?",
+                        list(key)
+                    )
+                    conn.executemany(
+                        "INSERT INTO coverage VALUES (?, ?, ?, ?, ?, ?)",
+                        [list(key) + [range_start, range_end] for range_start, range_end in covered]
+                    )
+                else:
+                    now = int(time.time())
+                    conn.execute(
+                        "DELETE FROM empty_coverage WHERE broker = ? AND exchange = ? AND symbol = ? "
+                        "AND interval = ? AND (expires_at <= ? OR (start_date = ? AND end_date = ?))",
+                        list(key) + [now, start, end]
+                    )
+                    conn.execute(
+                        "INSERT INTO empty_coverage VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        list(key) + [start, end, now + int(self.empty_ttl)]
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def load(self, key, start: date, end: date) -> pd.DataFrame:
+        """Cached candles of [start, end] ordered by timestamp"""
+        low, high = day_bounds(start, end)
+        with self._lock:
+            return self._connect().execute(
+                "SELECT timestamp, open, high, low, close, volume, oi FROM candles "
+                "WHERE broker = ? AND exchange = ? AND symbol = ? AND interval = ? "
+                "AND timestamp BETWEEN ? AND ? ORDER BY timestamp",
+                list(key) + [low, high]
+            ).df()
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM candles")
+            conn.execute("DELETE FROM coverage")
+            conn.execute("DELETE FROM empty_coverage")
+
+
+_history_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_history_cache() -> Optional[HistoryCache]:
+    """Return the shared HistoryCache, or None when caching is disabled or DuckDB is missing"""
+    global _history_cache
+    if not HISTORY_CACHE_ENABLED or not DUCKDB_AVAILABLE:
+        return None
+    if _history_cache is None:
+        with _cache_lock:
+            if _history_cache is None:
+                _history_cache = HistoryCache()
+    return _history_cache
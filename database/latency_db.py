@@ -5,7 +5,8 @@ from sqlalchemy.sql import func
 from sqlalchemy.pool import NullPool
 import os
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
+from database.log_writer import get_log_writer
 
 logger = logging.getLogger(__name__)
 
@@ -64,30 +65,27 @@ class OrderLatency(LatencyBase):
     
     @staticmethod
     def log_latency(order_id, user_id, broker, symbol, order_type, latencies, request_body, response_body, status, error=None):
-        """Log order execution latency"""
+        """Queue an order execution latency row for the buffered log writer"""
         try:
-            log = OrderLatency(
-                order_id=order_id,
-                user_id=user_id,
-                broker=broker,
-                symbol=symbol,
-                order_type=order_type,
-                rtt_ms=latencies.get('rtt', 0),
-                validation_latency_ms=latencies.get('validation', 0),
-                response_latency_ms=latencies.get('broker_response', 0),
-                overhead_ms=latencies.get('overhead', 0),
-                total_latency_ms=latencies.get('total', 0),
-                request_body=request_body,
-                response_body=response_body,
-                status=status,
-                error=error
-            )
-            latency_session.add(log)
-            latency_session.commit()
-            return True
+            return get_log_writer().enqueue(latency_session, OrderLatency, {
+                'timestamp': datetime.now(timezone.utc),
+                'order_id': order_id,
+                'user_id': user_id,
+                'broker': broker,
+                'symbol': symbol,
+                'order_type': order_type,
+                'rtt_ms': latencies.get('rtt', 0),
+                'validation_latency_ms': latencies.get('validation', 0),
+                'response_latency_ms': latencies.get('broker_response', 0),
+                'overhead_ms': latencies.get('overhead', 0),
+                'total_latency_ms': latencies.get('total', 0),
+                'request_body': request_body,
+                'response_body': response_body,
+                'status': status,
+                'error': error
+            })
         except Exception as e:
             logger.error(f"Error logging latency: {str(e)}")
-            latency_session.rollback()
             return False
 
     @staticmethod
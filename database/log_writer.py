@@ -0,0 +1,179 @@
+# database/log_writer.py
+"""
+Buffered background writer for log tables (traffic, latency, API and analyzer logs).
+
+Request threads only append a row mapping to a bounded in-memory queue. A single
+daemon thread drains the queue and writes the rows with bulk_insert_mappings, one
+commit per table every LOG_WRITER_BATCH_SIZE rows or LOG_WRITER_FLUSH_MS
+milliseconds, whichever comes first. When the queue is full new rows are dropped
+and counted rather than blocking the request. Pending rows are flushed at exit.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+_STOP = object()
+
+# Log a backpressure warning on the first drop and then every N drops
+DROP_LOG_INTERVAL = 1000
+
+
+class BufferedLogWriter:
+    """Bounded queue of log rows flushed in batches by one background thread"""
+
+    def __init__(self, max_queue_size=10000, batch_size=500, flush_interval=0.25):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.001, flush_interval)
+        self._queue = queue.Queue(maxsize=max(1, max_queue_size))
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stopped = False
+
+        # Counters
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def enqueue(self, session, model, mapping):
+        """
+        Queue one row for insertion
+
+        Args:
+            session: scoped_session bound to the model's database
+            model: Declarative model class of the target table
+            mapping: Column values of the row
+
+        Returns:
+            bool: False if the row was dropped because the queue is full or stopped
+        """
+        if self._stopped:
+            return False
+        if self._thread is None:
+            self._start()
+
+        try:
+            self._queue.put_nowait((session, model, mapping))
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % DROP_LOG_INTERVAL == 1:
+                logger.warning(f"Log writer queue full: {self.dropped} log rows dropped")
+            return False
+
+        self.enqueued += 1
+        return True
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="BufferedLogWriter")
+                self._thread.start()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._drain(batch)
+                return
+
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+                deadline = None
+
+    def _drain(self, batch):
+        """Write everything still queued"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+        for i in range(0, len(batch), self.batch_size):
+            self._write(batch[i:i + self.batch_size])
+
+    def _write(self, batch):
+        """Insert a batch with one bulk insert and commit per table"""
+        groups = {}
+        for session, model, mapping in batch:
+            groups.setdefault((session, model), []).append(mapping)
+
+        for (session, model), rows in groups.items():
+            try:
+                session.bulk_insert_mappings(model, rows)
+                session.commit()
+                self.written += len(rows)
+            except Exception as e:
+                self.failed += len(rows)
+                logger.error(f"Error writing {len(rows)} {model.__tablename__} rows: {e}")
+                try:
+                    session.rollback()
+                except Exception:
+                    pass
+            finally:
+                session.remove()
+        self.flushes += 1
+
+    def flush(self, timeout=10):
+        """Stop accepting rows and write everything queued, used at shutdown"""
+        if self._stopped:
+            return
+        self._stopped = True
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("Log writer queue full at shutdown")
+        self._thread.join(timeout=timeout)
+
+    def get_stats(self):
+        """Queue depth and row counters, served by /latency/api/log_writer"""
+        return {
+            'queued': self._queue.qsize(),
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'flushes': self.flushes,
+        }
+
+
+_log_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_log_writer():
+    """Return the process wide BufferedLogWriter configured from the environment"""
+    global _log_writer
+    if _log_writer is None:
+        with _writer_lock:
+            if _log_writer is None:
+                _log_writer = BufferedLogWriter(
+                    max_queue_size=int(os.getenv('LOG_WRITER_QUEUE_SIZE', '10000')),
+                    batch_size=int(os.getenv('LOG_WRITER_BATCH_SIZE', '500')),
+                    flush_interval=int(os.getenv('LOG_WRITER_FLUSH_MS', '250')) / 1000.0
+                )
+                atexit.register(_log_writer.flush)
+    return _log_writer
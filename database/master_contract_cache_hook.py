@@ -25,12 +25,16 @@ def load_symbols_to_cache(broker: str) -> bool:
         start_time = time.time()
         
         # Import the enhanced token_db module
-        from database.token_db_enhanced import load_cache_for_broker, get_cache_stats
+        from database.token_db_enhanced import load_cache_for_broker, get_cache_stats, get_cache
+        from database.expiry_calendar import build_expiry_calendar
         
         # Load all symbols into cache
         success = load_cache_for_broker(broker)
         
         if success:
+            # Expiry calendar from the derivatives index of the loaded symbols
+            build_expiry_calendar(get_cache().table)
+            
             load_time = time.time() - start_time
             stats = get_cache_stats()
             
@@ -109,6 +113,7 @@ def clear_cache_on_logout():
     """
     try:
         from database.token_db_enhanced import clear_cache, get_cache_stats
+        from database.expiry_calendar import clear_expiry_calendar
         
         # Get stats before clearing
         stats = get_cache_stats()
@@ -116,6 +121,7 @@ def clear_cache_on_logout():
         
         # Clear the cache
         clear_cache()
+        clear_expiry_calendar()
         
         logger.info(f"Cache cleared. Removed {symbols_cleared} symbols from memory")
         
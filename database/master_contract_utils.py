@@ -0,0 +1,187 @@
+# database/master_contract_utils.py
+"""
+Shared, vectorized helpers for building and loading broker master contracts.
+
+Every broker turns its instrument dump into the same OpenAlgo symtoken layout:
+expiries as DD-MMM-YY, futures as NAME + DDMMMYY + FUT, options as
+NAME + DDMMMYY + STRIKE + CE/PE, and exchange index names mapped to OpenAlgo
+index symbols. The helpers here work on whole pandas columns instead of
+DataFrame.apply(axis=1), and copy_symtokens loads the result with a single
+prepared INSERT executed over plain tuples instead of ORM bulk mappings.
+"""
+
+import sqlite3
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+EXPIRY_FORMAT = '%d-%b-%y'
+
+# Exchange published index names (NSE/BSE, as listed by Kite) to OpenAlgo symbols
+INDEX_SYMBOL_MAP = {
+    'NIFTY 50': 'NIFTY',
+    'NIFTY NEXT 50': 'NIFTYNXT50',
+    'NIFTY FIN SERVICE': 'FINNIFTY',
+    'NIFTY BANK': 'BANKNIFTY',
+    'NIFTY MID SELECT': 'MIDCPNIFTY',
+    'INDIA VIX': 'INDIAVIX',
+    'SNSX50': 'SENSEX50',
+}
+
+# numpy integers left inside object columns are not int subclasses, let sqlite3 bind them
+for _numpy_type in (np.int64, np.int32, np.int16, np.int8, np.bool_):
+    sqlite3.register_adapter(_numpy_type, _numpy_type.item)
+
+
+def format_expiry(expiry: pd.Series, input_format: Optional[str] = None) -> pd.Series:
+    """
+    Format expiry dates as DD-MMM-YY in upper case (25-JAN-24)
+
+    Args:
+        expiry: Dates as strings or datetimes
+        input_format: strptime format of string dates, inferred when None
+
+    Returns:
+        pd.Series: Formatted expiries, NaN where the value is missing or unparseable
+    """
+    # A dump has a few hundred distinct expiries, so parse and format each only once
+    codes, uniques = pd.factorize(expiry)
+    dates = pd.to_datetime(pd.Series(uniques), format=input_format, errors='coerce')
+    formatted = np.append(dates.dt.strftime(EXPIRY_FORMAT).str.upper().to_numpy(dtype=object), np.nan)
+    return pd.Series(formatted[codes], index=expiry.index)
+
+
+def compact_expiry(expiry: pd.Series) -> pd.Series:
+    """DD-MMM-YY expiries as the DDMMMYY used inside symbols, '' where missing"""
+    return expiry.fillna('').astype(str).str.replace('-', '', regex=False)
+
+
+def format_strike(strike: pd.Series) -> pd.Series:
+    """
+    Strike prices as they appear in symbols: whole numbers without a decimal
+    point (23500), others unchanged (83.25)
+    """
+    codes, uniques = pd.factorize(pd.to_numeric(strike, errors='coerce'))
+    values = pd.Series(uniques, dtype=float)
+    whole = values == np.floor(values)
+    formatted = values.astype(str)
+    formatted[whole] = values[whole].astype('int64').astype(str)
+    formatted = np.append(formatted.to_numpy(dtype=object), '')
+    return pd.Series(formatted[codes], index=strike.index)
+
+
+def normalize_strike(strike: pd.Series, missing: float = -1) -> pd.Series:
+    """Numeric strike column with unparseable or missing values set to `missing`"""
+    return pd.to_numeric(strike, errors='coerce').fillna(missing)
+
+
+def derivative_symbols(name: pd.Series, expiry: pd.Series, instrumenttype: pd.Series,
+                       strike: Optional[pd.Series] = None) -> pd.Series:
+    """
+    Build OpenAlgo futures and options symbols
+
+    Args:
+        name: Underlying name (NIFTY)
+        expiry: DD-MMM-YY expiry
+        instrumenttype: FUT, CE or PE
+        strike: Strike prices, required when the frame contains options
+
+    Returns:
+        pd.Series: NIFTY25JAN24FUT / NIFTY25JAN2423500CE, NaN for rows that are
+        neither futures nor options so callers can fill them from another column
+    """
+    prefix = name + compact_expiry(expiry)
+    symbols = pd.Series(np.nan, index=name.index, dtype=object)
+
+    futures = instrumenttype == 'FUT'
+    symbols[futures] = prefix[futures] + 'FUT'
+
+    options = instrumenttype.isin(['CE', 'PE'])
+    if options.any():
+        symbols[options] = prefix[options] + format_strike(strike[options]) + instrumenttype[options]
+    return symbols
+
+
+def rename_index_symbols(symbols: pd.Series, mapping: Optional[Dict[str, str]] = None) -> pd.Series:
+    """Map broker index names to OpenAlgo index symbols, INDEX_SYMBOL_MAP by default"""
+    return symbols.replace(INDEX_SYMBOL_MAP if mapping is None else mapping)
+
+
+def _insert_rows(session, table, columns, rows, rebuild_indexes=False) -> None:
+    """Insert tuples with one prepared statement, falling back to Core inserts elsewhere"""
+    connection = session.connection()
+
+    # Primary keys backed by a sequence (PostgreSQL) are filled in by SQLAlchemy,
+    # so the raw statement is only used on SQLite where the database assigns them
+    if connection.dialect.name == 'sqlite':
+        statement = (
+            f"INSERT INTO {table.name} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['?'] * len(columns))})"
+        )
+        # Filling an empty table is faster with the indexes built once afterwards
+        # than maintained row by row; SQLite DDL is part of the same transaction
+        indexes = list(table.indexes) if rebuild_indexes else []
+        for index in indexes:
+            index.drop(connection, checkfirst=True)
+        connection.exec_driver_sql(statement, rows)
+        for index in indexes:
+            index.create(connection, checkfirst=True)
+    else:
+        connection.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+
+
+def copy_symtokens(session, model, df: pd.DataFrame, key_columns: Sequence[str] = ('token',)) -> int:
+    """
+    Bulk insert a master contract DataFrame into a broker's symtoken table
+
+    Rows whose key (token, or token + exchange for brokers that reuse tokens across
+    exchanges) already exists in the table are skipped. Columns that are not part
+    of the table are ignored.
+
+    Args:
+        session: The broker's db_session
+        model: The broker's SymToken model
+        df: Processed master contract
+        key_columns: Columns identifying an existing instrument
+
+    Returns:
+        int: Number of rows inserted
+    """
+    logger.info("Performing Bulk Insert")
+    table = model.__table__
+    columns = [column.name for column in table.columns if not column.primary_key and column.name in df.columns]
+    key_columns = list(key_columns)
+
+    try:
+        existing = session.query(*[table.c[key] for key in key_columns]).all()
+        if existing:
+            if len(key_columns) == 1:
+                keys = df[key_columns[0]]
+                existing_keys = [row[0] for row in existing]
+            else:
+                keys = pd.MultiIndex.from_frame(df[key_columns])
+                existing_keys = [tuple(row) for row in existing]
+            df = df[~np.asarray(keys.isin(existing_keys))]
+
+        if df.empty:
+            logger.info("No new records to insert.")
+            return 0
+
+        # Plain Python values, None for missing, as the DB-API driver expects
+        frame = df[columns].astype(object)
+        frame = frame.where(df[columns].notna(), None)
+        rows = list(frame.itertuples(index=False, name=None))
+
+        _insert_rows(session, table, columns, rows, rebuild_indexes=not existing)
+        session.commit()
+        logger.info(f"Bulk insert completed successfully with {len(rows)} new records.")
+        return len(rows)
+    except Exception as e:
+        logger.error(f"Error during bulk insert: {e}")
+        session.rollback()
+        return 0
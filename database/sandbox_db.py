@@ -1,6 +1,7 @@
 # database/sandbox_db.py
 
 import os
+import threading
 from sqlalchemy import create_engine, UniqueConstraint, Index, CheckConstraint
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
@@ -42,6 +43,10 @@ db_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind
 Base = declarative_base()
 Base.query = db_session.query_property()
 
+# config_key -> config_value, loaded on first get_config and kept in sync by set_config
+_config_cache = None
+_config_lock = threading.Lock()
+
 
 class SandboxOrders(Base):
     """Sandbox orders table - all virtual orders"""
@@ -232,11 +237,21 @@ def init_default_config():
             'config_value': '5',
             'description': 'Interval in seconds to check pending orders - Range: 1-30 seconds'
         },
+        {
+            'config_key': 'order_execution_mode',
+            'config_value': 'poll',
+            'description': 'Pending order matching - poll (quotes API every check interval) or tick (live market data feed)'
+        },
         {
             'config_key': 'mtm_update_interval',
             'config_value': '5',
             'description': 'Interval in seconds to update MTM - Range: 0-60 seconds (0 = manual only)'
         },
+        {
+            'config_key': 'quote_cache_seconds',
+            'config_value': '2',
+            'description': 'Seconds a fetched quote is reused by MTM and order checks - Range: 0-30 seconds'
+        },
         {
             'config_key': 'nse_bse_square_off_time',
             'config_value': '15:15',
@@ -319,14 +334,27 @@ def init_default_config():
             db_session.rollback()
             logger.error(f"Error adding config {config['config_key']}: {e}")
 
+    clear_config_cache()
+
+
+def clear_config_cache():
+    """Drop the cached configuration, the next get_config reloads it"""
+    global _config_cache
+    with _config_lock:
+        _config_cache = None
+
 
 def get_config(config_key, default=None):
-    """Get configuration value by key"""
+    """Get configuration value by key (served from memory after the first call)"""
+    global _config_cache
     try:
-        config = SandboxConfig.query.filter_by(config_key=config_key).first()
-        if config:
-            return config.config_value
-        return default
+        configs = _config_cache
+        if configs is None:
+            with _config_lock:
+                if _config_cache is None:
+                    _config_cache = {config.config_key: config.config_value for config in SandboxConfig.query.all()}
+                configs = _config_cache
+        return configs.get(config_key, default)
     except Exception as e:
         logger.error(f"Error fetching config {config_key}: {e}")
         return default
@@ -348,6 +376,9 @@ def set_config(config_key, config_value, description=None):
             )
             db_session.add(config)
         db_session.commit()
+        with _config_lock:
+            if _config_cache is not None:
+                _config_cache[config_key] = str(config_value)
         logger.info(f"Updated config: {config_key} = {config_value}")
         return True
     except Exception as e:
@@ -0,0 +1,179 @@
+# database/security_state.py
+"""
+In-memory IP ban list and abuse counters for the security middleware.
+
+Every request, static assets and /api/v1 orders included, checks the client IP
+against the ban list, and every 404 and invalid API key was counted with a
+query and a commit on logs.db. Both now stay in memory:
+
+- BanList: banned IPs with their expiry (None for permanent bans) and a heap of
+  expiry times; loaded from ip_bans at startup and updated by ban_ip/unban_ip
+- HitCounter: 404 and invalid API key counts per IP, aggregated until the next
+  flush and then merged into the tracker tables by one background thread every
+  SECURITY_TRACKER_FLUSH_MS milliseconds (default 5000)
+
+The database tables stay the record the /security dashboard reads and edits.
+"""
+
+import atexit
+import heapq
+import threading
+import time
+from datetime import datetime, timezone
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+_MISSING = object()
+
+
+def to_epoch(value):
+    """Epoch seconds of a naive UTC datetime as stored in logs.db (None stays None)"""
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class BanList:
+    """Banned IPs: expiry by IP plus a heap of temporary ban expiries"""
+
+    def __init__(self):
+        self._bans = {}     # ip -> expiry in epoch seconds, None for permanent bans
+        self._expiry = []   # (expiry, ip) heap; stale entries are skipped when popped
+        self._expired = []  # IPs purged since the last drain_expired()
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def load(self, bans):
+        """Replace the list with (ip, expires_at) pairs, expires_at a naive UTC datetime or None"""
+        entries = {ip: to_epoch(expires_at) for ip, expires_at in bans}
+        heap = [(expiry, ip) for ip, expiry in entries.items() if expiry is not None]
+        heapq.heapify(heap)
+        with self._lock:
+            self._bans = entries
+            self._expiry = heap
+            self.loaded = True
+
+    def add(self, ip, expires_at=None):
+        expiry = to_epoch(expires_at)
+        with self._lock:
+            self._bans[ip] = expiry
+            if expiry is not None:
+                heapq.heappush(self._expiry, (expiry, ip))
+
+    def remove(self, ip):
+        with self._lock:
+            return self._bans.pop(ip, _MISSING) is not _MISSING
+
+    def is_banned(self, ip, now=None):
+        """Check an IP without locking; only a banned IP needs the clock"""
+        expiry = self._bans.get(ip, _MISSING)
+        if expiry is _MISSING:
+            return False
+        if expiry is None or (now or time.time()) < expiry:
+            return True
+        self.purge(now)
+        return False
+
+    def purge(self, now=None):
+        """Drop expired bans; their IPs are kept for drain_expired()"""
+        now = now or time.time()
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                expiry, ip = heapq.heappop(self._expiry)
+                # A later ban of the same IP pushed a newer entry; this one is stale
+                if self._bans.get(ip, _MISSING) == expiry:
+                    del self._bans[ip]
+                    self._expired.append(ip)
+
+    def drain_expired(self):
+        """Return and reset the IPs whose bans expired since the last call"""
+        with self._lock:
+            expired, self._expired = self._expired, []
+        return expired
+
+    def __len__(self):
+        return len(self._bans)
+
+
+class Hits:
+    """Counts of one IP since the last flush"""
+
+    __slots__ = ('count', 'first_at', 'last_at', 'items')
+
+    def __init__(self, now):
+        self.count = 0
+        self.first_at = now
+        self.last_at = now
+        self.items = []  # Distinct paths or API key hashes, oldest first
+
+
+class HitCounter:
+    """Per-IP counts aggregated in memory until drained by a flush"""
+
+    def __init__(self, max_items):
+        self.max_items = max_items
+        self._hits = {}
+        self._lock = threading.Lock()
+
+    def add(self, ip, item=None, now=None):
+        now = now or datetime.utcnow()
+        with self._lock:
+            hits = self._hits.get(ip)
+            if hits is None:
+                hits = self._hits[ip] = Hits(now)
+            hits.count += 1
+            hits.last_at = now
+            if item and item not in hits.items:
+                hits.items.append(item)
+                del hits.items[:-self.max_items]
+
+    def drain(self):
+        """Return and reset the counts gathered so far, by IP"""
+        with self._lock:
+            hits, self._hits = self._hits, {}
+        return hits
+
+    def __len__(self):
+        return len(self._hits)
+
+
+class PeriodicFlusher:
+    """Daemon thread calling flush() every interval seconds, and once more at exit"""
+
+    def __init__(self, flush, interval, name):
+        self.flush = flush
+        self.interval = max(0.01, interval)
+        self.name = name
+        self._thread = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name=self.name)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._flush()
+
+    def _flush(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"{self.name} flush failed: {e}")
+
+    def stop(self, timeout=10):
+        """Stop the thread and flush what is pending"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self._flush()
@@ -0,0 +1,437 @@
+"""
+Columnar in-memory symbol table backing the broker symbol cache
+
+All instruments of the active broker are held in NumPy arrays instead of one
+Python object per instrument:
+
+- symbol, brsymbol and token as fixed-width byte strings, one array each
+- low-cardinality columns (exchange, brexchange, name, expiry, instrumenttype)
+  as small integer codes into an interned vocabulary
+- strike and tick_size as float64, lotsize as int32
+
+Rows are stored sorted by (exchange, symbol), so symbol lookups are a binary
+search inside the exchange's slice. Token and broker symbol lookups binary
+search through sort permutations, and a derivatives index sorted by
+(exchange, underlying, expiry, instrumenttype, strike) answers option chain,
+expiry and strike queries without touching SQLite.
+"""
+
+import sys
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Column order of the rows passed to SymbolTable
+COLUMNS = (
+    'symbol', 'brsymbol', 'name', 'exchange', 'brexchange', 'token',
+    'expiry', 'strike', 'lotsize', 'instrumenttype', 'tick_size'
+)
+
+OPTION_TYPES = ('CE', 'PE')
+
+_MISSING_INT = np.iinfo(np.int32).min
+
+
+@dataclass
+class SymbolData:
+    """Lightweight symbol data structure for in-memory storage"""
+    symbol: str
+    brsymbol: str
+    name: str
+    exchange: str
+    brexchange: str
+    token: str
+    expiry: Optional[str] = None
+    strike: Optional[float] = None
+    lotsize: Optional[int] = None
+    instrumenttype: Optional[str] = None
+    tick_size: Optional[float] = None
+
+
+def _encode_strings(values: Sequence[Optional[str]]) -> np.ndarray:
+    """Fixed-width UTF-8 byte strings, '' for missing values"""
+    return np.array([str(value).encode('utf-8') if value is not None else b'' for value in values], dtype=bytes)
+
+
+def _encode_categories(values: Sequence[Optional[str]]) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """Integer codes into a vocabulary of interned strings (None kept as a value)"""
+    vocabulary: Dict[Optional[str], int] = {}
+    codes = np.fromiter(
+        (vocabulary.setdefault(value, len(vocabulary)) for value in values),
+        dtype=np.int64, count=len(values)
+    )
+    dtype = np.uint8 if len(vocabulary) <= 0xFF else np.uint16 if len(vocabulary) <= 0xFFFF else np.uint32
+    words = [sys.intern(value) if isinstance(value, str) else value for value in vocabulary]
+    return codes.astype(dtype), words
+
+
+def _floats(values: Sequence[Optional[float]]) -> np.ndarray:
+    return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+
+def _ints(values: Sequence[Optional[int]]) -> np.ndarray:
+    return np.array([_MISSING_INT if value is None else value for value in values], dtype=np.int32)
+
+
+def _expiry_sort_key(expiry: Optional[str]):
+    """Chronological order for DD-MMM-YY expiries, unparseable values last"""
+    try:
+        return (0, datetime.strptime(expiry, '%d-%b-%y'))
+    except (TypeError, ValueError):
+        return (1, expiry or '')
+
+
+def atm_strike_index(strikes: Sequence[float], price: float) -> int:
+    """Index of the strike closest to price in ascending strikes (the lower one on a tie)"""
+    position = bisect_left(strikes, price)
+    if position == len(strikes) or (position > 0 and price - strikes[position - 1] <= strikes[position] - price):
+        return position - 1
+    return position
+
+
+class SymbolTable:
+    """Immutable columnar store of one broker's instruments"""
+
+    def __init__(self, rows: Sequence[Tuple]):
+        columns = list(zip(*rows)) if rows else [()] * len(COLUMNS)
+        data = dict(zip(COLUMNS, columns))
+        self.size = len(rows)
+
+        exchange, self.exchanges = _encode_categories(data['exchange'])
+        symbol = _encode_strings(data['symbol'])
+
+        # Physical order: exchange, then symbol (stable, so duplicates keep load order)
+        order = np.lexsort((symbol, exchange))
+        self.exchange = exchange[order]
+        self.symbol = symbol[order]
+        self.brsymbol = _encode_strings(data['brsymbol'])[order]
+        self.token = _encode_strings(data['token'])[order]
+        self.strike = _floats(data['strike'])[order]
+        self.tick_size = _floats(data['tick_size'])[order]
+        self.lotsize = _ints(data['lotsize'])[order]
+
+        codes, self.brexchanges = _encode_categories(data['brexchange'])
+        self.brexchange = codes[order]
+        codes, self.names = _encode_categories(data['name'])
+        self.name = codes[order]
+        codes, self.expiries = _encode_categories(data['expiry'])
+        self.expiry = codes[order]
+        codes, self.instrumenttypes = _encode_categories(data['instrumenttype'])
+        self.instrumenttype = codes[order]
+
+        self._exchange_codes = {value: code for code, value in enumerate(self.exchanges)}
+        self._name_codes = {value: code for code, value in enumerate(self.names)}
+        self._expiry_codes = {value: code for code, value in enumerate(self.expiries)}
+        self._type_codes = {value: code for code, value in enumerate(self.instrumenttypes)}
+
+        # Exchange slices [start, end) of the physical order
+        code_range = np.arange(len(self.exchanges))
+        self._starts = np.searchsorted(self.exchange, code_range, side='left')
+        self._ends = np.searchsorted(self.exchange, code_range, side='right')
+
+        # Per-exchange permutations (offsets within the exchange slice) for token and brsymbol
+        slice_start = self._starts[self.exchange]
+        self._token_order = (np.lexsort((self.token, self.exchange)) - slice_start).astype(np.int32)
+        self._brsymbol_order = (np.lexsort((self.brsymbol, self.exchange)) - slice_start).astype(np.int32)
+        self._token_global_order = np.argsort(self.token, kind='stable').astype(np.int32)
+
+        # Upper-cased copies for search, shared with the originals when already upper case
+        self._symbol_upper = self._upper(self.symbol)
+        self._brsymbol_upper = self._upper(self.brsymbol)
+        self._names_upper = [(value or '').upper() for value in self.names]
+
+        self._build_chain_index()
+        self._strike_ladders: Dict[Tuple[str, str, str], Tuple[List[float], np.ndarray, List[float]]] = {}
+        self._expiry_order = {
+            code: rank for rank, code in enumerate(
+                sorted(range(len(self.expiries)), key=lambda code: _expiry_sort_key(self.expiries[code]))
+            )
+        }
+
+    @staticmethod
+    def _upper(values: np.ndarray) -> np.ndarray:
+        upper = np.char.upper(values)
+        return values if np.array_equal(upper, values) else upper
+
+    def _chain_key(self, exchange, name, expiry, instrumenttype):
+        return ((exchange * len(self.names) + name) * len(self.expiries) + expiry) * len(self.instrumenttypes) + instrumenttype
+
+    def _build_chain_index(self) -> None:
+        """Rows with an expiry sorted by (exchange, name, expiry, instrumenttype, strike)"""
+        no_expiry = {self._expiry_codes.get(value) for value in (None, '')}
+        has_expiry = ~np.isin(self.expiry, [code for code in no_expiry if code is not None])
+        rows = np.flatnonzero(has_expiry)
+        keys = self._chain_key(
+            self.exchange[rows].astype(np.int64), self.name[rows].astype(np.int64),
+            self.expiry[rows].astype(np.int64), self.instrumenttype[rows].astype(np.int64)
+        )
+        order = np.lexsort((self.strike[rows], keys))
+        self._chain_rows = rows[order].astype(np.int32)
+        self._chain_keys = keys[order]
+
+    # Point lookups -------------------------------------------------------
+
+    def _bounds(self, exchange: str) -> Optional[Tuple[int, int]]:
+        code = self._exchange_codes.get(exchange)
+        if code is None:
+            return None
+        return int(self._starts[code]), int(self._ends[code])
+
+    @staticmethod
+    def _search(values: np.ndarray, key, sorter=None) -> int:
+        """Index of the last entry equal to key, or -1 (duplicate symbols resolve to the last loaded, as with dicts)"""
+        if key is None:
+            return -1
+        key = str(key).encode('utf-8')
+        if not key or len(key) > values.dtype.itemsize:
+            return -1
+        position = int(np.searchsorted(values, key, side='right', sorter=sorter)) - 1
+        if position < 0:
+            return -1
+        index = position if sorter is None else int(sorter[position])
+        return index if values[index] == key else -1
+
+    def find_symbol(self, symbol: str, exchange: str) -> int:
+        """Row of (symbol, exchange), or -1"""
+        bounds = self._bounds(exchange)
+        if bounds is None:
+            return -1
+        start, end = bounds
+        index = self._search(self.symbol[start:end], symbol)
+        return -1 if index < 0 else start + index
+
+    def find_symbols(self, symbols: Sequence[str], exchange: str) -> np.ndarray:
+        """Rows of many symbols on one exchange in a single vectorized search, -1 where missing"""
+        rows = np.full(len(symbols), -1, dtype=np.int64)
+        bounds = self._bounds(exchange)
+        if bounds is None or not len(symbols):
+            return rows
+        start, end = bounds
+        values = self.symbol[start:end]
+        keys = np.array([str(symbol).encode('utf-8') if symbol else b'' for symbol in symbols], dtype=bytes)
+        # Keys wider than the column cannot match; numpy would otherwise compare them truncated
+        fits = (np.char.str_len(keys) <= values.dtype.itemsize) & (keys != b'')
+        positions = np.searchsorted(values, keys, side='right') - 1
+        found = fits & (positions >= 0)
+        found[found] = values[positions[found]] == keys[found]
+        rows[found] = positions[found] + start
+        return rows
+
+    def find_token(self, token: str, exchange: str) -> int:
+        """Row of (token, exchange), or -1"""
+        bounds = self._bounds(exchange)
+        if bounds is None:
+            return -1
+        start, end = bounds
+        index = self._search(self.token[start:end], token, self._token_order[start:end])
+        return -1 if index < 0 else start + index
+
+    def find_brsymbol(self, brsymbol: str, exchange: str) -> int:
+        """Row of (broker symbol, exchange), or -1"""
+        bounds = self._bounds(exchange)
+        if bounds is None:
+            return -1
+        start, end = bounds
+        index = self._search(self.brsymbol[start:end], brsymbol, self._brsymbol_order[start:end])
+        return -1 if index < 0 else start + index
+
+    def find_token_any(self, token: str) -> int:
+        """Row of a token on any exchange, or -1"""
+        return self._search(self.token, token, self._token_global_order)
+
+    # Row access ----------------------------------------------------------
+
+    def get_symbol(self, row: int) -> str:
+        return self.symbol[row].decode('utf-8')
+
+    def get_brsymbol(self, row: int) -> str:
+        return self.brsymbol[row].decode('utf-8')
+
+    def get_token(self, row: int) -> Optional[str]:
+        return self.token[row].decode('utf-8') or None
+
+    def get_brexchange(self, row: int) -> Optional[str]:
+        return self.brexchanges[self.brexchange[row]]
+
+    def get_row(self, row: int) -> SymbolData:
+        strike = self.strike[row]
+        tick_size = self.tick_size[row]
+        lotsize = self.lotsize[row]
+        return SymbolData(
+            symbol=self.get_symbol(row),
+            brsymbol=self.get_brsymbol(row),
+            name=self.names[self.name[row]],
+            exchange=self.exchanges[self.exchange[row]],
+            brexchange=self.get_brexchange(row),
+            token=self.get_token(row),
+            expiry=self.expiries[self.expiry[row]],
+            strike=None if np.isnan(strike) else float(strike),
+            lotsize=None if lotsize == _MISSING_INT else int(lotsize),
+            instrumenttype=self.instrumenttypes[self.instrumenttype[row]],
+            tick_size=None if np.isnan(tick_size) else float(tick_size)
+        )
+
+    def get_rows(self, rows: Sequence[int]) -> List[SymbolData]:
+        """get_row for many rows, gathering each column once"""
+        rows = np.asarray(rows, dtype=np.intp)
+        strike = self.strike[rows]
+        tick_size = self.tick_size[rows]
+        lotsize = self.lotsize[rows]
+        columns = zip(
+            self.symbol[rows].tolist(), self.brsymbol[rows].tolist(), self.name[rows].tolist(),
+            self.exchange[rows].tolist(), self.brexchange[rows].tolist(), self.token[rows].tolist(),
+            self.expiry[rows].tolist(),
+            np.where(np.isnan(strike), None, strike).tolist(),
+            np.where(lotsize == _MISSING_INT, None, lotsize).tolist(),
+            self.instrumenttype[rows].tolist(),
+            np.where(np.isnan(tick_size), None, tick_size).tolist()
+        )
+        return [
+            SymbolData(
+                symbol.decode('utf-8'), brsymbol.decode('utf-8'), self.names[name], self.exchanges[exchange],
+                self.brexchanges[brexchange], token.decode('utf-8') or None, self.expiries[expiry],
+                strike, lots, self.instrumenttypes[instrumenttype], tick
+            )
+            for (symbol, brsymbol, name, exchange, brexchange, token, expiry, strike, lots, instrumenttype, tick)
+            in columns
+        ]
+
+    # Search and derivatives ----------------------------------------------
+
+    def search(self, query: str, exchange: Optional[str] = None, limit: int = 50) -> List[int]:
+        """Rows whose symbol, broker symbol or name contains query (case-insensitive)"""
+        bounds = (0, self.size) if not exchange else self._bounds(exchange)
+        if bounds is None or not query:
+            return []
+        start, end = bounds
+        text = query.upper()
+        needle = text.encode('utf-8')
+
+        name_match = np.array([text in value for value in self._names_upper], dtype=bool)
+        matches = (
+            (np.char.find(self._symbol_upper[start:end], needle) >= 0)
+            | (np.char.find(self._brsymbol_upper[start:end], needle) >= 0)
+            | name_match[self.name[start:end]]
+        )
+        return (np.flatnonzero(matches)[:limit] + start).tolist()
+
+    def _chain_slice(self, low_key: int, high_key: int) -> np.ndarray:
+        low = np.searchsorted(self._chain_keys, low_key, side='left')
+        high = np.searchsorted(self._chain_keys, high_key, side='left')
+        return self._chain_rows[low:high]
+
+    def _underlying_codes(self, name: str, exchange: str) -> Optional[Tuple[int, int]]:
+        exchange_code = self._exchange_codes.get(exchange)
+        name_code = self._name_codes.get(name)
+        if exchange_code is None or name_code is None:
+            return None
+        return exchange_code, name_code
+
+    def contract_rows(self, name: str, expiry: str, exchange: str,
+                      instrumenttypes: Sequence[str] = OPTION_TYPES) -> np.ndarray:
+        """Rows of an underlying's contracts for one expiry, ordered by strike"""
+        codes = self._underlying_codes(name, exchange)
+        expiry_code = self._expiry_codes.get(expiry)
+        if codes is None or expiry_code is None:
+            return np.zeros(0, dtype=np.int32)
+
+        parts = []
+        for instrumenttype in instrumenttypes:
+            type_code = self._type_codes.get(instrumenttype)
+            if type_code is not None:
+                key = self._chain_key(codes[0], codes[1], expiry_code, type_code)
+                parts.append(self._chain_slice(key, key + 1))
+        if not parts:
+            return np.zeros(0, dtype=np.int32)
+        rows = np.concatenate(parts)
+        return rows[np.argsort(self.strike[rows], kind='stable')]
+
+    def expiry_dates(self, name: str, exchange: str, instrumenttype: Optional[str] = None) -> List[str]:
+        """An underlying's expiries in chronological order"""
+        codes = self._underlying_codes(name, exchange)
+        if codes is None:
+            return []
+        low = self._chain_key(codes[0], codes[1], 0, 0)
+        rows = self._chain_slice(low, low + len(self.expiries) * len(self.instrumenttypes))
+        if instrumenttype is not None:
+            type_code = self._type_codes.get(instrumenttype)
+            rows = rows[self.instrumenttype[rows] == type_code] if type_code is not None else rows[:0]
+        expiry_codes = np.unique(self.expiry[rows]).tolist()
+        return [self.expiries[code] for code in sorted(expiry_codes, key=self._expiry_order.__getitem__)]
+
+    def chain_combinations(self) -> List[Tuple[str, str, str, str]]:
+        """Distinct (exchange, name, expiry, instrumenttype) of the derivatives index"""
+        keys = np.unique(self._chain_keys)
+        keys, type_codes = np.divmod(keys, len(self.instrumenttypes))
+        keys, expiry_codes = np.divmod(keys, len(self.expiries))
+        exchange_codes, name_codes = np.divmod(keys, len(self.names))
+        return [
+            (self.exchanges[exchange], self.names[name], self.expiries[expiry], self.instrumenttypes[instrumenttype])
+            for exchange, name, expiry, instrumenttype in zip(
+                exchange_codes.tolist(), name_codes.tolist(), expiry_codes.tolist(), type_codes.tolist()
+            )
+        ]
+
+    def strikes(self, name: str, expiry: str, exchange: str,
+                instrumenttypes: Sequence[str] = OPTION_TYPES) -> List[float]:
+        """Distinct strikes of an underlying's options for one expiry"""
+        if tuple(instrumenttypes) == OPTION_TYPES:
+            return list(self._strike_ladder(name, expiry, exchange)[0])
+        rows = self.contract_rows(name, expiry, exchange, instrumenttypes)
+        return np.unique(self.strike[rows]).tolist()
+
+    def _strike_ladder(self, name: str, expiry: str, exchange: str) -> Tuple[List[float], np.ndarray, List[float]]:
+        """
+        Distinct strikes, option rows ordered by strike and the strike of each
+        row for one expiry, built on first use (the table never changes)
+        """
+        key = (name, expiry, exchange)
+        ladder = self._strike_ladders.get(key)
+        if ladder is None:
+            rows = self.contract_rows(name, expiry, exchange)
+            row_strikes = self.strike[rows]
+            ladder = (np.unique(row_strikes).tolist(), rows, row_strikes.tolist())
+            self._strike_ladders[key] = ladder
+        return ladder
+
+    def chain_window(self, name: str, expiry: str, exchange: str, price: float,
+                     strike_count: Optional[int] = None) -> Tuple[Optional[float], np.ndarray]:
+        """
+        ATM strike (closest to price) and the option rows of the strike_count
+        strikes on either side of it, ordered by strike. All strikes when
+        strike_count is None.
+        """
+        strikes, rows, row_strikes = self._strike_ladder(name, expiry, exchange)
+        if not strikes:
+            return None, rows
+
+        atm_index = atm_strike_index(strikes, price)
+        if strike_count is not None:
+            low = strikes[max(atm_index - strike_count, 0)]
+            high = strikes[min(atm_index + strike_count, len(strikes) - 1)]
+            rows = rows[bisect_left(row_strikes, low):bisect_right(row_strikes, high)]
+        return strikes[atm_index], rows
+
+    def find_contract(self, name: str, expiry: str, strike: float, instrumenttype: str, exchange: str) -> int:
+        """Row of the option with the given strike, or -1"""
+        rows = self.contract_rows(name, expiry, exchange, (instrumenttype,))
+        strikes = self.strike[rows]
+        position = int(np.searchsorted(strikes, strike))
+        if position < len(rows) and np.isclose(strikes[position], strike):
+            return int(rows[position])
+        return -1
+
+    # Monitoring ----------------------------------------------------------
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the arrays and vocabularies"""
+        # Upper-cased search columns may be the original arrays, count each array once
+        arrays = {id(value): value for value in vars(self).values() if isinstance(value, np.ndarray)}
+        size = sum(array.nbytes for array in arrays.values())
+        for vocabulary in (self.exchanges, self.brexchanges, self.names, self.expiries,
+                           self.instrumenttypes, self._names_upper):
+            size += sys.getsizeof(vocabulary) + sum(sys.getsizeof(value) for value in vocabulary)
+        return size
@@ -1,7 +1,7 @@
 """
 Token Database Module - Enhanced with Full Memory Cache
 This module provides the same API as before but now uses intelligent in-memory caching
-for 100,000+ symbols with O(1) lookup performance.
+for 100,000+ symbols with columnar storage and binary search lookups.
 
 All existing code will continue to work without any changes.
 """
@@ -27,8 +27,15 @@ from database.token_db_enhanced import (
     SymbolData,
     # New bulk operations (optional - won't break existing code)
     get_tokens_bulk,
+    get_brexchanges_bulk,
     get_symbols_bulk,
     search_symbols,
+    # Derivatives lookups
+    get_expiry_dates,
+    get_option_chain_symbols,
+    get_option_chain_window,
+    get_strikes,
+    find_option_symbol,
     # Cache management (optional - won't break existing code)
     load_cache_for_broker,
     clear_cache,
@@ -60,8 +67,14 @@ __all__ = [
     'SymbolData',
     # New functions (won't affect existing code)
     'get_tokens_bulk',
+    'get_brexchanges_bulk',
     'get_symbols_bulk',
     'search_symbols',
+    'get_expiry_dates',
+    'get_option_chain_symbols',
+    'get_option_chain_window',
+    'get_strikes',
+    'find_option_symbol',
     'load_cache_for_broker',
     'clear_cache',
     'get_cache_stats'
@@ -7,12 +7,16 @@ from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime, timedelta
 import time
 from dataclasses import dataclass, field
-from collections import defaultdict
+from collections import deque
 import pytz
+from database.symbol_table import COLUMNS, OPTION_TYPES, SymbolData, SymbolTable, atm_strike_index
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Number of recent cache lookups kept for latency percentiles
+LOOKUP_LATENCY_WINDOW = 1000
+
 @dataclass
 class CacheStats:
     """Statistics for cache performance monitoring"""
@@ -24,11 +28,34 @@ class CacheStats:
     last_loaded: Optional[datetime] = None
     total_symbols: int = 0
     memory_usage_mb: float = 0.0
+    load_time_seconds: float = 0.0
+    lookup_latencies_us: deque = field(default_factory=lambda: deque(maxlen=LOOKUP_LATENCY_WINDOW))
     
     def get_hit_rate(self) -> float:
         """Calculate cache hit rate"""
         total = self.hits + self.misses
         return (self.hits / total * 100) if total > 0 else 0.0
+
+    def record_lookup(self, started_ns: int, hit: bool) -> None:
+        """Count a cache lookup and keep its latency"""
+        self.lookup_latencies_us.append((time.perf_counter_ns() - started_ns) / 1000)
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def get_lookup_latency(self) -> dict:
+        """Percentiles (microseconds) of the recent cache lookups"""
+        latencies = sorted(self.lookup_latencies_us)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 2) if latencies else None
+
+        return {
+            'p50': percentile(0.50),
+            'p99': percentile(0.99),
+            'max': round(latencies[-1], 2) if latencies else None,
+        }
     
     def to_dict(self) -> dict:
         """Convert stats to dictionary for API response"""
@@ -41,28 +68,17 @@ class CacheStats:
             'cache_loads': self.cache_loads,
             'last_loaded': self.last_loaded.isoformat() if self.last_loaded else None,
             'total_symbols': self.total_symbols,
-            'memory_usage_mb': f"{self.memory_usage_mb:.2f}"
+            'memory_usage_mb': f"{self.memory_usage_mb:.2f}",
+            'load_time_seconds': round(self.load_time_seconds, 2),
+            'lookup_latency_us': self.get_lookup_latency()
         }
 
-@dataclass
-class SymbolData:
-    """Lightweight symbol data structure for in-memory storage"""
-    symbol: str
-    brsymbol: str
-    name: str
-    exchange: str
-    brexchange: str
-    token: str
-    expiry: Optional[str] = None
-    strike: Optional[float] = None
-    lotsize: Optional[int] = None
-    instrumenttype: Optional[str] = None
-    tick_size: Optional[float] = None
-
 class BrokerSymbolCache:
     """
     High-performance in-memory cache for broker symbols
-    Designed to handle 100,000+ symbols with minimal memory footprint
+    Designed to handle 100,000+ symbols with minimal memory footprint.
+    The instruments live in a columnar SymbolTable that is rebuilt on every
+    load and swapped in whole, so readers never see a partially loaded cache.
     """
     
     def __init__(self):
@@ -70,14 +86,8 @@ class BrokerSymbolCache:
         self.active_broker: Optional[str] = None
         self.cache_loaded: bool = False
         
-        # Primary storage - all symbols in memory
-        self.symbols: Dict[str, SymbolData] = {}
-        
-        # Multi-index maps for O(1) lookups
-        self.by_symbol_exchange: Dict[Tuple[str, str], SymbolData] = {}
-        self.by_token_exchange: Dict[Tuple[str, str], SymbolData] = {}
-        self.by_brsymbol_exchange: Dict[Tuple[str, str], SymbolData] = {}
-        self.by_token: Dict[str, SymbolData] = {}
+        # Primary storage - all symbols in memory, column by column
+        self.table: SymbolTable = SymbolTable([])
         
         # Cache statistics
         self.stats = CacheStats()
@@ -94,7 +104,7 @@ class BrokerSymbolCache:
         This is called once after master contract download
         """
         try:
-            from database.symbol import SymToken
+            from database.symbol import SymToken, db_session
             
             start_time = time.time()
             logger.info(f"Loading all symbols for broker: {broker}")
@@ -102,52 +112,26 @@ class BrokerSymbolCache:
             # Clear existing cache
             self.clear_cache()
             
-            # Query all symbols from database
-            symbols = SymToken.query.all()
+            # Query plain column tuples, no ORM objects are needed
+            rows = db_session.query(*[getattr(SymToken, column) for column in COLUMNS]).all()
             
-            if not symbols:
+            if not rows:
                 logger.warning(f"No symbols found in database for broker: {broker}")
                 return False
             
-            # Build in-memory structures
-            for sym in symbols:
-                # Create lightweight data object
-                symbol_data = SymbolData(
-                    symbol=sym.symbol,
-                    brsymbol=sym.brsymbol,
-                    name=sym.name,
-                    exchange=sym.exchange,
-                    brexchange=sym.brexchange,
-                    token=sym.token,
-                    expiry=sym.expiry,
-                    strike=sym.strike,
-                    lotsize=sym.lotsize,
-                    instrumenttype=sym.instrumenttype,
-                    tick_size=sym.tick_size
-                )
-                
-                # Store in primary dict
-                self.symbols[sym.token] = symbol_data
-                
-                # Build indexes
-                self.by_symbol_exchange[(sym.symbol, sym.exchange)] = symbol_data
-                self.by_token_exchange[(sym.token, sym.exchange)] = symbol_data
-                self.by_brsymbol_exchange[(sym.brsymbol, sym.exchange)] = symbol_data
-                self.by_token[sym.token] = symbol_data
+            # Build the columnar table and its indexes
+            self.table = SymbolTable(rows)
             
             # Update cache metadata
             self.active_broker = broker
             self.cache_loaded = True
-            self.stats.total_symbols = len(symbols)
+            self.stats.total_symbols = self.table.size
             self.stats.cache_loads += 1
             self.stats.last_loaded = datetime.now(pytz.timezone('Asia/Kolkata'))
-            
-            # Calculate memory usage (rough estimate)
-            self.stats.memory_usage_mb = (
-                len(self.symbols) * 500  # ~500 bytes per symbol
-            ) / (1024 * 1024)
+            self.stats.memory_usage_mb = self.table.memory_bytes() / (1024 * 1024)
             
             load_time = time.time() - start_time
+            self.stats.load_time_seconds = load_time
             logger.info(
                 f"Successfully loaded {self.stats.total_symbols} symbols "
                 f"in {load_time:.2f} seconds. "
@@ -193,150 +177,125 @@ class BrokerSymbolCache:
         now_ist = datetime.now(pytz.timezone('Asia/Kolkata'))
         return now_ist < self.next_reset_time
     
+    def _lookup(self, find, key: str, exchange: str, value):
+        """Find a row with find(key, exchange) and return value(table, row), counting the lookup"""
+        started = time.perf_counter_ns()
+        table = self.table
+        row = find(table, key, exchange)
+        self.stats.record_lookup(started, row >= 0)
+        return value(table, row) if row >= 0 else None
+    
     def get_token(self, symbol: str, exchange: str) -> Optional[str]:
-        """Get token for symbol and exchange - O(1) lookup"""
-        self.stats.hits += 1
-        key = (symbol, exchange)
-        if key in self.by_symbol_exchange:
-            return self.by_symbol_exchange[key].token
-        
-        self.stats.hits -= 1
-        self.stats.misses += 1
-        return None
+        """Get token for symbol and exchange - binary search"""
+        return self._lookup(SymbolTable.find_symbol, symbol, exchange, SymbolTable.get_token)
     
     def get_symbol(self, token: str, exchange: str) -> Optional[str]:
-        """Get symbol for token and exchange - O(1) lookup"""
-        self.stats.hits += 1
-        key = (token, exchange)
-        if key in self.by_token_exchange:
-            return self.by_token_exchange[key].symbol
-        
-        self.stats.hits -= 1
-        self.stats.misses += 1
-        return None
+        """Get symbol for token and exchange - binary search"""
+        return self._lookup(SymbolTable.find_token, token, exchange, SymbolTable.get_symbol)
     
     def get_br_symbol(self, symbol: str, exchange: str) -> Optional[str]:
-        """Get broker symbol for symbol and exchange - O(1) lookup"""
-        self.stats.hits += 1
-        key = (symbol, exchange)
-        if key in self.by_symbol_exchange:
-            return self.by_symbol_exchange[key].brsymbol
-        
-        self.stats.hits -= 1
-        self.stats.misses += 1
-        return None
+        """Get broker symbol for symbol and exchange - binary search"""
+        return self._lookup(SymbolTable.find_symbol, symbol, exchange, SymbolTable.get_brsymbol)
     
     def get_oa_symbol(self, brsymbol: str, exchange: str) -> Optional[str]:
-        """Get OpenAlgo symbol for broker symbol and exchange - O(1) lookup"""
-        self.stats.hits += 1
-        key = (brsymbol, exchange)
-        if key in self.by_brsymbol_exchange:
-            return self.by_brsymbol_exchange[key].symbol
-        
-        self.stats.hits -= 1
-        self.stats.misses += 1
-        return None
+        """Get OpenAlgo symbol for broker symbol and exchange - binary search"""
+        return self._lookup(SymbolTable.find_brsymbol, brsymbol, exchange, SymbolTable.get_symbol)
     
     def get_brexchange(self, symbol: str, exchange: str) -> Optional[str]:
-        """Get broker exchange for symbol and exchange - O(1) lookup"""
-        self.stats.hits += 1
-        key = (symbol, exchange)
-        if key in self.by_symbol_exchange:
-            return self.by_symbol_exchange[key].brexchange
-
-        self.stats.hits -= 1
-        self.stats.misses += 1
-        return None
+        """Get broker exchange for symbol and exchange - binary search"""
+        return self._lookup(SymbolTable.find_symbol, symbol, exchange, SymbolTable.get_brexchange)
 
     def get_symbol_info(self, symbol: str, exchange: str) -> Optional[SymbolData]:
-        """Get full symbol data for symbol and exchange - O(1) lookup"""
-        self.stats.hits += 1
-        key = (symbol, exchange)
-        if key in self.by_symbol_exchange:
-            return self.by_symbol_exchange[key]
-
-        self.stats.hits -= 1
-        self.stats.misses += 1
-        return None
+        """Get full symbol data for symbol and exchange - binary search"""
+        return self._lookup(SymbolTable.find_symbol, symbol, exchange, SymbolTable.get_row)
 
     def get_symbol_data(self, token: str) -> Optional[SymbolData]:
-        """Get complete symbol data by token - O(1) lookup"""
-        self.stats.hits += 1
-        if token in self.by_token:
-            return self.by_token[token]
+        """Get complete symbol data by token - binary search"""
+        started = time.perf_counter_ns()
+        table = self.table
+        row = table.find_token_any(token)
+        self.stats.record_lookup(started, row >= 0)
+        return table.get_row(row) if row >= 0 else None
+    
+    def _find_symbols_bulk(self, symbol_exchange_pairs: List[Tuple[str, str]]) -> Tuple[SymbolTable, List[int]]:
+        """Rows of many symbol-exchange pairs, one vectorized search per exchange"""
+        table = self.table
+        rows = [-1] * len(symbol_exchange_pairs)
+        by_exchange: Dict[str, List[int]] = {}
+        for position, (_, exchange) in enumerate(symbol_exchange_pairs):
+            by_exchange.setdefault(exchange, []).append(position)
         
-        self.stats.hits -= 1
-        self.stats.misses += 1
-        return None
+        for exchange, positions in by_exchange.items():
+            found = table.find_symbols([symbol_exchange_pairs[p][0] for p in positions], exchange)
+            for position, row in zip(positions, found.tolist()):
+                rows[position] = row
+        
+        hits = sum(1 for row in rows if row >= 0)
+        self.stats.hits += hits
+        self.stats.misses += len(rows) - hits
+        self.stats.bulk_queries += 1
+        return table, rows
     
     def get_tokens_bulk(self, symbol_exchange_pairs: List[Tuple[str, str]]) -> List[Optional[str]]:
         """
         Bulk retrieve tokens for multiple symbol-exchange pairs
-        Optimized for performance with single pass
+        Optimized for performance with one binary search pass per exchange
         """
-        self.stats.bulk_queries += 1
-        results = []
-        
-        for symbol, exchange in symbol_exchange_pairs:
-            key = (symbol, exchange)
-            if key in self.by_symbol_exchange:
-                results.append(self.by_symbol_exchange[key].token)
-                self.stats.hits += 1
-            else:
-                results.append(None)
-                self.stats.misses += 1
-        
-        return results
+        table, rows = self._find_symbols_bulk(symbol_exchange_pairs)
+        return [table.get_token(row) if row >= 0 else None for row in rows]
+    
+    def get_brexchanges_bulk(self, symbol_exchange_pairs: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """
+        Bulk retrieve broker exchanges for multiple symbol-exchange pairs
+        """
+        table, rows = self._find_symbols_bulk(symbol_exchange_pairs)
+        return [table.get_brexchange(row) if row >= 0 else None for row in rows]
     
     def get_symbols_bulk(self, token_exchange_pairs: List[Tuple[str, str]]) -> List[Optional[str]]:
         """
         Bulk retrieve symbols for multiple token-exchange pairs
         """
         self.stats.bulk_queries += 1
-        results = []
-        
-        for token, exchange in token_exchange_pairs:
-            key = (token, exchange)
-            if key in self.by_token_exchange:
-                results.append(self.by_token_exchange[key].symbol)
-                self.stats.hits += 1
-            else:
-                results.append(None)
-                self.stats.misses += 1
-        
-        return results
+        return [self.get_symbol(token, exchange) for token, exchange in token_exchange_pairs]
     
     def search_symbols(self, query: str, exchange: Optional[str] = None, limit: int = 50) -> List[SymbolData]:
         """
         Search symbols by partial match
         Returns list of matching SymbolData objects
         """
-        query = query.upper()
-        matches = []
-        
-        for symbol_data in self.symbols.values():
-            # Skip if exchange filter doesn't match
-            if exchange and symbol_data.exchange != exchange:
-                continue
-            
-            # Check for match in symbol, brsymbol, or name
-            if (query in symbol_data.symbol.upper() or 
-                query in symbol_data.brsymbol.upper() or 
-                (symbol_data.name and query in symbol_data.name.upper())):
-                matches.append(symbol_data)
-                
-                if len(matches) >= limit:
-                    break
-        
-        return matches
+        table = self.table
+        return [table.get_row(row) for row in table.search(query, exchange, limit)]
+
+    def get_expiry_dates(self, name: str, exchange: str, instrumenttype: Optional[str] = None) -> List[str]:
+        """Expiries of an underlying in chronological order, optionally for one instrument type"""
+        return self.table.expiry_dates(name, exchange, instrumenttype)
+
+    def get_strikes(self, name: str, expiry: str, exchange: str, option_type: Optional[str] = None) -> List[float]:
+        """Distinct option strikes of an underlying for one expiry, optionally of one type (CE/PE)"""
+        return self.table.strikes(name, expiry, exchange, (option_type,) if option_type else OPTION_TYPES)
+
+    def get_option_chain(self, name: str, expiry: str, exchange: str) -> List[SymbolData]:
+        """Call and put contracts of an underlying for one expiry, ordered by strike"""
+        table = self.table
+        return table.get_rows(table.contract_rows(name, expiry, exchange, OPTION_TYPES))
+
+    def get_option_chain_window(self, name: str, expiry: str, exchange: str, price: float,
+                                strike_count: Optional[int] = None) -> Tuple[Optional[float], List[SymbolData]]:
+        """ATM strike and the contracts of strike_count strikes around it, ordered by strike"""
+        table = self.table
+        atm_strike, rows = table.chain_window(name, expiry, exchange, price, strike_count)
+        return atm_strike, table.get_rows(rows)
+
+    def get_option_symbol(self, name: str, expiry: str, strike: float, option_type: str,
+                          exchange: str) -> Optional[SymbolData]:
+        """The option contract for a strike and type (CE/PE)"""
+        table = self.table
+        row = table.find_contract(name, expiry, strike, option_type, exchange)
+        return table.get_row(row) if row >= 0 else None
     
     def clear_cache(self):
         """Clear all cached data"""
-        self.symbols.clear()
-        self.by_symbol_exchange.clear()
-        self.by_token_exchange.clear()
-        self.by_brsymbol_exchange.clear()
-        self.by_token.clear()
+        self.table = SymbolTable([])
         self.cache_loaded = False
         self.active_broker = None
         logger.info("Cache cleared")
@@ -589,6 +548,20 @@ def get_tokens_bulk(symbol_exchange_pairs: List[Tuple[str, str]]) -> List[Option
         results.append(get_token_dbquery(symbol, exchange))
     return results
 
+def get_brexchanges_bulk(symbol_exchange_pairs: List[Tuple[str, str]]) -> List[Optional[str]]:
+    """Bulk retrieve broker exchanges - optimized for performance"""
+    cache = get_cache()
+    
+    if cache.cache_loaded and cache.is_cache_valid():
+        return cache.get_brexchanges_bulk(symbol_exchange_pairs)
+    
+    # Fallback to individual queries
+    results = []
+    for symbol, exchange in symbol_exchange_pairs:
+        cache.stats.db_queries += 1
+        results.append(get_brexchange_dbquery(symbol, exchange))
+    return results
+
 def get_symbols_bulk(token_exchange_pairs: List[Tuple[str, str]]) -> List[Optional[str]]:
     """Bulk retrieve symbols - optimized for performance"""
     cache = get_cache()
@@ -646,4 +619,112 @@ def search_symbols(query: str, exchange: Optional[str] = None, limit: int = 50)
         ]
     except Exception as e:
         logger.error(f"Error searching symbols: {e}")
-        return []
\ No newline at end of file
+        return []
+
+# Derivatives lookups served from the chain index
+def _symbol_data_from_row(sym_token) -> SymbolData:
+    """SymbolData for a SymToken row"""
+    return SymbolData(**{column: getattr(sym_token, column) for column in COLUMNS})
+
+def get_expiry_dates(name: str, exchange: str, instrumenttype: Optional[str] = None) -> List[str]:
+    """
+    Get the expiries of an underlying (NIFTY on NFO) in chronological order,
+    optionally only those of one instrument type (FUT, CE, PE)
+    """
+    cache = get_cache()
+
+    if cache.cache_loaded and cache.is_cache_valid():
+        return cache.get_expiry_dates(name, exchange, instrumenttype)
+
+    cache.stats.db_queries += 1
+    try:
+        from database.symbol import SymToken
+        from database.symbol_table import _expiry_sort_key
+        query_obj = SymToken.query.with_entities(SymToken.expiry).filter_by(name=name, exchange=exchange)
+        if instrumenttype:
+            query_obj = query_obj.filter_by(instrumenttype=instrumenttype)
+        expiries = {row.expiry for row in query_obj.distinct().all() if row.expiry}
+        return sorted(expiries, key=_expiry_sort_key)
+    except Exception as e:
+        logger.error(f"Error while querying expiry dates: {e}")
+        return []
+
+def get_option_chain_symbols(name: str, expiry: str, exchange: str) -> List[SymbolData]:
+    """
+    Get the call and put contracts of an underlying for one expiry, ordered by strike
+    """
+    cache = get_cache()
+
+    if cache.cache_loaded and cache.is_cache_valid():
+        return cache.get_option_chain(name, expiry, exchange)
+
+    cache.stats.db_queries += 1
+    try:
+        from database.symbol import SymToken
+        results = SymToken.query.filter(
+            SymToken.name == name,
+            SymToken.expiry == expiry,
+            SymToken.exchange == exchange,
+            SymToken.instrumenttype.in_(OPTION_TYPES)
+        ).order_by(SymToken.strike).all()
+        return [_symbol_data_from_row(r) for r in results]
+    except Exception as e:
+        logger.error(f"Error while querying option chain: {e}")
+        return []
+
+def get_strikes(name: str, expiry: str, exchange: str, option_type: Optional[str] = None) -> List[float]:
+    """Get the distinct option strikes of an underlying for one expiry, optionally of one type (CE/PE)"""
+    cache = get_cache()
+
+    if cache.cache_loaded and cache.is_cache_valid():
+        return cache.get_strikes(name, expiry, exchange, option_type)
+
+    return sorted({
+        s.strike for s in get_option_chain_symbols(name, expiry, exchange)
+        if option_type is None or s.instrumenttype == option_type
+    })
+
+def get_option_chain_window(name: str, expiry: str, exchange: str, price: float,
+                            strike_count: Optional[int] = None) -> Tuple[Optional[float], List[SymbolData]]:
+    """
+    Get the ATM strike for price and the call and put contracts of strike_count
+    strikes on either side of it (the whole chain when strike_count is None)
+    """
+    cache = get_cache()
+
+    if cache.cache_loaded and cache.is_cache_valid():
+        return cache.get_option_chain_window(name, expiry, exchange, price, strike_count)
+
+    contracts = get_option_chain_symbols(name, expiry, exchange)
+    strikes = sorted({s.strike for s in contracts})
+    if not strikes:
+        return None, []
+    atm_index = atm_strike_index(strikes, price)
+    if strike_count is None:
+        return strikes[atm_index], contracts
+    low = strikes[max(atm_index - strike_count, 0)]
+    high = strikes[min(atm_index + strike_count, len(strikes) - 1)]
+    return strikes[atm_index], [s for s in contracts if low <= s.strike <= high]
+
+def find_option_symbol(name: str, expiry: str, strike: float, option_type: str,
+                       exchange: str) -> Optional[SymbolData]:
+    """
+    Get the option contract of an underlying for an expiry, strike and type (CE/PE)
+    """
+    cache = get_cache()
+
+    if cache.cache_loaded and cache.is_cache_valid():
+        result = cache.get_option_symbol(name, expiry, strike, option_type, exchange)
+        if result is not None:
+            return result
+
+    cache.stats.db_queries += 1
+    try:
+        from database.symbol import SymToken
+        sym_token = SymToken.query.filter_by(
+            name=name, expiry=expiry, strike=strike, instrumenttype=option_type, exchange=exchange
+        ).first()
+        return _symbol_data_from_row(sym_token) if sym_token else None
+    except Exception as e:
+        logger.error(f"Error while querying option symbol: {e}")
+        return None
@@ -5,9 +5,12 @@ from sqlalchemy.sql import func
 from sqlalchemy.pool import NullPool
 import os
 import logging
-from datetime import datetime, timedelta
+import threading
+from datetime import datetime, timedelta, timezone
 import json
 from database.settings_db import get_security_settings
+from database.log_writer import get_log_writer
+from database.security_state import BanList, HitCounter, PeriodicFlusher
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +38,17 @@ logs_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bi
 LogBase = declarative_base()
 LogBase.query = logs_session.query_property()
 
+# Ban checks and 404 / invalid API key counts are served from memory
+# (database/security_state.py); counts are merged into the tables every flush
+SECURITY_TRACKER_FLUSH_MS = int(os.getenv('SECURITY_TRACKER_FLUSH_MS', '5000'))
+LOCALHOST_IPS = ('127.0.0.1', '::1', 'localhost')
+
+_ban_list = BanList()
+_404_hits = HitCounter(max_items=50)      # Keep last 50 paths
+_api_key_hits = HitCounter(max_items=20)  # Keep last 20 keys
+_ban_list_lock = threading.Lock()
+_flush_lock = threading.Lock()
+
 class TrafficLog(LogBase):
     """Model for traffic logging"""
     __tablename__ = 'traffic_logs'
@@ -52,24 +66,21 @@ class TrafficLog(LogBase):
 
     @staticmethod
     def log_request(client_ip, method, path, status_code, duration_ms, host=None, error=None, user_id=None):
-        """Log a request to the database"""
+        """Queue a request log row for the buffered log writer"""
         try:
-            log = TrafficLog(
-                client_ip=client_ip,
-                method=method,
-                path=path,
-                status_code=status_code,
-                duration_ms=duration_ms,
-                host=host,
-                error=error,
-                user_id=user_id
-            )
-            logs_session.add(log)
-            logs_session.commit()
-            return True
+            return get_log_writer().enqueue(logs_session, TrafficLog, {
+                'timestamp': datetime.now(timezone.utc),
+                'client_ip': client_ip,
+                'method': method,
+                'path': path,
+                'status_code': status_code,
+                'duration_ms': duration_ms,
+                'host': host,
+                'error': error,
+                'user_id': user_id
+            })
         except Exception as e:
             logger.error(f"Error logging traffic: {str(e)}")
-            logs_session.rollback()
             return False
 
     @staticmethod
@@ -119,38 +130,17 @@ class IPBan(LogBase):
 
     @staticmethod
     def is_ip_banned(ip_address):
-        """Check if an IP is currently banned"""
-        try:
-            ban = IPBan.query.filter_by(ip_address=ip_address).first()
-            if not ban:
-                return False
-
-            # Check permanent ban
-            if ban.is_permanent:
-                return True
-
-            # Check temporary ban expiry
-            if ban.expires_at:
-                if datetime.utcnow() < ban.expires_at.replace(tzinfo=None):
-                    return True
-                else:
-                    # Ban expired, remove it
-                    logs_session.delete(ban)
-                    logs_session.commit()
-                    return False
-
-            return False
-        except Exception as e:
-            logger.error(f"Error checking IP ban status: {e}")
-            logs_session.rollback()
-            return False
+        """Check if an IP is currently banned, against the in-memory ban list"""
+        if not _ban_list.loaded:
+            load_ip_bans()
+        return _ban_list.is_banned(ip_address)
 
     @staticmethod
     def ban_ip(ip_address, reason, duration_hours=24, permanent=False, created_by='system'):
         """Ban an IP address"""
         try:
             # Never ban localhost
-            if ip_address in ['127.0.0.1', '::1', 'localhost']:
+            if ip_address in LOCALHOST_IPS:
                 logger.warning(f"Attempted to ban localhost IP {ip_address} - ignoring")
                 return False
 
@@ -184,8 +174,11 @@ class IPBan(LogBase):
                     created_by=created_by
                 )
                 logs_session.add(ban)
+                existing_ban = ban
 
             logs_session.commit()
+            if _ban_list.loaded:
+                _ban_list.add(ip_address, None if existing_ban.is_permanent else existing_ban.expires_at)
             logger.info(f"IP {ip_address} banned: {reason}")
             return True
         except Exception as e:
@@ -202,8 +195,8 @@ class IPBan(LogBase):
                 logs_session.delete(ban)
                 logs_session.commit()
                 logger.info(f"IP {ip_address} unbanned")
-                return True
-            return False
+            _ban_list.remove(ip_address)
+            return ban is not None
         except Exception as e:
             logger.error(f"Error unbanning IP: {e}")
             logs_session.rollback()
@@ -243,74 +236,68 @@ class Error404Tracker(LogBase):
 
     @staticmethod
     def track_404(ip_address, path):
-        """Track a 404 error for an IP"""
-        try:
-            # Check if already banned
-            if IPBan.is_ip_banned(ip_address):
-                return False
-
-            # Get security settings from database
-            security_settings = get_security_settings()
-            threshold_404 = security_settings['404_threshold']
-            ban_duration_404 = security_settings['404_ban_duration']
-
-            now = datetime.utcnow()
-            tracker = Error404Tracker.query.filter_by(ip_address=ip_address).first()
-
-            if tracker:
-                # Check if tracking period expired (24 hours)
-                if (now - tracker.first_error_at.replace(tzinfo=None)).days >= 1:
-                    # Reset counter for new day
-                    tracker.error_count = 1
-                    tracker.first_error_at = now
-                    tracker.paths_attempted = json.dumps([path])
-                else:
-                    # Increment counter
-                    tracker.error_count += 1
-
-                    # Add path to attempted paths
-                    paths = json.loads(tracker.paths_attempted or '[]')
-                    if path not in paths:
-                        paths.append(path)
-                        tracker.paths_attempted = json.dumps(paths[-50:])  # Keep last 50 paths
-
-                tracker.last_error_at = now
-
-                # Check if threshold reached (configurable, default 20 404s per day)
-                # AUTOMATED BAN DISABLED - Manual ban only via /security dashboard
-                # if tracker.error_count >= threshold_404:
-                #     # Don't ban localhost IPs
-                #     if ip_address not in ['127.0.0.1', '::1', 'localhost']:
-                #         # Ban the IP
-                #         IPBan.ban_ip(
-                #             ip_address=ip_address,
-                #             reason=f"Exceeded 404 threshold: {tracker.error_count} errors in 24 hours",
-                #             duration_hours=ban_duration_404,
-                #             created_by='404_detector'
-                #         )
-                #
-                #         # Clean up tracker entry
-                #         logs_session.delete(tracker)
-            else:
-                # Create new tracker
-                tracker = Error404Tracker(
-                    ip_address=ip_address,
-                    error_count=1,
-                    paths_attempted=json.dumps([path])
-                )
-                logs_session.add(tracker)
+        """Count a 404 error for an IP; counts reach the table on the next flush"""
+        # Check if already banned
+        if IPBan.is_ip_banned(ip_address):
+            return False
 
-            logs_session.commit()
-            return True
+        _404_hits.add(ip_address, path)
+        _get_tracker_flusher().start()
+        return True
 
-        except Exception as e:
-            logger.error(f"Error tracking 404: {e}")
-            logs_session.rollback()
-            return False
+    @staticmethod
+    def merge_hits(ip_address, hits):
+        """Add the 404 errors counted in memory for an IP to its tracker row"""
+        tracker = Error404Tracker.query.filter_by(ip_address=ip_address).first()
+
+        if tracker:
+            # Check if tracking period expired (24 hours)
+            if (hits.last_at - tracker.first_error_at.replace(tzinfo=None)).days >= 1:
+                # Reset counter for new day
+                tracker.error_count = hits.count
+                tracker.first_error_at = hits.first_at
+                tracker.paths_attempted = json.dumps(hits.items)
+            else:
+                # Increment counter
+                tracker.error_count += hits.count
+
+                # Add paths to attempted paths
+                paths = json.loads(tracker.paths_attempted or '[]')
+                paths += [path for path in hits.items if path not in paths]
+                tracker.paths_attempted = json.dumps(paths[-50:])  # Keep last 50 paths
+
+            tracker.last_error_at = hits.last_at
+
+            # Check if threshold reached (configurable, default 20 404s per day)
+            # AUTOMATED BAN DISABLED - Manual ban only via /security dashboard
+            # if tracker.error_count >= get_security_settings()['404_threshold']:
+            #     # Don't ban localhost IPs
+            #     if ip_address not in LOCALHOST_IPS:
+            #         # Ban the IP
+            #         IPBan.ban_ip(
+            #             ip_address=ip_address,
+            #             reason=f"Exceeded 404 threshold: {tracker.error_count} errors in 24 hours",
+            #             duration_hours=get_security_settings()['404_ban_duration'],
+            #             created_by='404_detector'
+            #         )
+            #
+            #         # Clean up tracker entry
+            #         logs_session.delete(tracker)
+        else:
+            # Create new tracker
+            tracker = Error404Tracker(
+                ip_address=ip_address,
+                error_count=hits.count,
+                first_error_at=hits.first_at,
+                last_error_at=hits.last_at,
+                paths_attempted=json.dumps(hits.items)
+            )
+            logs_session.add(tracker)
 
     @staticmethod
     def get_suspicious_ips(min_errors=5):
         """Get IPs with suspicious 404 activity"""
+        flush_security_trackers()
         try:
             # Clean up old entries (older than 24 hours)
             cutoff = datetime.utcnow() - timedelta(days=1)
@@ -344,76 +331,69 @@ class InvalidAPIKeyTracker(LogBase):
 
     @staticmethod
     def track_invalid_api_key(ip_address, api_key_hash=None):
-        """Track an invalid API key attempt"""
-        try:
-            # Check if already banned
-            if IPBan.is_ip_banned(ip_address):
-                return False
+        """Count an invalid API key attempt; counts reach the table on the next flush"""
+        # Check if already banned
+        if IPBan.is_ip_banned(ip_address):
+            return False
 
-            # Get security settings from database
-            security_settings = get_security_settings()
-            threshold_api = security_settings['api_threshold']
-            ban_duration_api = security_settings['api_ban_duration']
-
-            now = datetime.utcnow()
-            tracker = InvalidAPIKeyTracker.query.filter_by(ip_address=ip_address).first()
-
-            if tracker:
-                # Check if tracking period expired (24 hours)
-                if (now - tracker.first_attempt_at.replace(tzinfo=None)).days >= 1:
-                    # Reset counter for new day
-                    tracker.attempt_count = 1
-                    tracker.first_attempt_at = now
-                    tracker.api_keys_tried = json.dumps([api_key_hash] if api_key_hash else [])
-                else:
-                    # Increment counter
-                    tracker.attempt_count += 1
-
-                    # Add API key hash to tried list
-                    if api_key_hash:
-                        keys_tried = json.loads(tracker.api_keys_tried or '[]')
-                        if api_key_hash not in keys_tried:
-                            keys_tried.append(api_key_hash)
-                            tracker.api_keys_tried = json.dumps(keys_tried[-20:])  # Keep last 20 keys
-
-                tracker.last_attempt_at = now
-
-                # Check if threshold reached (configurable, default 10 invalid API keys per day)
-                # AUTOMATED BAN DISABLED - Manual ban only via /security dashboard
-                # if tracker.attempt_count >= threshold_api:
-                #     # Don't ban localhost IPs but keep tracking
-                #     if ip_address not in ['127.0.0.1', '::1', 'localhost']:
-                #         # Ban the IP
-                #         success = IPBan.ban_ip(
-                #             ip_address=ip_address,
-                #             reason=f"Exceeded invalid API key threshold: {tracker.attempt_count} attempts in 24 hours",
-                #             duration_hours=ban_duration_api,  # Configurable hours for API abuse
-                #             created_by='api_key_detector'
-                #         )
-                #
-                #         # Only delete tracker if ban was successful
-                #         if success:
-                #             logs_session.delete(tracker)
-            else:
-                # Create new tracker
-                tracker = InvalidAPIKeyTracker(
-                    ip_address=ip_address,
-                    attempt_count=1,
-                    api_keys_tried=json.dumps([api_key_hash] if api_key_hash else [])
-                )
-                logs_session.add(tracker)
+        _api_key_hits.add(ip_address, api_key_hash)
+        _get_tracker_flusher().start()
+        return True
 
-            logs_session.commit()
-            return True
-
-        except Exception as e:
-            logger.error(f"Error tracking invalid API key: {e}")
-            logs_session.rollback()
-            return False
+    @staticmethod
+    def merge_hits(ip_address, hits):
+        """Add the invalid API key attempts counted in memory for an IP to its tracker row"""
+        tracker = InvalidAPIKeyTracker.query.filter_by(ip_address=ip_address).first()
+
+        if tracker:
+            # Check if tracking period expired (24 hours)
+            if (hits.last_at - tracker.first_attempt_at.replace(tzinfo=None)).days >= 1:
+                # Reset counter for new day
+                tracker.attempt_count = hits.count
+                tracker.first_attempt_at = hits.first_at
+                tracker.api_keys_tried = json.dumps(hits.items)
+            else:
+                # Increment counter
+                tracker.attempt_count += hits.count
+
+                # Add API key hashes to tried list
+                keys_tried = json.loads(tracker.api_keys_tried or '[]')
+                keys_tried += [key for key in hits.items if key not in keys_tried]
+                tracker.api_keys_tried = json.dumps(keys_tried[-20:])  # Keep last 20 keys
+
+            tracker.last_attempt_at = hits.last_at
+
+            # Check if threshold reached (configurable, default 10 invalid API keys per day)
+            # AUTOMATED BAN DISABLED - Manual ban only via /security dashboard
+            # if tracker.attempt_count >= get_security_settings()['api_threshold']:
+            #     # Don't ban localhost IPs but keep tracking
+            #     if ip_address not in LOCALHOST_IPS:
+            #         # Ban the IP
+            #         success = IPBan.ban_ip(
+            #             ip_address=ip_address,
+            #             reason=f"Exceeded invalid API key threshold: {tracker.attempt_count} attempts in 24 hours",
+            #             duration_hours=get_security_settings()['api_ban_duration'],  # Configurable hours for API abuse
+            #             created_by='api_key_detector'
+            #         )
+            #
+            #         # Only delete tracker if ban was successful
+            #         if success:
+            #             logs_session.delete(tracker)
+        else:
+            # Create new tracker
+            tracker = InvalidAPIKeyTracker(
+                ip_address=ip_address,
+                attempt_count=hits.count,
+                first_attempt_at=hits.first_at,
+                last_attempt_at=hits.last_at,
+                api_keys_tried=json.dumps(hits.items)
+            )
+            logs_session.add(tracker)
 
     @staticmethod
     def get_suspicious_api_users(min_attempts=3):
         """Get IPs with suspicious API key activity"""
+        flush_security_trackers()
         try:
             # Clean up old entries (older than 24 hours)
             cutoff = datetime.utcnow() - timedelta(days=1)
@@ -434,6 +414,63 @@ class InvalidAPIKeyTracker(LogBase):
             logger.error(f"Error getting suspicious API users: {e}")
             return []
 
+def load_ip_bans():
+    """Load the active bans of ip_bans into the in-memory ban list"""
+    with _ban_list_lock:
+        if _ban_list.loaded:
+            return
+        try:
+            bans = logs_session.query(IPBan.ip_address, IPBan.is_permanent, IPBan.expires_at).all()
+            _ban_list.load((ip, None if permanent else expires_at) for ip, permanent, expires_at in bans)
+            logger.info(f"Loaded {len(_ban_list)} IP bans")
+        except Exception as e:
+            # Checked on every request: do not retry against a failing database
+            logger.error(f"Error loading IP bans: {e}")
+            logs_session.rollback()
+            _ban_list.load([])
+
+def flush_security_trackers():
+    """Merge the 404 and invalid API key counts gathered in memory into their tables"""
+    with _flush_lock:
+        for model, counter in ((Error404Tracker, _404_hits), (InvalidAPIKeyTracker, _api_key_hits)):
+            pending = counter.drain()
+            if not pending:
+                continue
+            try:
+                for ip_address, hits in pending.items():
+                    model.merge_hits(ip_address, hits)
+                logs_session.commit()
+            except Exception as e:
+                logger.error(f"Error writing {len(pending)} {model.__tablename__} rows: {e}")
+                logs_session.rollback()
+
+        # Expired bans leave the ban list; remove their rows as well
+        _ban_list.purge()
+        expired = _ban_list.drain_expired()
+        if expired:
+            try:
+                IPBan.query.filter(
+                    IPBan.ip_address.in_(expired),
+                    IPBan.is_permanent == False,
+                    IPBan.expires_at < datetime.utcnow()
+                ).delete(synchronize_session=False)
+                logs_session.commit()
+            except Exception as e:
+                logger.error(f"Error removing expired IP bans: {e}")
+                logs_session.rollback()
+
+_tracker_flusher = None
+_tracker_flusher_lock = threading.Lock()
+
+def _get_tracker_flusher():
+    global _tracker_flusher
+    if _tracker_flusher is None:
+        with _tracker_flusher_lock:
+            if _tracker_flusher is None:
+                _tracker_flusher = PeriodicFlusher(flush_security_trackers, SECURITY_TRACKER_FLUSH_MS / 1000.0,
+                                                   name="SecurityTrackerFlush")
+    return _tracker_flusher
+
 def init_logs_db():
     """Initialize the logs database"""
     # Extract directory from database URL and create if it doesn't exist
@@ -444,3 +481,5 @@ def init_logs_db():
 
     from database.db_init_helper import init_db_with_logging
     init_db_with_logging(LogBase, logs_engine, "Traffic Logs DB", logger)
+    load_ip_bans()
+    _get_tracker_flusher().start()
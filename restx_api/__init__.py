@@ -30,6 +30,7 @@ from .symbol import api as symbol_ns
 from .search import api as search_ns
 from .expiry import api as expiry_ns
 from .option_symbol import api as option_symbol_ns
+from .option_chain import api as option_chain_ns
 from .options_order import api as options_order_ns
 from .options_multiorder import api as options_multiorder_ns
 from .option_greeks import api as option_greeks_ns
@@ -66,6 +67,7 @@ api.add_namespace(symbol_ns, path='/symbol')
 api.add_namespace(search_ns, path='/search')
 api.add_namespace(expiry_ns, path='/expiry')
 api.add_namespace(option_symbol_ns, path='/optionsymbol')
+api.add_namespace(option_chain_ns, path='/optionchain')
 api.add_namespace(options_order_ns, path='/optionsorder')
 api.add_namespace(options_multiorder_ns, path='/optionsmultiorder')
 api.add_namespace(option_greeks_ns, path='/optiongreeks')
@@ -92,6 +92,8 @@ class ExpirySchema(Schema):
     symbol = fields.Str(required=True)      # Underlying symbol (e.g., NIFTY, BANKNIFTY)
     exchange = fields.Str(required=True, validate=validate.OneOf(["NFO", "BFO", "MCX", "CDS"]))    # Exchange (e.g., NFO, BFO, MCX, CDS)
     instrumenttype = fields.Str(required=True, validate=validate.OneOf(["futures", "options"]))  # futures or options
+    count = fields.Int(required=False, validate=validate.Range(min=1), allow_none=True)  # OPTIONAL: Nearest N upcoming expiries
+    expiry_type = fields.Str(required=False, validate=validate.OneOf(["weekly", "monthly"]), allow_none=True)  # OPTIONAL: weekly or monthly expiries only
 
 class OptionSymbolSchema(Schema):
     apikey = fields.Str(required=True)      # API Key for authentication
@@ -112,9 +114,27 @@ class OptionGreeksSchema(Schema):
     underlying_exchange = fields.Str(required=False)  # Optional: Specify underlying exchange (NSE_INDEX, NFO, etc.)
     expiry_time = fields.Str(required=False)  # Optional: Custom expiry time in HH:MM format (e.g., "15:30", "19:00"). If not provided, uses exchange defaults
 
+class OptionChainGreeksSchema(Schema):
+    apikey = fields.Str(required=True)      # API Key for authentication
+    underlying = fields.Str(required=True)  # Underlying symbol (e.g., NIFTY)
+    exchange = fields.Str(required=True, validate=validate.OneOf(["NFO", "BFO", "CDS", "MCX"]))  # Options exchange
+    expiry_date = fields.Str(required=True)  # Expiry in DDMMMYY format (e.g., 28NOV24)
+    interest_rate = fields.Float(required=False, validate=validate.Range(min=0, max=100))  # Risk-free interest rate (annualized %). Optional, defaults per exchange
+    underlying_symbol = fields.Str(required=False)   # Optional: Specify underlying symbol (e.g., NIFTY or NIFTY28NOV24FUT)
+    underlying_exchange = fields.Str(required=False)  # Optional: Specify underlying exchange (NSE_INDEX, NFO, etc.)
+    expiry_time = fields.Str(required=False)  # Optional: Custom expiry time in HH:MM format
+    model = fields.Str(required=False, validate=validate.OneOf(["black_scholes", "black76"]))  # Optional: black76 when the underlying is a future
+
 class InstrumentsSchema(Schema):
     apikey = fields.Str(required=True)      # API Key for authentication
     exchange = fields.Str(required=False, validate=validate.OneOf([
         "NSE", "BSE", "NFO", "BFO", "BCD", "CDS", "MCX", "NSE_INDEX", "BSE_INDEX"
     ]))  # Optional exchange filter
     format = fields.Str(required=False, validate=validate.OneOf(["json", "csv"]))  # Output format (json or csv), defaults to json
+
+class OptionChainSchema(Schema):
+    apikey = fields.Str(required=True)      # API Key for authentication
+    underlying = fields.Str(required=True)  # Underlying symbol (NIFTY, RELIANCE, NIFTY28OCT25FUT)
+    exchange = fields.Str(required=True)    # Exchange (NSE_INDEX, NSE, NFO, BSE_INDEX, BSE, BFO, MCX, CDS)
+    expiry_date = fields.Str(required=False)  # Expiry date in DDMMMYY format (e.g., 28OCT25). Optional if underlying includes expiry
+    strike_count = fields.Int(required=False, validate=validate.Range(min=1, max=100), allow_none=True)  # OPTIONAL: Strikes on each side of ATM. If not provided, the full chain is returned
@@ -37,7 +37,9 @@ class Expiry(Resource):
                 symbol=symbol,
                 exchange=exchange,
                 instrumenttype=instrumenttype,
-                api_key=api_key
+                api_key=api_key,
+                count=expiry_data.get('count'),
+                expiry_type=expiry_data.get('expiry_type')
             )
             
             return make_response(jsonify(response_data), status_code)
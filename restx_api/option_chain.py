@@ -0,0 +1,95 @@
+"""
+Option Chain API Endpoint
+
+POST /api/v1/optionchain
+
+Returns the strikes of an underlying's expiry with CE/PE symbols, tokens, lot size
+and live LTP/OI. With strike_count only ATM +/- strike_count strikes are returned.
+
+Request Body:
+{
+    "apikey": "your_api_key",
+    "underlying": "NIFTY",  // or "NIFTY28OCT25FUT"
+    "exchange": "NSE_INDEX",  // or "NSE", "NFO", "BSE_INDEX", "BSE", "BFO"
+    "expiry_date": "28OCT25",  // Optional: nearest listed expiry if omitted
+    "strike_count": 10  // Optional: strikes on each side of ATM. Full chain if omitted
+}
+
+Response:
+{
+    "status": "success",
+    "underlying": "NIFTY",
+    "underlying_ltp": 23587.50,
+    "exchange": "NFO",
+    "expiry_date": "28OCT25",
+    "atm_strike": 23600.0,
+    "chain": [
+        {
+            "strike": 23600.0,
+            "CE": {"symbol": "NIFTY28OCT2523600CE", "token": "43651", "lotsize": 75,
+                   "tick_size": 0.05, "ltp": 112.35, "oi": 5120325},
+            "PE": {"symbol": "NIFTY28OCT2523600PE", "token": "43652", "lotsize": 75,
+                   "tick_size": 0.05, "ltp": 118.9, "oi": 4371150}
+        }
+    ]
+}
+"""
+
+from flask import request
+from flask_restx import Namespace, Resource
+from marshmallow import ValidationError
+from limiter import limiter
+from utils.logging import get_logger
+from .data_schemas import OptionChainSchema
+from services.option_chain_service import get_option_chain
+import os
+
+# Initialize logger
+logger = get_logger(__name__)
+
+# Create namespace
+api = Namespace('optionchain', description='Get Option Chain with live LTP and OI')
+
+# Get rate limit from environment
+API_RATE_LIMIT = os.getenv("API_RATE_LIMIT", "10 per second")
+
+
+@api.route('/', strict_slashes=False)
+class OptionChain(Resource):
+    @limiter.limit(API_RATE_LIMIT)
+    def post(self):
+        """Get the option chain of an underlying for one expiry"""
+        try:
+            # Validate request data
+            schema = OptionChainSchema()
+            data = schema.load(request.json)
+
+            logger.info(
+                f"Option chain request: underlying={data['underlying']}, exchange={data['exchange']}, "
+                f"expiry={data.get('expiry_date')}, strike_count={data.get('strike_count')}"
+            )
+
+            # Call service to build the chain
+            success, response, status_code = get_option_chain(
+                underlying=data['underlying'],
+                exchange=data['exchange'],
+                expiry_date=data.get('expiry_date'),
+                strike_count=data.get('strike_count'),
+                api_key=data['apikey']
+            )
+
+            return response, status_code
+
+        except ValidationError as err:
+            logger.warning(f"Validation error in option chain request: {err.messages}")
+            return {
+                'status': 'error',
+                'message': 'Validation error',
+                'errors': err.messages
+            }, 400
+        except Exception as e:
+            logger.exception(f"Unexpected error in option chain endpoint: {e}")
+            return {
+                'status': 'error',
+                'message': 'An unexpected error occurred'
+            }, 500
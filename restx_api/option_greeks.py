@@ -4,8 +4,8 @@ from marshmallow import ValidationError
 from limiter import limiter
 import os
 
-from .data_schemas import OptionGreeksSchema
-from services.option_greeks_service import get_option_greeks
+from .data_schemas import OptionGreeksSchema, OptionChainGreeksSchema
+from services.option_greeks_service import get_option_greeks, get_option_chain_greeks
 from database.auth_db import verify_api_key
 from utils.logging import get_logger
 
@@ -18,6 +18,7 @@ api = Namespace('optiongreeks', description='Option Greeks API')
 
 # Initialize schema
 option_greeks_schema = OptionGreeksSchema()
+option_chain_greeks_schema = OptionChainGreeksSchema()
 
 
 @api.route('', strict_slashes=False)
@@ -137,3 +138,103 @@ class OptionGreeks(Resource):
                 'status': 'error',
                 'message': 'Internal server error while calculating option Greeks'
             }), 500)
+
+
+@api.route('/chain', strict_slashes=False)
+class OptionChainGreeks(Resource):
+    @limiter.limit(GREEKS_RATE_LIMIT)
+    def post(self):
+        """
+        Calculate Implied Volatility and Greeks for every strike of an expiry
+
+        All quotes are fetched with one multiquotes request and the whole chain
+        is solved in a single vectorized calculation.
+
+        Required fields:
+        - apikey: API key for authentication
+        - underlying: Underlying symbol (e.g., NIFTY)
+        - exchange: Options exchange code (NFO, BFO, CDS, MCX)
+        - expiry_date: Expiry in DDMMMYY format (e.g., 28NOV24)
+
+        Optional fields:
+        - interest_rate, underlying_symbol, underlying_exchange, expiry_time: as for /optiongreeks
+        - model: black_scholes (default) or black76 when the underlying is a future
+
+        Example Request:
+        {
+            "apikey": "your_api_key",
+            "underlying": "NIFTY",
+            "exchange": "NFO",
+            "expiry_date": "28NOV24"
+        }
+
+        Example Response:
+        {
+            "status": "success",
+            "underlying": "NIFTY",
+            "exchange": "NFO",
+            "expiry_date": "28-Nov-2024",
+            "days_to_expiry": 5.5,
+            "spot_price": 24015.75,
+            "interest_rate": 0,
+            "model": "black_scholes",
+            "chain": [
+                {
+                    "strike": 24000,
+                    "CE": {"symbol": "NIFTY28NOV2424000CE", "option_price": 125.5, "implied_volatility": 15.25,
+                           "greeks": {"delta": 0.5234, "gamma": 0.000125, "theta": -12.5678, "vega": 18.7654, "rho": 0.001234}},
+                    "PE": {...}
+                }
+            ]
+        }
+        """
+        try:
+            data = request.json
+
+            if data is None:
+                return make_response(jsonify({
+                    'status': 'error',
+                    'message': 'Request body is missing or invalid JSON'
+                }), 400)
+
+            try:
+                validated_data = option_chain_greeks_schema.load(data)
+            except ValidationError as err:
+                logger.warning(f"Validation error in option chain greeks request: {err.messages}")
+                return make_response(jsonify({
+                    'status': 'error',
+                    'message': 'Validation failed',
+                    'errors': err.messages
+                }), 400)
+
+            api_key = validated_data.get('apikey')
+            if not verify_api_key(api_key):
+                logger.warning(f"Invalid API key used for option chain greeks: {api_key[:10]}...")
+                return make_response(jsonify({
+                    'status': 'error',
+                    'message': 'Invalid openalgo apikey'
+                }), 401)
+
+            success, response, status_code = get_option_chain_greeks(
+                underlying=validated_data.get('underlying'),
+                exchange=validated_data.get('exchange'),
+                expiry_date=validated_data.get('expiry_date'),
+                interest_rate=validated_data.get('interest_rate'),
+                underlying_symbol=validated_data.get('underlying_symbol'),
+                underlying_exchange=validated_data.get('underlying_exchange'),
+                expiry_time=validated_data.get('expiry_time'),
+                model=validated_data.get('model') or 'black_scholes',
+                api_key=api_key
+            )
+
+            if not success:
+                logger.error(f"Failed to calculate chain Greeks: {response.get('message')}")
+
+            return make_response(jsonify(response), status_code)
+
+        except Exception as e:
+            logger.exception(f"Unexpected error in option chain greeks endpoint: {e}")
+            return make_response(jsonify({
+                'status': 'error',
+                'message': 'Internal server error while calculating option chain Greeks'
+            }), 500)
@@ -133,7 +133,7 @@ class SyntheticFutureSchema(Schema):
     apikey = fields.Str(required=True)
     underlying = fields.Str(required=True)  # Underlying symbol (NIFTY, BANKNIFTY, RELIANCE)
     exchange = fields.Str(required=True)  # Exchange (NSE_INDEX, NSE, BSE_INDEX, BSE)
-    expiry_date = fields.Str(required=True)  # Expiry date in DDMMMYY format (e.g., 28OCT25)
+    expiry_date = fields.Str(required=False)  # Expiry date in DDMMMYY format (e.g., 28OCT25). Optional, nearest listed expiry if omitted
 
 class MarginPositionSchema(Schema):
     """Schema for a single position in margin calculation"""
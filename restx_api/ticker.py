@@ -5,11 +5,11 @@ from database.auth_db import get_auth_token_broker
 from limiter import limiter
 import os
 import importlib
-import pandas as pd
 from datetime import datetime, timezone, timedelta
 import pytz
 
 from .data_schemas import TickerSchema
+from services.history_service import fetch_history_dataframe
 from utils.logging import get_logger
 
 API_RATE_LIMIT = os.getenv("API_RATE_LIMIT", "10 per second")
@@ -188,20 +188,18 @@ class Ticker(Resource):
                 }), 404)
 
             try:
-                # Initialize broker's data handler
-                data_handler = broker_module.BrokerData(AUTH_TOKEN)
-                
-                # Use chunked API call
-                df = data_handler.get_history(
+                # Cached, concurrently chunked history download
+                df = fetch_history_dataframe(
+                    broker_module,
+                    AUTH_TOKEN,
+                    None,
+                    broker,
                     history_data['symbol'],
                     history_data['exchange'],
                     history_data['interval'],
                     history_data['start_date'],
                     history_data['end_date']
                 )
-                
-                if not isinstance(df, pd.DataFrame):
-                    raise ValueError("Invalid data format returned from broker")
 
                 # Format the response based on the format parameter
                 if response_format == 'txt':
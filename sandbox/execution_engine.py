@@ -4,11 +4,12 @@ Execution Engine - Monitors and executes pending orders
 
 Features:
 - Background order monitoring (every 5 seconds configurable)
-- Real-time quote fetching from broker
+- Real-time quotes from the shared batched quote snapshot
 - Order execution based on price type (MARKET, LIMIT, SL, SL-M)
 - Trade creation and position updates
 - Rate limit compliance (10 orders/second, 50 API calls/second)
 - Batch processing for efficiency
+- Orders, trades and positions read and updated in the sandbox state store
 """
 
 import os
@@ -16,18 +17,16 @@ import sys
 from decimal import Decimal
 from datetime import datetime
 import pytz
+import threading
 import time
 import uuid
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.sandbox_db import (
-    SandboxOrders, SandboxTrades, SandboxPositions,
-    db_session
-)
 from sandbox.fund_manager import FundManager
-from services.quotes_service import get_quotes
+from sandbox.state_store import get_state_store, TradeState, PositionState, ist_now
+from sandbox.quote_provider import get_quote_provider
 from database.auth_db import get_auth_token_broker
 from utils.logging import get_logger
 
@@ -42,6 +41,7 @@ class ExecutionEngine:
         self.order_rate_limit = int(os.getenv('ORDER_RATE_LIMIT', '10 per second').split()[0])
         self.api_rate_limit = int(os.getenv('API_RATE_LIMIT', '50 per second').split()[0])
         self.batch_delay = 1.0  # 1 second between batches
+        self.store = get_state_store()
 
     def check_and_execute_pending_orders(self):
         """
@@ -50,7 +50,7 @@ class ExecutionEngine:
         """
         try:
             # Get all pending orders
-            pending_orders = SandboxOrders.query.filter_by(order_status='open').all()
+            pending_orders = self.store.open_orders()
 
             if not pending_orders:
                 logger.debug("No pending orders to process")
@@ -66,19 +66,8 @@ class ExecutionEngine:
                     orders_by_symbol[key] = []
                 orders_by_symbol[key].append(order)
 
-            # Fetch quotes in batches (respecting API rate limit of 50/second)
-            quote_cache = {}
-            symbols_list = list(orders_by_symbol.keys())
-
-            for i in range(0, len(symbols_list), self.api_rate_limit):
-                batch = symbols_list[i:i + self.api_rate_limit]
-
-                for symbol, exchange in batch:
-                    quote_cache[(symbol, exchange)] = self._fetch_quote(symbol, exchange)
-
-                # Wait 1 second before next batch if more symbols remain
-                if i + self.api_rate_limit < len(symbols_list):
-                    time.sleep(self.batch_delay)
+            # Fetch quotes for all symbols in one multiquotes batch
+            quote_cache = get_quote_provider().get_quotes(orders_by_symbol.keys())
 
             # Process orders in batches (respecting order rate limit of 10/second)
             orders_processed = 0
@@ -102,64 +91,40 @@ class ExecutionEngine:
 
     def _fetch_quote(self, symbol, exchange):
         """
-        Fetch real-time quote for a symbol using API key
+        Fetch real-time quote for a symbol from the shared quote snapshot
         Returns dict with ltp, high, low, open, close, etc.
         Returns None if quote cannot be fetched (permission error, API error, etc.)
         """
-        try:
-            # Get any user's API key for fetching quotes
-            from database.auth_db import ApiKeys, decrypt_token
-            api_key_obj = ApiKeys.query.first()
-
-            if not api_key_obj:
-                logger.debug("No API keys found for fetching quotes")
-                return None
-
-            # Decrypt the API key
-            api_key = decrypt_token(api_key_obj.api_key_encrypted)
-
-            # Use quotes service with API key authentication
-            success, response, status_code = get_quotes(
-                symbol=symbol,
-                exchange=exchange,
-                api_key=api_key
-            )
-
-            if success and 'data' in response:
-                quote_data = response['data']
-                logger.debug(f"Fetched quote for {symbol}: LTP={quote_data.get('ltp', 0)}")
-                return quote_data
-            else:
-                # Log at debug level to avoid spam for permission errors
-                logger.debug(f"Could not fetch quote for {symbol}: {response.get('message', 'Unknown error')}")
-                return None
-
-        except Exception as e:
-            # Handle all exceptions gracefully - don't stop execution engine
-            logger.debug(f"Exception fetching quote for {symbol}: {str(e)}")
-            return None
+        quote = get_quote_provider().get_quote(symbol, exchange)
+        if quote:
+            logger.debug(f"Fetched quote for {symbol}: LTP={quote.get('ltp', 0)}")
+        return quote
 
     def _process_order(self, order, quote):
         """
         Process a single order based on current quote
         Determines if order should be executed based on price type
         """
+        # Placement, cancellation and execution of a user's orders are serialized on the user's lock
+        with self.store.user(order.user_id).lock:
+            if order.order_status != 'open':
+                logger.debug(f"Order {order.orderid} is {order.order_status}, skipping execution")
+                return
+            self._process_open_order(order, quote)
+
+    def _process_open_order(self, order, quote):
         try:
             # Check if this order already has a trade (prevent duplicates)
-            # This can happen with MARKET orders that are executed immediately on placement
-            # but the order status hasn't been updated to 'complete' yet due to race condition
-            existing_trade = SandboxTrades.query.filter_by(orderid=order.orderid).first()
+            existing_trade = self.store.user(order.user_id).trade_by_order.get(order.orderid)
             if existing_trade:
                 logger.debug(f"Order {order.orderid} already has trade {existing_trade.tradeid}, skipping execution")
-                # Update order status to complete if it's still open (race condition cleanup)
-                if order.order_status == 'open':
-                    order.order_status = 'complete'
-                    order.average_price = existing_trade.price
-                    order.filled_quantity = order.quantity
-                    order.pending_quantity = 0
-                    order.update_timestamp = datetime.now(pytz.timezone('Asia/Kolkata'))
-                    db_session.commit()
-                    logger.info(f"Updated order {order.orderid} status to complete (was in race condition)")
+                # Update order status to complete if it's still open
+                order.order_status = 'complete'
+                order.average_price = existing_trade.price
+                order.filled_quantity = order.quantity
+                order.pending_quantity = 0
+                self.store.save(order)
+                logger.info(f"Updated order {order.orderid} status to complete")
                 return
 
             ltp = Decimal(str(quote.get('ltp', 0)))
@@ -237,7 +202,7 @@ class ExecutionEngine:
             tradeid = self._generate_trade_id()
 
             # Create trade record
-            trade = SandboxTrades(
+            trade = TradeState(
                 tradeid=tradeid,
                 orderid=order.orderid,
                 user_id=order.user_id,
@@ -248,19 +213,17 @@ class ExecutionEngine:
                 price=execution_price,
                 product=order.product,
                 strategy=order.strategy,
-                trade_timestamp=datetime.now(pytz.timezone('Asia/Kolkata'))
+                trade_timestamp=ist_now()
             )
 
-            db_session.add(trade)
+            self.store.add_trade(trade)
 
             # Update order status
             order.order_status = 'complete'
             order.average_price = execution_price
             order.filled_quantity = order.quantity
             order.pending_quantity = 0
-            order.update_timestamp = datetime.now(pytz.timezone('Asia/Kolkata'))
-
-            db_session.commit()
+            self.store.save(order)
 
             # Update position
             self._update_position(order, execution_price)
@@ -268,17 +231,12 @@ class ExecutionEngine:
             logger.info(f"Order {order.orderid} executed successfully. Trade ID: {tradeid}")
 
         except Exception as e:
-            db_session.rollback()
             logger.error(f"Error executing order {order.orderid}: {e}")
 
             # Mark order as rejected
-            try:
-                order.order_status = 'rejected'
-                order.rejection_reason = f"Execution error: {str(e)}"
-                order.update_timestamp = datetime.now(pytz.timezone('Asia/Kolkata'))
-                db_session.commit()
-            except:
-                db_session.rollback()
+            order.order_status = 'rejected'
+            order.rejection_reason = f"Execution error: {str(e)}"
+            self.store.save(order)
 
     def _update_position(self, order, execution_price):
         """
@@ -293,18 +251,13 @@ class ExecutionEngine:
             fund_manager = FundManager(order.user_id)
 
             # Check if position exists
-            position = SandboxPositions.query.filter_by(
-                user_id=order.user_id,
-                symbol=order.symbol,
-                exchange=order.exchange,
-                product=order.product
-            ).first()
+            position = self.store.user(order.user_id).positions.get((order.symbol, order.exchange, order.product))
 
             if not position:
                 # Create new position
                 # Store the exact margin that was blocked at order placement time
                 order_margin = order.margin_blocked if hasattr(order, 'margin_blocked') and order.margin_blocked else Decimal('0.00')
-                position = SandboxPositions(
+                position = PositionState(
                     user_id=order.user_id,
                     symbol=order.symbol,
                     exchange=order.exchange,
@@ -316,9 +269,9 @@ class ExecutionEngine:
                     pnl_percent=Decimal('0.00'),
                     accumulated_realized_pnl=Decimal('0.00'),
                     margin_blocked=order_margin,  # Store exact margin from order
-                    created_at=datetime.now(pytz.timezone('Asia/Kolkata'))
+                    created_at=ist_now()
                 )
-                db_session.add(position)
+                self.store.add_position(position)
                 logger.info(f"Created new position: {order.symbol} {order.action} {order.quantity} (margin blocked: ₹{order_margin})")
 
             else:
@@ -452,10 +405,9 @@ class ExecutionEngine:
                     position.ltp = execution_price
                     logger.info(f"Partial close: {order.symbol}, New qty: {final_quantity}, Realized P&L: ₹{realized_pnl}")
 
-            db_session.commit()
+                self.store.save(position)
 
         except Exception as e:
-            db_session.rollback()
             logger.error(f"Error updating position for order {order.orderid}: {e}")
             raise
 
@@ -487,6 +439,20 @@ class ExecutionEngine:
         return f"TRADE-{timestamp}-{unique_id}"
 
 
+_execution_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_execution_engine():
+    """Return the process wide ExecutionEngine (fills MARKET orders when they are placed)"""
+    global _execution_engine
+    if _execution_engine is None:
+        with _engine_lock:
+            if _execution_engine is None:
+                _execution_engine = ExecutionEngine()
+    return _execution_engine
+
+
 def run_execution_engine_once():
     """Run one cycle of the execution engine"""
     engine = ExecutionEngine()
@@ -34,6 +34,13 @@ class ExecutionEngineThread(threading.Thread):
         from sandbox.execution_engine import ExecutionEngine
 
         logger.info("Sandbox Execution Engine thread started")
+
+        if get_config('order_execution_mode', 'poll') == 'tick':
+            if self._run_tick_engine():
+                logger.info("Sandbox Execution Engine thread stopped")
+                return
+            logger.warning("Tick execution unavailable, falling back to polling")
+
         engine = ExecutionEngine()
 
         while not self.stop_event.is_set():
@@ -50,6 +57,25 @@ class ExecutionEngineThread(threading.Thread):
 
         logger.info("Sandbox Execution Engine thread stopped")
 
+    def _run_tick_engine(self):
+        """
+        Match pending orders on live ticks until stopped
+        Returns False if the market data bus cannot be used
+        """
+        try:
+            from sandbox.tick_execution import TickExecutionEngine
+            engine = TickExecutionEngine(resync_interval=self.check_interval)
+        except ImportError as e:
+            logger.error(f"Tick execution requires pyzmq: {e}")
+            return False
+
+        try:
+            engine.run(self.stop_event)
+        except Exception as e:
+            logger.error(f"Error in tick execution engine: {e}")
+            return False
+        return True
+
     def stop(self):
         """Signal the thread to stop"""
         self.stop_event.set()
@@ -118,5 +144,6 @@ def get_execution_engine_status():
     return {
         'running': is_execution_engine_running(),
         'thread_name': _execution_thread.name if _execution_thread else None,
-        'check_interval': int(get_config('order_check_interval', '5'))
+        'check_interval': int(get_config('order_check_interval', '5')),
+        'execution_mode': get_config('order_execution_mode', 'poll')
     }
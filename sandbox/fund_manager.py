@@ -8,6 +8,10 @@ Features:
 - Leverage-based margin calculations
 - Real-time available balance tracking
 
+State:
+- Funds are held in the sandbox state store (see state_store.py) and written
+  to sandbox_db in the background
+
 Auto-Reset:
 - Runs as APScheduler background job (see squareoff_thread.py)
 - Configurable day (Monday-Sunday) and time (HH:MM format)
@@ -19,16 +23,15 @@ import os
 import sys
 from decimal import Decimal
 from datetime import datetime, timedelta
+from functools import wraps
 import pytz
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.sandbox_db import (
-    SandboxFunds, SandboxPositions, SandboxHoldings,
-    db_session, get_config
-)
+from database.sandbox_db import get_config
 from database.token_db import get_symbol_info
+from sandbox.state_store import get_state_store, FundsState, ist_now
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -48,22 +51,34 @@ def is_future(symbol, exchange):
     return False
 
 
+def with_user_lock(method):
+    """Run a manager method holding the lock of its user's sandbox state"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.state.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class FundManager:
     """Manages virtual funds for sandbox mode"""
 
     def __init__(self, user_id):
         self.user_id = user_id
         self.starting_capital = Decimal(get_config('starting_capital', '10000000.00'))
+        self.store = get_state_store()
+        self.state = self.store.user(user_id)
 
+    @with_user_lock
     def initialize_funds(self):
         """Initialize funds for a new user"""
         try:
             # Check if user already has funds
-            funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+            funds = self.state.funds
 
             if not funds:
                 # Create new fund account
-                funds = SandboxFunds(
+                funds = FundsState(
                     user_id=self.user_id,
                     total_capital=self.starting_capital,
                     available_balance=self.starting_capital,
@@ -71,11 +86,10 @@ class FundManager:
                     realized_pnl=Decimal('0.00'),
                     unrealized_pnl=Decimal('0.00'),
                     total_pnl=Decimal('0.00'),
-                    last_reset_date=datetime.now(pytz.timezone('Asia/Kolkata')),
+                    last_reset_date=ist_now(),
                     reset_count=0
                 )
-                db_session.add(funds)
-                db_session.commit()
+                self.store.set_funds(funds)
                 logger.info(f"Initialized funds for user {self.user_id} with ₹{self.starting_capital}")
                 return True, "Funds initialized successfully"
             else:
@@ -83,14 +97,14 @@ class FundManager:
                 return True, "Funds already initialized"
 
         except Exception as e:
-            db_session.rollback()
             logger.error(f"Error initializing funds for user {self.user_id}: {e}")
             return False, f"Error initializing funds: {str(e)}"
 
+    @with_user_lock
     def get_funds(self):
         """Get current fund status for user"""
         try:
-            funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+            funds = self.state.funds
 
             if not funds:
                 # Initialize funds if not exists
@@ -98,7 +112,7 @@ class FundManager:
                 if not success:
                     return None
 
-                funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+                funds = self.state.funds
 
             # Check if reset is needed
             self._check_and_reset_funds(funds)
@@ -151,6 +165,7 @@ class FundManager:
         except Exception as e:
             logger.error(f"Error checking fund reset for user {self.user_id}: {e}")
 
+    @with_user_lock
     def _reset_funds(self, funds):
         """Reset funds to starting capital"""
         try:
@@ -163,26 +178,26 @@ class FundManager:
             funds.realized_pnl = Decimal('0.00')
             funds.unrealized_pnl = Decimal('0.00')
             funds.total_pnl = Decimal('0.00')
-            funds.last_reset_date = datetime.now(pytz.timezone('Asia/Kolkata'))
+            funds.last_reset_date = ist_now()
             funds.reset_count += 1
-
-            db_session.commit()
+            self.store.save(funds)
 
             # Clear all positions and holdings
-            SandboxPositions.query.filter_by(user_id=self.user_id).delete()
-            SandboxHoldings.query.filter_by(user_id=self.user_id).delete()
-            db_session.commit()
+            for position in list(self.state.positions.values()):
+                self.store.remove_position(position)
+            for holding in list(self.state.holdings.values()):
+                self.store.remove_holding(holding)
 
             logger.info(f"Funds reset successfully for user {self.user_id} (Reset #{funds.reset_count})")
 
         except Exception as e:
-            db_session.rollback()
             logger.error(f"Error resetting funds for user {self.user_id}: {e}")
 
+    @with_user_lock
     def check_margin_available(self, required_margin):
         """Check if user has sufficient margin available"""
         try:
-            funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+            funds = self.state.funds
 
             if not funds:
                 return False, "Funds not initialized"
@@ -199,10 +214,11 @@ class FundManager:
             logger.error(f"Error checking margin for user {self.user_id}: {e}")
             return False, f"Error checking margin: {str(e)}"
 
+    @with_user_lock
     def block_margin(self, amount, description=""):
         """Block margin for a trade"""
         try:
-            funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+            funds = self.state.funds
 
             if not funds:
                 return False, "Funds not initialized"
@@ -216,20 +232,20 @@ class FundManager:
             funds.available_balance -= amount
             funds.used_margin += amount
 
-            db_session.commit()
+            self.store.save(funds)
 
             logger.info(f"Blocked ₹{amount} margin for user {self.user_id}. {description}")
             return True, f"Margin blocked: ₹{amount}"
 
         except Exception as e:
-            db_session.rollback()
             logger.error(f"Error blocking margin for user {self.user_id}: {e}")
             return False, f"Error blocking margin: {str(e)}"
 
+    @with_user_lock
     def release_margin(self, amount, realized_pnl=0, description=""):
         """Release blocked margin and update P&L"""
         try:
-            funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+            funds = self.state.funds
 
             if not funds:
                 return False, "Funds not initialized"
@@ -246,16 +262,16 @@ class FundManager:
             funds.realized_pnl += realized_pnl
             funds.total_pnl = funds.realized_pnl + funds.unrealized_pnl
 
-            db_session.commit()
+            self.store.save(funds)
 
             logger.info(f"Released ₹{amount} margin for user {self.user_id}. Realized P&L: ₹{realized_pnl}. {description}")
             return True, f"Margin released: ₹{amount}, P&L: ₹{realized_pnl}"
 
         except Exception as e:
-            db_session.rollback()
             logger.error(f"Error releasing margin for user {self.user_id}: {e}")
             return False, f"Error releasing margin: {str(e)}"
 
+    @with_user_lock
     def transfer_margin_to_holdings(self, amount, description=""):
         """
         Transfer margin to holdings during T+1 settlement
@@ -263,7 +279,7 @@ class FundManager:
         (the money is now represented in holdings value, not available cash)
         """
         try:
-            funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+            funds = self.state.funds
 
             if not funds:
                 return False, "Funds not initialized"
@@ -274,23 +290,23 @@ class FundManager:
             # But do NOT credit available_balance - money is now in holdings
             funds.used_margin -= amount
 
-            db_session.commit()
+            self.store.save(funds)
 
             logger.info(f"Transferred ₹{amount} margin to holdings for user {self.user_id}. {description}")
             return True, f"Margin transferred to holdings: ₹{amount}"
 
         except Exception as e:
-            db_session.rollback()
             logger.error(f"Error transferring margin to holdings for user {self.user_id}: {e}")
             return False, f"Error transferring margin to holdings: {str(e)}"
 
+    @with_user_lock
     def credit_sale_proceeds(self, amount, description=""):
         """
         Credit sale proceeds from selling CNC holdings
         Increases available_balance when holdings are sold
         """
         try:
-            funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+            funds = self.state.funds
 
             if not funds:
                 return False, "Funds not initialized"
@@ -300,20 +316,20 @@ class FundManager:
             # Credit sale proceeds to available balance
             funds.available_balance += amount
 
-            db_session.commit()
+            self.store.save(funds)
 
             logger.info(f"Credited ₹{amount} sale proceeds for user {self.user_id}. {description}")
             return True, f"Sale proceeds credited: ₹{amount}"
 
         except Exception as e:
-            db_session.rollback()
             logger.error(f"Error crediting sale proceeds for user {self.user_id}: {e}")
             return False, f"Error crediting sale proceeds: {str(e)}"
 
+    @with_user_lock
     def update_unrealized_pnl(self, unrealized_pnl):
         """Update unrealized P&L from open positions"""
         try:
-            funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+            funds = self.state.funds
 
             if not funds:
                 return False, "Funds not initialized"
@@ -323,12 +339,11 @@ class FundManager:
             funds.unrealized_pnl = unrealized_pnl
             funds.total_pnl = funds.realized_pnl + funds.unrealized_pnl
 
-            db_session.commit()
+            self.store.save(funds)
 
             return True, "Unrealized P&L updated"
 
         except Exception as e:
-            db_session.rollback()
             logger.error(f"Error updating unrealized P&L for user {self.user_id}: {e}")
             return False, f"Error updating unrealized P&L: {str(e)}"
 
@@ -417,8 +432,8 @@ def reset_all_user_funds():
     try:
         logger.info("=== AUTO-RESET: Starting scheduled fund reset for all users ===")
 
-        # Get all unique user IDs from funds table
-        all_funds = SandboxFunds.query.all()
+        # Every user with a fund account
+        all_funds = [state.funds for state in get_state_store().users() if state.funds is not None]
 
         if not all_funds:
             logger.info("No user funds to reset")
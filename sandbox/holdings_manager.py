@@ -8,6 +8,7 @@ Features:
 - Holdings P&L tracking with MTM
 - Holdings retrieval with live prices
 - Daily settlement processing
+- Positions and holdings read and updated in the sandbox state store
 """
 
 import os
@@ -19,10 +20,8 @@ import pytz
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.sandbox_db import (
-    SandboxPositions, SandboxHoldings, db_session
-)
-from services.quotes_service import get_quotes
+from sandbox.quote_provider import get_quote_provider
+from sandbox.state_store import get_state_store, HoldingState, ist_now
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -33,6 +32,8 @@ class HoldingsManager:
 
     def __init__(self, user_id):
         self.user_id = user_id
+        self.store = get_state_store()
+        self.state = self.store.user(user_id)
 
     def get_holdings(self, update_mtm=True):
         """
@@ -46,9 +47,8 @@ class HoldingsManager:
         """
         try:
             # Get all holdings, excluding zero-quantity holdings
-            holdings = SandboxHoldings.query.filter_by(user_id=self.user_id).filter(
-                SandboxHoldings.quantity != 0
-            ).all()
+            with self.state.lock:
+                holdings = [holding for holding in self.state.holdings.values() if holding.quantity != 0]
 
             if update_mtm:
                 self._update_holdings_mtm(holdings)
@@ -112,121 +112,117 @@ class HoldingsManager:
         Should be called daily after market close
         """
         try:
-            ist = pytz.timezone('Asia/Kolkata')
-            today = datetime.now(ist).date()
-            settlement_cutoff = datetime.combine(today, datetime.min.time())
-
-            # Get all CNC positions from yesterday or earlier
-            cnc_positions = SandboxPositions.query.filter_by(
-                user_id=self.user_id,
-                product='CNC'
-            ).filter(
-                SandboxPositions.created_at < settlement_cutoff
-            ).all()
-
-            if not cnc_positions:
-                logger.debug(f"No CNC positions to settle for user {self.user_id}")
-                return True, "No positions to settle"
-
-            settled_count = 0
-
-            for position in cnc_positions:
-                # Skip positions with zero quantity (already squared off)
-                if position.quantity == 0:
-                    db_session.delete(position)
-                    logger.debug(f"Deleted zero-quantity position: {position.symbol} {position.exchange}")
-                    continue
-
-                # Initialize fund manager for margin operations
-                from sandbox.fund_manager import FundManager
-                fund_manager = FundManager(self.user_id)
-
-                # Check if holding already exists
-                holding = SandboxHoldings.query.filter_by(
-                    user_id=self.user_id,
-                    symbol=position.symbol,
-                    exchange=position.exchange
-                ).first()
-
-                if holding:
-                    # Update existing holding
-                    old_holding_qty = holding.quantity
-
-                    if position.quantity > 0:
-                        # Adding to holding (BUY)
-                        # Calculate new average price
-                        total_value = (abs(holding.quantity) * holding.average_price) + \
-                                      (abs(position.quantity) * position.average_price)
-                        total_quantity = abs(holding.quantity) + abs(position.quantity)
-
-                        holding.quantity += position.quantity
-                        holding.average_price = total_value / total_quantity if total_quantity > 0 else holding.average_price
-
-                        # Transfer margin from used_margin to holdings (don't credit available_balance)
-                        margin_amount = abs(position.quantity) * position.average_price
-                        fund_manager.transfer_margin_to_holdings(
-                            margin_amount,
-                            f"T+1 settlement: {position.symbol} BUY → Holdings"
-                        )
-                        logger.info(f"Added to holding: {position.symbol}, Qty: {holding.quantity}, Margin transferred: ₹{margin_amount}")
-
-                    else:
-                        # Reducing holding (SELL)
-                        holding.quantity += position.quantity
-
-                        # Credit sale proceeds to available balance
-                        sale_proceeds = abs(position.quantity) * position.average_price
-                        fund_manager.credit_sale_proceeds(
-                            sale_proceeds,
-                            f"T+1 settlement: {position.symbol} SELL from Holdings"
-                        )
-                        logger.info(f"Reduced holding: {position.symbol}, Qty: {holding.quantity}, Sale proceeds: ₹{sale_proceeds}")
-
-                    holding.ltp = position.ltp
-                    holding.updated_at = datetime.now(ist)
-
-                    # If holding quantity becomes 0 after update, delete the holding
-                    if holding.quantity == 0:
-                        db_session.delete(holding)
-                        logger.info(f"Deleted zero-quantity holding: {position.symbol}")
+            with self.state.lock:
+                return self._process_t1_settlement()
 
-                else:
-                    # Create new holding (BUY position becoming holding)
-                    holding = SandboxHoldings(
-                        user_id=self.user_id,
-                        symbol=position.symbol,
-                        exchange=position.exchange,
-                        quantity=position.quantity,
-                        average_price=position.average_price,
-                        ltp=position.ltp or position.average_price,
-                        pnl=Decimal('0.00'),
-                        pnl_percent=Decimal('0.00'),
-                        settlement_date=today,
-                        created_at=datetime.now(ist)
-                    )
-                    db_session.add(holding)
+        except Exception as e:
+            logger.error(f"Error processing T+1 settlement for user {self.user_id}: {e}")
+            return False, f"Settlement error: {str(e)}"
+
+    def _process_t1_settlement(self):
+        ist = pytz.timezone('Asia/Kolkata')
+        today = datetime.now(ist).date()
+        settlement_cutoff = datetime.combine(today, datetime.min.time())
+
+        # Get all CNC positions from yesterday or earlier
+        cnc_positions = [
+            position for position in self.state.positions.values()
+            if position.product == 'CNC' and position.created_at < settlement_cutoff
+        ]
+
+        if not cnc_positions:
+            logger.debug(f"No CNC positions to settle for user {self.user_id}")
+            return True, "No positions to settle"
+
+        settled_count = 0
+
+        for position in cnc_positions:
+            # Skip positions with zero quantity (already squared off)
+            if position.quantity == 0:
+                self.store.remove_position(position)
+                logger.debug(f"Deleted zero-quantity position: {position.symbol} {position.exchange}")
+                continue
+
+            # Initialize fund manager for margin operations
+            from sandbox.fund_manager import FundManager
+            fund_manager = FundManager(self.user_id)
+
+            # Check if holding already exists
+            holding = self.state.holdings.get((position.symbol, position.exchange))
+
+            if holding:
+                # Update existing holding
+                old_holding_qty = holding.quantity
+
+                if position.quantity > 0:
+                    # Adding to holding (BUY)
+                    # Calculate new average price
+                    total_value = (abs(holding.quantity) * holding.average_price) + \
+                                  (abs(position.quantity) * position.average_price)
+                    total_quantity = abs(holding.quantity) + abs(position.quantity)
+
+                    holding.quantity += position.quantity
+                    holding.average_price = total_value / total_quantity if total_quantity > 0 else holding.average_price
 
                     # Transfer margin from used_margin to holdings (don't credit available_balance)
                     margin_amount = abs(position.quantity) * position.average_price
                     fund_manager.transfer_margin_to_holdings(
                         margin_amount,
-                        f"T+1 settlement: {position.symbol} → Holdings"
+                        f"T+1 settlement: {position.symbol} BUY → Holdings"
                     )
-                    logger.info(f"Created new holding: {position.symbol}, Qty: {position.quantity}, Margin transferred: ₹{margin_amount}")
+                    logger.info(f"Added to holding: {position.symbol}, Qty: {holding.quantity}, Margin transferred: ₹{margin_amount}")
 
-                # Delete the position after settling
-                db_session.delete(position)
-                settled_count += 1
+                else:
+                    # Reducing holding (SELL)
+                    holding.quantity += position.quantity
+
+                    # Credit sale proceeds to available balance
+                    sale_proceeds = abs(position.quantity) * position.average_price
+                    fund_manager.credit_sale_proceeds(
+                        sale_proceeds,
+                        f"T+1 settlement: {position.symbol} SELL from Holdings"
+                    )
+                    logger.info(f"Reduced holding: {position.symbol}, Qty: {holding.quantity}, Sale proceeds: ₹{sale_proceeds}")
 
-            db_session.commit()
+                holding.ltp = position.ltp
 
-            logger.info(f"Settled {settled_count} CNC positions for user {self.user_id}")
-            return True, f"Settled {settled_count} positions"
+                # If holding quantity becomes 0 after update, delete the holding
+                if holding.quantity == 0:
+                    self.store.remove_holding(holding)
+                    logger.info(f"Deleted zero-quantity holding: {position.symbol}")
+                else:
+                    self.store.save(holding)
 
-        except Exception as e:
-            db_session.rollback()
-            logger.error(f"Error processing T+1 settlement for user {self.user_id}: {e}")
-            return False, f"Settlement error: {str(e)}"
+            else:
+                # Create new holding (BUY position becoming holding)
+                holding = HoldingState(
+                    user_id=self.user_id,
+                    symbol=position.symbol,
+                    exchange=position.exchange,
+                    quantity=position.quantity,
+                    average_price=position.average_price,
+                    ltp=position.ltp or position.average_price,
+                    pnl=Decimal('0.00'),
+                    pnl_percent=Decimal('0.00'),
+                    settlement_date=today,
+                    created_at=ist_now()
+                )
+                self.store.add_holding(holding)
+
+                # Transfer margin from used_margin to holdings (don't credit available_balance)
+                margin_amount = abs(position.quantity) * position.average_price
+                fund_manager.transfer_margin_to_holdings(
+                    margin_amount,
+                    f"T+1 settlement: {position.symbol} → Holdings"
+                )
+                logger.info(f"Created new holding: {position.symbol}, Qty: {position.quantity}, Margin transferred: ₹{margin_amount}")
+
+            # Delete the position after settling
+            self.store.remove_position(position)
+            settled_count += 1
+
+        logger.info(f"Settled {settled_count} CNC positions for user {self.user_id}")
+        return True, f"Settled {settled_count} positions"
 
     def _update_holdings_mtm(self, holdings):
         """Update MTM for all holdings with live quotes"""
@@ -239,34 +235,29 @@ class HoldingsManager:
             for holding in holdings:
                 symbols_to_fetch.add((holding.symbol, holding.exchange))
 
-            # Fetch quotes for all symbols
-            quote_cache = {}
-            for symbol, exchange in symbols_to_fetch:
-                quote = self._fetch_quote(symbol, exchange)
-                if quote:
-                    quote_cache[(symbol, exchange)] = quote
+            # Fetch quotes for all symbols in one batch
+            quote_cache = get_quote_provider().get_quotes(symbols_to_fetch)
 
             # Update MTM for each holding
-            for holding in holdings:
-                quote = quote_cache.get((holding.symbol, holding.exchange))
-                if quote:
-                    ltp = Decimal(str(quote.get('ltp', 0)))
-                    if ltp > 0:
-                        holding.ltp = ltp
-                        holding.pnl = self._calculate_holding_pnl(
-                            holding.quantity,
-                            holding.average_price,
-                            ltp
-                        )
-                        holding.pnl_percent = self._calculate_pnl_percent(
-                            holding.average_price,
-                            ltp
-                        )
-
-            db_session.commit()
+            with self.state.lock:
+                for holding in holdings:
+                    quote = quote_cache.get((holding.symbol, holding.exchange))
+                    if quote:
+                        ltp = Decimal(str(quote.get('ltp', 0)))
+                        if ltp > 0:
+                            holding.ltp = ltp
+                            holding.pnl = self._calculate_holding_pnl(
+                                holding.quantity,
+                                holding.average_price,
+                                ltp
+                            )
+                            holding.pnl_percent = self._calculate_pnl_percent(
+                                holding.average_price,
+                                ltp
+                            )
+                            self.store.save(holding)
 
         except Exception as e:
-            db_session.rollback()
             logger.error(f"Error updating holdings MTM: {e}")
 
     def _calculate_holding_pnl(self, quantity, avg_price, ltp):
@@ -302,37 +293,6 @@ class HoldingsManager:
             logger.error(f"Error calculating P&L percent: {e}")
             return Decimal('0.00')
 
-    def _fetch_quote(self, symbol, exchange):
-        """Fetch real-time quote for a symbol using API key"""
-        try:
-            # Get any user's API key for fetching quotes
-            from database.auth_db import ApiKeys, decrypt_token
-            api_key_obj = ApiKeys.query.first()
-
-            if not api_key_obj:
-                logger.warning("No API keys found for fetching quotes")
-                return None
-
-            # Decrypt the API key
-            api_key = decrypt_token(api_key_obj.api_key_encrypted)
-
-            # Use quotes service with API key authentication
-            success, response, status_code = get_quotes(
-                symbol=symbol,
-                exchange=exchange,
-                api_key=api_key
-            )
-
-            if success and 'data' in response:
-                return response['data']
-            else:
-                return None
-
-        except Exception as e:
-            logger.error(f"Error fetching quote for {symbol}: {e}")
-            return None
-
-
 def process_all_t1_settlements():
     """Process T+1 settlement for all users"""
     try:
@@ -341,9 +301,10 @@ def process_all_t1_settlements():
         today = datetime.now(ist).date()
         settlement_cutoff = datetime.combine(today, datetime.min.time())
 
-        positions = SandboxPositions.query.filter_by(product='CNC').filter(
-            SandboxPositions.created_at < settlement_cutoff
-        ).all()
+        positions = [
+            position for position in get_state_store().positions('CNC')
+            if position.created_at < settlement_cutoff
+        ]
 
         if not positions:
             logger.info("No CNC positions to settle")
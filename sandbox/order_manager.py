@@ -8,6 +8,7 @@ Features:
 - Order placement with unique order IDs
 - Order modification and cancellation
 - Support for all order types: MARKET, LIMIT, SL, SL-M
+- Orders and positions read and updated in the sandbox state store, one user at a time
 """
 
 import os
@@ -20,10 +21,9 @@ import uuid
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.sandbox_db import (
-    SandboxOrders, SandboxTrades, SandboxPositions, db_session
-)
-from sandbox.fund_manager import FundManager
+from sandbox.fund_manager import FundManager, with_user_lock
+from sandbox.quote_provider import get_quote_provider
+from sandbox.state_store import OrderState, ist_now, session_start
 from database.symbol import SymToken
 from database.token_db import get_symbol_info
 from utils.logging import get_logger
@@ -51,6 +51,8 @@ class OrderManager:
     def __init__(self, user_id):
         self.user_id = user_id
         self.fund_manager = FundManager(user_id)
+        self.store = self.fund_manager.store
+        self.state = self.fund_manager.state
 
     def place_order(self, order_data):
         """
@@ -71,6 +73,9 @@ class OrderManager:
         Returns:
             tuple: (success: bool, response: dict, status_code: int)
         """
+        # Validation and the quote of a MARKET order need no user state and run
+        # before taking the user's lock: on a quote cache miss the quote is a broker
+        # call that would hold up the user's other orders
         try:
             # Validate order data
             is_valid, validation_msg = self._validate_order(order_data)
@@ -81,16 +86,9 @@ class OrderManager:
                     'mode': 'analyze'
                 }, 400
 
-            # Extract order parameters
             symbol = order_data['symbol']
             exchange = order_data['exchange']
-            action = order_data['action'].upper()
             quantity = int(order_data['quantity'])
-            price = Decimal(str(order_data.get('price', 0))) if order_data.get('price') else None
-            trigger_price = Decimal(str(order_data.get('trigger_price', 0))) if order_data.get('trigger_price') else None
-            price_type = order_data['price_type'].upper()
-            product = order_data['product'].upper()
-            strategy = order_data.get('strategy', '')
 
             # Get symbol info for lot size validation (from cache)
             symbol_obj = get_symbol_info(symbol, exchange)
@@ -111,6 +109,34 @@ class OrderManager:
                         'mode': 'analyze'
                     }, 400
 
+            quote = None
+            if order_data['price_type'].upper() == 'MARKET':
+                quote = self._fetch_quote(symbol, exchange)
+        except Exception as e:
+            logger.error(f"Error placing order: {e}")
+            return False, {
+                'status': 'error',
+                'message': f'Error placing order: {str(e)}',
+                'mode': 'analyze'
+            }, 500
+
+        return self._place_order(order_data, quote)
+
+    @with_user_lock
+    def _place_order(self, order_data, quote):
+        """Block margin for and record a validated order; quote is the LTP source of MARKET orders"""
+        try:
+            # Extract order parameters
+            symbol = order_data['symbol']
+            exchange = order_data['exchange']
+            action = order_data['action'].upper()
+            quantity = int(order_data['quantity'])
+            price = Decimal(str(order_data.get('price', 0))) if order_data.get('price') else None
+            trigger_price = Decimal(str(order_data.get('trigger_price', 0))) if order_data.get('trigger_price') else None
+            price_type = order_data['price_type'].upper()
+            product = order_data['product'].upper()
+            strategy = order_data.get('strategy', '')
+
             # Validate MIS orders - reject if after square-off time but before market open
             # Exception: Allow orders that reduce/close existing positions
             if product == 'MIS':
@@ -142,12 +168,9 @@ class OrderManager:
 
                     if is_blocked:
                         # Check if this order will reduce/close an existing OPEN position
-                        existing_position = SandboxPositions.query.filter_by(
-                            user_id=self.user_id,
-                            symbol=symbol,
-                            exchange=exchange,
-                            product=product
-                        ).filter(SandboxPositions.quantity != 0).first()
+                        existing_position = self.state.positions.get((symbol, exchange, product))
+                        if existing_position and existing_position.quantity == 0:
+                            existing_position = None
 
                         # Allow if reducing existing position
                         # BUY reduces short position (negative qty), SELL reduces long position (positive qty)
@@ -175,20 +198,10 @@ class OrderManager:
                 if product == 'CNC':
                     # CNC SELL orders require existing long positions or holdings
                     # Check existing position
-                    existing_position = SandboxPositions.query.filter_by(
-                        user_id=self.user_id,
-                        symbol=symbol,
-                        exchange=exchange,
-                        product=product
-                    ).first()
+                    existing_position = self.state.positions.get((symbol, exchange, product))
 
                     # Check holdings (T+1 settled positions)
-                    from database.sandbox_db import SandboxHoldings
-                    existing_holdings = SandboxHoldings.query.filter_by(
-                        user_id=self.user_id,
-                        symbol=symbol,
-                        exchange=exchange
-                    ).first()
+                    existing_holdings = self.state.holdings.get((symbol, exchange))
 
                     # Calculate total available quantity
                     position_qty = existing_position.quantity if existing_position and existing_position.quantity > 0 else 0
@@ -210,41 +223,23 @@ class OrderManager:
             margin_calculation_price = None
 
             # Check for existing position early (needed for fallback pricing)
-            temp_existing_position = SandboxPositions.query.filter_by(
-                user_id=self.user_id,
-                symbol=symbol,
-                exchange=exchange,
-                product=product
-            ).first()
+            temp_existing_position = self.state.positions.get((symbol, exchange, product))
 
             if price_type == 'MARKET':
-                # For MARKET orders, fetch current LTP for margin calculation
-                try:
-                    from sandbox.execution_engine import ExecutionEngine
-                    engine = ExecutionEngine()
-                    quote = engine._fetch_quote(symbol, exchange)
-                    if quote and quote.get('ltp'):
-                        margin_calculation_price = Decimal(str(quote['ltp']))
-                        logger.debug(f"Using LTP {margin_calculation_price} for MARKET order margin calculation")
-                    else:
-                        # In sandbox mode, use a default price if API fails
-                        # Try to get last execution price from positions
-                        if temp_existing_position and temp_existing_position.ltp:
-                            margin_calculation_price = temp_existing_position.ltp
-                            logger.warning(f"API failed, using last known price {margin_calculation_price} for {symbol}")
-                        else:
-                            # Use a reasonable default for sandbox testing
-                            margin_calculation_price = Decimal('100.00')  # Default price for testing
-                            logger.warning(f"API failed, using default sandbox price {margin_calculation_price} for {symbol}")
-                except Exception as e:
-                    logger.error(f"Error fetching quote for margin calculation: {e}")
-                    # In sandbox mode, use a fallback price
+                # For MARKET orders, use the LTP fetched before the lock for margin calculation
+                if quote and quote.get('ltp'):
+                    margin_calculation_price = Decimal(str(quote['ltp']))
+                    logger.debug(f"Using LTP {margin_calculation_price} for MARKET order margin calculation")
+                else:
+                    # In sandbox mode, use a default price if API fails
+                    # Try to get last execution price from positions
                     if temp_existing_position and temp_existing_position.ltp:
                         margin_calculation_price = temp_existing_position.ltp
-                        logger.warning(f"API error, using last known price {margin_calculation_price} for {symbol}")
+                        logger.warning(f"API failed, using last known price {margin_calculation_price} for {symbol}")
                     else:
+                        # Use a reasonable default for sandbox testing
                         margin_calculation_price = Decimal('100.00')  # Default price for testing
-                        logger.warning(f"API error, using default sandbox price {margin_calculation_price} for {symbol}")
+                        logger.warning(f"API failed, using default sandbox price {margin_calculation_price} for {symbol}")
 
             elif price_type == 'LIMIT':
                 # For LIMIT orders, use the limit price for margin calculation
@@ -278,12 +273,7 @@ class OrderManager:
                 }, 400
 
             # Check if this order will close/reduce/reverse an existing position
-            existing_position = SandboxPositions.query.filter_by(
-                user_id=self.user_id,
-                symbol=symbol,
-                exchange=exchange,
-                product=product
-            ).first()
+            existing_position = self.state.positions.get((symbol, exchange, product))
 
             # Calculate margin to block based on position impact
             actual_margin_to_block = margin_required
@@ -370,7 +360,7 @@ class OrderManager:
                 # For MARKET orders, store the LTP we used for margin calculation as reference price
                 order_price_to_store = margin_calculation_price if price_type == 'MARKET' else price
 
-                order = SandboxOrders(
+                order = OrderState(
                     orderid=orderid,
                     user_id=self.user_id,
                     strategy=strategy,
@@ -388,11 +378,10 @@ class OrderManager:
                     pending_quantity=0,
                     rejection_reason=cnc_sell_rejection_reason,
                     margin_blocked=Decimal('0'),  # No margin blocked for rejected orders
-                    order_timestamp=datetime.now(pytz.timezone('Asia/Kolkata'))
+                    order_timestamp=ist_now()
                 )
 
-                db_session.add(order)
-                db_session.commit()
+                self.store.add_order(order)
 
                 logger.info(f"Order rejected: {orderid} - {symbol} {action} {quantity} - Reason: {cnc_sell_rejection_reason}")
 
@@ -407,7 +396,7 @@ class OrderManager:
             # For MARKET orders, store the LTP we used for margin calculation as reference price
             order_price_to_store = margin_calculation_price if price_type == 'MARKET' else price
 
-            order = SandboxOrders(
+            order = OrderState(
                 orderid=orderid,
                 user_id=self.user_id,
                 strategy=strategy,
@@ -425,25 +414,21 @@ class OrderManager:
                 pending_quantity=quantity,
                 rejection_reason=None,
                 margin_blocked=actual_margin_to_block,  # Store exact margin blocked
-                order_timestamp=datetime.now(pytz.timezone('Asia/Kolkata'))
+                order_timestamp=ist_now()
             )
 
-            db_session.add(order)
-            db_session.commit()
+            self.store.add_order(order)
 
             logger.info(f"Order placed: {orderid} - {symbol} {action} {quantity} @ {price_type}")
 
             # Execute MARKET orders immediately
             if price_type == 'MARKET':
                 try:
-                    from sandbox.execution_engine import ExecutionEngine
-                    engine = ExecutionEngine()
+                    from sandbox.execution_engine import get_execution_engine
 
-                    # Fetch current quote
-                    quote = engine._fetch_quote(symbol, exchange)
                     if quote:
-                        # Process the order immediately
-                        engine._process_order(order, quote)
+                        # Process the order immediately at the quote it was priced with
+                        get_execution_engine()._process_order(order, quote)
                         logger.info(f"Market order {orderid} executed immediately")
                     else:
                         logger.warning(f"Could not fetch quote for {symbol} on {exchange}, order remains open")
@@ -451,6 +436,11 @@ class OrderManager:
                     logger.error(f"Error executing market order immediately: {e}")
                     # Order remains in 'open' status if execution fails
 
+            # Index the pending order in the tick execution trigger books
+            if order.order_status == 'open':
+                from sandbox.tick_execution import notify_order_upsert
+                notify_order_upsert(order)
+
             return True, {
                 'status': 'success',
                 'orderid': orderid,
@@ -458,7 +448,6 @@ class OrderManager:
             }, 200
 
         except Exception as e:
-            db_session.rollback()
             logger.error(f"Error placing order: {e}")
             return False, {
                 'status': 'error',
@@ -466,6 +455,7 @@ class OrderManager:
                 'mode': 'analyze'
             }, 500
 
+    @with_user_lock
     def modify_order(self, orderid, new_data):
         """
         Modify an existing open order
@@ -479,10 +469,7 @@ class OrderManager:
         """
         try:
             # Get existing order
-            order = SandboxOrders.query.filter_by(
-                orderid=orderid,
-                user_id=self.user_id
-            ).first()
+            order = self.store.find_order(self.user_id, orderid)
 
             if not order:
                 return False, {
@@ -520,9 +507,10 @@ class OrderManager:
             if 'trigger_price' in new_data and new_data['trigger_price']:
                 order.trigger_price = Decimal(str(new_data['trigger_price']))
 
-            order.update_timestamp = datetime.now(pytz.timezone('Asia/Kolkata'))
+            self.store.save(order)
 
-            db_session.commit()
+            from sandbox.tick_execution import notify_order_upsert
+            notify_order_upsert(order)
 
             logger.info(f"Order modified: {orderid}")
 
@@ -534,7 +522,6 @@ class OrderManager:
             }, 200
 
         except Exception as e:
-            db_session.rollback()
             logger.error(f"Error modifying order {orderid}: {e}")
             return False, {
                 'status': 'error',
@@ -552,12 +539,19 @@ class OrderManager:
         Returns:
             tuple: (success: bool, response: dict, status_code: int)
         """
+        # Old MARKET orders without margin_blocked or a price need an LTP to release
+        # their margin; like place_order, fetch it before taking the user's lock
+        quote = None
+        order = self.store.find_order(self.user_id, orderid)
+        if order is not None and order.order_status == 'open' and not order.margin_blocked and not order.price:
+            quote = self._fetch_quote(order.symbol, order.exchange)
+        return self._cancel_order(orderid, quote)
+
+    @with_user_lock
+    def _cancel_order(self, orderid, quote):
         try:
             # Get existing order
-            order = SandboxOrders.query.filter_by(
-                orderid=orderid,
-                user_id=self.user_id
-            ).first()
+            order = self.store.find_order(self.user_id, orderid)
 
             if not order:
                 return False, {
@@ -575,7 +569,6 @@ class OrderManager:
 
             # Update order status
             order.order_status = 'cancelled'
-            order.update_timestamp = datetime.now(pytz.timezone('Asia/Kolkata'))
 
             # Release blocked margin using the exact amount that was blocked
             if hasattr(order, 'margin_blocked') and order.margin_blocked and order.margin_blocked > 0:
@@ -605,18 +598,11 @@ class OrderManager:
                     if should_release_margin:
                         # Get price for margin calculation
                         if not order.price:
-                            # If price is not set (old MARKET orders), fetch current LTP
-                            try:
-                                from sandbox.execution_engine import ExecutionEngine
-                                engine = ExecutionEngine()
-                                quote = engine._fetch_quote(order.symbol, order.exchange)
-                                if quote and quote.get('ltp'):
-                                    order_price = Decimal(str(quote['ltp']))
-                                else:
-                                    logger.error(f"Cannot fetch LTP for {order.symbol} to calculate margin release")
-                                    order_price = Decimal('0')
-                            except Exception as e:
-                                logger.error(f"Error fetching quote for margin release: {e}")
+                            # If price is not set (old MARKET orders), use the LTP fetched before the lock
+                            if quote and quote.get('ltp'):
+                                order_price = Decimal(str(quote['ltp']))
+                            else:
+                                logger.error(f"Cannot fetch LTP for {order.symbol} to calculate margin release")
                                 order_price = Decimal('0')
                         else:
                             order_price = order.price
@@ -636,7 +622,10 @@ class OrderManager:
                     else:
                         logger.info(f"No margin to release for cancelled order {orderid} ({order.action} {order.product})")
 
-            db_session.commit()
+            self.store.save(order)
+
+            from sandbox.tick_execution import notify_order_removed
+            notify_order_removed(orderid)
 
             logger.info(f"Order cancelled: {orderid}")
 
@@ -648,7 +637,6 @@ class OrderManager:
             }, 200
 
         except Exception as e:
-            db_session.rollback()
             logger.error(f"Error cancelling order {orderid}: {e}")
             return False, {
                 'status': 'error',
@@ -656,40 +644,19 @@ class OrderManager:
                 'mode': 'analyze'
             }, 500
 
+    @with_user_lock
     def get_orderbook(self):
         """Get all orders for the user for current session only"""
         try:
-            from datetime import datetime, time, timedelta
-            import os
-
-            # Get session expiry time from config (e.g., '03:00')
-            session_expiry_str = os.getenv('SESSION_EXPIRY_TIME', '03:00')
-            expiry_hour, expiry_minute = map(int, session_expiry_str.split(':'))
-
-            # Get current time
-            now = datetime.now()
-            today = now.date()
-
-            # Calculate session start time
-            # If current time is before session expiry (e.g., before 3 AM),
-            # session started yesterday at expiry time
-            session_expiry_time = time(expiry_hour, expiry_minute)
-
-            if now.time() < session_expiry_time:
-                # We're in the early morning before session expiry
-                # Session started yesterday at expiry time
-                session_start = datetime.combine(today - timedelta(days=1), session_expiry_time)
-            else:
-                # We're after session expiry time
-                # Session started today at expiry time
-                session_start = datetime.combine(today, session_expiry_time)
-
-            orders = SandboxOrders.query.filter(
-                SandboxOrders.user_id == self.user_id,
-                SandboxOrders.order_timestamp >= session_start
-            ).order_by(
-                SandboxOrders.order_timestamp.desc()
-            ).all()
+            # Orders and trades of past sessions stay in sandbox_db only
+            since = session_start()
+            self.store.prune(self.state, since)
+
+            orders = sorted(
+                (order for order in self.state.orders.values() if order.order_timestamp >= since),
+                key=lambda order: order.order_timestamp,
+                reverse=True
+            )
 
             orderbook = []
             for order in orders:
@@ -732,13 +699,11 @@ class OrderManager:
                 'mode': 'analyze'
             }, 500
 
+    @with_user_lock
     def get_order_status(self, orderid):
         """Get status of a specific order"""
         try:
-            order = SandboxOrders.query.filter_by(
-                orderid=orderid,
-                user_id=self.user_id
-            ).first()
+            order = self.store.find_order(self.user_id, orderid)
 
             if not order:
                 return False, {
@@ -777,6 +742,14 @@ class OrderManager:
                 'mode': 'analyze'
             }, 500
 
+    def _fetch_quote(self, symbol, exchange):
+        """Quote of an instrument from the shared quote provider, None if it cannot be fetched"""
+        try:
+            return get_quote_provider().get_quote(symbol, exchange)
+        except Exception as e:
+            logger.error(f"Error fetching quote for {exchange}:{symbol}: {e}")
+            return None
+
     def _validate_order(self, order_data):
         """Validate order parameters"""
         required_fields = ['symbol', 'exchange', 'action', 'quantity', 'price_type', 'product']
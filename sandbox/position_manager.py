@@ -8,6 +8,7 @@ Features:
 - Position netting (same symbol/exchange/product)
 - Open position retrieval with live P&L
 - Background MTM updates (configurable interval)
+- Positions and trades read from the sandbox state store
 """
 
 import os
@@ -20,12 +21,11 @@ import time
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.sandbox_db import (
-    SandboxPositions, SandboxTrades, db_session, get_config
-)
+from database.sandbox_db import get_config
 from sandbox.fund_manager import FundManager
+from sandbox.state_store import get_state_store, session_start
 from sandbox.holdings_manager import HoldingsManager
-from services.quotes_service import get_quotes
+from sandbox.quote_provider import get_quote_provider
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -37,6 +37,8 @@ class PositionManager:
     def __init__(self, user_id):
         self.user_id = user_id
         self.fund_manager = FundManager(user_id)
+        self.store = self.fund_manager.store
+        self.state = self.fund_manager.state
 
     def get_open_positions(self, update_mtm=True):
         """
@@ -51,39 +53,15 @@ class PositionManager:
             tuple: (success: bool, response: dict, status_code: int)
         """
         try:
-            from datetime import datetime, time, timedelta
-            import os
-
-            # Get session expiry time from config (e.g., '03:00')
-            session_expiry_str = os.getenv('SESSION_EXPIRY_TIME', '03:00')
-            expiry_hour, expiry_minute = map(int, session_expiry_str.split(':'))
-
-            # Get current time
-            now = datetime.now()
-            today = now.date()
-
-            # Calculate if we're in a new session
-            session_expiry_time = time(expiry_hour, expiry_minute)
-
-            # Determine last session expiry
-            if now.time() < session_expiry_time:
-                # We're before today's session expiry (e.g., before 3 AM)
-                # Last session expired yesterday at 3 AM
-                last_session_expiry = datetime.combine(today - timedelta(days=1), session_expiry_time)
-            else:
-                # We're after today's session expiry (e.g., after 3 AM)
-                # Last session expired today at 3 AM
-                last_session_expiry = datetime.combine(today, session_expiry_time)
+            # Last session expiry (SESSION_EXPIRY_TIME, e.g. '03:00')
+            last_session_expiry = session_start()
 
             # Get all positions (including zero quantity ones from current session)
-            positions_query = SandboxPositions.query.filter(
-                SandboxPositions.user_id == self.user_id
-            )
-
             # Check if we need to filter positions based on product type
             # If position was created before last session expiry and it's not NRML,
             # it should have been settled
-            all_positions = positions_query.all()
+            with self.state.lock:
+                all_positions = list(self.state.positions.values())
             positions = []
 
             for position in all_positions:
@@ -103,27 +81,28 @@ class PositionManager:
             total_unrealized_pnl = Decimal('0.00')  # Only from open positions
             total_display_pnl = Decimal('0.00')     # For display (includes closed positions)
 
-            for position in positions:
-                pnl = Decimal(str(position.pnl))
-
-                # Add to display total (includes all positions)
-                total_display_pnl += pnl
-
-                # Only add to unrealized P&L if position is open (not closed)
-                # Closed positions (qty=0) have their P&L already in realized_pnl in funds
-                if position.quantity != 0:
-                    total_unrealized_pnl += pnl
-
-                positions_list.append({
-                    'symbol': position.symbol,
-                    'exchange': position.exchange,
-                    'product': position.product,
-                    'quantity': position.quantity,
-                    'average_price': float(position.average_price),
-                    'ltp': float(position.ltp) if position.ltp else 0.0,
-                    'pnl': float(pnl),
-                    'pnl_percent': float(position.pnl_percent),
-                })
+            with self.state.lock:
+                for position in positions:
+                    pnl = Decimal(str(position.pnl))
+
+                    # Add to display total (includes all positions)
+                    total_display_pnl += pnl
+
+                    # Only add to unrealized P&L if position is open (not closed)
+                    # Closed positions (qty=0) have their P&L already in realized_pnl in funds
+                    if position.quantity != 0:
+                        total_unrealized_pnl += pnl
+
+                    positions_list.append({
+                        'symbol': position.symbol,
+                        'exchange': position.exchange,
+                        'product': position.product,
+                        'quantity': position.quantity,
+                        'average_price': float(position.average_price),
+                        'ltp': float(position.ltp) if position.ltp else 0.0,
+                        'pnl': float(pnl),
+                        'pnl_percent': float(position.pnl_percent),
+                    })
 
             # Update fund unrealized P&L (only from open positions)
             # Closed position P&L is already in realized_pnl, so don't include it here
@@ -148,12 +127,7 @@ class PositionManager:
     def get_position_for_symbol(self, symbol, exchange, product):
         """Get position for a specific symbol"""
         try:
-            position = SandboxPositions.query.filter_by(
-                user_id=self.user_id,
-                symbol=symbol,
-                exchange=exchange,
-                product=product
-            ).first()
+            position = self.state.positions.get((symbol, exchange, product))
 
             if not position:
                 return None
@@ -187,49 +161,48 @@ class PositionManager:
             for position in positions:
                 symbols_to_fetch.add((position.symbol, position.exchange))
 
-            # Fetch quotes for all symbols
-            quote_cache = {}
-            for symbol, exchange in symbols_to_fetch:
-                quote = self._fetch_quote(symbol, exchange)
-                if quote:
-                    quote_cache[(symbol, exchange)] = quote
+            # Fetch quotes for all symbols in one batch (outside the user lock)
+            quote_cache = get_quote_provider().get_quotes(symbols_to_fetch)
 
             # Update MTM for each position
-            for position in positions:
-                # Skip MTM update for closed positions (quantity = 0)
-                # They already have accumulated realized P&L stored in position.pnl
-                if position.quantity == 0:
-                    continue
-
-                quote = quote_cache.get((position.symbol, position.exchange))
-                if quote:
-                    ltp = Decimal(str(quote.get('ltp', 0)))
-                    if ltp > 0:
-                        position.ltp = ltp
-
-                        # Calculate current unrealized P&L for open position
-                        current_unrealized_pnl = self._calculate_position_pnl(
-                            position.quantity,
-                            position.average_price,
-                            ltp
-                        )
-
-                        # Display = accumulated realized P&L + current unrealized P&L
-                        accumulated_realized = position.accumulated_realized_pnl if position.accumulated_realized_pnl else Decimal('0.00')
-                        position.pnl = accumulated_realized + current_unrealized_pnl
-
-                        position.pnl_percent = self._calculate_pnl_percent(
-                            position.average_price,
-                            ltp,
-                            position.quantity
-                        )
-
-            db_session.commit()
+            with self.state.lock:
+                for position in positions:
+                    # Skip MTM update for closed positions (quantity = 0)
+                    # They already have accumulated realized P&L stored in position.pnl
+                    if position.quantity == 0:
+                        continue
+
+                    quote = quote_cache.get((position.symbol, position.exchange))
+                    if quote:
+                        ltp = Decimal(str(quote.get('ltp', 0)))
+                        if ltp > 0:
+                            self._apply_mtm(position, ltp)
 
         except Exception as e:
-            db_session.rollback()
             logger.error(f"Error updating positions MTM: {e}")
 
+    def _apply_mtm(self, position, ltp):
+        """Mark a position to ltp and queue it for persistence (caller holds the user lock)"""
+        position.ltp = ltp
+
+        # Calculate current unrealized P&L for open position
+        current_unrealized_pnl = self._calculate_position_pnl(
+            position.quantity,
+            position.average_price,
+            ltp
+        )
+
+        # Display = accumulated realized P&L + current unrealized P&L
+        accumulated_realized = position.accumulated_realized_pnl if position.accumulated_realized_pnl else Decimal('0.00')
+        position.pnl = accumulated_realized + current_unrealized_pnl
+
+        position.pnl_percent = self._calculate_pnl_percent(
+            position.average_price,
+            ltp,
+            position.quantity
+        )
+        self.store.save(position)
+
     def _update_single_position_mtm(self, position):
         """Update MTM for a single position"""
         try:
@@ -242,28 +215,10 @@ class PositionManager:
             if quote:
                 ltp = Decimal(str(quote.get('ltp', 0)))
                 if ltp > 0:
-                    position.ltp = ltp
-
-                    # Calculate current unrealized P&L for open position
-                    current_unrealized_pnl = self._calculate_position_pnl(
-                        position.quantity,
-                        position.average_price,
-                        ltp
-                    )
-
-                    # Display = accumulated realized P&L + current unrealized P&L
-                    accumulated_realized = position.accumulated_realized_pnl if position.accumulated_realized_pnl else Decimal('0.00')
-                    position.pnl = accumulated_realized + current_unrealized_pnl
-
-                    position.pnl_percent = self._calculate_pnl_percent(
-                        position.average_price,
-                        ltp,
-                        position.quantity
-                    )
-                    db_session.commit()
+                    with self.state.lock:
+                        self._apply_mtm(position, ltp)
 
         except Exception as e:
-            db_session.rollback()
             logger.error(f"Error updating position MTM for {position.symbol}: {e}")
 
     def _calculate_position_pnl(self, quantity, avg_price, ltp):
@@ -309,35 +264,11 @@ class PositionManager:
             return Decimal('0.00')
 
     def _fetch_quote(self, symbol, exchange):
-        """Fetch real-time quote for a symbol using API key"""
-        try:
-            # Get any user's API key for fetching quotes
-            from database.auth_db import ApiKeys, decrypt_token
-            api_key_obj = ApiKeys.query.first()
-
-            if not api_key_obj:
-                logger.warning("No API keys found for fetching quotes")
-                return None
-
-            # Decrypt the API key
-            api_key = decrypt_token(api_key_obj.api_key_encrypted)
-
-            # Use quotes service with API key authentication
-            success, response, status_code = get_quotes(
-                symbol=symbol,
-                exchange=exchange,
-                api_key=api_key
-            )
-
-            if success and 'data' in response:
-                return response['data']
-            else:
-                logger.warning(f"Failed to fetch quote for {symbol}: {response.get('message', 'Unknown error')}")
-                return None
-
-        except Exception as e:
-            logger.error(f"Error fetching quote for {symbol}: {e}")
-            return None
+        """Fetch real-time quote for a symbol from the shared quote snapshot"""
+        quote = get_quote_provider().get_quote(symbol, exchange)
+        if quote is None:
+            logger.warning(f"Failed to fetch quote for {symbol}")
+        return quote
 
     def close_position(self, symbol, exchange, product):
         """
@@ -345,12 +276,7 @@ class PositionManager:
         Creates a reverse order to close the position
         """
         try:
-            position = SandboxPositions.query.filter_by(
-                user_id=self.user_id,
-                symbol=symbol,
-                exchange=exchange,
-                product=product
-            ).first()
+            position = self.state.positions.get((symbol, exchange, product))
 
             if not position:
                 return False, {
@@ -401,37 +327,15 @@ class PositionManager:
     def get_tradebook(self):
         """Get all executed trades for the user for current session only"""
         try:
-            from datetime import datetime, time, timedelta
-            import os
-
-            # Get session expiry time from config (e.g., '03:00')
-            session_expiry_str = os.getenv('SESSION_EXPIRY_TIME', '03:00')
-            expiry_hour, expiry_minute = map(int, session_expiry_str.split(':'))
-
-            # Get current time
-            now = datetime.now()
-            today = now.date()
-
-            # Calculate session start time
-            # If current time is before session expiry (e.g., before 3 AM),
-            # session started yesterday at expiry time
-            session_expiry_time = time(expiry_hour, expiry_minute)
-
-            if now.time() < session_expiry_time:
-                # We're in the early morning before session expiry
-                # Session started yesterday at expiry time
-                session_start = datetime.combine(today - timedelta(days=1), session_expiry_time)
-            else:
-                # We're after session expiry time
-                # Session started today at expiry time
-                session_start = datetime.combine(today, session_expiry_time)
-
-            trades = SandboxTrades.query.filter(
-                SandboxTrades.user_id == self.user_id,
-                SandboxTrades.trade_timestamp >= session_start
-            ).order_by(
-                SandboxTrades.trade_timestamp.desc()
-            ).all()
+            # Orders and trades of past sessions stay in sandbox_db only
+            since = session_start()
+            with self.state.lock:
+                self.store.prune(self.state, since)
+                trades = sorted(
+                    (trade for trade in self.state.trades.values() if trade.trade_timestamp >= since),
+                    key=lambda trade: trade.trade_timestamp,
+                    reverse=True
+                )
 
             tradebook = []
             for trade in trades:
@@ -468,109 +372,12 @@ class PositionManager:
                 'mode': 'analyze'
             }, 500
 
-    def process_session_settlement(self):
-        """
-        Process session expiry settlement (at SESSION_EXPIRY_TIME):
-        1. Auto square-off MIS positions
-        2. Move CNC positions to holdings (T+1 settlement)
-        3. Keep NRML positions as carry forward
-
-        This should be called at session expiry time (e.g., 3:00 AM IST)
-        """
-        try:
-            from datetime import datetime, date
-            from database.sandbox_db import SandboxHoldings
-            from database import db
-            import os
-
-            # Get session expiry time from config
-            session_expiry_str = os.getenv('SESSION_EXPIRY_TIME', '03:00')
-            logger.info(f"Processing session settlement at {session_expiry_str}")
-
-            # Get all open positions
-            positions = SandboxPositions.query.filter_by(user_id=self.user_id).all()
-
-            for position in positions:
-                if position.quantity == 0:
-                    continue  # Skip closed positions
-
-                if position.product == 'MIS':
-                    # Auto square-off MIS positions at market close
-                    # Create a reverse order to square off
-                    action = 'SELL' if position.quantity > 0 else 'BUY'
-                    quantity = abs(position.quantity)
-
-                    # Use last traded price or average price for square-off
-                    price = float(position.average_price) if position.average_price else 0
-
-                    # Update position to closed
-                    position.quantity = 0
-                    position.pnl = float(position.realized_pnl)
-                    db.session.commit()
-
-                    logger.info(f"Auto squared-off MIS position: {position.symbol} qty: {quantity}")
-
-                elif position.product == 'CNC' and position.quantity > 0:
-                    # Move CNC buy positions to holdings (T+1 settlement)
-                    # CNC sell positions are already closed (no short delivery allowed)
-
-                    # Check if holdings exist
-                    holdings = SandboxHoldings.query.filter_by(
-                        user_id=self.user_id,
-                        symbol=position.symbol,
-                        exchange=position.exchange
-                    ).first()
-
-                    if holdings:
-                        # Update existing holdings
-                        holdings.quantity += position.quantity
-                        holdings.average_price = (
-                            (holdings.average_price * holdings.quantity +
-                             position.average_price * position.quantity) /
-                            (holdings.quantity + position.quantity)
-                        )
-                    else:
-                        # Create new holdings
-                        holdings = SandboxHoldings(
-                            user_id=self.user_id,
-                            symbol=position.symbol,
-                            exchange=position.exchange,
-                            quantity=position.quantity,
-                            average_price=position.average_price,
-                            settlement_date=date.today()
-                        )
-                        db.session.add(holdings)
-
-                    # Clear the CNC position
-                    position.quantity = 0
-                    position.pnl = float(position.realized_pnl)
-                    db.session.commit()
-
-                    logger.info(f"Moved CNC position to holdings: {position.symbol} qty: {position.quantity}")
-
-                # NRML positions remain as-is (carry forward)
-
-            return True, {
-                'status': 'success',
-                'message': 'Session settlement completed',
-                'mode': 'analyze'
-            }, 200
-
-        except Exception as e:
-            logger.error(f"Error in EOD settlement: {e}")
-            db.session.rollback()
-            return False, {
-                'status': 'error',
-                'message': f'Error in EOD settlement: {str(e)}',
-                'mode': 'analyze'
-            }, 500
-
 
 def update_all_positions_mtm():
     """Background task to update MTM for all positions"""
     try:
         # Get all unique users with positions
-        positions = SandboxPositions.query.all()
+        positions = get_state_store().positions()
 
         if not positions:
             logger.debug("No positions to update")
@@ -598,7 +405,7 @@ def process_all_users_settlement():
     """
     try:
         # Get all unique users with positions
-        positions = SandboxPositions.query.all()
+        positions = get_state_store().positions()
 
         if not positions:
             logger.info("No positions to settle")
@@ -639,10 +446,10 @@ def catchup_missed_settlements():
         today = datetime.now(ist).date()
         cutoff_time = datetime.combine(today, datetime.min.time())
 
-        cnc_positions = SandboxPositions.query.filter_by(product='CNC').filter(
-            SandboxPositions.quantity != 0,
-            SandboxPositions.created_at < cutoff_time
-        ).all()
+        cnc_positions = [
+            position for position in get_state_store().positions('CNC')
+            if position.quantity != 0 and position.created_at < cutoff_time
+        ]
 
         if not cnc_positions:
             logger.info("No CNC positions for catch-up settlement")
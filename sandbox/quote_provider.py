@@ -0,0 +1,162 @@
+# sandbox/quote_provider.py
+"""
+Quote Snapshot Provider - Shared, batched quotes for the sandbox
+
+Features:
+- One multiquotes call for all requested symbols instead of one call per symbol
+- Snapshot cache with a configurable staleness window ('quote_cache_seconds')
+- Broker credentials resolved once and reused, not decrypted per quote
+- Serves the execution engine, position MTM and holdings MTM
+"""
+
+import threading
+import time
+
+from services.quotes_service import get_multiquotes
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Symbols per multiquotes request, brokers split further if their API needs it
+MULTIQUOTE_BATCH_SIZE = 500
+
+# Seconds before the resolved API key is read from the database again
+API_KEY_REFRESH_SECONDS = 300
+
+
+class QuoteProvider:
+    """Thread-safe quote snapshot cache backed by get_multiquotes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots = {}  # (symbol, exchange) -> (monotonic fetch time, quote dict)
+        self._api_key = None
+        self._api_key_loaded_at = 0.0
+        self.requests = 0
+        self.cache_hits = 0
+
+    def get_quote(self, symbol, exchange, max_age=None):
+        """Return the quote for one symbol, or None if it cannot be fetched"""
+        return self.get_quotes([(symbol, exchange)], max_age).get((symbol, exchange))
+
+    def get_quotes(self, instruments, max_age=None):
+        """
+        Return quotes for many symbols with as few broker round trips as possible
+
+        Args:
+            instruments: Iterable of (symbol, exchange) tuples
+            max_age: Seconds a cached quote stays usable (default: sandbox config)
+
+        Returns:
+            dict: (symbol, exchange) -> quote dict, symbols without a quote are omitted
+        """
+        if max_age is None:
+            max_age = self._get_max_age()
+
+        now = time.monotonic()
+        quotes = {}
+        missing = []
+        with self._lock:
+            for key in dict.fromkeys(instruments):
+                snapshot = self._snapshots.get(key)
+                if snapshot and now - snapshot[0] <= max_age:
+                    quotes[key] = snapshot[1]
+                    self.cache_hits += 1
+                else:
+                    missing.append(key)
+
+        for i in range(0, len(missing), MULTIQUOTE_BATCH_SIZE):
+            quotes.update(self._fetch_batch(missing[i:i + MULTIQUOTE_BATCH_SIZE]))
+
+        return quotes
+
+    def invalidate(self):
+        """Drop all cached quotes and credentials"""
+        with self._lock:
+            self._snapshots.clear()
+            self._api_key = None
+
+    def _fetch_batch(self, instruments):
+        api_key = self._get_api_key()
+        if not api_key:
+            return {}
+
+        symbols = [{'symbol': symbol, 'exchange': exchange} for symbol, exchange in instruments]
+        try:
+            self.requests += 1
+            success, response, status_code = get_multiquotes(symbols=symbols, api_key=api_key)
+        except Exception as e:
+            logger.debug(f"Exception fetching quotes for {len(symbols)} symbols: {e}")
+            return {}
+
+        if not success:
+            if status_code == 403:
+                # API key was revoked or regenerated, read it again next time
+                self._api_key = None
+            # Log at debug level to avoid spam for permission errors
+            logger.debug(f"Could not fetch quotes for {len(symbols)} symbols: {response.get('message', 'Unknown error')}")
+            return {}
+
+        quotes = {}
+        for result in response.get('results') or []:
+            data = result.get('data')
+            if not data or 'error' in result:
+                continue
+            quotes[(result.get('symbol'), result.get('exchange'))] = data
+
+        fetched_at = time.monotonic()
+        with self._lock:
+            for key, quote in quotes.items():
+                self._snapshots[key] = (fetched_at, quote)
+
+        logger.debug(f"Fetched {len(quotes)} of {len(symbols)} quotes in one request")
+        return quotes
+
+    def _get_api_key(self):
+        """Decrypt the API key used for sandbox quotes, cached between calls"""
+        now = time.monotonic()
+        if self._api_key and now - self._api_key_loaded_at < API_KEY_REFRESH_SECONDS:
+            return self._api_key
+
+        try:
+            # Get any user's API key for fetching quotes
+            from database.auth_db import ApiKeys, decrypt_token
+            api_key_obj = ApiKeys.query.first()
+            if not api_key_obj:
+                logger.debug("No API keys found for fetching quotes")
+                return None
+            self._api_key = decrypt_token(api_key_obj.api_key_encrypted)
+            self._api_key_loaded_at = now
+            return self._api_key
+        except Exception as e:
+            logger.debug(f"Could not load API key for quotes: {e}")
+            return None
+
+    @staticmethod
+    def _get_max_age():
+        from database.sandbox_db import get_config
+        try:
+            return float(get_config('quote_cache_seconds', '2'))
+        except (TypeError, ValueError):
+            return 2.0
+
+    def get_stats(self):
+        return {
+            'cached_symbols': len(self._snapshots),
+            'requests': self.requests,
+            'cache_hits': self.cache_hits,
+        }
+
+
+_quote_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_quote_provider():
+    """Return the process wide QuoteProvider"""
+    global _quote_provider
+    if _quote_provider is None:
+        with _provider_lock:
+            if _quote_provider is None:
+                _quote_provider = QuoteProvider()
+    return _quote_provider
@@ -19,10 +19,9 @@ from decimal import Decimal
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.sandbox_db import (
-    SandboxPositions, db_session, get_config
-)
+from database.sandbox_db import get_config
 from sandbox.position_manager import PositionManager
+from sandbox.state_store import get_state_store
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -68,8 +67,7 @@ class SquareOffManager:
             self._cancel_open_mis_orders(current_time)
 
             # Step 2: Get all open MIS positions (quantity != 0)
-            mis_positions = SandboxPositions.query.filter_by(product='MIS')\
-                .filter(SandboxPositions.quantity != 0).all()
+            mis_positions = [position for position in get_state_store().positions('MIS') if position.quantity != 0]
 
             if not mis_positions:
                 logger.debug("No MIS positions to square-off")
@@ -102,14 +100,10 @@ class SquareOffManager:
     def _cancel_open_mis_orders(self, current_time):
         """Cancel all open MIS orders past their exchange's square-off time"""
         try:
-            from database.sandbox_db import SandboxOrders
             from sandbox.order_manager import OrderManager
 
             # Get all open MIS orders
-            open_orders = SandboxOrders.query.filter_by(
-                product='MIS',
-                order_status='open'
-            ).all()
+            open_orders = get_state_store().open_orders('MIS')
 
             if not open_orders:
                 return
@@ -180,8 +174,7 @@ class SquareOffManager:
     def force_square_off_all_mis(self):
         """Force square-off all MIS positions immediately"""
         try:
-            mis_positions = SandboxPositions.query.filter_by(product='MIS')\
-                .filter(SandboxPositions.quantity != 0).all()
+            mis_positions = [position for position in get_state_store().positions('MIS') if position.quantity != 0]
 
             if not mis_positions:
                 logger.info("No MIS positions to force square-off")
@@ -0,0 +1,514 @@
+# sandbox/state_store.py
+"""
+Sandbox State Store - In-memory sandbox state with write-behind persistence
+
+Features:
+- Orders, trades, positions, holdings and funds of every user held in memory
+  and treated as the source of truth by the sandbox managers
+- One reentrant lock per user: placement, execution and reads of a user are
+  serialized, different users never contend
+- Changed records are coalesced per row and written to sandbox_db in batches by
+  one background thread every SANDBOX_STATE_FLUSH_MS (default 500ms)
+- Rebuilt from sandbox_db on first use: funds, positions, holdings, open orders
+  and the current session's orders and trades
+
+The store lives in the app process, like the execution and square-off threads.
+"""
+
+import atexit
+import os
+import threading
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta
+from datetime import time as dt_time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+import pytz
+
+from database.sandbox_db import (
+    SandboxOrders, SandboxTrades, SandboxPositions, SandboxHoldings, SandboxFunds,
+    db_session
+)
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+IST = pytz.timezone('Asia/Kolkata')
+
+# Rows per IN (...) query when looking up existing rows during a flush
+LOOKUP_CHUNK = 500
+
+
+def ist_now():
+    """Current IST time without tzinfo, as stored in and read back from sandbox_db"""
+    return datetime.now(IST).replace(tzinfo=None)
+
+
+def session_start(now=None):
+    """Start of the current trading session (last SESSION_EXPIRY_TIME, default 03:00)"""
+    now = now or datetime.now()
+    expiry_hour, expiry_minute = map(int, os.getenv('SESSION_EXPIRY_TIME', '03:00').split(':'))
+    session_expiry_time = dt_time(expiry_hour, expiry_minute)
+    day = now.date() if now.time() >= session_expiry_time else now.date() - timedelta(days=1)
+    return datetime.combine(day, session_expiry_time)
+
+
+class _Record:
+    """Column-compatible in-memory row: same attribute names as the sandbox_db model"""
+
+    model = None
+    key_fields = ()
+    touch_field = None  # Timestamp bumped on every save, like the model's onupdate
+
+    @property
+    def key(self):
+        return tuple(getattr(self, name) for name in self.key_fields)
+
+    def to_row(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(**{f.name: getattr(row, f.name) for f in fields(cls)})
+
+
+@dataclass(eq=False)
+class OrderState(_Record):
+    orderid: str
+    user_id: str
+    symbol: str
+    exchange: str
+    action: str
+    quantity: int
+    price_type: str
+    product: str
+    price: Optional[Decimal] = None
+    trigger_price: Optional[Decimal] = None
+    strategy: Optional[str] = None
+    order_status: str = 'open'
+    average_price: Optional[Decimal] = None
+    filled_quantity: int = 0
+    pending_quantity: int = 0
+    rejection_reason: Optional[str] = None
+    margin_blocked: Decimal = Decimal('0.00')
+    order_timestamp: datetime = field(default_factory=ist_now)
+    update_timestamp: datetime = field(default_factory=ist_now)
+
+    model = SandboxOrders
+    key_fields = ('orderid',)
+    touch_field = 'update_timestamp'
+
+
+@dataclass(eq=False)
+class TradeState(_Record):
+    tradeid: str
+    orderid: str
+    user_id: str
+    symbol: str
+    exchange: str
+    action: str
+    quantity: int
+    price: Decimal
+    product: str
+    strategy: Optional[str] = None
+    trade_timestamp: datetime = field(default_factory=ist_now)
+
+    model = SandboxTrades
+    key_fields = ('tradeid',)
+
+
+@dataclass(eq=False)
+class PositionState(_Record):
+    user_id: str
+    symbol: str
+    exchange: str
+    product: str
+    quantity: int
+    average_price: Decimal
+    ltp: Optional[Decimal] = None
+    pnl: Decimal = Decimal('0.00')
+    pnl_percent: Decimal = Decimal('0.00')
+    accumulated_realized_pnl: Decimal = Decimal('0.00')
+    margin_blocked: Decimal = Decimal('0.00')
+    created_at: datetime = field(default_factory=ist_now)
+    updated_at: datetime = field(default_factory=ist_now)
+
+    model = SandboxPositions
+    key_fields = ('user_id', 'symbol', 'exchange', 'product')
+    touch_field = 'updated_at'
+
+
+@dataclass(eq=False)
+class HoldingState(_Record):
+    user_id: str
+    symbol: str
+    exchange: str
+    quantity: int
+    average_price: Decimal
+    settlement_date: Any
+    ltp: Optional[Decimal] = None
+    pnl: Decimal = Decimal('0.00')
+    pnl_percent: Decimal = Decimal('0.00')
+    created_at: datetime = field(default_factory=ist_now)
+    updated_at: datetime = field(default_factory=ist_now)
+
+    model = SandboxHoldings
+    key_fields = ('user_id', 'symbol', 'exchange')
+    touch_field = 'updated_at'
+
+
+@dataclass(eq=False)
+class FundsState(_Record):
+    user_id: str
+    total_capital: Decimal = Decimal('10000000.00')
+    available_balance: Decimal = Decimal('10000000.00')
+    used_margin: Decimal = Decimal('0.00')
+    realized_pnl: Decimal = Decimal('0.00')
+    unrealized_pnl: Decimal = Decimal('0.00')
+    total_pnl: Decimal = Decimal('0.00')
+    last_reset_date: datetime = field(default_factory=ist_now)
+    reset_count: int = 0
+    created_at: datetime = field(default_factory=ist_now)
+    updated_at: datetime = field(default_factory=ist_now)
+
+    model = SandboxFunds
+    key_fields = ('user_id',)
+    touch_field = 'updated_at'
+
+
+RECORD_TYPES = (OrderState, TradeState, PositionState, HoldingState, FundsState)
+
+
+class UserState:
+    """Sandbox state of one user, guarded by its lock"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.lock = threading.RLock()
+        self.funds: Optional[FundsState] = None
+        self.orders: Dict[str, OrderState] = {}        # orderid -> order, in placement order
+        self.trades: Dict[str, TradeState] = {}        # tradeid -> trade, in execution order
+        self.trade_by_order: Dict[str, TradeState] = {}
+        self.positions: Dict[tuple, PositionState] = {}  # (symbol, exchange, product) -> position
+        self.holdings: Dict[tuple, HoldingState] = {}    # (symbol, exchange) -> holding
+
+    def open_orders(self) -> List[OrderState]:
+        return [order for order in self.orders.values() if order.order_status == 'open']
+
+    def prune(self, since):
+        """Drop finished orders and trades older than since (already queued for persistence)"""
+        stale = [orderid for orderid, order in self.orders.items()
+                 if order.order_status != 'open' and order.order_timestamp < since]
+        for orderid in stale:
+            del self.orders[orderid]
+        for tradeid in [tradeid for tradeid, trade in self.trades.items() if trade.trade_timestamp < since]:
+            trade = self.trades.pop(tradeid)
+            self.trade_by_order.pop(trade.orderid, None)
+        return stale
+
+
+class SandboxStateStore:
+    """Sandbox state of all users with batched write-behind to sandbox_db"""
+
+    def __init__(self, session=None, flush_interval=0.5):
+        self.session = session or db_session
+        self.flush_interval = max(0.01, flush_interval)
+        self._users: Dict[str, UserState] = {}
+        self._orders: Dict[str, OrderState] = {}  # orderid -> order across users
+        self._users_lock = threading.Lock()
+
+        # (record type, key) -> row mapping, or None for a delete. Newest change wins.
+        self._pending: Dict[tuple, Optional[Dict[str, Any]]] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Counters
+        self.saved = 0
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+
+    # ------------------------------------------------------------------ state
+
+    def load(self):
+        """Rebuild the in-memory state from sandbox_db"""
+        query = self.session.query
+        since = session_start()
+        try:
+            for row in query(SandboxFunds).all():
+                self.user(row.user_id).funds = FundsState.from_row(row)
+            for row in query(SandboxPositions).all():
+                position = PositionState.from_row(row)
+                self.user(row.user_id).positions[(row.symbol, row.exchange, row.product)] = position
+            for row in query(SandboxHoldings).all():
+                self.user(row.user_id).holdings[(row.symbol, row.exchange)] = HoldingState.from_row(row)
+            orders = query(SandboxOrders).filter(
+                (SandboxOrders.order_status == 'open') | (SandboxOrders.order_timestamp >= since)
+            ).order_by(SandboxOrders.order_timestamp).all()
+            for row in orders:
+                self.add_order(OrderState.from_row(row), persist=False)
+            trades = query(SandboxTrades).filter(
+                SandboxTrades.trade_timestamp >= since
+            ).order_by(SandboxTrades.trade_timestamp).all()
+            for row in trades:
+                self.add_trade(TradeState.from_row(row), persist=False)
+            logger.info(f"Sandbox state loaded: {len(self._users)} users, {len(orders)} orders, {len(trades)} trades")
+        finally:
+            self.session.remove()
+
+    def user(self, user_id) -> UserState:
+        state = self._users.get(user_id)
+        if state is None:
+            with self._users_lock:
+                state = self._users.get(user_id)
+                if state is None:
+                    state = self._users[user_id] = UserState(user_id)
+        return state
+
+    def users(self) -> List[UserState]:
+        with self._users_lock:
+            return list(self._users.values())
+
+    def get_order(self, orderid) -> Optional[OrderState]:
+        return self._orders.get(orderid)
+
+    def find_order(self, user_id, orderid) -> Optional[OrderState]:
+        """An order of the user from memory, or from sandbox_db for orders of past sessions"""
+        order = self._orders.get(orderid)
+        if order is not None:
+            return order if order.user_id == user_id else None
+        try:
+            row = self.session.query(SandboxOrders).filter_by(orderid=orderid, user_id=user_id).first()
+            return OrderState.from_row(row) if row else None
+        finally:
+            self.session.remove()
+
+    def open_orders(self, product=None) -> List[OrderState]:
+        """Open orders of all users"""
+        orders = []
+        for state in self.users():
+            with state.lock:
+                orders.extend(order for order in state.orders.values()
+                              if order.order_status == 'open' and (product is None or order.product == product))
+        return orders
+
+    def positions(self, product=None) -> List[PositionState]:
+        """Positions of all users"""
+        positions = []
+        for state in self.users():
+            with state.lock:
+                positions.extend(position for position in state.positions.values()
+                                 if product is None or position.product == product)
+        return positions
+
+    def add_order(self, order: OrderState, persist=True):
+        self.user(order.user_id).orders[order.orderid] = order
+        self._orders[order.orderid] = order
+        if persist:
+            self.save(order)
+
+    def add_trade(self, trade: TradeState, persist=True):
+        state = self.user(trade.user_id)
+        state.trades[trade.tradeid] = trade
+        state.trade_by_order[trade.orderid] = trade
+        if persist:
+            self.save(trade)
+
+    def add_position(self, position: PositionState):
+        self.user(position.user_id).positions[(position.symbol, position.exchange, position.product)] = position
+        self.save(position)
+
+    def remove_position(self, position: PositionState):
+        self.user(position.user_id).positions.pop((position.symbol, position.exchange, position.product), None)
+        self.delete(position)
+
+    def add_holding(self, holding: HoldingState):
+        self.user(holding.user_id).holdings[(holding.symbol, holding.exchange)] = holding
+        self.save(holding)
+
+    def remove_holding(self, holding: HoldingState):
+        self.user(holding.user_id).holdings.pop((holding.symbol, holding.exchange), None)
+        self.delete(holding)
+
+    def set_funds(self, funds: FundsState):
+        self.user(funds.user_id).funds = funds
+        self.save(funds)
+
+    def prune(self, state: UserState, since):
+        """Drop a user's finished orders and trades of past sessions from memory"""
+        for orderid in state.prune(since):
+            self._orders.pop(orderid, None)
+
+    def clear_user(self, user_id):
+        """Delete all sandbox orders, trades, positions and holdings of a user, in memory and in sandbox_db"""
+        state = self.user(user_id)
+        with state.lock:
+            for orderid in state.orders:
+                self._orders.pop(orderid, None)
+            state.orders.clear()
+            state.trades.clear()
+            state.trade_by_order.clear()
+            state.positions.clear()
+            state.holdings.clear()
+
+            # Rows of past sessions are not in memory, so delete by user in the database
+            with self._flush_lock:
+                with self._pending_lock:
+                    for key in [key for key, row in self._pending.items()
+                                if key[0] is not FundsState and self._pending_user(key, row) == user_id]:
+                        del self._pending[key]
+                try:
+                    counts = {}
+                    for model in (SandboxOrders, SandboxTrades, SandboxPositions, SandboxHoldings):
+                        counts[model.__tablename__] = self.session.query(model).filter_by(user_id=user_id).delete()
+                    self.session.commit()
+                    return counts
+                except Exception:
+                    self.session.rollback()
+                    raise
+                finally:
+                    self.session.remove()
+
+    @staticmethod
+    def _pending_user(key, row):
+        if row is not None:
+            return row['user_id']
+        record_type, record_key = key
+        return record_key[record_type.key_fields.index('user_id')] if 'user_id' in record_type.key_fields else None
+
+    # ------------------------------------------------------------ persistence
+
+    def save(self, record: _Record):
+        """Queue the current values of a record for writing"""
+        if record.touch_field:
+            setattr(record, record.touch_field, ist_now())
+        row = record.to_row()
+        with self._pending_lock:
+            self._pending[(type(record), record.key)] = row
+        self.saved += 1
+        self._ensure_writer()
+
+    def delete(self, record: _Record):
+        """Queue the deletion of a record"""
+        with self._pending_lock:
+            self._pending[(type(record), record.key)] = None
+        self._ensure_writer()
+
+    def pending(self):
+        return len(self._pending)
+
+    def _ensure_writer(self):
+        if self._thread is None:
+            with self._users_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True, name="SandboxStateWriter")
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._stop.wait(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Write every queued change with one commit"""
+        with self._flush_lock:
+            with self._pending_lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+
+            try:
+                self._write(batch)
+                self.session.commit()
+                self.written += len(batch)
+                return len(batch)
+            except Exception as e:
+                self.session.rollback()
+                self.failed += len(batch)
+                logger.error(f"Error writing {len(batch)} sandbox state changes, retrying: {e}")
+                # Keep the batch unless a newer change of the same row was queued meanwhile
+                with self._pending_lock:
+                    for key, row in batch.items():
+                        self._pending.setdefault(key, row)
+                return 0
+            finally:
+                self.session.remove()
+                self.flushes += 1
+
+    def _write(self, batch):
+        by_type: Dict[type, Dict[tuple, Optional[Dict[str, Any]]]] = {}
+        for (record_type, key), row in batch.items():
+            by_type.setdefault(record_type, {})[key] = row
+
+        for record_type in RECORD_TYPES:
+            changes = by_type.get(record_type)
+            if not changes:
+                continue
+            model = record_type.model
+            existing = self._existing_rows(record_type, list(changes))
+            inserts = []
+            for key, row in changes.items():
+                current = existing.get(key)
+                if row is None:
+                    if current is not None:
+                        self.session.delete(current)
+                elif current is None:
+                    inserts.append(row)
+                else:
+                    for name, value in row.items():
+                        setattr(current, name, value)
+            if inserts:
+                self.session.bulk_insert_mappings(model, inserts)
+            self.session.flush()
+
+    def _existing_rows(self, record_type, keys):
+        """Rows of the given keys, one IN query per chunk on the first key column"""
+        model = record_type.model
+        first = getattr(model, record_type.key_fields[0])
+        rows = {}
+        values = list({key[0] for key in keys})
+        for i in range(0, len(values), LOOKUP_CHUNK):
+            for row in self.session.query(model).filter(first.in_(values[i:i + LOOKUP_CHUNK])).all():
+                rows[tuple(getattr(row, name) for name in record_type.key_fields)] = row
+        return rows
+
+    def stop(self, timeout=10):
+        """Stop the writer and write everything queued, used at shutdown"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self.flush()
+
+    def get_stats(self):
+        return {
+            'users': len(self._users),
+            'orders': len(self._orders),
+            'pending': len(self._pending),
+            'saved': self.saved,
+            'written': self.written,
+            'failed': self.failed,
+            'flushes': self.flushes,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_state_store():
+    """Return the process wide sandbox state store, loaded from sandbox_db on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = SandboxStateStore(
+                    flush_interval=int(os.getenv('SANDBOX_STATE_FLUSH_MS', '500')) / 1000.0
+                )
+                store.load()
+                atexit.register(store.stop)
+                _store = store
+    return _store
@@ -0,0 +1,357 @@
+# sandbox/tick_execution.py
+"""
+Tick Driven Execution - Matches pending orders against the live market data bus
+
+Features:
+- Pending orders indexed per instrument in price-sorted trigger books
+- Orders fire on the first tick whose LTP crosses their price or trigger
+- Ticks consumed straight from the ZeroMQ bus the broker adapter publishes on
+- Open orders read from the in-memory sandbox state store, fills persisted in the background
+- REST quote polling kept as a fallback for instruments without recent ticks
+
+Enabled with the sandbox config 'order_execution_mode' = 'tick' (default: 'poll').
+"""
+
+import os
+import queue
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from decimal import Decimal
+
+from sandbox.execution_engine import ExecutionEngine
+from sandbox.quote_provider import get_quote_provider
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+EXECUTION_MODE_POLL = 'poll'
+EXECUTION_MODE_TICK = 'tick'
+
+# Seconds without a tick before an instrument is checked through the quotes API
+STALE_TICK_SECONDS = 30
+
+# Order book changes from OrderManager, applied by the execution thread
+_order_events = queue.Queue()
+_tick_engine_active = threading.Event()
+
+
+def notify_order_upsert(order):
+    """Queue a new or modified open order for the tick engine (no-op in poll mode)"""
+    if _tick_engine_active.is_set():
+        _order_events.put(('upsert', _order_snapshot(order)))
+
+
+def notify_order_removed(orderid):
+    """Queue removal of a cancelled or filled order for the tick engine (no-op in poll mode)"""
+    if _tick_engine_active.is_set():
+        _order_events.put(('remove', orderid))
+
+
+def _order_snapshot(order):
+    """Copy the fields the trigger book needs from an order"""
+    return {
+        'orderid': order.orderid,
+        'user_id': order.user_id,
+        'symbol': order.symbol,
+        'exchange': order.exchange,
+        'action': order.action,
+        'price_type': order.price_type,
+        'price': Decimal(str(order.price or 0)),
+        'trigger_price': Decimal(str(order.trigger_price or 0)),
+    }
+
+
+class TriggerBook:
+    """
+    Price-sorted pending orders of a single instrument
+
+    Each side is a sorted list of (level, sequence, orderid), so a tick only visits
+    the orders its LTP actually crossed:
+    - buy_limit:  LIMIT BUY at price, fills when LTP <= price
+    - sell_limit: LIMIT SELL at price, fills when LTP >= price
+    - buy_stop:   SL/SL-M BUY at trigger, fires when LTP >= trigger
+    - sell_stop:  SL/SL-M SELL at trigger, fires when LTP <= trigger
+    SL (stop-limit) orders additionally need LTP inside their limit, as in ExecutionEngine.
+    """
+
+    def __init__(self):
+        self.buy_limit = []
+        self.sell_limit = []
+        self.buy_stop = []
+        self.sell_stop = []
+        self.market = []
+        self._sequence = 0
+        # orderid -> (side list, entry, limit price for SL orders or None)
+        self._orders = {}
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __contains__(self, orderid):
+        return orderid in self._orders
+
+    def add(self, orderid, action, price_type, price=0, trigger_price=0):
+        """Insert or replace an order"""
+        self.remove(orderid)
+        self._sequence += 1
+        price = Decimal(str(price or 0))
+        trigger_price = Decimal(str(trigger_price or 0))
+        stop_limit = None
+
+        if price_type == 'MARKET':
+            side, level = self.market, Decimal(0)
+        elif price_type == 'LIMIT':
+            side, level = (self.buy_limit if action == 'BUY' else self.sell_limit), price
+        elif price_type in ('SL', 'SL-M'):
+            side, level = (self.buy_stop if action == 'BUY' else self.sell_stop), trigger_price
+            if price_type == 'SL':
+                stop_limit = price
+        else:
+            logger.warning(f"Unknown price type {price_type} for order {orderid}, not indexed")
+            return
+
+        entry = (level, self._sequence, orderid)
+        insort(side, entry)
+        self._orders[orderid] = (side, entry, stop_limit)
+
+    def remove(self, orderid):
+        """Remove an order, returns True if it was present"""
+        indexed = self._orders.pop(orderid, None)
+        if indexed is None:
+            return False
+        side, entry, _ = indexed
+        index = bisect_left(side, entry)
+        if index < len(side) and side[index] == entry:
+            del side[index]
+        return True
+
+    def match(self, ltp):
+        """
+        Return the orderids whose fill condition holds at this LTP
+
+        Orders stay in the book until removed, so a fill that does not go through
+        (e.g. rejected for margin) is never lost.
+        """
+        ltp = Decimal(str(ltp))
+        matched = [entry[2] for entry in self.market]
+
+        # Limit orders: buys priced at or above LTP, sells priced at or below LTP
+        matched.extend(entry[2] for entry in self.buy_limit[bisect_left(self.buy_limit, (ltp,)):])
+        matched.extend(entry[2] for entry in self.sell_limit[:bisect_right(self.sell_limit, (ltp, float('inf')))])
+
+        # Stops: buy triggers at or below LTP, sell triggers at or above LTP
+        for entry in self.buy_stop[:bisect_right(self.buy_stop, (ltp, float('inf')))]:
+            stop_limit = self._orders[entry[2]][2]
+            if stop_limit is None or ltp <= stop_limit:
+                matched.append(entry[2])
+        for entry in self.sell_stop[bisect_left(self.sell_stop, (ltp,)):]:
+            stop_limit = self._orders[entry[2]][2]
+            if stop_limit is None or ltp >= stop_limit:
+                matched.append(entry[2])
+
+        return matched
+
+
+class TickExecutionEngine(ExecutionEngine):
+    """Executes pending orders on ticks from the ZeroMQ market data bus"""
+
+    def __init__(self, resync_interval=5):
+        super().__init__()
+        self.resync_interval = resync_interval
+        self.books = {}          # (symbol, exchange) -> TriggerBook
+        self.order_keys = {}     # orderid -> (symbol, exchange)
+        self.last_tick = {}      # (symbol, exchange) -> monotonic time of the last tick
+        self.subscribed = set()  # (user_id, symbol, exchange) subscribed through the proxy
+        self.context = None
+        self.socket = None
+        self.topic_table = None
+        self.ticks_processed = 0
+
+    def start(self):
+        """Connect to the market data bus and load the open orders"""
+        import zmq
+        from websocket_proxy.tick_codec import TopicTable
+
+        self.topic_table = TopicTable()
+        self.context = zmq.Context.instance()
+        self.socket = self.context.socket(zmq.SUB)
+        zmq_host = os.getenv('ZMQ_HOST', '127.0.0.1')
+        zmq_port = os.getenv('ZMQ_PORT', '5555')
+        self.socket.connect(f"tcp://{zmq_host}:{zmq_port}")
+        self.socket.setsockopt(zmq.SUBSCRIBE, b"")
+        _tick_engine_active.set()
+        logger.info(f"Tick execution connected to market data bus at {zmq_host}:{zmq_port}")
+        self.resync_orders()
+
+    def stop(self):
+        _tick_engine_active.clear()
+        if self.socket:
+            self.socket.close(linger=0)
+            self.socket = None
+
+    def add_order(self, snapshot):
+        key = (snapshot['symbol'], snapshot['exchange'])
+        previous = self.order_keys.get(snapshot['orderid'])
+        if previous and previous != key:
+            self.remove_order(snapshot['orderid'])
+
+        book = self.books.get(key)
+        if book is None:
+            book = self.books[key] = TriggerBook()
+        book.add(snapshot['orderid'], snapshot['action'], snapshot['price_type'],
+                 snapshot['price'], snapshot['trigger_price'])
+        self.order_keys[snapshot['orderid']] = key
+        self._ensure_subscribed(snapshot['user_id'], *key)
+
+    def remove_order(self, orderid):
+        key = self.order_keys.pop(orderid, None)
+        if key is None:
+            return
+        book = self.books.get(key)
+        if book is not None:
+            book.remove(orderid)
+            if not book:
+                del self.books[key]
+                self._release_subscriptions(*key)
+
+    def resync_orders(self):
+        """Rebuild the trigger books from the open orders in the sandbox state store"""
+        try:
+            open_orders = self.store.open_orders()
+            open_ids = set()
+            for order in open_orders:
+                open_ids.add(order.orderid)
+                self.add_order(_order_snapshot(order))
+            for orderid in [orderid for orderid in self.order_keys if orderid not in open_ids]:
+                self.remove_order(orderid)
+            logger.debug(f"Tick execution tracking {len(open_ids)} open orders on {len(self.books)} instruments")
+        except Exception as e:
+            logger.error(f"Error resyncing open orders: {e}")
+
+    def apply_order_events(self):
+        """Apply book changes queued by OrderManager"""
+        while True:
+            try:
+                event, payload = _order_events.get_nowait()
+            except queue.Empty:
+                return
+            if event == 'upsert':
+                self.add_order(payload)
+            elif event == 'remove':
+                self.remove_order(payload)
+
+    def on_tick(self, symbol, exchange, tick):
+        """Match a tick against the instrument's trigger book"""
+        key = (symbol, exchange)
+        self.last_tick[key] = time.monotonic()
+        book = self.books.get(key)
+        if book is None:
+            return
+
+        ltp = tick.get('ltp')
+        if not ltp or ltp <= 0:
+            return
+        self.ticks_processed += 1
+
+        matched = book.match(ltp)
+        if matched:
+            self._fill(matched, tick)
+
+    def _fill(self, orderids, quote):
+        """Run the matched orders through the normal execution path"""
+        for orderid in orderids:
+            order = self.store.get_order(orderid)
+            if order is not None and order.order_status == 'open':
+                self._process_order(order, quote)
+            if order is None or order.order_status != 'open':
+                self.remove_order(orderid)
+
+    def poll_stale_instruments(self):
+        """Check instruments without recent ticks through the quotes API"""
+        now = time.monotonic()
+        stale = [key for key in self.books if now - self.last_tick.get(key, 0.0) >= STALE_TICK_SECONDS]
+        if not stale:
+            return
+
+        quotes = get_quote_provider().get_quotes(stale)
+        for key, quote in quotes.items():
+            orderids = [orderid for orderid, order_key in self.order_keys.items() if order_key == key]
+            self._fill(orderids, quote)
+
+    def _ensure_subscribed(self, user_id, symbol, exchange):
+        """
+        Subscribe the instrument through the proxy so its ticks reach the bus
+
+        Only successful subscriptions are recorded; a failed one is tried again
+        when the order is seen on the next resync.
+        """
+        if (user_id, symbol, exchange) in self.subscribed:
+            return
+        try:
+            from services.websocket_service import subscribe_to_symbols
+            success, response, _ = subscribe_to_symbols(
+                user_id, 'sandbox', [{'symbol': symbol, 'exchange': exchange}], 'LTP'
+            )
+            if not success:
+                logger.debug(f"Could not subscribe {exchange}:{symbol} for tick execution: {response.get('message')}")
+                return
+        except Exception as e:
+            logger.debug(f"Could not subscribe {exchange}:{symbol} for tick execution: {e}")
+            return
+        self.subscribed.add((user_id, symbol, exchange))
+
+    def _release_subscriptions(self, symbol, exchange):
+        """Unsubscribe an instrument whose trigger book emptied"""
+        for user_id, sub_symbol, sub_exchange in [key for key in self.subscribed
+                                                  if key[1:] == (symbol, exchange)]:
+            self.subscribed.discard((user_id, sub_symbol, sub_exchange))
+            try:
+                from services.websocket_service import unsubscribe_from_symbols
+                success, response, _ = unsubscribe_from_symbols(
+                    user_id, 'sandbox', [{'symbol': symbol, 'exchange': exchange}], 'LTP'
+                )
+                if not success:
+                    logger.debug(f"Could not unsubscribe {exchange}:{symbol} after tick execution: {response.get('message')}")
+            except Exception as e:
+                logger.debug(f"Could not unsubscribe {exchange}:{symbol} after tick execution: {e}")
+
+    def run(self, stop_event):
+        """Consume ticks until stop_event is set"""
+        import zmq
+        from websocket_proxy.tick_codec import decode_tick
+
+        self.start()
+        poller = zmq.Poller()
+        poller.register(self.socket, zmq.POLLIN)
+        next_resync = time.monotonic() + self.resync_interval
+
+        try:
+            while not stop_event.is_set():
+                self.apply_order_events()
+
+                if poller.poll(100):
+                    # Drain everything already queued before checking timers again
+                    while True:
+                        try:
+                            topic, payload = self.socket.recv_multipart(zmq.NOBLOCK)
+                        except zmq.Again:
+                            break
+                        parsed = self.topic_table.parse(topic)
+                        if parsed is None:
+                            continue
+                        _, exchange, symbol, _ = parsed
+                        if (symbol, exchange) not in self.books:
+                            self.last_tick[(symbol, exchange)] = time.monotonic()
+                            continue
+                        try:
+                            self.on_tick(symbol, exchange, decode_tick(payload))
+                        except Exception as e:
+                            logger.error(f"Error processing tick for {exchange}:{symbol}: {e}")
+
+                if time.monotonic() >= next_resync:
+                    self.resync_orders()
+                    self.poll_stale_instruments()
+                    next_resync = time.monotonic() + self.resync_interval
+        finally:
+            self.stop()
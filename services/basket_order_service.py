@@ -15,8 +15,10 @@ from utils.constants import (
     VALID_PRODUCT_TYPES,
     REQUIRED_ORDER_FIELDS
 )
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from utils.logging import get_logger
+from utils.order_batch import OrderTask, run_order_batch
+from utils.order_gateway import PRIORITY_ENTRY
+from utils.order_state import invalidate_books
 from services.telegram_alert_service import telegram_alert_service
 
 # Initialize logger
@@ -176,6 +178,9 @@ def place_single_order(
             'status': 'error',
             'message': 'Failed to place order due to internal error'
         }
+    finally:
+        # The order books of the session changed, the next read goes to the broker
+        invalidate_books(broker_module, auth_token)
 
 def process_basket_order_with_auth(
     basket_data: Dict[str, Any],
@@ -296,57 +301,25 @@ def process_basket_order_with_auth(
     sell_orders = [order for order in basket_data['orders'] if order.get('action', '').upper() == 'SELL']
     sorted_orders = buy_orders + sell_orders
     
-    results = []
     total_orders = len(sorted_orders)
     
-    # Process BUY orders first
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        # Process all BUY orders first
-        buy_futures = []
-        for i, order in enumerate(buy_orders):
-            # Create order with authentication fields without modifying original
-            order_with_auth = {**order, 'apikey': api_key, 'strategy': basket_data['strategy']}
-            buy_futures.append(
-                executor.submit(
-                    place_single_order,
-                    order_with_auth,
-                    broker_module,
-                    auth_token,
-                    total_orders,
-                    i
-                )
-            )
-        
-        # Wait for all BUY orders to complete
-        for future in as_completed(buy_futures):
-            result = future.result()
-            if result:
-                results.append(result)
-        
-        # Then process SELL orders
-        sell_futures = []
-        for i, order in enumerate(sell_orders, start=len(buy_orders)):
-            # Create order with authentication fields without modifying original
-            order_with_auth = {**order, 'apikey': api_key, 'strategy': basket_data['strategy']}
-            sell_futures.append(
-                executor.submit(
-                    place_single_order,
-                    order_with_auth,
-                    broker_module,
-                    auth_token,
-                    total_orders,
-                    i
-                )
-            )
-        
-        # Wait for all SELL orders to complete
-        for future in as_completed(sell_futures):
-            result = future.result()
-            if result:
-                results.append(result)
-
-    # Sort results to maintain order consistency
-    results.sort(key=lambda x: 0 if x.get('action', '').upper() == 'BUY' else 1)
+    # Orders run concurrently on the broker's order gateway; all BUY orders
+    # complete before the first SELL order is sent
+    tasks = []
+    for i, order in enumerate(sorted_orders):
+        # Create order with authentication fields without modifying original
+        order_with_auth = {**order, 'apikey': api_key, 'strategy': basket_data['strategy']}
+        tasks.append(OrderTask(
+            order.get('symbol'),
+            lambda order_with_auth=order_with_auth, i=i: place_single_order(
+                order_with_auth, broker_module, auth_token, total_orders, i),
+            priority=PRIORITY_ENTRY,
+            group=0 if i < len(buy_orders) else 1
+        ))
+    report = run_order_batch(broker, 'basket', tasks, succeeded=lambda result: result.get('status') == 'success')
+
+    # Results follow the BUY then SELL order of the basket
+    results = [result['response'] for result in report.results if result.get('response')]
 
     # Log the basket order results
     response_data = {
@@ -9,6 +9,8 @@ from database.settings_db import get_analyze_mode
 from database.analyzer_db import async_log_analyzer
 from extensions import socketio
 from utils.logging import get_logger
+from utils.order_gateway import PRIORITY_CANCEL, cancel_key, get_order_gateway
+from utils.order_state import invalidate_books
 from services.telegram_alert_service import telegram_alert_service
 
 # Initialize logger
@@ -123,8 +125,10 @@ def cancel_order_with_auth(
         return False, error_response, 404
 
     try:
-        # Use the dynamically imported module's function to cancel the order
-        response_message, status_code = broker_module.cancel_order(orderid, auth_token)
+        # Use the dynamically imported module's function to cancel the order, ahead of
+        # new orders; a cancel of the same order already in flight is shared
+        response_message, status_code = get_order_gateway(broker).call(
+            broker_module.cancel_order, orderid, auth_token, priority=PRIORITY_CANCEL, key=cancel_key(orderid))
     except Exception as e:
         logger.error(f"Error in broker_module.cancel_order: {e}")
         traceback.print_exc()
@@ -134,6 +138,9 @@ def cancel_order_with_auth(
         }
         executor.submit(async_log_order, 'cancelorder', original_data, error_response)
         return False, error_response, 500
+    finally:
+        # The order books of the session changed, the next read goes to the broker
+        invalidate_books(broker_module, auth_token)
 
     if status_code == 200:
         # Emit SocketIO event asynchronously (non-blocking)
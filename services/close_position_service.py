@@ -10,6 +10,7 @@ from database.analyzer_db import async_log_analyzer
 from extensions import socketio
 from utils.api_analyzer import analyze_request
 from utils.logging import get_logger
+from utils.order_state import invalidate_books
 from services.telegram_alert_service import telegram_alert_service
 
 # Initialize logger
@@ -150,6 +151,9 @@ def close_position_with_auth(
         }
         executor.submit(async_log_order, 'closeposition', original_data, error_response)
         return False, error_response, 500
+    finally:
+        # The order books of the session changed, the next read goes to the broker
+        invalidate_books(broker_module, auth_token)
 
     if status_code == 200:
         response_data = {
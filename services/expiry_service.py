@@ -1,12 +1,30 @@
 from database.symbol import SymToken, db_session
+from database.expiry_calendar import WEEKLY, MONTHLY, get_expiry_calendar, classify_expiries, select_expiries
 from database.auth_db import verify_api_key
 from utils.logging import get_logger
-from typing import Tuple, Dict, Any, List
+from typing import Tuple, Dict, Any, List, Optional
 from sqlalchemy import distinct, func
 
 logger = get_logger(__name__)
 
-def get_expiry_dates(symbol: str, exchange: str, instrumenttype: str, api_key: str = None) -> Tuple[bool, Dict[str, Any], int]:
+# Instrument types per exchange; all exchanges support FUT / CE / PE along with their specific types
+INSTRUMENT_TYPES = {
+    'futures': {
+        'NFO': ['FUTSTK', 'FUTIDX', 'FUT'],
+        'BFO': ['FUTSTK', 'FUTIDX', 'FUT'],
+        'MCX': ['FUTCOM', 'FUTENR', 'FUT'],
+        'CDS': ['FUTCUR', 'FUTIRC', 'FUT'],
+    },
+    'options': {
+        'NFO': ['OPTSTK', 'OPTIDX', 'CE', 'PE'],
+        'BFO': ['OPTSTK', 'OPTIDX', 'CE', 'PE'],
+        'MCX': ['OPTFUT', 'CE', 'PE'],
+        'CDS': ['OPTCUR', 'OPTIRC', 'CE', 'PE'],
+    },
+}
+
+def get_expiry_dates(symbol: str, exchange: str, instrumenttype: str, api_key: str = None,
+                     count: Optional[int] = None, expiry_type: Optional[str] = None) -> Tuple[bool, Dict[str, Any], int]:
     """
     Get expiry dates for F&O symbols (futures or options) for a given underlying symbol.
     
@@ -15,6 +33,8 @@ def get_expiry_dates(symbol: str, exchange: str, instrumenttype: str, api_key: s
         exchange: Exchange (NFO, BFO, MCX, CDS)
         instrumenttype: Type of instrument (futures or options)
         api_key: API key for authentication
+        count: Optional number of nearest upcoming expiries to return (all listed expiries if not provided)
+        expiry_type: Optional filter, "weekly" or "monthly"
     
     Returns:
         Tuple of (success, response_data, status_code)
@@ -60,6 +80,14 @@ def get_expiry_dates(symbol: str, exchange: str, instrumenttype: str, api_key: s
                 'message': 'Instrumenttype must be either "futures" or "options"'
             }, 400
         
+        if expiry_type and expiry_type.lower() not in [WEEKLY, MONTHLY]:
+            logger.warning(f"Invalid expiry_type provided: {expiry_type}")
+            return False, {
+                'status': 'error',
+                'message': 'Expiry_type must be either "weekly" or "monthly"'
+            }, 400
+        expiry_type = expiry_type.lower() if expiry_type else None
+        
         # Validate exchange
         supported_exchanges = ['NFO', 'BFO', 'MCX', 'CDS']
         if exchange.upper() not in supported_exchanges:
@@ -75,6 +103,20 @@ def get_expiry_dates(symbol: str, exchange: str, instrumenttype: str, api_key: s
         
         logger.info(f"Getting expiry dates for symbol: {symbol}, exchange: {exchange}, instrumenttype: {instrumenttype}")
         
+        # Expiry calendar built when the master contract loads
+        calendar = get_expiry_calendar()
+        if calendar and calendar.has_underlying(symbol, exchange, instrumenttype):
+            expiries = select_expiries(calendar.expiries(symbol, exchange, instrumenttype), count, expiry_type)
+            expiry_dates = [e.expiry for e in expiries]
+            logger.info(f"Found {len(expiry_dates)} expiry dates for symbol: {symbol} in the expiry calendar")
+            return True, {
+                'status': 'success',
+                'message': f'Found {len(expiry_dates)} expiry dates for {symbol} {instrumenttype} in {exchange}',
+                'data': expiry_dates
+            }, 200
+        
+        instrument_types = INSTRUMENT_TYPES[instrumenttype][exchange]
+        
         # Build query based on instrument type
         # For exact matching, we need to ensure the symbol starts with the underlying symbol
         # followed by a date pattern (for F&O instruments)
@@ -87,22 +129,7 @@ def get_expiry_dates(symbol: str, exchange: str, instrumenttype: str, api_key: s
         )
         
         # Filter by instrument type based on exchange
-        if instrumenttype == 'futures':
-            # All exchanges support FUT along with their specific types
-            if exchange in ['NFO', 'BFO']:
-                query = query.filter(SymToken.instrumenttype.in_(['FUTSTK', 'FUTIDX', 'FUT']))
-            elif exchange == 'MCX':
-                query = query.filter(SymToken.instrumenttype.in_(['FUTCOM', 'FUTENR', 'FUT']))
-            elif exchange == 'CDS':
-                query = query.filter(SymToken.instrumenttype.in_(['FUTCUR', 'FUTIRC', 'FUT']))
-        else:  # options
-            # All exchanges support CE/PE along with their specific types
-            if exchange in ['NFO', 'BFO']:
-                query = query.filter(SymToken.instrumenttype.in_(['OPTSTK', 'OPTIDX', 'CE', 'PE']))
-            elif exchange == 'MCX':
-                query = query.filter(SymToken.instrumenttype.in_(['OPTFUT', 'CE', 'PE']))
-            elif exchange == 'CDS':
-                query = query.filter(SymToken.instrumenttype.in_(['OPTCUR', 'OPTIRC', 'CE', 'PE']))
+        query = query.filter(SymToken.instrumenttype.in_(instrument_types))
         
         # Execute query and get results
         results = query.all()
@@ -193,6 +220,8 @@ def get_expiry_dates(symbol: str, exchange: str, instrumenttype: str, api_key: s
             return sorted(date_list, key=parse_date)
         
         expiry_dates = sort_expiry_dates(list(filtered_expiry_dates))
+        if count or expiry_type:
+            expiry_dates = [e.expiry for e in select_expiries(classify_expiries(expiry_dates), count, expiry_type)]
         
         logger.info(f"Found {len(expiry_dates)} expiry dates for symbol: {symbol}")
         
@@ -1,13 +1,26 @@
 import importlib
+import os
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 import pandas as pd
 from typing import Tuple, Dict, Any, Optional, List, Union
 from database.auth_db import get_auth_token_broker
+from database.history_cache_db import CANDLE_COLUMNS, IST, get_history_cache, split_range, subtract_ranges
 from utils.logging import get_logger
+from utils.token_bucket import TokenBucket, parse_rate_limit
 
 # Initialize logger
 logger = get_logger(__name__)
 
+# Days per broker request; chunks of one request are downloaded concurrently
+HISTORY_CHUNK_DAYS = int(os.getenv('HISTORY_CHUNK_DAYS', '60'))
+HISTORY_FETCH_WORKERS = int(os.getenv('HISTORY_FETCH_WORKERS', '4'))
+
+# Shared across requests so concurrent downloads stay within the broker's history API limit
+history_rate_limiter = TokenBucket(parse_rate_limit(os.getenv('HISTORY_RATE_LIMIT', '3 per second'), 3))
+fetch_executor = ThreadPoolExecutor(HISTORY_FETCH_WORKERS, thread_name_prefix='history_fetch')
+
 def import_broker_module(broker_name: str) -> Optional[Any]:
     """
     Dynamically import the broker-specific data module.
@@ -26,6 +39,108 @@ def import_broker_module(broker_name: str) -> Optional[Any]:
         logger.error(f"Error importing broker module '{module_path}': {error}")
         return None
 
+def create_data_handler(broker_module: Any, auth_token: str, feed_token: Optional[str]) -> Any:
+    """Initialize broker's data handler based on broker's requirements"""
+    if hasattr(broker_module.BrokerData.__init__, '__code__'):
+        # Check number of parameters the broker's __init__ accepts
+        param_count = broker_module.BrokerData.__init__.__code__.co_argcount
+        if param_count > 2:  # More than self and auth_token
+            return broker_module.BrokerData(auth_token, feed_token)
+        return broker_module.BrokerData(auth_token)
+    # Fallback to just auth token if we can't inspect
+    return broker_module.BrokerData(auth_token)
+
+def _fetch_chunk(broker_module: Any, auth_token: str, feed_token: Optional[str],
+                 symbol: str, exchange: str, interval: str, chunk: Tuple[Any, Any]) -> pd.DataFrame:
+    """Download one date chunk from the broker, paced by the shared rate limiter"""
+    history_rate_limiter.acquire()
+    data_handler = create_data_handler(broker_module, auth_token, feed_token)
+    df = data_handler.get_history(
+        symbol,
+        exchange,
+        interval,
+        chunk[0].strftime('%Y-%m-%d'),
+        chunk[1].strftime('%Y-%m-%d')
+    )
+    if not isinstance(df, pd.DataFrame):
+        raise ValueError("Invalid data format returned from broker")
+    return df
+
+def _fetch_chunks(broker_module: Any, auth_token: str, feed_token: Optional[str],
+                  symbol: str, exchange: str, interval: str, chunks: List[Tuple[Any, Any]]) -> List[pd.DataFrame]:
+    """Download date chunks concurrently, in chunk order"""
+    if len(chunks) == 1:
+        return [_fetch_chunk(broker_module, auth_token, feed_token, symbol, exchange, interval, chunks[0])]
+    futures = [
+        fetch_executor.submit(_fetch_chunk, broker_module, auth_token, feed_token, symbol, exchange, interval, chunk)
+        for chunk in chunks
+    ]
+    return [future.result() for future in futures]
+
+def _combine_candles(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    frames = [frame for frame in frames if frame is not None and not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=CANDLE_COLUMNS)
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    df = pd.concat(frames, ignore_index=True)
+    return df.drop_duplicates(subset=['timestamp'], keep='last').sort_values('timestamp').reset_index(drop=True)
+
+def fetch_history_dataframe(
+    broker_module: Any,
+    auth_token: str,
+    feed_token: Optional[str],
+    broker: str,
+    symbol: str,
+    exchange: str,
+    interval: str,
+    start_date: Any,
+    end_date: Any
+) -> pd.DataFrame:
+    """
+    Get historical candles through the candle cache and concurrent chunked downloads.
+
+    Completed days are served from the local cache and only days missing from it are
+    downloaded. The current day is always downloaded. Date ranges are split into
+    HISTORY_CHUNK_DAYS chunks that are fetched in parallel within HISTORY_RATE_LIMIT.
+    """
+    start = pd.Timestamp(start_date).date()
+    end = pd.Timestamp(end_date).date()
+    uncached = [(start, end)]  # Day ranges downloaded without the cache
+    frames = []
+
+    cache = get_history_cache()
+    last_complete_day = min(end, datetime.now(IST).date() - timedelta(days=1))
+    if cache is not None and start <= last_complete_day:
+        key = (broker, exchange, symbol, interval)
+        fetched = []
+        try:
+            missing = [chunk for missing_range in cache.missing_ranges(key, start, last_complete_day)
+                       for chunk in split_range(missing_range[0], missing_range[1], HISTORY_CHUNK_DAYS)]
+            if missing:
+                logger.debug(f"History cache miss for {exchange}:{symbol} {interval}: {len(missing)} chunks to download")
+            fetched = list(zip(missing, _fetch_chunks(broker_module, auth_token, feed_token,
+                                                      symbol, exchange, interval, missing)))
+            for chunk, df in fetched:
+                cache.store(key, chunk[0], chunk[1], df)
+            frames.append(cache.load(key, start, last_complete_day))
+            uncached = []
+        except Exception as e:
+            # Broker errors propagate from the uncached download below; chunks
+            # downloaded before the cache failed are kept
+            logger.warning(f"History cache unavailable for {exchange}:{symbol} {interval}: {e}")
+            frames = [df for _, df in fetched]
+            uncached = subtract_ranges(start, last_complete_day, [chunk for chunk, _ in fetched])
+        if last_complete_day < end:
+            uncached.append((last_complete_day + timedelta(days=1), end))
+
+    chunks = [chunk for uncached_range in uncached
+              for chunk in split_range(uncached_range[0], uncached_range[1], HISTORY_CHUNK_DAYS)]
+    if chunks:
+        frames.extend(_fetch_chunks(broker_module, auth_token, feed_token, symbol, exchange, interval, chunks))
+
+    return _combine_candles(frames)
+
 def get_history_with_auth(
     auth_token: str, 
     feed_token: Optional[str], 
@@ -64,30 +179,18 @@ def get_history_with_auth(
         }, 404
 
     try:
-        # Initialize broker's data handler based on broker's requirements
-        if hasattr(broker_module.BrokerData.__init__, '__code__'):
-            # Check number of parameters the broker's __init__ accepts
-            param_count = broker_module.BrokerData.__init__.__code__.co_argcount
-            if param_count > 2:  # More than self and auth_token
-                data_handler = broker_module.BrokerData(auth_token, feed_token)
-            else:
-                data_handler = broker_module.BrokerData(auth_token)
-        else:
-            # Fallback to just auth token if we can't inspect
-            data_handler = broker_module.BrokerData(auth_token)
-
-        # Call the broker's get_history method
-        df = data_handler.get_history(
+        df = fetch_history_dataframe(
+            broker_module,
+            auth_token,
+            feed_token,
+            broker,
             symbol,
             exchange,
             interval,
             start_date,
             end_date
         )
-        
-        if not isinstance(df, pd.DataFrame):
-            raise ValueError("Invalid data format returned from broker")
-            
+
         # Ensure all responses include 'oi' field, set to 0 if not present
         if 'oi' not in df.columns:
             df['oi'] = 0
@@ -115,6 +115,7 @@ class MarketDataService:
                         'close': market_data.get('close', 0),
                         'ltp': market_data.get('ltp', 0),
                         'volume': market_data.get('volume', 0),
+                        'oi': market_data.get('oi', 0),
                         'timestamp': market_data.get('timestamp', timestamp)
                     }
                     # Also update LTP from quote
@@ -247,6 +248,31 @@ class MarketDataService:
         
         return result
     
+    def get_multiple_quotes(self, symbols: List[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Get quotes for multiple symbols
+        
+        Args:
+            symbols: List of symbol dictionaries with 'symbol' and 'exchange' keys
+            
+        Returns:
+            Dictionary mapping symbol_key to quote data (symbols without a cached quote are left out)
+        """
+        result = {}
+        
+        with self.data_lock:
+            for symbol_info in symbols:
+                symbol = symbol_info.get('symbol')
+                exchange = symbol_info.get('exchange')
+                if symbol and exchange:
+                    symbol_key = f"{exchange}:{symbol}"
+                    if symbol_key in self.market_data_cache:
+                        quote_data = self.market_data_cache[symbol_key].get('quote')
+                        if quote_data:
+                            result[symbol_key] = quote_data
+        
+        return result
+    
     def subscribe_to_updates(self, event_type: str, callback: Callable, filter_symbols: Optional[Set[str]] = None) -> int:
         """
         Subscribe to market data updates
@@ -10,6 +10,8 @@ from database.analyzer_db import async_log_analyzer
 from extensions import socketio
 from utils.api_analyzer import analyze_request
 from utils.logging import get_logger
+from utils.order_gateway import PRIORITY_CANCEL, get_order_gateway
+from utils.order_state import invalidate_books
 from services.telegram_alert_service import telegram_alert_service
 
 # Initialize logger
@@ -123,8 +125,10 @@ def modify_order_with_auth(
         return False, error_response, 404
 
     try:
-        # Use the dynamically imported module's function to modify the order
-        response_message, status_code = broker_module.modify_order(order_data, auth_token)
+        # Use the dynamically imported module's function to modify the order, in the
+        # gateway's cancel lane ahead of new orders
+        response_message, status_code = get_order_gateway(broker).call(
+            broker_module.modify_order, order_data, auth_token, priority=PRIORITY_CANCEL)
     except Exception as e:
         logger.error(f"Error in broker_module.modify_order: {e}")
         traceback.print_exc()
@@ -134,6 +138,9 @@ def modify_order_with_auth(
         }
         executor.submit(async_log_order, 'modifyorder', original_data, error_response)
         return False, error_response, 500
+    finally:
+        # The order books of the session changed, the next read goes to the broker
+        invalidate_books(broker_module, auth_token)
 
     if status_code == 200:
         response_data = {
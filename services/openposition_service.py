@@ -1,6 +1,5 @@
 import traceback
 import copy
-import requests
 from typing import Tuple, Dict, Any, Optional
 
 from database.auth_db import get_auth_token_broker
@@ -9,7 +8,7 @@ from database.settings_db import get_analyze_mode
 from database.analyzer_db import async_log_analyzer
 from extensions import socketio
 from utils.logging import get_logger
-from utils.config import get_host_server
+from services.positionbook_service import get_positionbook_with_auth
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -131,25 +130,18 @@ def get_open_position_with_auth(
 
     # Live mode - get position from positionbook
     try:
-        # For internal service calls, we'll use the positionbook service directly
-        # But for now, we'll maintain compatibility by using the API endpoint
+        # The positionbook service reads the shared order state snapshot, so
+        # polling open positions does not download the positionbook every call
+        success, positionbook_data, status_code = get_positionbook_with_auth(auth_token, broker)
         
-        # Prepare positionbook request with just apikey
-        positionbook_request = {'apikey': position_data.get('apikey')}
-        
-        # Make request to positionbook API using HOST_SERVER from config
-        host_server = get_host_server()
-        positionbook_response = requests.post(f'{host_server}/api/v1/positionbook', json=positionbook_request)
-        
-        if positionbook_response.status_code != 200:
+        if status_code != 200:
             error_response = {
                 'status': 'error',
-                'message': 'Failed to fetch positionbook'
+                'message': positionbook_data.get('message', 'Failed to fetch positionbook')
             }
             log_executor.submit(async_log_order, 'openposition', original_data, error_response)
-            return False, error_response, positionbook_response.status_code
+            return False, error_response, status_code
 
-        positionbook_data = positionbook_response.json()
         if positionbook_data.get('status') != 'success':
             error_response = {
                 'status': 'error',
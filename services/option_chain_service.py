@@ -0,0 +1,185 @@
+"""
+Option Chain Service
+
+Returns every strike (or ATM +/- strike_count strikes) of an underlying's expiry
+with the CE and PE contract details and live LTP/OI.
+
+Contracts come from the derivatives index of the symbol cache, which is built
+once when the master contract loads, so resolving the chain does not query the
+database. Prices are read from the market data cache (WebSocket quotes) and
+only the contracts missing there are fetched, in a single multiquotes request.
+
+Example Usage:
+    Input:
+        underlying: "NIFTY"
+        exchange: "NSE_INDEX"
+        expiry_date: "28OCT25"
+        strike_count: 10
+
+    Output:
+        chain of 21 strikes around ATM, each with CE and PE legs
+"""
+
+from datetime import datetime
+from typing import Tuple, Dict, Any, Optional, List
+from database.auth_db import verify_api_key
+from database.token_db import get_option_chain_window
+from services.option_symbol_service import (
+    parse_underlying_symbol, get_quote_exchange, get_option_exchange, resolve_expiry
+)
+from services.quotes_service import get_quotes, get_multiquotes
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def get_cached_quotes(symbols: List[Dict[str, str]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Quotes of symbols streamed into the market data cache, keyed by "EXCHANGE:SYMBOL".
+    Empty when the market data service is not available.
+    """
+    try:
+        from services.market_data_service import get_market_data_service
+        return get_market_data_service().get_multiple_quotes(symbols)
+    except Exception as e:
+        logger.debug(f"Market data cache not available: {e}")
+        return {}
+
+
+def get_underlying_ltp(symbol: str, exchange: str, api_key: Optional[str]) -> Tuple[Optional[float], Optional[Tuple[Dict[str, Any], int]]]:
+    """
+    LTP of the underlying, from the market data cache or a quote request.
+
+    Returns:
+        Tuple of (ltp, error) where error is (response_data, status_code) on failure
+    """
+    cached = get_cached_quotes([{'symbol': symbol, 'exchange': exchange}]).get(f"{exchange}:{symbol}")
+    if cached and cached.get('ltp'):
+        return cached['ltp'], None
+
+    success, quote_response, status_code = get_quotes(symbol=symbol, exchange=exchange, api_key=api_key)
+    if not success:
+        return None, ({
+            'status': 'error',
+            'message': f"Failed to fetch LTP for {symbol}. {quote_response.get('message', 'Unknown error')}"
+        }, status_code)
+
+    ltp = quote_response.get('data', {}).get('ltp')
+    if ltp is None:
+        return None, ({
+            'status': 'error',
+            'message': f'Could not determine LTP for {symbol}.'
+        }, 500)
+    return ltp, None
+
+
+def get_option_chain(
+    underlying: str,
+    exchange: str,
+    expiry_date: Optional[str],
+    strike_count: Optional[int],
+    api_key: str
+) -> Tuple[bool, Dict[str, Any], int]:
+    """
+    Get the option chain of an underlying for one expiry.
+
+    Args:
+        underlying: Underlying symbol (e.g., "NIFTY", "NIFTY28OCT25FUT", "RELIANCE")
+        exchange: Exchange (e.g., "NSE_INDEX", "NSE", "NFO")
+        expiry_date: Expiry date in DDMMMYY format (optional if embedded in underlying, nearest listed expiry if omitted)
+        strike_count: Strikes on each side of ATM. Optional - all strikes if not provided
+        api_key: OpenAlgo API key
+
+    Returns:
+        Tuple of (success, response_data, status_code)
+    """
+    try:
+        # Validate API key here, a chain served from the market data cache makes no quote request
+        if not verify_api_key(api_key):
+            logger.warning("Invalid API key provided for option chain")
+            return False, {
+                'status': 'error',
+                'message': 'Invalid openalgo apikey'
+            }, 403
+
+        base_symbol, embedded_expiry = parse_underlying_symbol(underlying)
+        quote_exchange = get_quote_exchange(base_symbol, exchange)
+        options_exchange = get_option_exchange(quote_exchange)
+        quote_symbol = base_symbol if embedded_expiry else underlying
+
+        # Nearest listed expiry when none is given
+        final_expiry, error_message = resolve_expiry(base_symbol, options_exchange, embedded_expiry or expiry_date)
+        if error_message:
+            return False, {
+                'status': 'error',
+                'message': error_message
+            }, 400 if not final_expiry else 404
+
+        try:
+            expiry = datetime.strptime(final_expiry, '%d%b%y')
+        except ValueError:
+            return False, {
+                'status': 'error',
+                'message': f'Invalid expiry_date: {final_expiry}. Use DDMMMYY format (e.g., 28OCT25)'
+            }, 400
+
+        ltp, error = get_underlying_ltp(quote_symbol, quote_exchange, api_key)
+        if error:
+            response, status_code = error
+            return False, response, status_code
+
+        # Strikes and contracts from the derivatives index (expiry stored as DD-MMM-YY)
+        atm_strike, contracts = get_option_chain_window(
+            base_symbol, expiry.strftime('%d-%b-%y').upper(), options_exchange, ltp, strike_count
+        )
+        if not contracts:
+            return False, {
+                'status': 'error',
+                'message': f'No strikes found for {base_symbol} expiring {final_expiry}. Please check expiry date or update master contract.'
+            }, 404
+
+        # Live prices: streamed quotes first, one multiquotes request for the rest
+        symbols = [{'symbol': contract.symbol, 'exchange': contract.exchange} for contract in contracts]
+        quotes = get_cached_quotes(symbols)
+        missing = [item for item in symbols if f"{item['exchange']}:{item['symbol']}" not in quotes]
+        if missing:
+            logger.info(f"Fetching {len(missing)} of {len(symbols)} option quotes for {base_symbol} {final_expiry}")
+            success, quotes_response, status_code = get_multiquotes(missing, api_key)
+            if not success:
+                return False, {
+                    'status': 'error',
+                    'message': f"Failed to fetch option quotes. {quotes_response.get('message', 'Unknown error')}"
+                }, status_code
+            for result in quotes_response.get('results', []):
+                if result.get('data'):
+                    quotes[f"{result.get('exchange')}:{result.get('symbol')}"] = result['data']
+
+        chain: Dict[float, Dict[str, Any]] = {}
+        for contract in contracts:
+            quote = quotes.get(f"{contract.exchange}:{contract.symbol}", {})
+            row = chain.setdefault(contract.strike, {'strike': contract.strike, 'CE': None, 'PE': None})
+            row[contract.instrumenttype] = {
+                'symbol': contract.symbol,
+                'token': contract.token,
+                'lotsize': contract.lotsize,
+                'tick_size': contract.tick_size,
+                'ltp': quote.get('ltp'),
+                'oi': quote.get('oi')
+            }
+
+        return True, {
+            'status': 'success',
+            'underlying': base_symbol,
+            'underlying_ltp': ltp,
+            'exchange': options_exchange,
+            'expiry_date': final_expiry,
+            'atm_strike': atm_strike,
+            'chain': [chain[strike] for strike in sorted(chain)]
+        }, 200
+
+    except Exception as e:
+        logger.exception(f"Error in get_option_chain: {e}")
+        return False, {
+            'status': 'error',
+            'message': f'An error occurred while processing option chain request: {str(e)}'
+        }, 500
@@ -6,8 +6,10 @@ for options across all supported exchanges (NFO, BFO, CDS, MCX)
 
 import re
 from datetime import datetime
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, Tuple, Optional, List
+import numpy as np
 from utils.logging import get_logger
+from utils.option_pricing import MODEL_BLACK_SCHOLES, implied_volatility, option_greeks
 
 # Import mibian for Black-Scholes calculations
 try:
@@ -58,6 +60,43 @@ def check_mibian_availability():
     return True, None, None
 
 
+def get_expiry_time_of_day(exchange: str, custom_expiry_time: Optional[str] = None) -> Tuple[int, int]:
+    """
+    Hour and minute at which options of an exchange expire
+
+    Args:
+        exchange: Exchange code
+        custom_expiry_time: Optional custom expiry time in "HH:MM" format
+
+    Returns:
+        (hour, minute)
+    """
+    if custom_expiry_time:
+        # Parse custom expiry time (format: "HH:MM")
+        try:
+            time_parts = custom_expiry_time.split(':')
+            if len(time_parts) != 2:
+                raise ValueError(f"Invalid expiry_time format: {custom_expiry_time}. Use HH:MM format (e.g., '15:30', '19:00')")
+            expiry_hour = int(time_parts[0])
+            expiry_minute = int(time_parts[1])
+            if not (0 <= expiry_hour <= 23) or not (0 <= expiry_minute <= 59):
+                raise ValueError(f"Invalid expiry_time values: {custom_expiry_time}. Hour must be 0-23, minute must be 0-59")
+            logger.info(f"Using custom expiry time: {custom_expiry_time}")
+            return expiry_hour, expiry_minute
+        except Exception as e:
+            raise ValueError(f"Failed to parse expiry_time '{custom_expiry_time}': {str(e)}")
+
+    # Use default expiry time based on exchange:
+    # NFO/BFO: 15:30 (3:30 PM)
+    # CDS: 12:30 (12:30 PM)
+    # MCX: 23:30 (11:30 PM) - Default, but varies by commodity
+    if exchange == "MCX":
+        return 23, 30
+    elif exchange == "CDS":
+        return 12, 30
+    return 15, 30  # NFO, BFO
+
+
 def parse_option_symbol(symbol: str, exchange: str, custom_expiry_time: Optional[str] = None) -> Tuple[str, datetime, float, str]:
     """
     Parse option symbol to extract underlying, expiry, strike, and option type
@@ -96,34 +135,7 @@ def parse_option_symbol(symbol: str, exchange: str, custom_expiry_time: Optional
             'JUL': 7, 'AUG': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DEC': 12
         }
 
-        # Determine expiry time
-        if custom_expiry_time:
-            # Parse custom expiry time (format: "HH:MM")
-            try:
-                time_parts = custom_expiry_time.split(':')
-                if len(time_parts) != 2:
-                    raise ValueError(f"Invalid expiry_time format: {custom_expiry_time}. Use HH:MM format (e.g., '15:30', '19:00')")
-                expiry_hour = int(time_parts[0])
-                expiry_minute = int(time_parts[1])
-                if not (0 <= expiry_hour <= 23) or not (0 <= expiry_minute <= 59):
-                    raise ValueError(f"Invalid expiry_time values: {custom_expiry_time}. Hour must be 0-23, minute must be 0-59")
-                logger.info(f"Using custom expiry time: {custom_expiry_time}")
-            except Exception as e:
-                raise ValueError(f"Failed to parse expiry_time '{custom_expiry_time}': {str(e)}")
-        else:
-            # Use default expiry time based on exchange:
-            # NFO/BFO: 15:30 (3:30 PM)
-            # CDS: 12:30 (12:30 PM)
-            # MCX: 23:30 (11:30 PM) - Default, but varies by commodity
-            if exchange == "MCX":
-                expiry_hour = 23
-                expiry_minute = 30
-            elif exchange == "CDS":
-                expiry_hour = 12
-                expiry_minute = 30
-            else:  # NFO, BFO
-                expiry_hour = 15
-                expiry_minute = 30
+        expiry_hour, expiry_minute = get_expiry_time_of_day(exchange, custom_expiry_time)
 
         expiry = datetime(
             int('20' + year),
@@ -455,3 +467,185 @@ def get_option_greeks(
             'status': 'error',
             'message': f'Failed to get option Greeks: {str(e)}'
         }, 500
+
+
+def _round_or_none(value: float, digits: int) -> Optional[float]:
+    """Round a NumPy value for the response, None when it is NaN"""
+    return None if not np.isfinite(value) else round(float(value), digits)
+
+
+def build_chain_greeks(
+    contracts: List[Any],
+    option_prices: Dict[str, float],
+    spot_price: float,
+    days_to_expiry: float,
+    interest_rate: float,
+    model: str = MODEL_BLACK_SCHOLES
+) -> List[Dict[str, Any]]:
+    """
+    Implied volatility and Greeks for a whole option chain in one vectorized pass
+
+    Args:
+        contracts: SymbolData of the chain's CE and PE contracts
+        option_prices: Option LTP by symbol (contracts without a price get no Greeks)
+        spot_price: Underlying spot/futures price
+        days_to_expiry: Time to expiry in days
+        interest_rate: Risk-free interest rate (annualized %)
+        model: 'black_scholes' or 'black76' (for futures as the underlying)
+
+    Returns:
+        List of {'strike', 'CE', 'PE'} entries in strike order
+    """
+    strikes = np.array([contract.strike for contract in contracts], dtype=float)
+    is_call = np.array([contract.instrumenttype == 'CE' for contract in contracts], dtype=bool)
+    prices = np.array([option_prices.get(contract.symbol) or np.nan for contract in contracts], dtype=float)
+    years = days_to_expiry / 365.0
+    rate = interest_rate / 100.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volatility = implied_volatility(prices, spot_price, strikes, years, rate, is_call, model)
+        greeks = option_greeks(spot_price, strikes, years, rate, volatility, is_call, model)
+
+    chain: Dict[float, Dict[str, Any]] = {}
+    for i, contract in enumerate(contracts):
+        row = chain.setdefault(contract.strike, {'strike': round(contract.strike, 2), 'CE': None, 'PE': None})
+        row[contract.instrumenttype] = {
+            'symbol': contract.symbol,
+            'option_price': _round_or_none(prices[i], 2),
+            'implied_volatility': _round_or_none(volatility[i] * 100, 2),
+            'greeks': {
+                'delta': _round_or_none(greeks['delta'][i], 4),
+                'gamma': _round_or_none(greeks['gamma'][i], 6),
+                'theta': _round_or_none(greeks['theta'][i], 4),
+                'vega': _round_or_none(greeks['vega'][i], 4),
+                'rho': _round_or_none(greeks['rho'][i], 6)
+            }
+        }
+    return [chain[strike] for strike in sorted(chain)]
+
+
+def get_option_chain_greeks(
+    underlying: str,
+    exchange: str,
+    expiry_date: str,
+    interest_rate: Optional[float] = None,
+    underlying_symbol: Optional[str] = None,
+    underlying_exchange: Optional[str] = None,
+    expiry_time: Optional[str] = None,
+    model: str = MODEL_BLACK_SCHOLES,
+    api_key: Optional[str] = None
+) -> Tuple[bool, Dict[str, Any], int]:
+    """
+    Get IV and Greeks for every strike of an underlying's expiry
+
+    All prices (underlying and every CE/PE contract) are fetched with a single
+    multiquotes request and the chain is solved in one vectorized call.
+
+    Args:
+        underlying: Underlying symbol (e.g., NIFTY)
+        exchange: Options exchange code (NFO, BFO, CDS, MCX)
+        expiry_date: Expiry in DDMMMYY format (e.g., 28NOV24)
+        interest_rate: Optional interest rate (annualized %, default from exchange mapping)
+        underlying_symbol: Optional symbol to use for spot price (e.g., NIFTY28NOV24FUT)
+        underlying_exchange: Optional underlying exchange (e.g., NSE_INDEX or NFO)
+        expiry_time: Optional custom expiry time in "HH:MM" format
+        model: 'black_scholes' (default) or 'black76' when the underlying price is a future
+        api_key: API key for authentication
+
+    Returns:
+        Tuple of (success, response_dict, status_code)
+    """
+    try:
+        # Import here to avoid circular dependency
+        from services.quotes_service import get_multiquotes
+        from database.token_db import get_option_chain_symbols
+
+        base_symbol = underlying.upper()
+        expiry_date = expiry_date.upper()
+        try:
+            expiry_day = datetime.strptime(expiry_date, '%d%b%y')
+        except ValueError:
+            return False, {
+                'status': 'error',
+                'message': f'Invalid expiry_date: {expiry_date}. Use DDMMMYY format (e.g., 28NOV24)'
+            }, 400
+
+        expiry_hour, expiry_minute = get_expiry_time_of_day(exchange, expiry_time)
+        expiry = expiry_day.replace(hour=expiry_hour, minute=expiry_minute)
+        days_to_expiry = calculate_time_to_expiry(expiry)
+        if days_to_expiry <= 0:
+            return False, {
+                'status': 'error',
+                'message': f'Option has expired on {expiry.strftime("%d-%b-%Y")}'
+            }, 400
+
+        # Chain contracts from the symbol cache, expiry as stored in the master contract
+        contracts = get_option_chain_symbols(base_symbol, expiry_day.strftime('%d-%b-%y').upper(), exchange)
+        if not contracts:
+            return False, {
+                'status': 'error',
+                'message': f'No options found for {base_symbol} expiring {expiry_date} on {exchange}'
+            }, 404
+
+        if interest_rate is None:
+            interest_rate = DEFAULT_INTEREST_RATES.get(exchange, 0)
+
+        spot_symbol = underlying_symbol or base_symbol
+        spot_exchange = underlying_exchange or get_underlying_exchange(base_symbol, exchange)
+
+        # One request for the underlying and every contract
+        symbols = [{'symbol': spot_symbol, 'exchange': spot_exchange}]
+        symbols += [{'symbol': contract.symbol, 'exchange': exchange} for contract in contracts]
+        logger.info(f"Fetching {len(symbols)} quotes for {base_symbol} {expiry_date} option chain")
+        success, quotes_response, status_code = get_multiquotes(symbols, api_key)
+
+        if not success:
+            return False, {
+                'status': 'error',
+                'message': f'Failed to fetch quotes: {quotes_response.get("message", "Unknown error")}'
+            }, status_code
+
+        ltps = {}
+        for result in quotes_response.get('results', []):
+            ltp = (result.get('data') or {}).get('ltp')
+            if ltp:
+                ltps[(result.get('symbol'), result.get('exchange'))] = ltp
+
+        spot_price = ltps.get((spot_symbol, spot_exchange))
+        if not spot_price:
+            return False, {
+                'status': 'error',
+                'message': 'Underlying LTP not available'
+            }, 404
+
+        option_prices = {
+            contract.symbol: ltps.get((contract.symbol, exchange)) for contract in contracts
+        }
+        chain = build_chain_greeks(contracts, option_prices, spot_price, days_to_expiry, interest_rate, model)
+
+        logger.info(f"Greeks calculated for {len(contracts)} contracts of {base_symbol} {expiry_date}")
+        return True, {
+            'status': 'success',
+            'underlying': base_symbol,
+            'exchange': exchange,
+            'expiry_date': expiry.strftime('%d-%b-%Y'),
+            'days_to_expiry': round(days_to_expiry, 4),
+            'spot_price': round(spot_price, 2),
+            'interest_rate': round(interest_rate, 2),
+            'model': model,
+            'chain': chain
+        }, 200
+
+    except ValueError as e:
+        logger.error(f"Validation error in get_option_chain_greeks: {e}")
+        return False, {
+            'status': 'error',
+            'message': str(e)
+        }, 400
+
+    except Exception as e:
+        logger.exception(f"Error in get_option_chain_greeks: {e}")
+        return False, {
+            'status': 'error',
+            'message': f'Failed to get option chain Greeks: {str(e)}'
+        }, 500
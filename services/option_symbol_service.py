@@ -38,7 +38,11 @@ import importlib
 from typing import Tuple, Dict, Any, Optional, List
 from datetime import datetime
 from database.auth_db import get_auth_token_broker
+from dataclasses import asdict
 from database.symbol import SymToken, db_session
+from database.expiry_calendar import get_expiry_calendar
+from database.symbol_table import atm_strike_index
+from database.token_db import get_strikes, get_symbol_info
 from services.quotes_service import get_quotes
 from utils.logging import get_logger
 
@@ -217,6 +221,12 @@ def find_option_in_database(option_symbol: str, exchange: str) -> Optional[Dict[
         Dictionary with symbol details or None if not found
     """
     try:
+        # Symbol cache first, the database only when the cache is not loaded
+        symbol_info = get_symbol_info(option_symbol, exchange)
+        if symbol_info:
+            logger.info(f"Found option in symbol cache: {option_symbol} on {exchange}")
+            return asdict(symbol_info)
+
         # Query the database
         result = db_session.query(SymToken).filter(
             SymToken.symbol == option_symbol,
@@ -289,6 +299,12 @@ def get_available_strikes(base_symbol: str, expiry_date: str, option_type: str,
         # e.g., "28OCT25" -> "28-OCT-25"
         expiry_formatted = f"{expiry_date[:2]}-{expiry_date[2:5]}-{expiry_date[5:]}"
 
+        # Strike index built with the symbol cache when the master contract loads
+        strikes = get_strikes(base_symbol.upper(), expiry_formatted.upper(), exchange.upper(), option_type.upper())
+        if strikes:
+            _STRIKES_CACHE[cache_key] = strikes
+            return strikes
+
         # Construct symbol pattern: BASE + EXPIRY (without hyphens) + % wildcard
         # e.g., "NIFTY" + "18NOV25" + "%" = "NIFTY18NOV25%"
         expiry_no_hyphen = expiry_date.upper()  # Already in DDMMMYY format
@@ -341,8 +357,8 @@ def find_atm_strike_from_actual(ltp: float, available_strikes: list) -> Optional
         logger.warning("No available strikes to find ATM")
         return None
 
-    # Find the strike closest to LTP
-    atm_strike = min(available_strikes, key=lambda x: abs(x - ltp))
+    # Find the strike closest to LTP (binary search, strikes are sorted)
+    atm_strike = available_strikes[atm_strike_index(available_strikes, ltp)]
 
     logger.info(f"Found ATM strike: {atm_strike} (LTP: {ltp})")
     return atm_strike
@@ -430,6 +446,26 @@ def calculate_offset_strike_from_actual(
     return target_strike
 
 
+def get_quote_exchange(base_symbol: str, exchange: str) -> str:
+    """
+    Map the exchange passed with an underlying to the exchange its LTP is quoted on.
+
+    If exchange is already NFO/BFO, the LTP comes from the index/equity exchange:
+    NIFTY on NFO -> NSE_INDEX, SENSEX on BFO -> BSE_INDEX, RELIANCE on NFO -> NSE.
+    Other exchanges are returned unchanged.
+    """
+    if exchange.upper() not in ['NFO', 'BFO']:
+        return exchange
+
+    # User passed options exchange, need to map back to index/equity
+    if base_symbol in ['NIFTY', 'BANKNIFTY', 'FINNIFTY', 'MIDCPNIFTY', 'NIFTYNXT50', 'INDIAVIX']:
+        return 'NSE_INDEX'
+    elif base_symbol in ['SENSEX', 'BANKEX', 'SENSEX50']:
+        return 'BSE_INDEX'
+    # Assume it's an equity symbol
+    return 'NSE' if exchange.upper() == 'NFO' else 'BSE'
+
+
 def get_option_exchange(underlying_exchange: str) -> str:
     """
     Map underlying exchange to options exchange.
@@ -461,6 +497,36 @@ def get_option_exchange(underlying_exchange: str) -> str:
         return 'NFO'
 
 
+def resolve_expiry(base_symbol: str, options_exchange: str, expiry_date: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Resolve and validate an option expiry against the expiry calendar.
+
+    Args:
+        base_symbol: Base symbol like "NIFTY"
+        options_exchange: Options exchange like "NFO"
+        expiry_date: Expiry in DDMMMYY format, or None for the nearest listed expiry
+
+    Returns:
+        Tuple of (expiry in DDMMMYY format, error message). Without the calendar
+        (symbol cache not loaded) a given expiry is returned unchecked.
+    """
+    calendar = get_expiry_calendar()
+    known_underlying = calendar is not None and calendar.has_underlying(base_symbol, options_exchange)
+
+    if not expiry_date:
+        nearest = calendar.nearest(base_symbol, options_exchange) if known_underlying else []
+        if not nearest:
+            return None, 'Expiry date required. Provide via expiry_date parameter or embed in underlying (e.g., NIFTY28OCT25FUT).'
+        logger.info(f"No expiry given, using nearest expiry {nearest[0].code} for {base_symbol}")
+        return nearest[0].code, None
+
+    expiry_date = expiry_date.upper()
+    if known_underlying and calendar.find(base_symbol, options_exchange, expiry_date) is None:
+        upcoming = ', '.join(e.code for e in calendar.nearest(base_symbol, options_exchange, count=3))
+        return expiry_date, f'No {base_symbol} options expiring {expiry_date} on {options_exchange}. Upcoming expiries: {upcoming or "none"}'
+    return expiry_date, None
+
+
 def get_option_symbol(
     underlying: str,
     exchange: str,
@@ -477,7 +543,7 @@ def get_option_symbol(
     Args:
         underlying: Underlying symbol (e.g., "NIFTY", "NIFTY28OCT25FUT", "RELIANCE")
         exchange: Exchange (e.g., "NSE_INDEX", "NSE", "NFO")
-        expiry_date: Expiry date in DDMMMYY format (optional if embedded in underlying)
+        expiry_date: Expiry date in DDMMMYY format (optional if embedded in underlying, nearest listed expiry if omitted)
         strike_int: Strike interval (e.g., 50 for NIFTY). Optional - if not provided, will use actual strikes from database
         offset: Offset from ATM (e.g., "ATM", "ITM1", "OTM2")
         option_type: Option type ("CE" or "PE")
@@ -491,27 +557,19 @@ def get_option_symbol(
         # Step 1: Parse underlying to extract base symbol and expiry
         base_symbol, embedded_expiry = parse_underlying_symbol(underlying)
 
-        # Determine final expiry date
-        final_expiry = embedded_expiry or expiry_date
-        if not final_expiry:
-            logger.error("No expiry date provided or found in underlying symbol")
+        # Step 2: Determine the quote exchange (where to fetch LTP from)
+        quote_exchange = get_quote_exchange(base_symbol, exchange)
+
+        # Determine final expiry date (nearest listed expiry when none is given)
+        final_expiry, error_message = resolve_expiry(
+            base_symbol, get_option_exchange(quote_exchange), embedded_expiry or expiry_date
+        )
+        if error_message:
+            logger.error(error_message)
             return False, {
                 'status': 'error',
-                'message': 'Expiry date required. Provide via expiry_date parameter or embed in underlying (e.g., NIFTY28OCT25FUT).'
-            }, 400
-
-        # Step 2: Determine the quote exchange (where to fetch LTP from)
-        # If exchange is already NFO/BFO, we need to get LTP from index/equity exchange
-        quote_exchange = exchange
-        if exchange.upper() in ['NFO', 'BFO']:
-            # User passed options exchange, need to map back to index/equity
-            if base_symbol in ['NIFTY', 'BANKNIFTY', 'FINNIFTY', 'MIDCPNIFTY', 'NIFTYNXT50', 'INDIAVIX']:
-                quote_exchange = 'NSE_INDEX'
-            elif base_symbol in ['SENSEX', 'BANKEX', 'SENSEX50']:
-                quote_exchange = 'BSE_INDEX'
-            else:
-                # Assume it's an equity symbol
-                quote_exchange = 'NSE' if exchange.upper() == 'NFO' else 'BSE'
+                'message': error_message
+            }, 400 if not final_expiry else 404
 
         # Construct the symbol to fetch quotes for
         # If underlying already has expiry embedded, use base symbol only
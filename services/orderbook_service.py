@@ -3,6 +3,7 @@ import traceback
 from typing import Tuple, Dict, Any, Optional, List, Union
 from database.auth_db import get_auth_token_broker
 from utils.logging import get_logger
+from utils.order_state import copy_records, get_order_state
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -121,8 +122,10 @@ def get_orderbook_with_auth(auth_token: str, broker: str, original_data: Dict[st
         }, 404
 
     try:
-        # Get orderbook data using broker's implementation
-        order_data = broker_funcs['get_order_book'](auth_token)
+        # Get orderbook data using broker's implementation, shared with other
+        # readers of this session for the order state staleness window
+        snapshot = get_order_state().snapshot('orderbook', broker_funcs['get_order_book'], auth_token)
+        order_data = snapshot.data
         
         if 'status' in order_data and order_data['status'] == 'error':
             return False, {
@@ -130,20 +133,23 @@ def get_orderbook_with_auth(auth_token: str, broker: str, original_data: Dict[st
                 'message': order_data.get('message', 'Error fetching order data')
             }, 500
 
-        # Transform data using mapping functions
-        order_data = broker_funcs['map_order_data'](order_data=order_data)
-        order_stats = broker_funcs['calculate_order_statistics'](order_data)
-        order_data = broker_funcs['transform_order_data'](order_data)
-        
-        # Format numeric values to 2 decimal places
-        formatted_orders = format_order_data(order_data)
-        formatted_stats = format_statistics(order_stats)
+        def build_orderbook(order_data):
+            # Transform data using mapping functions
+            order_data = broker_funcs['map_order_data'](order_data=order_data)
+            order_stats = broker_funcs['calculate_order_statistics'](order_data)
+            order_data = broker_funcs['transform_order_data'](order_data)
+            
+            # Format numeric values to 2 decimal places
+            return format_order_data(order_data), format_statistics(order_stats)
+
+        # Mapped once per snapshot
+        formatted_orders, formatted_stats = snapshot.view('orderbook', build_orderbook)
         
         return True, {
             'status': 'success',
             'data': {
-                'orders': formatted_orders,
-                'statistics': formatted_stats
+                'orders': copy_records(formatted_orders),
+                'statistics': dict(formatted_stats) if isinstance(formatted_stats, dict) else formatted_stats
             }
         }, 200
     except Exception as e:
@@ -17,6 +17,8 @@ from utils.constants import (
 )
 from restx_api.schemas import OrderSchema
 from utils.logging import get_logger
+from utils.order_gateway import get_order_gateway
+from utils.order_state import invalidate_books
 from services.telegram_alert_service import telegram_alert_service
 
 # Initialize logger
@@ -177,8 +179,9 @@ def place_order_with_auth(
         return False, error_response, 404
 
     try:
-        # Call the broker's place_order_api function
-        res, response_data, order_id = broker_module.place_order_api(order_data, auth_token)
+        # Call the broker's place_order_api function through the broker's order gateway
+        res, response_data, order_id = get_order_gateway(broker).call(
+            broker_module.place_order_api, order_data, auth_token)
     except Exception as e:
         logger.error(f"Error in broker_module.place_order_api: {e}")
         traceback.print_exc()
@@ -188,6 +191,9 @@ def place_order_with_auth(
         }
         executor.submit(async_log_order, 'placeorder', original_data, error_response)
         return False, error_response, 500
+    finally:
+        # The order books of the session changed, the next read goes to the broker
+        invalidate_books(broker_module, auth_token)
 
     if res.status == 200:
         # Emit SocketIO event asynchronously (non-blocking)
@@ -18,6 +18,8 @@ from utils.constants import (
     REQUIRED_SMART_ORDER_FIELDS
 )
 from utils.logging import get_logger
+from utils.order_gateway import get_order_gateway
+from utils.order_state import invalidate_books
 from services.telegram_alert_service import telegram_alert_service
 
 # Initialize logger
@@ -202,7 +204,11 @@ def place_smart_order_with_auth(
         return False, error_response, 404
 
     try:
-        res, response_data, order_id = broker_module.place_smartorder_api(order_data, auth_token)
+        res, response_data, order_id = get_order_gateway(broker).call(
+            broker_module.place_smartorder_api, order_data, auth_token)
+        if res is not None:
+            # An order went to the broker, the cached books of the session no longer hold
+            invalidate_books(broker_module, auth_token)
         
         # Handle case where position size matches current position
         if res is None and response_data.get('status') == 'success' and 'No action needed' in response_data.get('message', ''):
@@ -248,6 +254,7 @@ def place_smart_order_with_auth(
     except Exception as e:
         logger.error(f"Error in broker_module.place_smartorder_api: {e}")
         traceback.print_exc()
+        invalidate_books(broker_module, auth_token)
         error_response = {
             'status': 'error',
             'message': 'Failed to place smart order due to internal error'
@@ -3,6 +3,7 @@ import traceback
 from typing import Tuple, Dict, Any, Optional, List, Union
 from database.auth_db import get_auth_token_broker
 from utils.logging import get_logger
+from utils.order_state import copy_records, get_order_state
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -92,8 +93,10 @@ def get_positionbook_with_auth(auth_token: str, broker: str, original_data: Dict
         }, 404
 
     try:
-        # Get positions data using broker's implementation
-        positions_data = broker_funcs['get_positions'](auth_token)
+        # Get positions data using broker's implementation, shared with smart
+        # orders and other readers of this session for the staleness window
+        snapshot = get_order_state().snapshot('positions', broker_funcs['get_positions'], auth_token)
+        positions_data = snapshot.data
         
         if 'status' in positions_data and positions_data['status'] == 'error':
             return False, {
@@ -101,16 +104,20 @@ def get_positionbook_with_auth(auth_token: str, broker: str, original_data: Dict
                 'message': positions_data.get('message', 'Error fetching positions data')
             }, 500
 
-        # Transform data using mapping functions
-        positions_data = broker_funcs['map_position_data'](positions_data)
-        positions_data = broker_funcs['transform_positions_data'](positions_data)
-        
-        # Format numeric values to 2 decimal places
-        formatted_positions = format_position_data(positions_data)
+        def build_positionbook(positions_data):
+            # Transform data using mapping functions
+            positions_data = broker_funcs['map_position_data'](positions_data)
+            positions_data = broker_funcs['transform_positions_data'](positions_data)
+            
+            # Format numeric values to 2 decimal places
+            return format_position_data(positions_data)
+
+        # Mapped once per snapshot
+        formatted_positions = snapshot.view('positionbook', build_positionbook)
         
         return True, {
             'status': 'success',
-            'data': formatted_positions
+            'data': copy_records(formatted_positions)
         }, 200
     except Exception as e:
         logger.error(f"Error processing positions data: {e}")
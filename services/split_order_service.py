@@ -2,7 +2,6 @@ import importlib
 import traceback
 import copy
 from typing import Tuple, Dict, Any, Optional, List
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from database.auth_db import get_auth_token_broker
 from database.apilog_db import async_log_order, executor as log_executor
@@ -18,6 +17,9 @@ from utils.constants import (
     REQUIRED_ORDER_FIELDS
 )
 from utils.logging import get_logger
+from utils.order_batch import OrderTask, run_order_batch
+from utils.order_gateway import PRIORITY_ENTRY
+from utils.order_state import invalidate_books
 from services.telegram_alert_service import telegram_alert_service
 
 # Initialize logger
@@ -149,6 +151,9 @@ def place_single_order(
             'status': 'error',
             'message': 'Failed to place order due to internal error'
         }
+    finally:
+        # The order books of the session changed, the next read goes to the broker
+        invalidate_books(broker_module, auth_token)
 
 def split_order_with_auth(
     split_data: Dict[str, Any],
@@ -313,65 +318,39 @@ def split_order_with_auth(
         log_executor.submit(async_log_order, 'splitorder', original_data, error_response)
         return False, error_response, 404
 
-    # Process orders concurrently
-    results = []
-    
-    # Create a ThreadPoolExecutor for concurrent order placement
-    with ThreadPoolExecutor(max_workers=10) as order_executor:
-        # Prepare orders for concurrent execution
-        futures = []
-        
-        # Submit full-size orders
-        for i in range(num_full_orders):
-            order_data = copy.deepcopy(split_data)
-            order_data['quantity'] = str(split_size)
-            futures.append(
-                order_executor.submit(
-                    place_single_order,
-                    order_data,
-                    broker_module,
-                    auth_token,
-                    i + 1,
-                    total_orders
-                )
-            )
-
-        # Submit remaining quantity order if any
-        if remaining_qty > 0:
-            order_data = copy.deepcopy(split_data)
-            order_data['quantity'] = str(remaining_qty)
-            futures.append(
-                order_executor.submit(
-                    place_single_order,
-                    order_data,
-                    broker_module,
-                    auth_token,
-                    total_orders,
-                    total_orders
-                )
-            )
-
-        # Collect results as they complete
-        for future in as_completed(futures):
-            result = future.result()
-            results.append(result)
-
-        # Sort results by order_num to maintain order in response
-        results.sort(key=lambda x: x['order_num'])
-
-        # Log the split order results
-        response_data = {
-            'status': 'success',
-            'total_quantity': total_quantity,
-            'split_size': split_size,
-            'results': results
-        }
-        log_executor.submit(async_log_order, 'splitorder', split_request_data, response_data)
+    # Process orders concurrently on the broker's order gateway
+    quantities = [split_size] * num_full_orders
+    if remaining_qty > 0:
+        quantities.append(remaining_qty)
+
+    tasks = []
+    for i, quantity in enumerate(quantities):
+        order_data = copy.deepcopy(split_data)
+        order_data['quantity'] = str(quantity)
+        tasks.append(OrderTask(
+            i + 1,
+            lambda order_data=order_data, order_num=i + 1: place_single_order(
+                order_data, broker_module, auth_token, order_num, total_orders),
+            priority=PRIORITY_ENTRY
+        ))
+    report = run_order_batch(broker, 'split', tasks, succeeded=lambda result: result.get('status') == 'success')
+
+    # Results are in order_num order
+    results = [result['response'] for result in report.results]
+
+    # Log the split order results
+    response_data = {
+        'status': 'success',
+        'total_quantity': total_quantity,
+        'split_size': split_size,
+        'results': results
+    }
+    log_executor.submit(async_log_order, 'splitorder', split_request_data, response_data)
 
-        # Send Telegram alert for live mode
-        telegram_alert_service.send_order_alert('splitorder', split_data, response_data, split_data.get('apikey'))
+    # Send Telegram alert for live mode
+    telegram_alert_service.send_order_alert('splitorder', split_data, response_data, split_data.get('apikey'))
 
-        return True, response_data, 200
+    return True, response_data, 200
 
 def split_order(
     split_data: Dict[str, Any],
@@ -12,9 +12,11 @@ Synthetic Future Price = Strike Price + Call Premium - Put Premium
 The basis (difference from spot) indicates the cost of carry.
 """
 
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Optional
 from utils.logging import get_logger
-from services.option_symbol_service import get_option_symbol
+from services.option_symbol_service import (
+    get_option_symbol, parse_underlying_symbol, get_quote_exchange, get_option_exchange, resolve_expiry
+)
 from services.quotes_service import get_quotes
 
 logger = get_logger(__name__)
@@ -23,7 +25,7 @@ logger = get_logger(__name__)
 def calculate_synthetic_future(
     underlying: str,
     exchange: str,
-    expiry_date: str,
+    expiry_date: Optional[str],
     api_key: str
 ) -> Tuple[bool, Dict[str, Any], int]:
     """
@@ -32,7 +34,7 @@ def calculate_synthetic_future(
     Args:
         underlying: Underlying symbol (e.g., "NIFTY", "BANKNIFTY")
         exchange: Exchange (e.g., "NSE_INDEX", "NSE")
-        expiry_date: Expiry date in DDMMMYY format (e.g., "28OCT25")
+        expiry_date: Expiry date in DDMMMYY format (e.g., "28OCT25"). Optional - nearest listed expiry if not provided
         api_key: OpenAlgo API key
 
     Returns:
@@ -46,6 +48,16 @@ def calculate_synthetic_future(
         - synthetic_future_price: Calculated synthetic future price
     """
     try:
+        # Resolve the expiry from the expiry calendar (nearest listed expiry when none is given)
+        base_symbol, embedded_expiry = parse_underlying_symbol(underlying)
+        options_exchange = get_option_exchange(get_quote_exchange(base_symbol, exchange))
+        expiry_date, error_message = resolve_expiry(base_symbol, options_exchange, embedded_expiry or expiry_date)
+        if error_message:
+            return False, {
+                'status': 'error',
+                'message': error_message
+            }, 400 if not expiry_date else 404
+
         logger.info(f"Calculating synthetic future for {underlying} expiring {expiry_date}")
 
         # Step 1: Get ATM Call option symbol
@@ -87,7 +99,7 @@ def calculate_synthetic_future(
                 'message': f'Failed to parse strike from option symbol: {call_symbol}'
             }, 500
 
-        # Step 2: Get ATM Put option symbol
+        # Step 2: Get ATM Put option symbol (reusing the underlying LTP of the Call lookup)
         success_put, put_response, status_code = get_option_symbol(
             underlying=underlying,
             exchange=exchange,
@@ -95,7 +107,8 @@ def calculate_synthetic_future(
             strike_int=None,  # Use actual strikes from database
             offset="ATM",
             option_type="PE",
-            api_key=api_key
+            api_key=api_key,
+            underlying_ltp=underlying_ltp
         )
 
         if not success_put:
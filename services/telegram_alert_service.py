@@ -1,10 +1,20 @@
 """
 Telegram Alert Service for Order Notifications
 Handles asynchronous sending of order-related alerts to users via Telegram
+
+Order services only queue an alert (AlertDispatcher); one dispatcher thread
+looks up the user, formats the message and batches alerts per chat, so a burst
+such as the legs of a multi-leg order arrives as one digest message. Sends are
+paced within Telegram's limits (about one message per second per chat and 30
+per second overall).
 """
 
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, NamedTuple
 from concurrent.futures import ThreadPoolExecutor
+import atexit
+import os
+import queue
+import threading
 import time
 from datetime import datetime
 import json
@@ -15,6 +25,7 @@ from database.telegram_db import (
     add_notification
 )
 from utils.logging import get_logger
+from utils.token_bucket import TokenBucket, parse_rate_limit
 from database.auth_db import get_username_by_apikey
 
 # Lazy import telegram bot service to avoid import errors if telegram package not installed properly
@@ -42,6 +53,184 @@ logger = get_logger(__name__)
 # Thread pool for async operations
 alert_executor = ThreadPoolExecutor(max_workers=5, thread_name_prefix="telegram_alert")
 
+# Telegram rejects longer messages
+MAX_MESSAGE_LENGTH = 4096
+
+_STOP = object()
+
+
+class Alert(NamedTuple):
+    """A formatted alert for one chat; summary is its one-line digest form"""
+    telegram_id: int
+    message: str
+    summary: Optional[str] = None
+
+
+class AlertDispatcher:
+    """
+    Bounded alert queue drained by one thread that batches alerts per chat
+
+    A chat's alerts are sent once none has arrived for batch_window seconds, or
+    max_delay seconds after the first. One alert is sent as it is; a few are
+    joined into one message; more than digest_after become a digest with one
+    summary line each. Sends are paced at chat_interval seconds per chat and
+    rate messages per second overall. Alerts beyond the queue size are dropped
+    and counted rather than blocking the order.
+    """
+
+    def __init__(self, deliver, max_queue_size=1000, batch_window=0.5, max_delay=5.0,
+                 digest_after=5, rate=25.0, chat_interval=1.0):
+        self.deliver = deliver  # deliver(telegram_id, text), must not block for long
+        self.batch_window = batch_window
+        self.max_delay = max(batch_window, max_delay)
+        self.digest_after = digest_after
+        self.chat_interval = chat_interval
+        self.bucket = TokenBucket(rate)
+        self._queue = queue.Queue(maxsize=max(1, max_queue_size))
+        self._pending = {}    # telegram_id -> [first_at, last_at, alerts]
+        self._next_send = {}  # telegram_id -> earliest time of the next send
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stopped = False
+
+        # Counters
+        self.queued = 0
+        self.dropped = 0
+        self.alerts_sent = 0
+        self.messages_sent = 0
+
+    def submit(self, prepare) -> bool:
+        """
+        Queue an alert without blocking
+
+        Args:
+            prepare: Called on the dispatcher thread, returns an Alert or None to skip it
+
+        Returns:
+            bool: False if the alert was dropped because the queue is full or stopped
+        """
+        if self._stopped:
+            return False
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(prepare)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                logger.warning(f"Telegram alert queue full: {self.dropped} alerts dropped")
+            return False
+        self.queued += 1
+        return True
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="TelegramAlertDispatcher")
+                self._thread.start()
+
+    def _due_at(self, telegram_id):
+        first_at, last_at, _ = self._pending[telegram_id]
+        ready = min(last_at + self.batch_window, first_at + self.max_delay)
+        return max(ready, self._next_send.get(telegram_id, 0.0))
+
+    def _run(self):
+        while True:
+            now = time.monotonic()
+            timeout = min((self._due_at(tid) for tid in self._pending), default=now + 1.0) - now
+            try:
+                prepare = self._queue.get(timeout=max(0.0, timeout))
+            except queue.Empty:
+                prepare = None
+
+            if prepare is _STOP:
+                self._send_due(force=True)
+                return
+            if prepare is not None:
+                self._add(prepare)
+            self._send_due()
+
+    def _add(self, prepare):
+        try:
+            alert = prepare()
+        except Exception as e:
+            logger.error(f"Error preparing telegram alert: {e}", exc_info=True)
+            return
+        if alert is None:
+            return
+        now = time.monotonic()
+        pending = self._pending.get(alert.telegram_id)
+        if pending is None:
+            self._pending[alert.telegram_id] = [now, now, [alert]]
+        else:
+            pending[1] = now
+            pending[2].append(alert)
+
+    def _send_due(self, force=False):
+        now = time.monotonic()
+        for telegram_id in [tid for tid in self._pending if force or self._due_at(tid) <= now]:
+            alerts = self._pending.pop(telegram_id)[2]
+            texts = self.compose(alerts)
+            for text in texts:
+                self.bucket.acquire()
+                try:
+                    self.deliver(telegram_id, text)
+                except Exception as e:
+                    logger.error(f"Error sending telegram alert to {telegram_id}: {e}")
+            self._next_send[telegram_id] = time.monotonic() + self.chat_interval * len(texts)
+            self.alerts_sent += len(alerts)
+            self.messages_sent += len(texts)
+            if len(alerts) > 1:
+                logger.info(f"Sent {len(alerts)} telegram alerts to {telegram_id} in {len(texts)} message(s)")
+
+    def compose(self, alerts: List[Alert]) -> List[str]:
+        """Messages for a chat's batch of alerts, each within MAX_MESSAGE_LENGTH"""
+        if len(alerts) == 1:
+            return [alerts[0].message[:MAX_MESSAGE_LENGTH]]
+        header = f"📬 *{len(alerts)} Alerts*"
+        if len(alerts) > self.digest_after:
+            parts = [alert.summary or alert.message.split('\n', 1)[0] for alert in alerts]
+            separator = '\n'
+        else:
+            parts = [alert.message for alert in alerts]
+            separator = '\n\n'
+
+        messages = []
+        current = header
+        for part in parts:
+            part = part[:MAX_MESSAGE_LENGTH - len(header) - len(separator)]
+            if len(current) + len(separator) + len(part) > MAX_MESSAGE_LENGTH:
+                messages.append(current)
+                current = part
+            else:
+                current = current + separator + part
+        messages.append(current)
+        return messages
+
+    def flush(self, timeout=10):
+        """Stop accepting alerts and send everything queued, used at shutdown"""
+        if self._stopped:
+            return
+        self._stopped = True
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("Telegram alert queue full at shutdown")
+        self._thread.join(timeout=timeout)
+
+    def get_stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'pending_chats': len(self._pending),
+            'submitted': self.queued,
+            'dropped': self.dropped,
+            'alerts_sent': self.alerts_sent,
+            'messages_sent': self.messages_sent,
+        }
+
+
 class TelegramAlertService:
     """Service for sending order-related alerts via Telegram"""
 
@@ -57,12 +246,22 @@ class TelegramAlertService:
             'cancelallorder': '🚫 *All Orders Cancelled*\n{details}',
             'closeposition': '🔒 *Position Closed*\n{details}'
         }
-
-    def format_order_details(self, order_type: str, order_data: Dict[str, Any], response: Dict[str, Any]) -> str:
+        self.dispatcher = AlertDispatcher(
+            lambda telegram_id, message: alert_executor.submit(self.send_alert_sync, telegram_id, message),
+            max_queue_size=int(os.getenv('TELEGRAM_ALERT_QUEUE_SIZE', '1000')),
+            batch_window=int(os.getenv('TELEGRAM_ALERT_BATCH_MS', '500')) / 1000.0,
+            max_delay=int(os.getenv('TELEGRAM_ALERT_MAX_DELAY_MS', '5000')) / 1000.0,
+            digest_after=int(os.getenv('TELEGRAM_ALERT_DIGEST_AFTER', '5')),
+            rate=parse_rate_limit(os.getenv('TELEGRAM_ALERT_RATE_LIMIT', '25 per second'), 25.0)
+        )
+        atexit.register(self.dispatcher.flush)
+
+    def format_order_details(self, order_type: str, order_data: Dict[str, Any], response: Dict[str, Any],
+                             timestamp: Optional[datetime] = None) -> str:
         """Format order details for Telegram message"""
         try:
             details = []
-            timestamp = datetime.now().strftime('%H:%M:%S')
+            timestamp = (timestamp or datetime.now()).strftime('%H:%M:%S')
 
             # Add mode indicator at the top
             mode = response.get('mode', 'live')
@@ -174,6 +373,23 @@ class TelegramAlertService:
             logger.error(f"Error formatting order details: {e}")
             return f"Order Type: {order_type}\nStatus: {response.get('status', 'unknown')}"
 
+    def format_order_summary(self, order_type: str, order_data: Dict[str, Any], response: Dict[str, Any]) -> str:
+        """One-line form of an order alert, used in digests"""
+        status = '✅' if response.get('status') == 'success' else '❌'
+        template = self.alert_templates.get(order_type, '📊 *Order Update*\n{details}')
+        parts = [status, template.split('\n', 1)[0]]
+        if response.get('mode') == 'analyze':
+            parts.insert(1, '🔬')
+        for field in ('action', 'quantity'):
+            if order_data.get(field):
+                parts.append(str(order_data[field]))
+        if order_data.get('symbol'):
+            parts.append(f"`{order_data['symbol']}`")
+        reference = response.get('orderid') if response.get('status') == 'success' else response.get('message')
+        if reference:
+            parts.append(f"({reference})")
+        return ' '.join(parts)
+
     def send_alert_sync(self, telegram_id: int, message: str) -> bool:
         """Send alert message synchronously (thread-safe)"""
         try:
@@ -229,6 +445,9 @@ class TelegramAlertService:
         """
         Send order alert to telegram user (non-blocking)
 
+        Only queues the alert; the user lookup, formatting and sending happen on
+        the dispatcher thread.
+
         Args:
             order_type: Type of order (placeorder, basketorder, etc.)
             order_data: Original order data
@@ -236,70 +455,71 @@ class TelegramAlertService:
             api_key: API key to identify user
         """
         try:
-            logger.info(f"Telegram alert triggered for {order_type}, response: {response.get('status', 'unknown')}")
+            logger.debug(f"Telegram alert triggered for {order_type}, response: {response.get('status', 'unknown')}")
 
             # Skip if alerts are disabled
             if not self.enabled:
                 logger.debug("Telegram alerts are disabled globally")
                 return
 
-            # Get username from API key
-            username = None
-            api_key_used = api_key or order_data.get('apikey')
-
-            if api_key_used:
-                logger.debug(f"Looking up username for API key (first 10 chars): {api_key_used[:10] if api_key_used else 'None'}...")
-                username = get_username_by_apikey(api_key_used)
-                logger.debug(f"Username lookup result: {username}")
-            else:
-                logger.warning("No API key provided for telegram alert")
-
-            if not username:
-                logger.warning(f"No username found for telegram alert - api_key present: {bool(api_key_used)}, api_key_length: {len(api_key_used) if api_key_used else 0}")
-                # Try to get username from session if available
-                try:
-                    from flask import has_request_context, session
-                    if has_request_context() and session.get('user'):
-                        username = session.get('user')
-                        logger.info(f"Using username from session: {username}")
-                except:
-                    pass
-
-                if not username:
-                    return
-
-            # Get telegram user
-            telegram_user = get_telegram_user_by_username(username)
-            if not telegram_user:
-                logger.info(f"No telegram user linked for username: {username}")
-                return
-            if not telegram_user.get('notifications_enabled'):
-                logger.info(f"Notifications disabled for telegram user: {username}")
-                return
-
-            logger.info(f"Sending telegram alert to user {username} (telegram_id: {telegram_user['telegram_id']})")
-
-            # Format message
-            template = self.alert_templates.get(order_type, '📊 *Order Update*\n{details}')
-            details = self.format_order_details(order_type, order_data, response)
-            message = template.format(details=details)
-
-            # Send alert asynchronously (non-blocking)
-            telegram_id = telegram_user['telegram_id']
-
-            # Get telegram bot service
-            bot_service = _get_telegram_bot_service()
-
-            # Use thread pool executor for non-blocking execution
-            logger.info(f"Queueing alert via thread pool for telegram_id: {telegram_id}")
-            alert_executor.submit(self.send_alert_sync, telegram_id, message)
+            # The session is only available on the request thread
+            session_user = None
+            try:
+                from flask import has_request_context, session
+                if has_request_context():
+                    session_user = session.get('user')
+            except:
+                pass
 
-            logger.info(f"Telegram alert queued successfully for {order_type}")
+            timestamp = datetime.now()
+            self.dispatcher.submit(lambda: self._prepare_order_alert(
+                order_type, order_data, response, api_key, session_user, timestamp))
 
         except Exception as e:
             # Log error but don't raise - we don't want to affect order processing
             logger.error(f"Error queuing telegram alert: {e}", exc_info=True)
 
+    def _prepare_order_alert(self, order_type: str, order_data: Dict[str, Any], response: Dict[str, Any],
+                             api_key: Optional[str], session_user: Optional[str],
+                             timestamp: datetime) -> Optional[Alert]:
+        """Find the user's linked telegram chat and format the alert (dispatcher thread)"""
+        # Get username from API key
+        username = None
+        api_key_used = api_key or order_data.get('apikey')
+
+        if api_key_used:
+            logger.debug(f"Looking up username for API key (first 10 chars): {api_key_used[:10] if api_key_used else 'None'}...")
+            username = get_username_by_apikey(api_key_used)
+            logger.debug(f"Username lookup result: {username}")
+        else:
+            logger.warning("No API key provided for telegram alert")
+
+        if not username:
+            logger.warning(f"No username found for telegram alert - api_key present: {bool(api_key_used)}, api_key_length: {len(api_key_used) if api_key_used else 0}")
+            # Fall back to the username of the session the order came from
+            username = session_user
+            if not username:
+                return None
+            logger.info(f"Using username from session: {username}")
+
+        # Get telegram user
+        telegram_user = get_telegram_user_by_username(username)
+        if not telegram_user:
+            logger.info(f"No telegram user linked for username: {username}")
+            return None
+        if not telegram_user.get('notifications_enabled'):
+            logger.info(f"Notifications disabled for telegram user: {username}")
+            return None
+
+        # Format message
+        template = self.alert_templates.get(order_type, '📊 *Order Update*\n{details}')
+        details = self.format_order_details(order_type, order_data, response, timestamp)
+        message = template.format(details=details)
+
+        logger.debug(f"Telegram alert for {order_type} queued for telegram_id: {telegram_user['telegram_id']}")
+        return Alert(telegram_user['telegram_id'], message,
+                     self.format_order_summary(order_type, order_data, response))
+
     # Backward compatibility wrapper
     _send_alert_sync_wrapper = send_alert_sync
 
@@ -311,7 +531,7 @@ class TelegramAlertService:
             for user in users:
                 if user.get('notifications_enabled'):
                     telegram_id = user['telegram_id']
-                    alert_executor.submit(self._send_alert_sync_wrapper, telegram_id, message)
+                    self.dispatcher.submit(lambda telegram_id=telegram_id: Alert(telegram_id, message))
 
         except Exception as e:
             logger.error(f"Error sending broadcast alert: {e}")
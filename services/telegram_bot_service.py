@@ -20,8 +20,7 @@ from telegram.ext import Application, CommandHandler, CallbackQueryHandler, Mess
 from telegram.constants import ParseMode
 import telegram.error
 import json
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from collections import OrderedDict
 import pandas as pd
 import io
 import base64
@@ -41,9 +40,14 @@ from database.telegram_db import (
 )
 from database.auth_db import get_username_by_apikey
 from utils.logging import get_logger
+from services.telegram_chart_service import chart_key, get_chart
 
 logger = get_logger(__name__)
 
+# Recently requested charts are rendered again in the background when a new candle arrives
+CHART_WATCHLIST_SIZE = int(os.getenv('TELEGRAM_CHART_WATCHLIST_SIZE', '20'))
+CHART_REFRESH_SECONDS = int(os.getenv('TELEGRAM_CHART_REFRESH_SECONDS', '60'))
+
 class TelegramBotService:
     """Service class for managing Telegram bot operations with OpenAlgo SDK integration"""
 
@@ -56,6 +60,7 @@ class TelegramBotService:
         self.bot_thread = None
         self.bot_loop = None  # Store the bot's event loop
         self.sdk_clients = {}  # Cache for OpenAlgo SDK clients per user
+        self.chart_watchlist = OrderedDict()  # (type, symbol, exchange, interval, days) -> telegram_id
         self._stop_event = original_threading.Event()  # Thread-safe stop signal
 
     def _get_sdk_client(self, telegram_id: int) -> Optional[openalgo_api]:
@@ -168,87 +173,11 @@ class TelegramBotService:
             if 'index' in df.columns:
                 df.rename(columns={'index': 'timestamp'}, inplace=True)
 
-            # Create candlestick chart with volume
-            fig = make_subplots(
-                rows=2, cols=1,
-                shared_xaxes=True,
-                vertical_spacing=0.03,
-                subplot_titles=(f'{symbol} - {days} Day Intraday ({interval})', None),
-                row_heights=[0.7, 0.3]
-            )
-
-            # Add candlestick chart (following sample code exactly)
-            fig.add_trace(
-                go.Candlestick(
-                    x=df['timestamp'],  # x-axis as timestamp
-                    open=df['open'],
-                    high=df['high'],
-                    low=df['low'],
-                    close=df['close'],
-                    name='Price',
-                    increasing_line_color='green',
-                    decreasing_line_color='red'
-                ),
-                row=1, col=1
-            )
-
-            # Add volume bar chart
-            colors = ['red' if close < open else 'green'
-                     for close, open in zip(df['close'], df['open'])]
-
-            fig.add_trace(
-                go.Bar(
-                    x=df['timestamp'],  # x-axis as timestamp
-                    y=df['volume'],
-                    marker_color=colors,
-                    name='Volume',
-                    showlegend=False
-                ),
-                row=2, col=1
-            )
-
-            # Update layout - simplified like the sample code
-            fig.update_layout(
-                xaxis_rangeslider_visible=False,
-                height=600,
-                template='plotly_white',
-                showlegend=False,
-                hovermode='x unified'
-            )
-
-            # Apply category type to both x-axes to avoid gaps
-            # Reduce tick density - show only every Nth tick
-            tick_spacing = max(1, len(df) // 8)  # Show approximately 8 ticks
-            # Format timestamps as "22 SEP 09:15"
-            tick_labels = []
-            for i in range(0, len(df), tick_spacing):
-                if pd.notna(df['timestamp'].iloc[i]):
-                    ts = pd.to_datetime(df['timestamp'].iloc[i])
-                    tick_labels.append(ts.strftime('%d %b %H:%M').upper())
-                else:
-                    tick_labels.append('')
-
-            fig.update_xaxes(
-                type='category',
-                row=2, col=1,  # Apply to bottom subplot
-                tickmode='array',
-                tickvals=list(range(0, len(df), tick_spacing)),
-                ticktext=tick_labels,
-                tickangle=45
+            # Served from the cache until a new candle arrives, rendered off the event loop
+            key = chart_key('intraday', symbol, exchange, interval, days, df)
+            return await asyncio.get_event_loop().run_in_executor(
+                None, get_chart, key, 'intraday', df, symbol, days, interval
             )
-            # Hide ticks on top subplot
-            fig.update_xaxes(
-                type='category',
-                row=1, col=1,  # Apply to top subplot
-                showticklabels=False
-            )
-
-            # Clean up axes
-            fig.update_yaxes(title_text="")
-
-            # Convert to image bytes
-            img_bytes = fig.to_image(format="png", engine="kaleido")
-            return img_bytes
 
         except Exception as e:
             logger.error(f"Error generating intraday chart: {e}")
@@ -322,93 +251,35 @@ class TelegramBotService:
             # Keep last N trading days
             df = df.tail(days)
 
-            # Create candlestick chart with volume
-            fig = make_subplots(
-                rows=2, cols=1,
-                shared_xaxes=True,
-                vertical_spacing=0.03,
-                subplot_titles=(f'{symbol} - Daily Chart ({days} Days)', None),
-                row_heights=[0.7, 0.3]
-            )
-
-            # Add candlestick chart (following sample code exactly)
-            fig.add_trace(
-                go.Candlestick(
-                    x=df['timestamp'],  # x-axis as timestamp
-                    open=df['open'],
-                    high=df['high'],
-                    low=df['low'],
-                    close=df['close'],
-                    name='Price',
-                    increasing_line_color='green',
-                    decreasing_line_color='red'
-                ),
-                row=1, col=1
+            # Served from the cache until a new candle arrives, rendered off the event loop
+            key = chart_key('daily', symbol, exchange, interval, days, df)
+            return await asyncio.get_event_loop().run_in_executor(
+                None, get_chart, key, 'daily', df, symbol, days
             )
 
-
-            # Add volume bar chart
-            colors = ['red' if close < open else 'green'
-                     for close, open in zip(df['close'], df['open'])]
-
-            fig.add_trace(
-                go.Bar(
-                    x=df['timestamp'],  # x-axis as timestamp
-                    y=df['volume'],
-                    marker_color=colors,
-                    name='Volume',
-                    showlegend=False
-                ),
-                row=2, col=1
-            )
-
-            # Update layout - simplified like the sample code
-            fig.update_layout(
-                xaxis_rangeslider_visible=False,
-                height=600,
-                template='plotly_white',
-                showlegend=False,
-                hovermode='x unified'
-            )
-
-            # Apply category type to both x-axes to avoid gaps
-            # Reduce tick density for daily charts - show only every Nth tick
-            tick_spacing = max(1, len(df) // 10)  # Show approximately 10 ticks for daily
-            # Format dates for display as "22 SEP"
-            tick_labels = []
-            for i in range(0, len(df), tick_spacing):
-                if pd.notna(df['timestamp'].iloc[i]):
-                    ts = pd.to_datetime(df['timestamp'].iloc[i])
-                    tick_labels.append(ts.strftime('%d %b').upper())
-                else:
-                    tick_labels.append('')
-
-            fig.update_xaxes(
-                type='category',
-                row=2, col=1,  # Apply to bottom subplot
-                tickmode='array',
-                tickvals=list(range(0, len(df), tick_spacing)),
-                ticktext=tick_labels,
-                tickangle=45
-            )
-            # Hide ticks on top subplot
-            fig.update_xaxes(
-                type='category',
-                row=1, col=1,  # Apply to top subplot
-                showticklabels=False
-            )
-
-            # Clean up axes
-            fig.update_yaxes(title_text="")
-
-            # Convert to image bytes
-            img_bytes = fig.to_image(format="png", engine="kaleido")
-            return img_bytes
-
         except Exception as e:
             logger.error(f"Error generating daily chart: {e}")
             return None
 
+    def _watch_chart(self, chart_type: str, symbol: str, exchange: str, interval: str, days: int, telegram_id: int):
+        """Add a requested chart to the watchlist pre-rendered in the background"""
+        key = (chart_type, symbol, exchange, interval, days)
+        self.chart_watchlist[key] = telegram_id
+        self.chart_watchlist.move_to_end(key)
+        while len(self.chart_watchlist) > CHART_WATCHLIST_SIZE:
+            self.chart_watchlist.popitem(last=False)
+
+    async def _prerender_charts(self):
+        """Keep the watchlist charts rendered, so /chart is answered from the cache"""
+        while True:
+            await asyncio.sleep(CHART_REFRESH_SECONDS)
+            for (chart_type, symbol, exchange, interval, days), telegram_id in list(self.chart_watchlist.items()):
+                # Charts are only rendered again when a new candle has arrived
+                if chart_type == 'intraday':
+                    await self._generate_intraday_chart(symbol, exchange, interval, days, telegram_id)
+                else:
+                    await self._generate_daily_chart(symbol, exchange, interval, days, telegram_id)
+
     async def initialize_bot(self, token: str) -> Tuple[bool, str]:
         """Initialize the Telegram bot with given token"""
         try:
@@ -625,10 +496,15 @@ class TelegramBotService:
                 # Reset retry count on successful connection
                 retry_count = 0
 
+                # Pre-render watchlist charts while the bot runs
+                prerender_task = asyncio.ensure_future(self._prerender_charts())
+
                 # Keep running until stop signal
                 while not self._stop_event.is_set():
                     await asyncio.sleep(1)
 
+                prerender_task.cancel()
+
                 # Stop signal received - clean shutdown
                 logger.debug("Stop signal received, shutting down bot...")
                 self.is_running = False
@@ -1595,6 +1471,7 @@ class TelegramBotService:
                     symbol, exchange, intraday_interval, intraday_days, user.id
                 )
                 if intraday_chart:
+                    self._watch_chart('intraday', symbol, exchange, intraday_interval, intraday_days, user.id)
                     charts_generated.append(
                         InputMediaPhoto(
                             intraday_chart,
@@ -1610,6 +1487,7 @@ class TelegramBotService:
                     symbol, exchange, daily_interval, daily_days, user.id
                 )
                 if daily_chart:
+                    self._watch_chart('daily', symbol, exchange, daily_interval, daily_days, user.id)
                     charts_generated.append(
                         InputMediaPhoto(
                             daily_chart,
@@ -0,0 +1,379 @@
+"""
+Telegram Chart Service - Cached chart rendering in a worker process
+
+Rendering a candlestick chart with plotly and kaleido costs seconds of CPU, and
+it used to run for every /chart request on the bot's event loop. Now:
+
+- Rendered PNGs are cached (TELEGRAM_CHART_CACHE_SIZE charts, default 64) keyed
+  by symbol, exchange, interval, days and the last candle (its time and
+  values), so a chart is rendered again only when a new candle has arrived
+- Rendering runs in a `python -m services.telegram_chart_service` subprocess
+  (TELEGRAM_CHART_WORKER, default True), started on first use and restarted if
+  it exits; without it charts render in a thread as before
+- The bot re-renders recently requested charts in the background, so the next
+  /chart for them is served from the cache
+
+Like the WebSocket fan-out workers, the renderer is a plain subprocess rather
+than a multiprocessing child: spawning would re-run app.py's startup in it.
+"""
+
+import itertools
+import os
+import pickle
+import struct
+import subprocess
+import sys
+from collections import OrderedDict
+from typing import Optional
+
+from utils.logging import get_logger
+
+# The reader thread blocks on the worker's pipe, keep it off eventlet's hub
+if 'eventlet' in sys.modules:
+    import eventlet
+    original_threading = eventlet.patcher.original('threading')
+else:
+    import threading as original_threading
+
+logger = get_logger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds to wait for a rendered chart
+RENDER_TIMEOUT = 60
+
+_FRAME_HEADER = struct.Struct('>I')
+
+
+class ChartRenderError(Exception):
+    """The chart could not be rendered"""
+
+
+class ChartWorkerUnavailable(ChartRenderError):
+    """The renderer process could not be started or exited"""
+
+
+def _candlestick_png(df, title: str, tick_format: str, tick_count: int) -> bytes:
+    """Candlestick chart with a volume pane as PNG bytes"""
+    import pandas as pd
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    # Create candlestick chart with volume
+    fig = make_subplots(
+        rows=2, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.03,
+        subplot_titles=(title, None),
+        row_heights=[0.7, 0.3]
+    )
+
+    fig.add_trace(
+        go.Candlestick(
+            x=df['timestamp'],  # x-axis as timestamp
+            open=df['open'],
+            high=df['high'],
+            low=df['low'],
+            close=df['close'],
+            name='Price',
+            increasing_line_color='green',
+            decreasing_line_color='red'
+        ),
+        row=1, col=1
+    )
+
+    # Add volume bar chart
+    colors = ['red' if close < open else 'green'
+              for close, open in zip(df['close'], df['open'])]
+
+    fig.add_trace(
+        go.Bar(
+            x=df['timestamp'],  # x-axis as timestamp
+            y=df['volume'],
+            marker_color=colors,
+            name='Volume',
+            showlegend=False
+        ),
+        row=2, col=1
+    )
+
+    fig.update_layout(
+        xaxis_rangeslider_visible=False,
+        height=600,
+        template='plotly_white',
+        showlegend=False,
+        hovermode='x unified'
+    )
+
+    # Apply category type to both x-axes to avoid gaps
+    # Reduce tick density - show only every Nth tick
+    tick_spacing = max(1, len(df) // tick_count)
+    tick_labels = []
+    for i in range(0, len(df), tick_spacing):
+        if pd.notna(df['timestamp'].iloc[i]):
+            ts = pd.to_datetime(df['timestamp'].iloc[i])
+            tick_labels.append(ts.strftime(tick_format).upper())
+        else:
+            tick_labels.append('')
+
+    fig.update_xaxes(
+        type='category',
+        row=2, col=1,  # Apply to bottom subplot
+        tickmode='array',
+        tickvals=list(range(0, len(df), tick_spacing)),
+        ticktext=tick_labels,
+        tickangle=45
+    )
+    # Hide ticks on top subplot
+    fig.update_xaxes(
+        type='category',
+        row=1, col=1,  # Apply to top subplot
+        showticklabels=False
+    )
+
+    # Clean up axes
+    fig.update_yaxes(title_text="")
+
+    # Convert to image bytes
+    return fig.to_image(format="png", engine="kaleido")
+
+
+def render_intraday_chart(df, symbol: str, days: int, interval: str) -> bytes:
+    # Format timestamps as "22 SEP 09:15", approximately 8 ticks
+    return _candlestick_png(df, f'{symbol} - {days} Day Intraday ({interval})', '%d %b %H:%M', 8)
+
+
+def render_daily_chart(df, symbol: str, days: int) -> bytes:
+    # Format dates as "22 SEP", approximately 10 ticks
+    return _candlestick_png(df, f'{symbol} - Daily Chart ({days} Days)', '%d %b', 10)
+
+
+RENDERERS = {
+    'intraday': render_intraday_chart,
+    'daily': render_daily_chart,
+}
+
+
+def chart_key(kind: str, symbol: str, exchange: str, interval: str, days: int, df) -> tuple:
+    """
+    Cache key of a chart of `df` (columns timestamp, open, high, low, close, volume)
+
+    The last candle's values are part of the key so a candle that is still
+    forming is rendered again when it changes.
+    """
+    last = df.iloc[-1]
+    candle = tuple(str(last.get(column)) for column in ('timestamp', 'open', 'high', 'low', 'close', 'volume'))
+    return (kind, symbol, exchange, interval, days, len(df)) + candle
+
+
+class ChartCache:
+    """LRU cache of rendered chart PNGs"""
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max(1, max_size)
+        self._charts = OrderedDict()
+        self._lock = original_threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[bytes]:
+        with self._lock:
+            png = self._charts.get(key)
+            if png is None:
+                self.misses += 1
+                return None
+            self._charts.move_to_end(key)
+            self.hits += 1
+            return png
+
+    def put(self, key, png: bytes) -> None:
+        with self._lock:
+            self._charts[key] = png
+            self._charts.move_to_end(key)
+            while len(self._charts) > self.max_size:
+                self._charts.popitem(last=False)
+
+    def __len__(self):
+        return len(self._charts)
+
+
+def _write_frame(stream, message) -> None:
+    data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    stream.write(_FRAME_HEADER.pack(len(data)) + data)
+    stream.flush()
+
+
+def _read_frame(stream):
+    header = stream.read(_FRAME_HEADER.size)
+    if len(header) < _FRAME_HEADER.size:
+        return None
+    (size,) = _FRAME_HEADER.unpack(header)
+    data = stream.read(size)
+    if len(data) < size:
+        return None
+    return pickle.loads(data)
+
+
+class _Request:
+    __slots__ = ('done', 'ok', 'result')
+
+    def __init__(self):
+        self.done = original_threading.Event()
+        self.ok = False
+        self.result = None
+
+
+class ChartWorker:
+    """Renders charts in a renderer subprocess, one request at a time"""
+
+    def __init__(self):
+        self._process = None
+        self._requests = {}
+        self._ids = itertools.count()
+        self._lock = original_threading.Lock()
+
+    def _ensure_started(self):
+        if self._process is not None and self._process.poll() is None:
+            return self._process
+        command = [sys.executable, '-m', 'services.telegram_chart_service', '--worker']
+        try:
+            process = subprocess.Popen(command, cwd=REPO_ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        except OSError as e:
+            raise ChartWorkerUnavailable(f"Could not start chart renderer: {e}")
+        self._process = process
+        original_threading.Thread(target=self._read_results, args=(process,), daemon=True,
+                                  name="TelegramChartReader").start()
+        logger.info(f"Started chart renderer (pid {process.pid})")
+        return process
+
+    def render(self, kind: str, *args, timeout: float = RENDER_TIMEOUT) -> bytes:
+        request = _Request()
+        with self._lock:
+            process = self._ensure_started()
+            request_id = next(self._ids)
+            self._requests[request_id] = request
+            try:
+                _write_frame(process.stdin, (request_id, kind, args))
+            except (OSError, ValueError) as e:
+                self._requests.pop(request_id, None)
+                raise ChartWorkerUnavailable(f"Chart renderer is not accepting requests: {e}")
+
+        if not request.done.wait(timeout):
+            with self._lock:
+                self._requests.pop(request_id, None)
+            raise ChartRenderError(f"Chart rendering timed out after {timeout}s")
+        if not request.ok:
+            raise request.result
+        return request.result
+
+    def _read_results(self, process):
+        while True:
+            try:
+                message = _read_frame(process.stdout)
+            except Exception as e:
+                logger.error(f"Error reading from chart renderer: {e}")
+                message = None
+            if message is None:
+                break
+            request_id, ok, result = message
+            with self._lock:
+                request = self._requests.pop(request_id, None)
+            if request is not None:
+                request.ok = ok
+                request.result = result if ok else ChartRenderError(result)
+                request.done.set()
+
+        # The renderer exited: fail what it was working on, the next request restarts it
+        with self._lock:
+            unexpected = self._process is process
+            if unexpected:
+                self._process = None
+            requests, self._requests = self._requests, {}
+        for request in requests.values():
+            request.result = ChartWorkerUnavailable("Chart renderer exited")
+            request.done.set()
+        if unexpected:
+            logger.warning(f"Chart renderer (pid {process.pid}) exited with code {process.wait()}")
+
+    def stop(self):
+        with self._lock:
+            process, self._process = self._process, None
+        if process is not None and process.poll() is None:
+            try:
+                process.stdin.close()
+                process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                process.kill()
+
+
+chart_cache = ChartCache(int(os.getenv('TELEGRAM_CHART_CACHE_SIZE', '64')))
+
+_chart_worker = None
+_worker_lock = original_threading.Lock()
+
+
+def get_chart_worker() -> ChartWorker:
+    """Return the process wide ChartWorker"""
+    global _chart_worker
+    if _chart_worker is None:
+        with _worker_lock:
+            if _chart_worker is None:
+                _chart_worker = ChartWorker()
+    return _chart_worker
+
+
+def get_chart(key, kind: str, *args) -> bytes:
+    """
+    Return the PNG of a chart, rendering it only when it is not cached
+
+    Args:
+        key: chart_key() of the chart
+        kind: 'intraday' or 'daily'
+        args: Arguments of the renderer (see RENDERERS)
+
+    Raises:
+        ChartRenderError: The chart could not be rendered
+    """
+    png = chart_cache.get(key)
+    if png is not None:
+        return png
+
+    png = None
+    if os.getenv('TELEGRAM_CHART_WORKER', 'True').lower() == 'true':
+        try:
+            png = get_chart_worker().render(kind, *args)
+        except ChartWorkerUnavailable as e:
+            logger.warning(f"{e}, rendering in this process")
+    if png is None:
+        try:
+            png = RENDERERS[kind](*args)
+        except Exception as e:
+            raise ChartRenderError(str(e))
+
+    chart_cache.put(key, png)
+    return png
+
+
+def _worker_main():
+    """Serve render requests from stdin until it is closed"""
+    requests = sys.stdin.buffer
+    # Anything printed while rendering, kaleido's own processes included, must
+    # not reach the results pipe: keep it on a new descriptor, send fd 1 to stderr
+    sys.stdout.flush()
+    results = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    while True:
+        message = _read_frame(requests)
+        if message is None:
+            return
+        request_id, kind, args = message
+        try:
+            result = (request_id, True, RENDERERS[kind](*args))
+        except Exception as e:
+            result = (request_id, False, f"{type(e).__name__}: {e}")
+        _write_frame(results, result)
+
+
+if __name__ == '__main__':
+    if '--worker' in sys.argv:
+        _worker_main()
@@ -3,6 +3,7 @@ import traceback
 from typing import Tuple, Dict, Any, Optional, List, Union
 from database.auth_db import get_auth_token_broker
 from utils.logging import get_logger
+from utils.order_state import copy_records, get_order_state
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -92,8 +93,10 @@ def get_tradebook_with_auth(auth_token: str, broker: str, original_data: Dict[st
         }, 404
 
     try:
-        # Get tradebook data using broker's implementation
-        trade_data = broker_funcs['get_trade_book'](auth_token)
+        # Get tradebook data using broker's implementation, shared with other
+        # readers of this session for the order state staleness window
+        snapshot = get_order_state().snapshot('tradebook', broker_funcs['get_trade_book'], auth_token)
+        trade_data = snapshot.data
         
         if 'status' in trade_data and trade_data['status'] == 'error':
             return False, {
@@ -101,16 +104,20 @@ def get_tradebook_with_auth(auth_token: str, broker: str, original_data: Dict[st
                 'message': trade_data.get('message', 'Error fetching trade data')
             }, 500
 
-        # Transform data using mapping functions
-        trade_data = broker_funcs['map_trade_data'](trade_data=trade_data)
-        trade_data = broker_funcs['transform_tradebook_data'](trade_data)
-        
-        # Format numeric values to 2 decimal places
-        formatted_trades = format_trade_data(trade_data)
+        def build_tradebook(trade_data):
+            # Transform data using mapping functions
+            trade_data = broker_funcs['map_trade_data'](trade_data=trade_data)
+            trade_data = broker_funcs['transform_tradebook_data'](trade_data)
+            
+            # Format numeric values to 2 decimal places
+            return format_trade_data(trade_data)
+
+        # Mapped once per snapshot
+        formatted_trades = snapshot.view('tradebook', build_tradebook)
         
         return True, {
             'status': 'success',
-            'data': formatted_trades
+            'data': copy_records(formatted_trades)
         }, 200
     except Exception as e:
         logger.error(f"Error processing trade data: {e}")
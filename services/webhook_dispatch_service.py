@@ -0,0 +1,178 @@
+"""
+In-process order dispatch for TradingView and Chartink webhook alerts.
+
+Alerts are queued by the webhook handlers and placed by a single dispatcher thread
+that calls the order services directly, instead of posting back to this server's
+own REST API. The per-endpoint limits (ORDER_RATE_LIMIT, SMART_ORDER_RATE_LIMIT)
+are enforced with token buckets; smart orders take priority when both are ready.
+Every alert's end-to-end latency (queue wait plus order placement) is logged and
+kept for get_stats().
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+from utils.logging import get_logger
+from utils.token_bucket import TokenBucket, parse_rate_limit
+
+logger = get_logger(__name__)
+
+ENDPOINT_PLACEORDER = 'placeorder'
+ENDPOINT_PLACESMARTORDER = 'placesmartorder'
+
+# Number of recent alerts kept for latency percentiles
+LATENCY_WINDOW = 1000
+
+
+# The order services are imported on first use: the webhook blueprints load this
+# module before restx_api, which the order services import in turn
+def _place_order(**kwargs):
+    from services.place_order_service import place_order
+    return place_order(**kwargs)
+
+
+def _place_smart_order(**kwargs):
+    from services.place_smart_order_service import place_smart_order
+    return place_smart_order(**kwargs)
+
+
+class WebhookOrderDispatcher:
+    """Rate limited, in-process order placement for queued webhook alerts"""
+
+    def __init__(self, order_rate: float = 10, smart_order_rate: float = 2):
+        self.buckets = {
+            # No bursts for smart orders so each one sees the previous one's position
+            ENDPOINT_PLACESMARTORDER: TokenBucket(smart_order_rate, capacity=1),
+            ENDPOINT_PLACEORDER: TokenBucket(order_rate),
+        }
+        self.queues = {endpoint: deque() for endpoint in self.buckets}
+        self.handlers = {
+            ENDPOINT_PLACESMARTORDER: _place_smart_order,
+            ENDPOINT_PLACEORDER: _place_order,
+        }
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+
+        # Monitoring
+        self.dispatched = 0
+        self.failed = 0
+        self.latencies_ms = deque(maxlen=LATENCY_WINDOW)
+
+    def submit(self, endpoint: str, payload: Dict[str, Any], source: str = 'webhook') -> None:
+        """Queue an alert's order for placement"""
+        if endpoint not in self.queues:
+            endpoint = ENDPOINT_PLACEORDER
+        with self._condition:
+            if not self._running:
+                self._start()
+            self.queues[endpoint].append((time.monotonic(), source, payload))
+            self._condition.notify()
+
+    def _start(self) -> None:
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="WebhookOrderDispatcher")
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+
+    def _next_job(self):
+        """
+        Pop the next order whose endpoint has a token, smart orders first
+
+        Returns:
+            tuple: (job, wait) - job is None when nothing can run, wait is the time until
+            a queued order could run (None if nothing is queued)
+        """
+        now = time.monotonic()
+        wait = None
+        for endpoint, jobs in self.queues.items():
+            if not jobs:
+                continue
+            bucket = self.buckets[endpoint]
+            if bucket.try_acquire(now):
+                return (endpoint,) + jobs.popleft(), None
+            endpoint_wait = bucket.wait_time(now)
+            wait = endpoint_wait if wait is None else min(wait, endpoint_wait)
+        return None, wait
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if not self._running:
+                        return
+                    job, wait = self._next_job()
+                    if job is not None:
+                        break
+                    # Sleep until an order is queued or the next token is due
+                    self._condition.wait(timeout=wait)
+
+            self._dispatch(*job)
+
+    def _dispatch(self, endpoint: str, queued_at: float, source: str, payload: Dict[str, Any]) -> None:
+        started = time.monotonic()
+        symbol = payload.get('symbol')
+        strategy = payload.get('strategy')
+        try:
+            success, response_data, status_code = self.handlers[endpoint](
+                order_data=payload,
+                api_key=payload.get('apikey')
+            )
+        except Exception as e:
+            success, response_data, status_code = False, {'message': str(e)}, 500
+
+        finished = time.monotonic()
+        queue_ms = (started - queued_at) * 1000
+        total_ms = (finished - queued_at) * 1000
+        self.latencies_ms.append(total_ms)
+
+        if success:
+            self.dispatched += 1
+            logger.info(f'{source} {endpoint} placed for {symbol} in strategy {strategy} '
+                        f'(queue {queue_ms:.1f}ms, total {total_ms:.1f}ms)')
+        else:
+            self.failed += 1
+            logger.error(f'Error placing {source} {endpoint} for {symbol}: '
+                         f'{response_data.get("message", response_data)} (status {status_code}, total {total_ms:.1f}ms)')
+
+    def get_stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies_ms)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 2) if latencies else None
+
+        return {
+            'queued': {endpoint: len(jobs) for endpoint, jobs in self.queues.items()},
+            'dispatched': self.dispatched,
+            'failed': self.failed,
+            'latency_ms': {
+                'p50': percentile(0.50),
+                'p95': percentile(0.95),
+                'p99': percentile(0.99),
+                'max': round(latencies[-1], 2) if latencies else None,
+            },
+        }
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_webhook_dispatcher() -> WebhookOrderDispatcher:
+    """Return the dispatcher shared by the strategy and Chartink webhooks"""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = WebhookOrderDispatcher(
+                    order_rate=parse_rate_limit(os.getenv('ORDER_RATE_LIMIT', '10 per second'), 10),
+                    smart_order_rate=parse_rate_limit(os.getenv('SMART_ORDER_RATE_LIMIT', '2 per second'), 2)
+                )
+    return _dispatcher
@@ -0,0 +1,2 @@
+# test/benchmarks/__init__.py
+"""Offline performance benchmarks"""
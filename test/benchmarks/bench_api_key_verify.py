@@ -0,0 +1,113 @@
+# test/benchmarks/bench_api_key_verify.py
+"""
+API Key Verification Benchmark
+
+Measures verify_api_key on a cache miss against a SQLite api_keys table with
+1k users, for a valid key and an unknown key:
+
+1. Scan         - the previous path: load every ApiKeys row and try the Argon2
+                  hash of each until one matches
+2. Fingerprint  - one indexed lookup of the HMAC fingerprint and at most one
+                  Argon2 verification
+
+Hashing 1k keys with Argon2 takes minutes, so the users share the hashes of a
+small pool of keys; a mismatching verify costs the same against any of them.
+The scan is timed on --sample rows and extrapolated to the table.
+
+Usage:
+    python test/benchmarks/bench_api_key_verify.py [--users 1000] [--sample 10]
+"""
+
+import argparse
+import os
+import secrets
+import sys
+import tempfile
+import time
+
+BENCH_DIR = tempfile.mkdtemp(prefix='bench_api_key_verify_')
+# auth_db binds its engine to DATABASE_URL at import time, unknown keys are tracked in the logs DB
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(BENCH_DIR, 'bench.db')}"
+os.environ['LOGS_DATABASE_URL'] = f"sqlite:///{os.path.join(BENCH_DIR, 'logs.db')}"
+os.environ.setdefault('API_KEY_PEPPER', secrets.token_hex(32))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from argon2.exceptions import VerifyMismatchError
+
+from database import auth_db, settings_db, traffic_db
+from database.auth_db import ApiKeys, PEPPER, db_session, encrypt_token, get_api_key_fingerprint, ph
+
+HASH_POOL = 4
+
+
+def make_users(users):
+    """api_keys rows for users; the key of the last user is hashed for real"""
+    pool = [ph.hash(secrets.token_hex(32) + PEPPER) for _ in range(HASH_POOL)]
+    keys = [secrets.token_hex(32) for _ in range(users)]
+    rows = [{
+        'user_id': f"user{i}",
+        'api_key_hash': pool[i % HASH_POOL],
+        'api_key_encrypted': encrypt_token(key),
+        'api_key_fingerprint': get_api_key_fingerprint(key),
+    } for i, key in enumerate(keys)]
+    rows[-1]['api_key_hash'] = ph.hash(keys[-1] + PEPPER)
+    db_session.bulk_insert_mappings(ApiKeys, rows)
+    db_session.commit()
+    return keys[-1]
+
+
+def scan_verify(api_key, limit=None):
+    """The previous cache-miss path, optionally stopped after limit rows"""
+    peppered_key = api_key + PEPPER
+    for api_key_obj in ApiKeys.query.limit(limit).all() if limit else ApiKeys.query.all():
+        try:
+            ph.verify(api_key_obj.api_key_hash, peppered_key)
+            return api_key_obj.user_id
+        except VerifyMismatchError:
+            continue
+    return None
+
+
+def fingerprint_verify(api_key):
+    """verify_api_key with its caches cleared, so every call is a miss"""
+    auth_db.verified_api_key_cache.clear()
+    auth_db.invalid_api_key_cache.clear()
+    return auth_db.verify_api_key(api_key)
+
+
+def timed(func, *args, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args)
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--sample', type=int, default=10)
+    args = parser.parse_args()
+
+    auth_db.init_db()
+    settings_db.init_db()
+    traffic_db.init_logs_db()
+    valid_key = make_users(args.users)
+    unknown_key = secrets.token_hex(32)
+
+    # Scan cost is linear in the rows tried: a valid key of the last user and an unknown key both try every row
+    _, sample_seconds = timed(scan_verify, unknown_key, args.sample)
+    scan_seconds = sample_seconds * args.users / args.sample
+
+    valid_user, valid_seconds = timed(fingerprint_verify, valid_key, repeat=3)
+    unknown_user, unknown_seconds = timed(fingerprint_verify, unknown_key, repeat=3)
+    assert valid_user == f"user{args.users - 1}" and unknown_user is None
+
+    print(f"api_keys rows: {args.users}")
+    print(f"{'path':<28}{'valid key':>14}{'unknown key':>14}")
+    print(f"{'scan (extrapolated)':<28}{scan_seconds * 1000:>12.0f}ms{scan_seconds * 1000:>12.0f}ms")
+    print(f"{'fingerprint':<28}{valid_seconds * 1000:>12.1f}ms{unknown_seconds * 1000:>12.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
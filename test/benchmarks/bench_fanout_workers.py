@@ -0,0 +1,169 @@
+# test/benchmarks/bench_fanout_workers.py
+"""
+WebSocket Fan-out Workers Benchmark
+
+Runs the multi-process proxy tier with a SyntheticWebSocketAdapter behind the
+coordinator and measures market data delivery to real WebSocket clients for
+1..N worker processes:
+
+* --clients connections (spread over --client-procs processes) authenticate
+  with one API key and subscribe to the same --symbols instruments in LTP mode
+* the adapter publishes rounds of ticks for --seconds
+* delivered = messages received by all clients, per second of publishing
+
+The broker sees a single subscription per instrument in every configuration;
+the benchmark checks this after the clients have subscribed.
+
+Scaling needs free cores: the clients, the publisher and the workers all run on
+this machine, so with few cores the clients become the bottleneck.
+
+Usage:
+    python test/benchmarks/bench_fanout_workers.py [--workers 1,2,4] [--clients 200] [--symbols 50]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import secrets
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = tempfile.mkdtemp(prefix='bench_fanout_workers_')
+# auth_db binds its engine to DATABASE_URL at import time; the workers inherit the environment
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(BENCH_DIR, 'bench.db')}"
+os.environ['LOGS_DATABASE_URL'] = f"sqlite:///{os.path.join(BENCH_DIR, 'logs.db')}"
+os.environ.setdefault('API_KEY_PEPPER', secrets.token_hex(32))
+# Measure raw fan-out: no per-subscription rate limit
+os.environ['WEBSOCKET_LTP_MAX_RATE'] = '0'
+os.environ['QUOTE_BOARD_ENABLED'] = 'False'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+USER = 'bench_user'
+
+
+def run_clients(port, api_key, connections, symbols, ready, stop, results):
+    """Client process: keep connections subscribed and count market data messages until stopped"""
+    import websockets
+
+    async def client(counts, index):
+        async with websockets.connect(f"ws://127.0.0.1:{port}", max_queue=None) as websocket:
+            await websocket.send(json.dumps({'action': 'authenticate', 'api_key': api_key}))
+            await websocket.recv()
+            await websocket.send(json.dumps({'action': 'subscribe', 'mode': 'LTP', 'symbols': [
+                {'symbol': symbol, 'exchange': exchange} for symbol, exchange in symbols]}))
+            while json.loads(await websocket.recv()).get('type') != 'subscribe':
+                pass
+            ready.put(1)
+            async for message in websocket:
+                counts[index][0] += 1
+                counts[index][1] = time.time()
+
+    async def main():
+        counts = [[0, 0.0] for _ in range(connections)]
+        tasks = [asyncio.create_task(client(counts, i)) for i in range(connections)]
+        await asyncio.to_thread(stop.wait)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        results.put((sum(count for count, _ in counts), max(last for _, last in counts)))
+
+    asyncio.run(main())
+
+
+def setup_user():
+    from database.auth_db import init_db, upsert_api_key, upsert_auth
+
+    init_db()
+    api_key = secrets.token_hex(32)
+    upsert_api_key(USER, api_key)
+    upsert_auth(USER, 'bench-token', 'synthetic')
+    return api_key
+
+
+def run_config(workers, args, api_key, symbols):
+    from websocket_proxy.broker_factory import register_adapter
+    from websocket_proxy.fanout import FanoutCoordinator
+    from websocket_proxy.port_check import find_available_port
+    from test.benchmarks.synthetic_adapter import SyntheticWebSocketAdapter
+
+    register_adapter('synthetic', SyntheticWebSocketAdapter)
+    port = find_available_port(19000 + 100 * workers)
+    coordinator = FanoutCoordinator(host='127.0.0.1', port=port, workers=workers)
+    loop = threading.Thread(target=coordinator.run)
+    loop.start()
+    time.sleep(3.0)  # Workers import the proxy and bind the port
+
+    spawn = multiprocessing.get_context('spawn')
+    ready, results, stop = spawn.Queue(), spawn.Queue(), spawn.Event()
+    per_proc = max(1, args.clients // args.client_procs)
+    clients = [spawn.Process(target=run_clients, args=(port, api_key, per_proc, symbols, ready, stop, results))
+               for _ in range(args.client_procs)]
+    for process in clients:
+        process.start()
+    for _ in range(per_proc * len(clients)):
+        ready.get(timeout=120)
+
+    adapter = coordinator.adapters[USER]
+    assert len(adapter.subscribed) == len(symbols), "broker subscriptions must be shared"
+
+    published = 0
+    start = time.time()
+    while time.time() - start < args.seconds:
+        published += adapter.publish_round()
+        time.sleep(args.interval)
+    publish_seconds = time.time() - start
+    time.sleep(1.0)  # Let queued messages drain
+    stop.set()
+
+    delivered, last = 0, start
+    for _ in clients:
+        count, last_message = results.get(timeout=60)
+        delivered += count
+        last = max(last, last_message)
+    for process in clients:
+        process.join()
+    coordinator.stop()
+    loop.join()
+
+    return {
+        'workers': workers,
+        'published': published,
+        'delivered': delivered,
+        'expected': published * per_proc * len(clients),
+        'rate': delivered / max(publish_seconds, last - start),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--client-procs', type=int, default=4)
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--interval', type=float, default=0.01, help='pause between tick rounds')
+    args = parser.parse_args()
+
+    from test.benchmarks.synthetic_adapter import make_symbols
+
+    api_key = setup_user()
+    symbols = make_symbols(args.symbols)
+    print(f"Clients: {args.clients} in {args.client_procs} processes, symbols: {args.symbols}, "
+          f"cores: {os.cpu_count()}")
+    print(f"{'workers':>8}{'ticks':>10}{'delivered':>12}{'of expected':>13}{'msgs/s':>12}{'scaling':>9}")
+    baseline = None
+    for workers in [int(w) for w in args.workers.split(',')]:
+        result = run_config(workers, args, api_key, symbols)
+        baseline = baseline or result['rate']
+        print(f"{result['workers']:>8}{result['published']:>10}{result['delivered']:>12}"
+              f"{result['delivered'] / max(result['expected'], 1):>12.0%}{result['rate']:>12,.0f}"
+              f"{result['rate'] / baseline:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
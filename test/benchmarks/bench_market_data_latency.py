@@ -0,0 +1,290 @@
+# test/benchmarks/bench_market_data_latency.py
+"""
+Market Data Latency Benchmark
+
+Measures the whole market data path without a broker or network access:
+
+    SyntheticWebSocketAdapter -> ZeroMQ -> WebSocketProxy (zmq_listener, outboxes)
+        -> WebSocket -> simulated clients
+
+* the proxy is the real WebSocketProxy, serving on localhost; the synthetic
+  adapter is created by it exactly like a broker adapter when clients log in
+* --clients connections (spread over --client-procs processes) authenticate with
+  one API key and subscribe to all --instruments in --mode
+* for every rate in --rates the adapter publishes that many ticks/sec, round
+  robin over the instruments, for --seconds after a --warmup period
+
+Each tick carries its send time, so every client message yields one latency
+sample from adapter publish to client receipt (clients parse each message, as
+the SDK does). Reported per rate:
+
+* throughput   - ticks published and client messages delivered per second
+* latency      - p50 / p99 / p99.9 / max in milliseconds
+* cpu          - share of one core used by the adapter thread, the proxy and the
+                 client processes, plus adapter cost per tick (encoding, publishing
+                 and pacing; the pacing share dominates at low rates)
+* memory       - resident memory of the proxy and client processes (psutil when
+                 installed, else peak RSS from the resource module)
+
+The adapter runs in the proxy's process, like real adapters; its CPU is
+measured on its own thread and subtracted from the proxy's share.
+
+--max-p99-ms makes the run exit with status 1 when any rate exceeds that p99,
+and --json writes the results, so the benchmark can gate regressions in CI.
+
+Usage:
+    python test/benchmarks/bench_market_data_latency.py [--rates 1000,5000] [--instruments 200] [--clients 10]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from array import array
+
+BENCH_DIR = tempfile.mkdtemp(prefix='bench_market_data_latency_')
+# auth_db binds its engine to DATABASE_URL at import time
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(BENCH_DIR, 'bench.db')}"
+os.environ['LOGS_DATABASE_URL'] = f"sqlite:///{os.path.join(BENCH_DIR, 'logs.db')}"
+os.environ.setdefault('API_KEY_PEPPER', secrets.token_hex(32))
+# Measure every tick: no per-subscription rate limits, no bus taps
+os.environ['WEBSOCKET_LTP_MAX_RATE'] = '0'
+os.environ['WEBSOCKET_QUOTE_MAX_RATE'] = '0'
+os.environ['WEBSOCKET_DEPTH_MAX_RATE'] = '0'
+os.environ['QUOTE_BOARD_ENABLED'] = 'False'
+os.environ['TICK_RECORDER_ENABLED'] = 'False'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+USER = 'bench_user'
+STAMP_KEY = 'bench_ns'
+
+
+def process_usage():
+    """CPU seconds and resident memory (MB) of the calling process"""
+    if psutil is not None:
+        process = psutil.Process()
+        times = process.cpu_times()
+        return times.user + times.system, process.memory_info().rss / 2 ** 20
+    import resource
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime, usage.ru_maxrss / 1024  # Peak RSS, kilobytes on Linux
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_clients(port, api_key, connections, symbols, mode, ready, commands, results):
+    """Client process: keep connections subscribed and collect latency samples on command"""
+    import websockets
+
+    samples = array('q')
+
+    async def client():
+        async with websockets.connect(f"ws://127.0.0.1:{port}", max_queue=None) as websocket:
+            await websocket.send(json.dumps({'action': 'authenticate', 'api_key': api_key}))
+            await websocket.recv()
+            await websocket.send(json.dumps({'action': 'subscribe', 'mode': mode, 'symbols': [
+                {'symbol': symbol, 'exchange': exchange} for symbol, exchange in symbols]}))
+            while json.loads(await websocket.recv()).get('type') != 'subscribe':
+                pass
+            ready.put(1)
+            async for message in websocket:
+                received = time.time_ns()
+                data = json.loads(message).get('data')
+                if data and STAMP_KEY in data:
+                    samples.append(received - data[STAMP_KEY])
+
+    async def main():
+        tasks = [asyncio.create_task(client()) for _ in range(connections)]
+        cpu, _ = process_usage()
+        while await asyncio.to_thread(commands.get) == 'collect':
+            now_cpu, memory = process_usage()
+            results.put((samples.tobytes(), now_cpu - cpu, memory))
+            del samples[:]
+            cpu = now_cpu
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(main())
+
+
+def setup_user():
+    from database.auth_db import init_db, upsert_api_key, upsert_auth
+
+    init_db()
+    api_key = secrets.token_hex(32)
+    upsert_api_key(USER, api_key)
+    upsert_auth(USER, 'bench-token', 'synthetic')
+    return api_key
+
+
+def start_proxy():
+    """Run a WebSocketProxy on its own event loop thread; the adapter binds ZMQ_PORT on login"""
+    from websocket_proxy.broker_factory import register_adapter
+    from websocket_proxy.base_adapter import find_free_zmq_port
+    from websocket_proxy.port_check import find_available_port
+    from websocket_proxy.server import WebSocketProxy
+    from test.benchmarks.synthetic_adapter import SyntheticWebSocketAdapter
+
+    register_adapter('synthetic', SyntheticWebSocketAdapter)
+    os.environ['ZMQ_PORT'] = str(find_free_zmq_port(start_port=15555))
+    port = find_available_port(18765)
+    proxy = WebSocketProxy(host='127.0.0.1', port=port)
+
+    async def serve():
+        try:
+            await proxy.start()
+        finally:
+            await proxy.stop()
+
+    thread = threading.Thread(target=asyncio.run, args=(serve(),), name="BenchProxy")
+    thread.start()
+    time.sleep(1.0)
+    return proxy, thread, port
+
+
+def collect(command_queues, results):
+    """Ask every client process for its samples since the last collection"""
+    for queue in command_queues:
+        queue.put('collect')
+    samples, cpu, memory = array('q'), 0.0, []
+    for _ in command_queues:
+        data, process_cpu, process_memory = results.get(timeout=120)
+        samples.frombytes(data)
+        cpu += process_cpu
+        memory.append(process_memory)
+    return samples, cpu, memory
+
+
+def run_rate(rate, adapter, args, command_queues, results):
+    """Publish at one rate and measure latency, throughput and resource use"""
+    adapter.stream(rate, args.warmup)
+    time.sleep(args.drain)
+    collect(command_queues, results)  # Discard warmup samples
+
+    process_cpu = process_usage()[0]
+    adapter_cpu = time.thread_time()
+    start = time.perf_counter()
+    published = adapter.stream(rate, args.seconds)
+    publish_seconds = time.perf_counter() - start
+    adapter_cpu = time.thread_time() - adapter_cpu
+    time.sleep(args.drain)
+    wall = time.perf_counter() - start
+    now_cpu, proxy_memory = process_usage()
+    proxy_cpu = now_cpu - process_cpu - adapter_cpu
+
+    samples, clients_cpu, clients_memory = collect(command_queues, results)
+    latencies = sorted(samples)
+    expected = published * args.clients
+    return {
+        'rate': rate,
+        'published': published,
+        'published_per_sec': published / publish_seconds,
+        'delivered': len(latencies),
+        'delivered_share': len(latencies) / max(expected, 1),
+        'delivered_per_sec': len(latencies) / publish_seconds,
+        'p50_ms': percentile(latencies, 0.50) / 1e6,
+        'p99_ms': percentile(latencies, 0.99) / 1e6,
+        'p999_ms': percentile(latencies, 0.999) / 1e6,
+        'max_ms': (latencies[-1] if latencies else 0) / 1e6,
+        'adapter_cpu': adapter_cpu / wall,
+        'adapter_us_per_tick': adapter_cpu / max(published, 1) * 1e6,
+        'proxy_cpu': proxy_cpu / wall,
+        'clients_cpu': clients_cpu / wall,
+        'proxy_mb': proxy_memory,
+        'clients_mb': clients_memory,
+    }
+
+
+def report(result, args):
+    print(f"\n{result['rate']:,} ticks/s target: published {result['published']:,} "
+          f"({result['published_per_sec']:,.0f}/s), delivered {result['delivered']:,} "
+          f"({result['delivered_share']:.1%}) = {result['delivered_per_sec']:,.0f} msgs/s")
+    print(f"  latency ms   p50 {result['p50_ms']:.2f}   p99 {result['p99_ms']:.2f}   "
+          f"p99.9 {result['p999_ms']:.2f}   max {result['max_ms']:.2f}")
+    print(f"  cpu          adapter {result['adapter_cpu']:.0%} ({result['adapter_us_per_tick']:.1f} us/tick)   "
+          f"proxy {result['proxy_cpu']:.0%}   clients {result['clients_cpu']:.0%} ({args.client_procs} procs)")
+    print(f"  memory MB    proxy {result['proxy_mb']:.0f}   clients "
+          + " + ".join(f"{memory:.0f}" for memory in result['clients_mb']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rates', default='1000,5000', help='comma separated ticks/sec to publish')
+    parser.add_argument('--instruments', type=int, default=200)
+    parser.add_argument('--clients', type=int, default=10)
+    parser.add_argument('--client-procs', type=int, default=2)
+    parser.add_argument('--mode', default='LTP', choices=['LTP', 'QUOTE', 'DEPTH'])
+    parser.add_argument('--seconds', type=float, default=5.0, help='measured publishing time per rate')
+    parser.add_argument('--warmup', type=float, default=1.0, help='unmeasured publishing time per rate')
+    parser.add_argument('--drain', type=float, default=1.0, help='wait for in-flight messages after publishing')
+    parser.add_argument('--max-p99-ms', type=float, help='exit with status 1 if any p99 exceeds this')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    from test.benchmarks.synthetic_adapter import make_symbols
+
+    api_key = setup_user()
+    symbols = make_symbols(args.instruments)
+    proxy, proxy_thread, port = start_proxy()
+
+    spawn = multiprocessing.get_context('spawn')
+    ready, results = spawn.Queue(), spawn.Queue()
+    per_proc = max(1, args.clients // args.client_procs)
+    args.clients = per_proc * args.client_procs
+    command_queues = [spawn.Queue() for _ in range(args.client_procs)]
+    clients = [spawn.Process(target=run_clients,
+                             args=(port, api_key, per_proc, symbols, args.mode, ready, queue, results))
+               for queue in command_queues]
+    for process in clients:
+        process.start()
+
+    print(f"Instruments: {args.instruments}, mode: {args.mode}, clients: {args.clients} in "
+          f"{args.client_procs} processes, cores: {os.cpu_count()}")
+    all_results = []
+    try:
+        for _ in range(args.clients):
+            ready.get(timeout=120)
+        adapter = proxy.broker_adapters[USER]
+        for rate in [int(rate) for rate in args.rates.split(',')]:
+            result = run_rate(rate, adapter, args, command_queues, results)
+            report(result, args)
+            all_results.append(result)
+    finally:
+        for queue in command_queues:
+            queue.put('stop')
+        for process in clients:
+            process.join(timeout=30)
+        proxy.running = False
+        proxy_thread.join(timeout=30)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'instruments': args.instruments, 'mode': args.mode, 'clients': args.clients,
+                       'results': all_results}, f, indent=2)
+    if args.max_p99_ms is not None:
+        slow = [result['rate'] for result in all_results if result['p99_ms'] > args.max_p99_ms]
+        if slow:
+            print(f"\nFAIL: p99 above {args.max_p99_ms} ms at {', '.join(map(str, slow))} ticks/s")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# test/benchmarks/bench_master_contract.py
+"""
+Master Contract Benchmark
+
+Measures the morning master contract build on synthetic instrument dumps shaped
+like the broker files:
+
+1. Transform  - Zerodha (Kite instruments CSV) and Shoonya (NSE/NFO/CDS/MCX/BFO
+                symbol files) through their process_* functions, with the legacy
+                row-wise Zerodha transform as a baseline
+2. Load       - ORM bulk_insert_mappings against copy_symtokens into SQLite
+
+Usage:
+    python test/benchmarks/bench_master_contract.py [--rows 100000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BENCH_DIR = tempfile.mkdtemp(prefix='bench_master_contract_')
+# Broker modules bind their engine to DATABASE_URL at import time
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(BENCH_DIR, 'bench.db')}"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pandas as pd
+
+from broker.shoonya.database import master_contract_db as shoonya
+from broker.zerodha.database import master_contract_db as zerodha
+from database.master_contract_utils import copy_symtokens
+
+UNDERLYINGS = ['NIFTY', 'BANKNIFTY', 'FINNIFTY', 'RELIANCE', 'SBIN', 'INFY', 'TCS', 'HDFCBANK']
+
+
+def expiries(count):
+    start = date(2025, 1, 30)
+    return [start + timedelta(days=7 * i) for i in range(count)]
+
+
+def make_zerodha_csv(path, rows):
+    """Kite instruments dump: mostly options, some futures, equities and indices"""
+    records = []
+    token = 100000
+    for i in range(rows):
+        token += 1
+        underlying = UNDERLYINGS[i % len(UNDERLYINGS)]
+        expiry = expiries(12)[i % 12]
+        kind = i % 20
+        if kind == 0:
+            records.append((token, token // 256, f"{underlying}{i}", underlying, '', 0, 1, 'EQ', 'NSE', 'NSE', 0.05))
+        elif kind == 1:
+            records.append((token, token // 256, f"{underlying}{expiry:%y%b}FUT".upper(), underlying,
+                            expiry.isoformat(), 0, 50, 'FUT', 'NFO-FUT', 'NFO', 0.05))
+        else:
+            strike = 10000 + (i % 400) * 50
+            option = 'CE' if i % 2 else 'PE'
+            records.append((token, token // 256, f"{underlying}{expiry:%y%b}{strike}{option}".upper(), underlying,
+                            expiry.isoformat(), strike, 50, option, 'NFO-OPT', 'NFO', 0.05))
+    records.append((256265, 1001, 'NIFTY 50', 'NIFTY 50', '', 0, 0, 'EQ', 'INDICES', 'NSE', 0))
+    pd.DataFrame(records, columns=[
+        'instrument_token', 'exchange_token', 'tradingsymbol', 'name', 'expiry', 'strike',
+        'lot_size', 'instrument_type', 'segment', 'exchange', 'tick_size'
+    ]).to_csv(path, index=False)
+
+
+def make_shoonya_files(directory, rows):
+    """Shoonya symbol files, NFO carrying most of the rows"""
+    nse = pd.DataFrame({
+        'Exchange': 'NSE', 'Token': range(1, 2001), 'LotSize': 1,
+        'Symbol': [f"SYM{i}" for i in range(2000)],
+        'TradingSymbol': [f"SYM{i}-{'EQ' if i % 5 else 'BE'}" for i in range(2000)],
+        'Instrument': ['EQ' if i % 5 else 'BE' for i in range(2000)], 'TickSize': 0.05,
+    })
+    nse.to_csv(os.path.join(directory, 'NSE_symbols.txt'), index=False)
+    nse.assign(Exchange='BSE').to_csv(os.path.join(directory, 'BSE_symbols.txt'), index=False)
+
+    def derivatives(count, exchange, first_token, option_instrument, future_instrument, strike_step):
+        data = []
+        for i in range(count):
+            underlying = UNDERLYINGS[i % len(UNDERLYINGS)]
+            expiry = expiries(12)[i % 12].strftime('%d-%b-%Y').upper()
+            if i % 20 == 0:
+                data.append((exchange, first_token + i, 50, 0, underlying, f"{underlying}{i}F", expiry,
+                             future_instrument, 'XX', None, 0.05))
+            else:
+                strike = 100 + (i % 400) * strike_step
+                option = 'CE' if i % 2 else 'PE'
+                data.append((exchange, first_token + i, 50, 0, underlying, f"{underlying}{i}{option}", expiry,
+                             option_instrument, option, strike, 0.05))
+        return pd.DataFrame(data, columns=[
+            'Exchange', 'Token', 'LotSize', 'Extra', 'Symbol', 'TradingSymbol', 'Expiry',
+            'Instrument', 'OptionType', 'StrikePrice', 'TickSize'
+        ])
+
+    nfo = derivatives(rows, 'NFO', 35000, 'OPTIDX', 'FUTIDX', 50).drop(columns=['Extra'])
+    nfo.to_csv(os.path.join(directory, 'NFO_symbols.txt'), index=False)
+    nfo.assign(Exchange='BFO').to_csv(os.path.join(directory, 'BFO_symbols.txt'), index=False)
+
+    cds = derivatives(max(1000, rows // 20), 'CDS', 1000, 'OPTCUR', 'FUTCUR', 0.25)
+    cds = cds.rename(columns={'Extra': 'Precision'})
+    cds.insert(4, 'Multiplier', 1)
+    cds.to_csv(os.path.join(directory, 'CDS_symbols.txt'), index=False)
+
+    mcx = derivatives(max(1000, rows // 10), 'MCX', 200000, 'OPTFUT', 'FUTCOM', 100)
+    mcx.rename(columns={'Extra': 'GNGD'}).to_csv(os.path.join(directory, 'MCX_symbols.txt'), index=False)
+
+
+def legacy_zerodha_transform(path):
+    """The pre-vectorization Zerodha symbol construction (row-wise apply)"""
+    df = pd.read_csv(path)
+    df['expiry'] = pd.to_datetime(df['expiry']).dt.strftime('%d-%b-%y').str.upper()
+    df = df.rename(columns={'tradingsymbol': 'symbol', 'instrument_type': 'instrumenttype'})
+
+    def reformat_symbol(row):
+        parts = row['symbol'].split(' ')
+        if row['instrumenttype'] == 'FUT' and len(parts) == 5:
+            return parts[0] + parts[2] + parts[3] + parts[4] + parts[1]
+        if row['instrumenttype'] in ['CE', 'PE'] and len(parts) == 6:
+            return parts[0] + parts[3] + parts[4] + parts[5] + parts[1] + parts[2]
+        return row['symbol']
+
+    df['symbol'] = df.apply(reformat_symbol, axis=1)
+    df['expiry'] = df['expiry'].fillna('')
+    compact = df['expiry'].str.replace('-', '', regex=False)
+    strike = df['strike'].apply(lambda value: str(int(float(value))))
+    df.loc[df['instrumenttype'] == 'FUT', 'symbol'] = df['name'] + compact + 'FUT'
+    for option in ('CE', 'PE'):
+        df.loc[df['instrumenttype'] == option, 'symbol'] = df['name'] + compact + strike + df['instrumenttype']
+    return df
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    rows = len(result) if hasattr(result, '__len__') else 0
+    print(f"  {label:<34} {elapsed * 1000:>10.1f} ms   {rows:>9,} rows")
+    return result
+
+
+def run_transform_benchmark(rows):
+    print("\n1. TRANSFORM")
+    print("-" * 70)
+    zerodha_csv = os.path.join(BENCH_DIR, 'zerodha.csv')
+    make_zerodha_csv(zerodha_csv, rows)
+    make_shoonya_files(BENCH_DIR, rows)
+
+    timed("zerodha legacy (row-wise apply)", legacy_zerodha_transform, zerodha_csv)
+    zerodha_df = timed("zerodha process_zerodha_csv", zerodha.process_zerodha_csv, zerodha_csv)
+
+    shoonya_frames = []
+    for exchange in ('nse', 'bse', 'nfo', 'cds', 'mcx', 'bfo'):
+        process = getattr(shoonya, f'process_shoonya_{exchange}_data')
+        shoonya_frames.append(timed(f"shoonya {exchange.upper()}", process, BENCH_DIR))
+    return zerodha_df, pd.concat(shoonya_frames, ignore_index=True)
+
+
+def legacy_copy(module, df):
+    """The pre-change copy_from_dataframe body: to_dict + ORM bulk_insert_mappings"""
+    records = df.to_dict(orient='records')
+    existing = {result.token for result in module.db_session.query(module.SymToken.token).all()}
+    records = [row for row in records if row['token'] not in existing]
+    module.db_session.bulk_insert_mappings(module.SymToken, records)
+    module.db_session.commit()
+    return records
+
+
+def run_load_benchmark(label, module, df, key_columns=('token',)):
+    print(f"\n2. LOAD ({label}, {len(df):,} rows)")
+    print("-" * 70)
+    module.init_db()
+
+    module.delete_symtoken_table()
+    timed("bulk_insert_mappings (legacy)", legacy_copy, module, df)
+
+    module.delete_symtoken_table()
+    start = time.perf_counter()
+    inserted = copy_symtokens(module.db_session, module.SymToken, df, key_columns=key_columns)
+    elapsed = time.perf_counter() - start
+    print(f"  {'copy_symtokens':<34} {elapsed * 1000:>10.1f} ms   {inserted:>9,} rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Master contract transform and load benchmark")
+    parser.add_argument('--rows', type=int, default=100000, help="Instruments per large dump")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"MASTER CONTRACT BENCHMARK ({args.rows:,} rows, data in {BENCH_DIR})")
+    print("=" * 70)
+
+    zerodha_df, shoonya_df = run_transform_benchmark(args.rows)
+    # Both modules share the symtoken table, only one broker is active at a time
+    run_load_benchmark("zerodha", zerodha, zerodha_df)
+    run_load_benchmark("shoonya", shoonya, shoonya_df, key_columns=('token', 'exchange'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# test/benchmarks/bench_sandbox_state.py
+"""
+Sandbox State Benchmark
+
+Compares the database work of the sandbox hot paths against the in-memory
+state store, on a SQLite sandbox DB holding --history orders of past sessions:
+
+1. Place      - the previous path: position lookup, order insert and commit;
+                now a dict lookup and a queued order
+2. Orderbook  - the previous path: query the session's orders of the user;
+                now a sort of the user's in-memory orders
+3. Positions  - the previous path: query the user's positions;
+                now a copy of the user's in-memory positions
+4. Flush      - write-behind throughput of the queued orders
+
+Usage:
+    python test/benchmarks/bench_sandbox_state.py [--orders 2000] [--history 20000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+BENCH_DIR = tempfile.mkdtemp(prefix='bench_sandbox_state_')
+# sandbox_db binds its engine to SANDBOX_DATABASE_URL at import time
+os.environ['SANDBOX_DATABASE_URL'] = f"sqlite:///{os.path.join(BENCH_DIR, 'sandbox.db')}"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from database.sandbox_db import SandboxOrders, SandboxPositions, db_session, init_db
+from sandbox.state_store import SandboxStateStore, OrderState, ist_now, session_start
+
+USER = 'bench_user'
+SYMBOLS = ['SBIN', 'INFY', 'TCS', 'RELIANCE', 'HDFCBANK']
+
+
+def order_values(i, user_id=USER, **kwargs):
+    values = dict(orderid=f"B{i:08d}", user_id=user_id, symbol=SYMBOLS[i % len(SYMBOLS)], exchange='NSE',
+                  action='BUY', quantity=1, price_type='LIMIT', product='MIS', price=Decimal('100.00'),
+                  pending_quantity=1, margin_blocked=Decimal('20.00'))
+    values.update(kwargs)
+    return values
+
+
+def seed_history(history):
+    """Completed orders of past sessions, spread over 100 users"""
+    old = session_start() - timedelta(days=1)
+    rows = [order_values(i, user_id=f"user{i % 100}", order_status='complete', order_timestamp=old,
+                         update_timestamp=old) for i in range(history)]
+    rows.extend(order_values(history + i, order_status='complete', order_timestamp=old, update_timestamp=old)
+                for i in range(history // 100))
+    db_session.bulk_insert_mappings(SandboxOrders, rows)
+    db_session.commit()
+    db_session.remove()
+
+
+def db_place(i):
+    """The previous place_order database work"""
+    values = order_values(i)
+    SandboxPositions.query.filter_by(user_id=USER, symbol=values['symbol'], exchange='NSE', product='MIS').first()
+    db_session.add(SandboxOrders(order_timestamp=ist_now(), **values))
+    db_session.commit()
+
+
+def db_orderbook():
+    orders = SandboxOrders.query.filter(
+        SandboxOrders.user_id == USER,
+        SandboxOrders.order_timestamp >= session_start()
+    ).order_by(SandboxOrders.order_timestamp.desc()).all()
+    db_session.remove()
+    return orders
+
+
+def db_positions():
+    positions = SandboxPositions.query.filter(SandboxPositions.user_id == USER).all()
+    db_session.remove()
+    return positions
+
+
+def store_place(store, state, i):
+    values = order_values(i)
+    with state.lock:
+        state.positions.get((values['symbol'], 'NSE', 'MIS'))
+        store.add_order(OrderState(**values))
+
+
+def store_orderbook(store, state):
+    since = session_start()
+    with state.lock:
+        store.prune(state, since)
+        return sorted((order for order in state.orders.values() if order.order_timestamp >= since),
+                      key=lambda order: order.order_timestamp, reverse=True)
+
+
+def store_positions(state):
+    with state.lock:
+        return list(state.positions.values())
+
+
+def timed(func, *args, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args)
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--history', type=int, default=20000)
+    parser.add_argument('--reads', type=int, default=200)
+    args = parser.parse_args()
+
+    init_db()
+    seed_history(args.history)
+
+    # Previous path, on its own range of order ids
+    offset = 10 * (args.history + args.orders)
+    _, db_place_seconds = timed(lambda: [db_place(offset + i) for i in range(args.orders)])
+    db_session.remove()
+    db_book, db_book_seconds = timed(db_orderbook, repeat=args.reads)
+    _, db_positions_seconds = timed(db_positions, repeat=args.reads)
+
+    # State store: it loads the orders placed above, drop them so both orderbooks hold --orders
+    store = SandboxStateStore(flush_interval=3600)
+    _, load_seconds = timed(store.load)
+    state = store.user(USER)
+    state.orders.clear()
+    _, store_place_seconds = timed(lambda: [store_place(store, state, 2 * offset + i) for i in range(args.orders)])
+    store_book, store_book_seconds = timed(store_orderbook, store, state, repeat=args.reads)
+    _, store_positions_seconds = timed(store_positions, state, repeat=args.reads)
+    queued = store.pending()
+    written, flush_seconds = timed(store.flush)
+    assert len(db_book) == len(store_book) == args.orders and written == queued
+
+    print(f"Past orders: {args.history + args.history // 100}, session orders: {args.orders}, "
+          f"store load: {load_seconds * 1000:.0f}ms")
+    print(f"{'operation':<24}{'database':>14}{'state store':>14}")
+    print(f"{'place (per order)':<24}{db_place_seconds / args.orders * 1e6:>12.0f}us"
+          f"{store_place_seconds / args.orders * 1e6:>12.1f}us")
+    print(f"{'orderbook':<24}{db_book_seconds * 1000:>12.2f}ms{store_book_seconds * 1000:>12.2f}ms")
+    print(f"{'positionbook':<24}{db_positions_seconds * 1000:>12.2f}ms{store_positions_seconds * 1000:>12.3f}ms")
+    print(f"flush: {written} rows in {flush_seconds * 1000:.0f}ms ({written / flush_seconds:,.0f} rows/s)")
+    store.stop()
+
+
+if __name__ == "__main__":
+    main()
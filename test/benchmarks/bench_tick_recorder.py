@@ -0,0 +1,110 @@
+# test/benchmarks/bench_tick_recorder.py
+"""
+Tick Recorder Benchmark
+
+Records synthetic LTP/Quote/Depth ticks, as compact frames, and measures:
+
+1. Record     - cost of TickRecorder.record on the listener's hot path
+2. Write      - background write throughput and bytes per tick on disk
+3. Read       - TickFile.read throughput
+4. Replay     - ReplayWebSocketAdapter at max speed, received over ZeroMQ
+
+At max speed the replay can outrun the subscriber; ticks beyond the adapter's
+send high water mark are dropped by ZeroMQ, as they would be for a live broker,
+and reported as the delivered share.
+
+Usage:
+    python test/benchmarks/bench_tick_recorder.py [--ticks 200000] [--instruments 500]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from websocket_proxy.tick_codec import TICK_FORMAT_COMPACT, encode_tick
+from websocket_proxy.tick_recorder import TickFile, TickRecorder, tick_file_path, trading_day
+from test.benchmarks.synthetic_adapter import MODE_NAMES, make_symbols, make_tick
+
+
+def make_frames(count, instruments):
+    symbols = make_symbols(instruments)
+    frames = []
+    for i in range(count):
+        symbol, exchange = symbols[i % len(symbols)]
+        mode = 1 + i % 3
+        frames.append((f"{exchange}_{symbol}_{MODE_NAMES[mode]}".encode(),
+                       encode_tick(make_tick(symbol, exchange, mode), TICK_FORMAT_COMPACT)))
+    return frames
+
+
+def bench_replay(path, frames, instruments):
+    import zmq
+    from websocket_proxy.replay_adapter import ReplayWebSocketAdapter
+
+    adapter = ReplayWebSocketAdapter()
+    adapter.initialize('replay', 'bench', {'file': path, 'speed': 'max'})
+    subscriber = zmq.Context.instance().socket(zmq.SUB)
+    subscriber.setsockopt(zmq.RCVHWM, 0)
+    subscriber.setsockopt(zmq.SUBSCRIBE, b'')
+    subscriber.connect(f"tcp://127.0.0.1:{adapter.zmq_port}")
+    time.sleep(0.3)
+    # Subscribe everything first: playback starts with connect and the first subscription
+    for symbol, exchange in make_symbols(instruments):
+        for mode in MODE_NAMES:
+            adapter.subscribe(symbol, exchange, mode)
+
+    start = time.perf_counter()
+    adapter.connect()
+    received = 0
+    while received < len(frames):
+        if not subscriber.poll(2000):
+            break
+        subscriber.recv_multipart()
+        received += 1
+    elapsed = time.perf_counter() - start
+    subscriber.close(linger=0)
+    adapter.disconnect()
+    return received, adapter.published, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ticks', type=int, default=200000)
+    parser.add_argument('--instruments', type=int, default=500)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='bench_tick_recorder_')
+    frames = make_frames(args.ticks, args.instruments)
+    frame_bytes = sum(len(topic) + len(payload) for topic, payload in frames)
+
+    recorder = TickRecorder(directory, flush_interval=0.25)
+    start = time.perf_counter()
+    for topic, payload in frames:
+        recorder.record(topic, payload)
+    record_seconds = time.perf_counter() - start
+    recorder.flush(timeout=120)
+    write_seconds = time.perf_counter() - start
+    recorder.stop()
+
+    path = tick_file_path(directory, trading_day(time.time_ns()))
+    size = os.path.getsize(path)
+    start = time.perf_counter()
+    read = sum(1 for _ in TickFile(path).read())
+    read_seconds = time.perf_counter() - start
+
+    replayed, published, replay_seconds = bench_replay(path, frames, args.instruments)
+
+    print(f"Ticks: {args.ticks}, instruments: {args.instruments}, frames: {frame_bytes / args.ticks:.0f} bytes/tick")
+    print(f"record (hot path)   {record_seconds / args.ticks * 1e9:>10.0f} ns/tick")
+    print(f"record + write      {args.ticks / write_seconds:>10,.0f} ticks/s, "
+          f"{size / args.ticks:.1f} bytes/tick on disk ({frame_bytes / size:.1f}x smaller)")
+    print(f"read                {read / read_seconds:>10,.0f} ticks/s")
+    print(f"replay (max speed)  {replayed / replay_seconds:>10,.0f} ticks/s ({replayed / published:.1%} delivered)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# test/benchmarks/bench_tick_wire_format.py
+"""
+Tick Wire Format Benchmark
+
+Compares the legacy JSON tick path with the compact tick frame on the ZeroMQ hop
+between broker adapters and the WebSocket proxy.
+
+Two measurements are reported:
+1. Codec only   - encode + decode throughput without any sockets
+2. End to end   - SyntheticWebSocketAdapter publishing over ZeroMQ to a SUB socket
+                  that parses topics and payloads the way zmq_listener does
+
+Usage:
+    python test/benchmarks/bench_tick_wire_format.py [--ticks 200000] [--instruments 2000]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from websocket_proxy.tick_codec import (
+    TICK_FORMAT_COMPACT, TICK_FORMAT_JSON, TopicTable, decode_tick, encode_tick
+)
+from test.benchmarks.synthetic_adapter import MODE_NAMES, make_symbols, make_tick
+
+STOP_TOPIC = b"BENCH_STOP"
+
+
+def legacy_parse(topic, payload):
+    """The pre-codec zmq_listener path: decode, split the topic and json.loads every tick"""
+    parts = topic.decode('utf-8').split('_')
+    return parts, json.loads(payload.decode('utf-8'))
+
+
+def bench_codec(ticks, label, encode, decode):
+    """Time encode and decode over a list of (topic, tick) pairs"""
+    start = time.perf_counter()
+    frames = [(topic, encode(tick)) for topic, tick in ticks]
+    encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for topic, payload in frames:
+        decode(topic, payload)
+    decode_time = time.perf_counter() - start
+
+    avg_size = sum(len(payload) for _, payload in frames) / len(frames)
+    print(f"  {label:<22} encode {len(frames) / encode_time:>12,.0f}/s   "
+          f"decode {len(frames) / decode_time:>12,.0f}/s   avg {avg_size:>6.0f} bytes")
+
+
+def run_codec_benchmark(ticks):
+    print("\n1. CODEC ONLY")
+    print("-" * 70)
+    bench_codec(ticks, "json (legacy)",
+                lambda tick: json.dumps(tick).encode('utf-8'), legacy_parse)
+
+    table = TopicTable()
+    bench_codec(ticks, "json (codec)",
+                lambda tick: encode_tick(tick, TICK_FORMAT_JSON),
+                lambda topic, payload: (table.parse(topic), decode_tick(payload)))
+
+    table = TopicTable()
+    bench_codec(ticks, "compact",
+                lambda tick: encode_tick(tick, TICK_FORMAT_COMPACT),
+                lambda topic, payload: (table.parse(topic), decode_tick(payload)))
+
+
+def run_zmq_benchmark(instruments, rounds, tick_format, legacy=False):
+    """Publish rounds of ticks through a synthetic adapter and consume them over ZeroMQ"""
+    import zmq
+    from test.benchmarks.synthetic_adapter import SyntheticWebSocketAdapter
+
+    adapter = SyntheticWebSocketAdapter()
+    adapter.socket.setsockopt(zmq.SNDHWM, 0)  # Measure throughput, not drops
+    adapter.initialize("synthetic", "bench")
+    adapter.connect()
+    adapter.negotiate_tick_format([tick_format])
+    if legacy:
+        # Reproduce the original publish path exactly
+        adapter.publish_market_data = lambda topic, data: adapter.socket.send_multipart(
+            [topic.encode('utf-8'), json.dumps(data).encode('utf-8')])
+
+    for symbol, exchange in instruments:
+        adapter.subscribe(symbol, exchange, mode=2)
+
+    context = zmq.Context.instance()
+    sub = context.socket(zmq.SUB)
+    sub.setsockopt(zmq.RCVHWM, 0)
+    sub.setsockopt(zmq.SUBSCRIBE, b"")
+    sub.connect(f"tcp://127.0.0.1:{adapter.zmq_port}")
+    time.sleep(0.5)  # Let the subscription propagate (slow joiner)
+
+    received = 0
+    table = TopicTable()
+
+    def consume():
+        nonlocal received
+        while True:
+            topic, payload = sub.recv_multipart()
+            if topic == STOP_TOPIC:
+                break
+            if legacy:
+                legacy_parse(topic, payload)
+            else:
+                table.parse(topic)
+                decode_tick(payload)
+            received += 1
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+
+    start = time.perf_counter()
+    sent = 0
+    for _ in range(rounds):
+        sent += adapter.publish_round()
+    adapter.socket.send_multipart([STOP_TOPIC, b""])
+    consumer.join()
+    elapsed = time.perf_counter() - start
+
+    sub.close(linger=0)
+    adapter.disconnect()
+
+    label = "json (legacy)" if legacy else tick_format
+    print(f"  {label:<22} {received:>9,} of {sent:,} ticks in {elapsed:6.2f}s "
+          f"= {received / elapsed:>10,.0f} ticks/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tick wire format benchmark")
+    parser.add_argument("--ticks", type=int, default=200000, help="Ticks per measurement")
+    parser.add_argument("--instruments", type=int, default=2000, help="Subscribed instruments")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("TICK WIRE FORMAT BENCHMARK")
+    print("=" * 70)
+    print(f"Instruments: {args.instruments:,}   Ticks: {args.ticks:,}")
+
+    instruments = make_symbols(args.instruments)
+    ticks = []
+    for i in range(args.ticks):
+        symbol, exchange = instruments[i % len(instruments)]
+        mode = (1, 2, 2, 3)[i % 4]
+        ticks.append((f"{exchange}_{symbol}_{MODE_NAMES[mode]}".encode('utf-8'),
+                      make_tick(symbol, exchange, mode)))
+
+    run_codec_benchmark(ticks)
+
+    if importlib.util.find_spec('zmq') is None:
+        print("\n[SKIP] pyzmq not installed - end to end benchmark skipped")
+        return
+
+    print("\n2. END TO END (synthetic adapter -> ZeroMQ -> consumer)")
+    print("-" * 70)
+    rounds = max(1, args.ticks // len(instruments))
+    run_zmq_benchmark(instruments, rounds, TICK_FORMAT_JSON, legacy=True)
+    run_zmq_benchmark(instruments, rounds, TICK_FORMAT_JSON)
+    run_zmq_benchmark(instruments, rounds, TICK_FORMAT_COMPACT)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# test/benchmarks/synthetic_adapter.py
+"""
+Synthetic broker adapter for offline benchmarks.
+
+Implements the BaseBrokerWebSocketAdapter interface without talking to a broker:
+subscriptions are accepted immediately and ticks are generated locally with
+realistic LTP/Quote/Depth payloads, then published on the ZeroMQ bus exactly as
+a real adapter would.
+"""
+
+import random
+import time
+
+from websocket_proxy.base_adapter import BaseBrokerWebSocketAdapter
+
+MODE_NAMES = {1: 'LTP', 2: 'QUOTE', 3: 'DEPTH'}
+
+
+def make_symbols(count, exchange='NFO'):
+    """Build a list of (symbol, exchange) pairs that look like option contracts"""
+    symbols = []
+    for i in range(count):
+        strike = 20000 + (i // 2) * 50
+        option_type = 'CE' if i % 2 == 0 else 'PE'
+        symbols.append((f"NIFTY28NOV24{strike}{option_type}", exchange))
+    return symbols
+
+
+def make_tick(symbol, exchange, mode, ltp=None):
+    """Build a normalised tick dictionary in the shape broker adapters publish"""
+    now_ms = int(time.time() * 1000)
+    ltp = ltp if ltp is not None else round(random.uniform(50, 500), 2)
+    tick = {
+        'symbol': symbol,
+        'exchange': exchange,
+        'mode': MODE_NAMES[mode].lower(),
+        'ltp': ltp,
+        'ltt': now_ms,
+        'timestamp': now_ms,
+    }
+    if mode >= 2:
+        tick.update({
+            'volume': random.randint(1000, 5000000),
+            'last_quantity': random.randint(1, 1800),
+            'average_price': round(ltp * 0.998, 2),
+            'total_buy_quantity': random.randint(1000, 900000),
+            'total_sell_quantity': random.randint(1000, 900000),
+            'open': round(ltp * 0.99, 2),
+            'high': round(ltp * 1.02, 2),
+            'low': round(ltp * 0.97, 2),
+            'close': round(ltp * 1.01, 2),
+            'oi': random.randint(10000, 9000000),
+        })
+    if mode == 3:
+        tick['depth'] = {
+            'buy': [{'price': round(ltp - 0.05 * (i + 1), 2), 'quantity': 75 * (i + 1), 'orders': i + 1}
+                    for i in range(5)],
+            'sell': [{'price': round(ltp + 0.05 * (i + 1), 2), 'quantity': 75 * (i + 1), 'orders': i + 1}
+                     for i in range(5)],
+        }
+    return tick
+
+
+class SyntheticWebSocketAdapter(BaseBrokerWebSocketAdapter):
+    """Broker adapter that generates ticks locally instead of connecting to a broker"""
+
+    def __init__(self):
+        super().__init__()
+        self.broker_name = "synthetic"
+        self.user_id = None
+        self.subscribed = {}  # {(symbol, exchange, mode): topic}
+
+    def initialize(self, broker_name, user_id, auth_data=None):
+        self.user_id = user_id
+        return self._create_success_response("Synthetic adapter initialized")
+
+    def connect(self):
+        self.connected = True
+        return self._create_success_response("Synthetic adapter connected")
+
+    def disconnect(self):
+        self.connected = False
+        self.subscribed.clear()
+        self.cleanup_zmq()
+        return self._create_success_response("Synthetic adapter disconnected")
+
+    def subscribe(self, symbol, exchange, mode=2, depth_level=5):
+        self.subscribed[(symbol, exchange, mode)] = f"{exchange}_{symbol}_{MODE_NAMES[mode]}"
+        return self._create_success_response(f"Subscribed to {symbol}", actual_depth=depth_level)
+
+    def unsubscribe(self, symbol, exchange, mode=2):
+        self.subscribed.pop((symbol, exchange, mode), None)
+        return self._create_success_response(f"Unsubscribed from {symbol}")
+
+    def publish_round(self):
+        """Publish one tick for every subscription; returns the number of ticks sent"""
+        for (symbol, exchange, mode), topic in list(self.subscribed.items()):
+            self.publish_market_data(topic, make_tick(symbol, exchange, mode))
+        return len(self.subscribed)
+
+    def stream(self, rate, seconds, stamp_key='bench_ns'):
+        """
+        Publish ticks round-robin over the subscriptions at a steady rate
+
+        Each tick carries its send time (time.time_ns) under stamp_key, so a
+        consumer can measure the latency from this adapter to itself.
+
+        Args:
+            rate: Ticks per second across all subscriptions
+            seconds: How long to publish for
+
+        Returns:
+            int: Number of ticks published
+        """
+        subscriptions = [(topic, make_tick(symbol, exchange, mode))
+                         for (symbol, exchange, mode), topic in list(self.subscribed.items())]
+        if not subscriptions:
+            return 0
+        sent = 0
+        start = time.perf_counter()
+        while True:
+            elapsed = time.perf_counter() - start
+            if elapsed >= seconds:
+                break
+            # Catch up to the schedule, then yield until the next tick is due
+            due = int(elapsed * rate)
+            while sent < due:
+                topic, template = subscriptions[sent % len(subscriptions)]
+                tick = dict(template)
+                tick['ltp'] = round(template['ltp'] + random.uniform(-1, 1), 2)
+                tick['ltt'] = tick['timestamp'] = int(time.time() * 1000)
+                tick[stamp_key] = time.time_ns()
+                self.publish_market_data(topic, tick)
+                sent += 1
+            time.sleep(min(0.001, max(0.0, (sent + 1) / rate - elapsed)))
+        return sent
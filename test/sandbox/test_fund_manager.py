@@ -19,6 +19,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 
 from sandbox.fund_manager import FundManager, get_user_funds, initialize_user_funds
 from database.sandbox_db import SandboxFunds, db_session
+from sandbox.state_store import get_state_store
 
 
 def test_fund_initialization():
@@ -209,8 +210,12 @@ def test_unrealized_pnl():
 def cleanup_test_data(user_id):
     """Clean up test data for a user"""
     try:
+        # Funds live in the state store, write pending changes before deleting the row
+        store = get_state_store()
+        store.flush()
         SandboxFunds.query.filter_by(user_id=user_id).delete()
         db_session.commit()
+        store.user(user_id).funds = None
     except:
         db_session.rollback()
 
@@ -0,0 +1,85 @@
+"""
+Sandbox Quote Provider Tests
+Checks that sandbox quotes are batched into multiquotes calls and reused within the cache window
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import sandbox modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import sandbox.quote_provider as quote_provider
+from sandbox.quote_provider import QuoteProvider
+
+calls = []
+
+
+def fake_get_multiquotes(symbols, api_key=None, **kwargs):
+    calls.append([item['symbol'] for item in symbols])
+    results = []
+    for item in symbols:
+        if item['symbol'] == 'MISSING':
+            results.append({'symbol': item['symbol'], 'exchange': item['exchange'], 'error': 'No quote data available'})
+        else:
+            results.append({'symbol': item['symbol'], 'exchange': item['exchange'], 'data': {'ltp': 100.0}})
+    return True, {'status': 'success', 'results': results}, 200
+
+
+def make_provider():
+    calls.clear()
+    quote_provider.get_multiquotes = fake_get_multiquotes
+    provider = QuoteProvider()
+    provider._get_api_key = lambda: 'test-key'
+    return provider
+
+
+def test_positions_book_is_one_round_trip():
+    provider = make_provider()
+    instruments = [(f'SYM{i}', 'NSE') for i in range(100)]
+
+    quotes = provider.get_quotes(instruments, max_age=5)
+    assert len(calls) == 1
+    assert len(quotes) == 100
+    assert quotes[('SYM7', 'NSE')]['ltp'] == 100.0
+
+
+def test_cached_quotes_are_reused():
+    provider = make_provider()
+    provider.get_quotes([('SBIN', 'NSE'), ('INFY', 'NSE')], max_age=5)
+    provider.get_quotes([('SBIN', 'NSE'), ('TCS', 'NSE')], max_age=5)
+
+    # Only the symbol missing from the snapshot is fetched again
+    assert calls == [['SBIN', 'INFY'], ['TCS']]
+    assert provider.get_quote('INFY', 'NSE', max_age=5) == {'ltp': 100.0}
+    assert len(calls) == 2
+
+
+def test_zero_max_age_always_fetches():
+    provider = make_provider()
+    provider.get_quotes([('SBIN', 'NSE')], max_age=0)
+    provider.get_quotes([('SBIN', 'NSE')], max_age=0)
+    assert len(calls) == 2
+
+
+def test_errors_are_omitted():
+    provider = make_provider()
+    quotes = provider.get_quotes([('SBIN', 'NSE'), ('MISSING', 'NSE')], max_age=5)
+    assert list(quotes) == [('SBIN', 'NSE')]
+    assert provider.get_quote('MISSING', 'NSE', max_age=5) is None
+
+
+def test_large_requests_are_batched():
+    provider = make_provider()
+    count = quote_provider.MULTIQUOTE_BATCH_SIZE + 1
+    provider.get_quotes([(f'SYM{i}', 'NFO') for i in range(count)], max_age=5)
+    assert [len(batch) for batch in calls] == [quote_provider.MULTIQUOTE_BATCH_SIZE, 1]
+
+
+if __name__ == "__main__":
+    test_positions_book_is_one_round_trip()
+    test_cached_quotes_are_reused()
+    test_zero_max_age_always_fetches()
+    test_errors_are_omitted()
+    test_large_requests_are_batched()
+    print("All quote provider tests passed")
@@ -0,0 +1,228 @@
+"""
+Sandbox State Store Tests
+Checks that the in-memory sandbox state round-trips through sandbox_db and that
+order execution updates orders, trades, positions and funds in memory
+"""
+
+import sys
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+# Point the sandbox and main databases at a scratch directory before importing them
+TEST_DIR = tempfile.mkdtemp(prefix='test_state_store_')
+os.environ['SANDBOX_DATABASE_URL'] = f"sqlite:///{os.path.join(TEST_DIR, 'sandbox.db')}"
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(TEST_DIR, 'openalgo.db')}")
+
+# Add parent directory to path to import sandbox modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from database.sandbox_db import SandboxOrders, SandboxPositions, SandboxFunds, db_session, init_db
+from sandbox import state_store
+from sandbox.state_store import (
+    SandboxStateStore, OrderState, TradeState, PositionState, FundsState, ist_now, session_start
+)
+
+init_db()
+
+
+def new_store():
+    # Long interval: the tests flush explicitly
+    return SandboxStateStore(flush_interval=3600)
+
+
+def make_order(orderid, user_id='state_user', **kwargs):
+    values = dict(orderid=orderid, user_id=user_id, symbol='SBIN', exchange='NSE', action='BUY',
+                  quantity=10, price_type='LIMIT', product='MIS', price=Decimal('100.00'),
+                  pending_quantity=10)
+    values.update(kwargs)
+    return OrderState(**values)
+
+
+def test_flush_and_reload():
+    store = new_store()
+    store.set_funds(FundsState(user_id='u1'))
+    order = make_order('SS1', user_id='u1')
+    store.add_order(order)
+    order.order_status = 'complete'
+    order.average_price = Decimal('99.50')
+    store.save(order)
+    store.add_trade(TradeState(tradeid='T-SS1', orderid='SS1', user_id='u1', symbol='SBIN', exchange='NSE',
+                               action='BUY', quantity=10, price=Decimal('99.50'), product='MIS'))
+    store.add_position(PositionState(user_id='u1', symbol='SBIN', exchange='NSE', product='MIS',
+                                     quantity=10, average_price=Decimal('99.50')))
+
+    # Both saves of the order coalesce into one row
+    assert store.pending() == 4
+    assert store.flush() == 4
+    assert store.pending() == 0
+    assert SandboxOrders.query.filter_by(orderid='SS1').count() == 1
+    db_session.remove()
+
+    reloaded = new_store()
+    reloaded.load()
+    state = reloaded.user('u1')
+    assert state.funds.available_balance == Decimal('10000000.00')
+    assert state.orders['SS1'].order_status == 'complete'
+    assert state.orders['SS1'].average_price == Decimal('99.50')
+    assert state.trade_by_order['SS1'].tradeid == 'T-SS1'
+    assert state.positions[('SBIN', 'NSE', 'MIS')].quantity == 10
+
+    # Updates and deletes of loaded rows
+    position = state.positions[('SBIN', 'NSE', 'MIS')]
+    position.quantity = 0
+    reloaded.save(position)
+    reloaded.flush()
+    assert SandboxPositions.query.filter_by(user_id='u1').one().quantity == 0
+    reloaded.remove_position(position)
+    reloaded.flush()
+    assert SandboxPositions.query.filter_by(user_id='u1').count() == 0
+    db_session.remove()
+    store.stop()
+    reloaded.stop()
+
+
+def test_prune_and_find_order():
+    store = new_store()
+    old = ist_now().replace(hour=0) - timedelta(days=2)
+    store.add_order(make_order('SS_OLD', user_id='u2', order_status='complete', order_timestamp=old))
+    store.add_order(make_order('SS_OPEN_OLD', user_id='u2', order_timestamp=old))
+    store.add_order(make_order('SS_NEW', user_id='u2'))
+    store.flush()
+
+    state = store.user('u2')
+    store.prune(state, session_start())
+    assert set(state.orders) == {'SS_OPEN_OLD', 'SS_NEW'}
+    assert store.get_order('SS_OLD') is None
+
+    # Orders of past sessions are still found in sandbox_db, for their owner only
+    assert store.find_order('u2', 'SS_OLD').order_status == 'complete'
+    assert store.find_order('someone_else', 'SS_OLD') is None
+    assert store.find_order('someone_else', 'SS_NEW') is None
+
+    # Open orders of past sessions are loaded, finished ones are not
+    reloaded = new_store()
+    reloaded.load()
+    assert 'SS_OPEN_OLD' in reloaded.user('u2').orders
+    assert 'SS_OLD' not in reloaded.user('u2').orders
+    store.stop()
+    reloaded.stop()
+
+
+def test_clear_user():
+    store = new_store()
+    store.set_funds(FundsState(user_id='u3'))
+    store.add_order(make_order('SS_CLEAR1', user_id='u3'))
+    store.flush()
+    store.add_order(make_order('SS_CLEAR2', user_id='u3'))  # still queued
+
+    counts = store.clear_user('u3')
+    assert counts['sandbox_orders'] == 1
+    assert store.user('u3').orders == {} and store.get_order('SS_CLEAR2') is None
+    store.flush()
+    assert SandboxOrders.query.filter_by(user_id='u3').count() == 0
+    assert SandboxFunds.query.filter_by(user_id='u3').count() == 1
+    db_session.remove()
+    store.stop()
+
+
+def test_execution_updates_state():
+    store = new_store()
+    state_store._store = store
+
+    from sandbox.execution_engine import ExecutionEngine
+    from sandbox.fund_manager import FundManager
+
+    fund_manager = FundManager('u4')
+    fund_manager.initialize_funds()
+    fund_manager.block_margin(Decimal('200.00'))
+    order = make_order('SS_EXEC', user_id='u4', quantity=2, pending_quantity=2, margin_blocked=Decimal('200.00'))
+    store.add_order(order)
+
+    engine = ExecutionEngine()
+    engine._process_order(order, {'ltp': 101})
+    assert order.order_status == 'open'
+    engine._process_order(order, {'ltp': 99})
+    assert order.order_status == 'complete' and order.average_price == Decimal('99')
+
+    state = store.user('u4')
+    assert len(state.trades) == 1 and state.trade_by_order['SS_EXEC'].price == Decimal('99')
+    position = state.positions[('SBIN', 'NSE', 'MIS')]
+    assert position.quantity == 2 and position.margin_blocked == Decimal('200.00')
+    assert store.open_orders() == []
+
+    # A second match of the filled order is a no-op
+    engine._process_order(order, {'ltp': 98})
+    assert len(state.trades) == 1
+
+    # Closing the position releases the margin with the realized P&L
+    close = make_order('SS_EXEC_CLOSE', user_id='u4', action='SELL', quantity=2, pending_quantity=2,
+                       price=Decimal('100.00'))
+    store.add_order(close)
+    engine._process_order(close, {'ltp': 100})
+    assert position.quantity == 0 and position.accumulated_realized_pnl == Decimal('2')
+    assert state.funds.used_margin == Decimal('0.00')
+    assert state.funds.available_balance == Decimal('10000002.00')
+
+    store.flush()
+    assert SandboxPositions.query.filter_by(user_id='u4').one().quantity == 0
+    assert SandboxFunds.query.filter_by(user_id='u4').one().realized_pnl == Decimal('2')
+    db_session.remove()
+    state_store._store = None
+    store.stop()
+
+
+def test_market_order_quote_fetched_outside_user_lock():
+    import threading
+    from types import SimpleNamespace
+    from sandbox import fund_manager, order_manager
+    from sandbox.fund_manager import FundManager
+
+    store = new_store()
+    state_store._store = store
+    FundManager('u5').initialize_funds()
+    state = store.user('u5')
+
+    class Provider:
+        """Quote provider checking that another thread can take the user's lock"""
+
+        def __init__(self):
+            self.lock_free = []
+
+        def get_quote(self, symbol, exchange):
+            taken = []
+            thread = threading.Thread(target=lambda: taken.append(state.lock.acquire(timeout=1) and state.lock.release() is None))
+            thread.start()
+            thread.join()
+            self.lock_free.append(taken == [True])
+            return {'ltp': 100}
+
+    provider = Provider()
+    original = order_manager.get_quote_provider, order_manager.get_symbol_info, fund_manager.get_symbol_info
+    order_manager.get_quote_provider = lambda: provider
+    order_manager.get_symbol_info = fund_manager.get_symbol_info = lambda symbol, exchange: SimpleNamespace(lotsize=1)
+    try:
+        success, response, _ = order_manager.OrderManager('u5').place_order({
+            'symbol': 'SBIN', 'exchange': 'NSE', 'action': 'BUY', 'quantity': 2,
+            'price_type': 'MARKET', 'product': 'CNC'
+        })
+    finally:
+        order_manager.get_quote_provider, order_manager.get_symbol_info, fund_manager.get_symbol_info = original
+
+    # One quote prices the order and fills it
+    assert success, response
+    assert provider.lock_free == [True]
+    order = store.find_order('u5', response['orderid'])
+    assert order.order_status == 'complete' and order.average_price == Decimal('100')
+    state_store._store = None
+    store.stop()
+
+
+if __name__ == "__main__":
+    test_flush_and_reload()
+    test_prune_and_find_order()
+    test_clear_user()
+    test_execution_updates_state()
+    test_market_order_quote_fetched_outside_user_lock()
+    print("All sandbox state store tests passed")
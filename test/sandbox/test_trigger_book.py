@@ -0,0 +1,130 @@
+"""
+Sandbox Trigger Book Tests
+Checks that tick driven execution matches exactly the orders ExecutionEngine would fill
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import sandbox modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sandbox.tick_execution import TickExecutionEngine, TriggerBook
+
+
+def test_limit_orders():
+    book = TriggerBook()
+    book.add('B100', 'BUY', 'LIMIT', price=100)
+    book.add('B98', 'BUY', 'LIMIT', price=98)
+    book.add('S105', 'SELL', 'LIMIT', price=105)
+
+    assert book.match(101) == []
+    assert book.match(100) == ['B100']
+    assert sorted(book.match(97.5)) == ['B100', 'B98']
+    assert book.match(105) == ['S105']
+    assert book.match(110) == ['S105']
+
+
+def test_stop_market_orders():
+    book = TriggerBook()
+    book.add('SLM_BUY', 'BUY', 'SL-M', trigger_price=110)
+    book.add('SLM_SELL', 'SELL', 'SL-M', trigger_price=90)
+
+    assert book.match(100) == []
+    assert book.match(110) == ['SLM_BUY']
+    assert book.match(90) == ['SLM_SELL']
+
+
+def test_stop_limit_orders_need_ltp_inside_limit():
+    book = TriggerBook()
+    book.add('SL_BUY', 'BUY', 'SL', price=112, trigger_price=110)
+    book.add('SL_SELL', 'SELL', 'SL', price=88, trigger_price=90)
+
+    assert book.match(109) == []
+    assert book.match(111) == ['SL_BUY']
+    # Gapped past the limit: triggered but not fillable, stays in the book
+    assert book.match(115) == []
+    assert 'SL_BUY' in book
+
+    assert book.match(89) == ['SL_SELL']
+    assert book.match(85) == []
+
+
+def test_market_orders_match_any_tick():
+    book = TriggerBook()
+    book.add('MKT', 'BUY', 'MARKET')
+    assert book.match(1) == ['MKT']
+
+
+def test_modify_and_remove():
+    book = TriggerBook()
+    book.add('B1', 'BUY', 'LIMIT', price=100)
+    book.add('B1', 'BUY', 'LIMIT', price=95)
+    assert len(book) == 1
+    assert book.match(98) == []
+    assert book.match(95) == ['B1']
+
+    assert book.remove('B1') is True
+    assert book.remove('B1') is False
+    assert len(book) == 0
+    assert book.match(50) == []
+
+
+def test_orders_at_same_level():
+    book = TriggerBook()
+    for i in range(5):
+        book.add(f'S{i}', 'SELL', 'LIMIT', price=100)
+    book.remove('S2')
+    assert book.match(100) == ['S0', 'S1', 'S3', 'S4']
+
+
+def test_subscriptions_follow_trigger_books():
+    from services import websocket_service
+
+    calls = []
+    results = [False, True, True]
+
+    def subscribe(user_id, broker, symbols, mode):
+        calls.append(('subscribe', user_id, symbols[0]['symbol']))
+        return results.pop(0), {'message': 'proxy not running'}, 200
+
+    def unsubscribe(user_id, broker, symbols, mode):
+        calls.append(('unsubscribe', user_id, symbols[0]['symbol']))
+        return True, {}, 200
+
+    # The trigger books only, without the sandbox state store
+    engine = TickExecutionEngine.__new__(TickExecutionEngine)
+    engine.books, engine.order_keys, engine.last_tick, engine.subscribed = {}, {}, {}, set()
+    order = {'orderid': 'O1', 'user_id': 'u1', 'symbol': 'SBIN', 'exchange': 'NSE',
+             'action': 'BUY', 'price_type': 'LIMIT', 'price': 100, 'trigger_price': 0}
+
+    original = websocket_service.subscribe_to_symbols, websocket_service.unsubscribe_from_symbols
+    websocket_service.subscribe_to_symbols, websocket_service.unsubscribe_from_symbols = subscribe, unsubscribe
+    try:
+        # A failed subscribe is retried when the order is seen again
+        engine.add_order(order)
+        assert engine.subscribed == set()
+        engine.add_order(order)
+        engine.add_order(dict(order, orderid='O2'))
+        assert engine.subscribed == {('u1', 'SBIN', 'NSE')}
+
+        # The instrument is unsubscribed once its last order leaves the book
+        engine.remove_order('O1')
+        assert engine.subscribed == {('u1', 'SBIN', 'NSE')}
+        engine.remove_order('O2')
+        assert engine.subscribed == set()
+    finally:
+        websocket_service.subscribe_to_symbols, websocket_service.unsubscribe_from_symbols = original
+
+    assert calls == [('subscribe', 'u1', 'SBIN'), ('subscribe', 'u1', 'SBIN'), ('unsubscribe', 'u1', 'SBIN')]
+
+
+if __name__ == "__main__":
+    test_limit_orders()
+    test_stop_market_orders()
+    test_stop_limit_orders_need_ltp_inside_limit()
+    test_market_orders_match_any_tick()
+    test_modify_and_remove()
+    test_orders_at_same_level()
+    test_subscriptions_follow_trigger_books()
+    print("All trigger book tests passed")
@@ -0,0 +1,142 @@
+"""
+Bulk Subscribe Tests
+Checks bulk symbol to token resolution and the batch subscription API of the
+WebSocket broker adapters
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import websocket_proxy modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.symbol_table import SymbolTable
+from database.token_db_enhanced import BrokerSymbolCache
+from websocket_proxy.base_adapter import BaseBrokerWebSocketAdapter
+
+# symbol, brsymbol, name, exchange, brexchange, token, expiry, strike, lotsize, instrumenttype, tick_size
+ROWS = [
+    ('SBIN', 'SBIN-EQ', 'SBIN', 'NSE', 'NSE', '3045', None, -1.0, 1, 'EQ', 0.05),
+    ('INFY', 'INFY-EQ', 'INFY', 'NSE', 'NSE', '1594', None, -1.0, 1, 'EQ', 0.05),
+    ('NIFTY', 'Nifty 50', 'NIFTY', 'NSE_INDEX', 'NSE', '99926000', None, -1.0, 1, 'INDEX', 0.05),
+    ('NIFTY30JAN2523500CE', 'NIFTY25JAN23500CE', 'NIFTY', 'NFO', 'NFO', '35002', '30-JAN-25', 23500.0, 75, 'CE', 0.05),
+]
+
+
+class RecordingAdapter(BaseBrokerWebSocketAdapter):
+    """Adapter without native batching, records the per-symbol calls"""
+
+    max_instruments_per_frame = 2
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def initialize(self, broker_name, user_id, auth_data=None):
+        pass
+
+    def connect(self):
+        pass
+
+    def disconnect(self):
+        self.cleanup_zmq()
+
+    def subscribe(self, symbol, exchange, mode=2, depth_level=5):
+        self.calls.append(('subscribe', symbol, exchange, mode))
+        if symbol == 'MISSING':
+            return self._create_error_response('SYMBOL_NOT_FOUND', 'not found')
+        return self._create_success_response('Subscribed', actual_depth=depth_level)
+
+    def unsubscribe(self, symbol, exchange, mode=2):
+        self.calls.append(('unsubscribe', symbol, exchange, mode))
+        return self._create_success_response('Unsubscribed')
+
+
+def test_find_symbols():
+    table = SymbolTable(ROWS)
+    rows = table.find_symbols(['INFY', 'TCS', 'SBIN', '', 'SBIN' * 20], 'NSE')
+    assert [table.get_token(row) if row >= 0 else None for row in rows.tolist()] == [
+        '1594', None, '3045', None, None
+    ]
+    assert table.find_symbols(['SBIN'], 'BSE').tolist() == [-1]
+
+
+def test_cache_bulk_lookups():
+    cache = BrokerSymbolCache()
+    cache.table = SymbolTable(ROWS)
+    pairs = [('NIFTY30JAN2523500CE', 'NFO'), ('SBIN', 'NSE'), ('NIFTY', 'NSE_INDEX'), ('TCS', 'NSE')]
+    assert cache.get_tokens_bulk(pairs) == ['35002', '3045', '99926000', None]
+    assert cache.get_brexchanges_bulk(pairs) == ['NFO', 'NSE', 'NSE', None]
+    assert cache.stats.hits == 6 and cache.stats.misses == 2
+    assert cache.stats.bulk_queries == 2
+
+
+def test_default_subscribe_bulk():
+    adapter = RecordingAdapter()
+    try:
+        responses = adapter.subscribe_bulk([('SBIN', 'NSE'), ('MISSING', 'NSE')], mode=1, depth_level=5)
+        assert [response['status'] for response in responses] == ['success', 'error']
+        assert adapter.calls == [('subscribe', 'SBIN', 'NSE', 1), ('subscribe', 'MISSING', 'NSE', 1)]
+
+        responses = adapter.unsubscribe_bulk([('SBIN', 'NSE')], mode=1)
+        assert responses[0]['status'] == 'success'
+        assert adapter.calls[-1] == ('unsubscribe', 'SBIN', 'NSE', 1)
+    finally:
+        adapter.disconnect()
+
+
+def test_iter_frames():
+    adapter = RecordingAdapter()
+    try:
+        assert list(adapter.iter_frames([1, 2, 3, 4, 5])) == [[1, 2], [3, 4], [5]]
+        assert list(adapter.iter_frames([])) == []
+    finally:
+        adapter.disconnect()
+
+
+def test_angel_session_limit_and_resubscribe():
+    from broker.angel.streaming.angel_adapter import AngelWebSocketAdapter
+
+    class Client:
+        def __init__(self):
+            self.frames = []
+
+        def subscribe(self, correlation_id, mode, token_list):
+            self.frames.append((mode, token_list))
+
+        def close_connection(self):
+            pass
+
+    adapter = AngelWebSocketAdapter()
+    adapter.max_instruments_per_session = 3
+    adapter.max_instruments_per_frame = 2
+    adapter.resolve_instruments = lambda instruments: [
+        {'symbol': symbol, 'exchange': exchange, 'token': str(number), 'brexchange': exchange}
+        for number, (symbol, exchange) in enumerate(instruments)
+    ]
+    try:
+        instruments = [('SBIN', 'NSE'), ('INFY', 'NSE'), ('TCS', 'BSE'), ('WIPRO', 'NSE')]
+        responses = adapter.subscribe_bulk(instruments, mode=1)
+        assert [response['status'] for response in responses] == ['success', 'success', 'success', 'error']
+        assert 'per session' in responses[3]['message']
+        # Subscribing again within the session does not count twice
+        assert adapter.subscribe_bulk(instruments[:1], mode=1)[0]['status'] == 'success'
+
+        # A reconnect resends the session in frames, grouped by exchange type
+        adapter.ws_client = Client()
+        adapter._on_open(None)
+        assert adapter.ws_client.frames == [
+            (1, [{'exchangeType': 1, 'tokens': ['0', '1']}]),
+            (1, [{'exchangeType': 3, 'tokens': ['2']}]),
+        ]
+    finally:
+        adapter.disconnect()
+
+
+if __name__ == "__main__":
+    test_find_symbols()
+    test_cache_bulk_lookups()
+    test_default_subscribe_bulk()
+    test_iter_frames()
+    test_angel_session_limit_and_resubscribe()
+    print("All bulk subscribe tests passed")
@@ -0,0 +1,94 @@
+"""
+WebSocket Proxy Outbox Tests
+Checks the per-client bounded queue used for market data fan-out
+"""
+
+import sys
+import os
+import asyncio
+
+# Add parent directory to path to import websocket_proxy modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from websocket_proxy.client_outbox import ClientOutbox, POLICY_CONFLATE, POLICY_DROP_OLDEST
+
+
+class FakeWebSocket:
+    """Collects sent messages; optionally blocks until released"""
+
+    def __init__(self):
+        self.sent = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def send(self, message):
+        await self.gate.wait()
+        self.sent.append(message)
+
+
+async def _drain():
+    # Give writer tasks a few loop iterations to flush
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_conflate_keeps_latest_value_per_key():
+    async def run():
+        ws = FakeWebSocket()
+        ws.gate.clear()  # Simulate a slow consumer
+        outbox = ClientOutbox(1, ws, max_size=10, policy=POLICY_CONFLATE)
+        outbox.start()
+        outbox.put(('NIFTY', 'NSE_INDEX', 1), 'tick-1')
+        await _drain()  # Writer picks up tick-1 and blocks on the socket
+        for i in range(2, 6):
+            outbox.put(('NIFTY', 'NSE_INDEX', 1), f'tick-{i}')
+        outbox.put(('BANKNIFTY', 'NSE_INDEX', 1), 'bank-1')
+        ws.gate.set()
+        await _drain()
+        outbox.close()
+        return ws.sent, outbox
+
+    sent, outbox = asyncio.run(run())
+    assert sent == ['tick-1', 'tick-5', 'bank-1']
+    assert outbox.conflated == 3
+    assert outbox.dropped == 0
+
+
+def test_drop_oldest_bounds_queue():
+    async def run():
+        ws = FakeWebSocket()
+        ws.gate.clear()
+        outbox = ClientOutbox(2, ws, max_size=3, policy=POLICY_DROP_OLDEST)
+        outbox.start()
+        outbox.put('k', 'm0')
+        await _drain()  # m0 in flight
+        for i in range(1, 6):
+            outbox.put('k', f'm{i}')
+        ws.gate.set()
+        await _drain()
+        outbox.close()
+        return ws.sent, outbox
+
+    sent, outbox = asyncio.run(run())
+    assert sent == ['m0', 'm3', 'm4', 'm5']
+    assert outbox.dropped == 2
+
+
+def test_closed_outbox_ignores_messages():
+    async def run():
+        ws = FakeWebSocket()
+        outbox = ClientOutbox(3, ws)
+        outbox.start()
+        outbox.close()
+        outbox.put('k', 'late')
+        await _drain()
+        return ws.sent
+
+    assert asyncio.run(run()) == []
+
+
+if __name__ == "__main__":
+    test_conflate_keeps_latest_value_per_key()
+    test_drop_oldest_bounds_queue()
+    test_closed_outbox_ignores_messages()
+    print("All client outbox tests passed")
@@ -0,0 +1,91 @@
+"""
+WebSocket Proxy Conflation Tests
+Checks per-subscription rate policies and coalescing of throttled updates
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import websocket_proxy modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from websocket_proxy.conflation import ConflationEngine, make_rate_policy
+
+SUB_KEY = ('NIFTY', 'NSE_INDEX', 3)
+
+
+def test_make_rate_policy():
+    policy = make_rate_policy(4, latest_only=True)
+    assert policy.min_interval == 0.25
+    assert policy.max_rate == 4
+    assert policy.latest_only is True
+
+    unlimited = make_rate_policy(None)
+    assert unlimited.min_interval == 0
+    assert unlimited.max_rate is None
+
+    try:
+        make_rate_policy(-1)
+    except ValueError:
+        pass
+    else:
+        assert False, "Negative max_rate should be rejected"
+
+    for latest_only in ("false", "true", 1, 0):
+        try:
+            make_rate_policy(4, latest_only=latest_only)
+        except TypeError:
+            pass
+        else:
+            assert False, f"latest_only={latest_only!r} should be rejected"
+
+
+def test_first_update_passes_then_coalesces():
+    engine = ConflationEngine()
+    policy = make_rate_policy(10)  # 100ms
+    engine.set_policy(1, SUB_KEY, policy)
+
+    assert engine.offer(1, SUB_KEY, policy, 'd1', now=100.0) == 'd1'
+    # Burst inside the interval is held, newest value wins
+    assert engine.offer(1, SUB_KEY, policy, 'd2', now=100.01) is None
+    assert engine.offer(1, SUB_KEY, policy, 'd3', now=100.02) is None
+    assert engine.coalesced == 1
+
+    assert engine.due(now=100.05) == []
+    assert engine.due(now=100.11) == [(1, SUB_KEY, 'd3')]
+    assert engine.due(now=100.5) == []
+
+
+def test_policies_are_per_client():
+    engine = ConflationEngine()
+    slow = make_rate_policy(1)
+    fast = make_rate_policy(100)
+    engine.set_policy(1, SUB_KEY, slow)
+    engine.set_policy(2, SUB_KEY, fast)
+
+    assert engine.offer(1, SUB_KEY, slow, 'a', now=10.0) == 'a'
+    assert engine.offer(2, SUB_KEY, fast, 'a', now=10.0) == 'a'
+    assert engine.offer(1, SUB_KEY, slow, 'b', now=10.02) is None
+    assert engine.offer(2, SUB_KEY, fast, 'b', now=10.02) == 'b'
+
+    assert engine.due(now=10.5) == []
+    assert engine.due(now=11.0) == [(1, SUB_KEY, 'b')]
+
+
+def test_remove_client_clears_state():
+    engine = ConflationEngine()
+    policy = make_rate_policy(1)
+    engine.set_policy(1, SUB_KEY, policy)
+    engine.offer(1, SUB_KEY, policy, 'a', now=1.0)
+    engine.offer(1, SUB_KEY, policy, 'b', now=1.1)
+    engine.remove_client(1)
+    assert engine.due(now=5.0) == []
+    assert engine.get_stats()['subscriptions'] == 0
+
+
+if __name__ == "__main__":
+    test_make_rate_policy()
+    test_first_update_passes_then_coalesces()
+    test_policies_are_per_client()
+    test_remove_client_clears_state()
+    print("All conflation tests passed")
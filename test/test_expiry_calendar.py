@@ -0,0 +1,94 @@
+"""
+Expiry Calendar Tests
+Checks the weekly/monthly classification and the nearest-expiry queries of the
+expiry calendar built from the symbol cache
+"""
+
+import sys
+import os
+from datetime import date
+
+# Add parent directory to path to import database modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.symbol_table import SymbolTable
+from database.expiry_calendar import (
+    ExpiryCalendar, FUTURES, OPTIONS, WEEKLY, MONTHLY,
+    classify_expiries, parse_expiry, select_expiries
+)
+
+# symbol, brsymbol, name, exchange, brexchange, token, expiry, strike, lotsize, instrumenttype, tick_size
+ROWS = [
+    ('SBIN', 'SBIN-EQ', 'SBIN', 'NSE', 'NSE', '3045', None, -1.0, 1, 'EQ', 0.05),
+    ('NIFTY30JAN25FUT', 'NIFTY25JANFUT', 'NIFTY', 'NFO', 'NFO', '35000', '30-JAN-25', -1.0, 75, 'FUT', 0.05),
+    ('NIFTY27FEB25FUT', 'NIFTY25FEBFUT', 'NIFTY', 'NFO', 'NFO', '35001', '27-FEB-25', -1.0, 75, 'FUT', 0.05),
+    ('NIFTY23JAN2523000CE', 'NIFTY2512323000CE', 'NIFTY', 'NFO', 'NFO', '35002', '23-JAN-25', 23000.0, 75, 'CE', 0.05),
+    ('NIFTY30JAN2523000CE', 'NIFTY25JAN23000CE', 'NIFTY', 'NFO', 'NFO', '35003', '30-JAN-25', 23000.0, 75, 'CE', 0.05),
+    ('NIFTY30JAN2523000PE', 'NIFTY25JAN23000PE', 'NIFTY', 'NFO', 'NFO', '35004', '30-JAN-25', 23000.0, 75, 'PE', 0.05),
+    ('NIFTY06FEB2523000CE', 'NIFTY2520623000CE', 'NIFTY', 'NFO', 'NFO', '35005', '06-FEB-25', 23000.0, 75, 'CE', 0.05),
+    ('NIFTY13FEB2523000CE', 'NIFTY2521323000CE', 'NIFTY', 'NFO', 'NFO', '35006', '13-FEB-25', 23000.0, 75, 'CE', 0.05),
+    ('NIFTY27FEB2523000CE', 'NIFTY25FEB23000CE', 'NIFTY', 'NFO', 'NFO', '35007', '27-FEB-25', 23000.0, 75, 'CE', 0.05),
+    ('SENSEX28JAN2576000CE', 'SENSEX25JAN76000CE', 'SENSEX', 'BFO', 'BFO', '8001', '28-JAN-25', 76000.0, 20, 'CE', 0.05),
+]
+
+
+def test_parse_expiry():
+    assert parse_expiry('30-JAN-25') == date(2025, 1, 30)
+    assert parse_expiry('30JAN25') == date(2025, 1, 30)
+    assert parse_expiry('30-JAN-2025') == date(2025, 1, 30)
+    assert parse_expiry('') is None
+    assert parse_expiry(None) is None
+
+
+def test_classify_expiries():
+    expiries = classify_expiries(['30-JAN-25', '23-JAN-25', '06-FEB-25', 'BAD', '23-JAN-25'])
+    assert [e.expiry for e in expiries] == ['23-JAN-25', '30-JAN-25', '06-FEB-25']
+    assert [e.expiry_type for e in expiries] == [WEEKLY, MONTHLY, MONTHLY]
+    assert expiries[0].code == '23JAN25'
+
+
+def test_select_expiries():
+    expiries = classify_expiries(['23-JAN-25', '30-JAN-25', '06-FEB-25', '27-FEB-25'])
+    assert [e.code for e in select_expiries(expiries, expiry_type=MONTHLY)] == ['30JAN25', '27FEB25']
+    assert [e.code for e in select_expiries(expiries, count=2, on=date(2025, 1, 24))] == ['30JAN25', '06FEB25']
+    assert [e.code for e in select_expiries(expiries, count=1, expiry_type=WEEKLY, on=date(2025, 1, 24))] == ['06FEB25']
+    assert select_expiries(expiries, count=3, on=date(2025, 3, 1)) == []
+
+
+def test_calendar():
+    calendar = ExpiryCalendar(SymbolTable(ROWS))
+    assert calendar.underlyings == 2
+    assert calendar.has_underlying('NIFTY', 'NFO') and calendar.has_underlying('NIFTY', 'NFO', FUTURES)
+    assert not calendar.has_underlying('SBIN', 'NSE')
+    assert not calendar.has_underlying('SENSEX', 'BFO', FUTURES)
+
+    options = calendar.expiries('NIFTY', 'NFO')
+    assert [e.code for e in options] == ['23JAN25', '30JAN25', '06FEB25', '13FEB25', '27FEB25']
+    assert [e.expiry_type for e in options] == [WEEKLY, MONTHLY, WEEKLY, WEEKLY, MONTHLY]
+    assert [e.code for e in calendar.expiries('NIFTY', 'NFO', FUTURES)] == ['30JAN25', '27FEB25']
+    assert [e.code for e in calendar.expiries('NIFTY', 'NFO', expiry_type=MONTHLY)] == ['30JAN25', '27FEB25']
+
+
+def test_nearest_and_find():
+    calendar = ExpiryCalendar(SymbolTable(ROWS))
+    on = date(2025, 1, 30)
+    assert [e.code for e in calendar.nearest('NIFTY', 'NFO', on=on)] == ['30JAN25']
+    assert [e.code for e in calendar.nearest('NIFTY', 'NFO', count=3, on=on)] == ['30JAN25', '06FEB25', '13FEB25']
+    assert [e.code for e in calendar.nearest('NIFTY', 'NFO', OPTIONS, 1, MONTHLY, date(2025, 1, 31))] == ['27FEB25']
+    assert calendar.nearest('NIFTY', 'NFO', on=date(2025, 3, 1)) == []
+    assert calendar.nearest('TCS', 'NFO', on=on) == []
+
+    assert calendar.find('NIFTY', 'NFO', '06FEB25').expiry == '06-FEB-25'
+    assert calendar.find('NIFTY', 'NFO', '06-FEB-25').expiry_type == WEEKLY
+    assert calendar.find('NIFTY', 'NFO', '07FEB25') is None
+    assert calendar.find('NIFTY', 'NFO', 'garbage') is None
+    assert calendar.find('SENSEX', 'BFO', '28JAN25').expiry_type == MONTHLY
+
+
+if __name__ == "__main__":
+    test_parse_expiry()
+    test_classify_expiries()
+    test_select_expiries()
+    test_calendar()
+    test_nearest_and_find()
+    print("All expiry calendar tests passed")
@@ -0,0 +1,196 @@
+"""
+WebSocket Fan-out Tests
+Checks the subscription reference counts of the multi-process proxy, the
+coordinator's handling of worker requests and the control/data path between
+a worker and the coordinator
+"""
+
+import sys
+import os
+import threading
+import time
+
+import zmq
+
+# Add parent directory to path to import websocket_proxy modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from websocket_proxy.fanout import (
+    ControlLink, FanoutCoordinator, RemoteBrokerAdapter, SubscriptionRefs
+)
+from websocket_proxy.port_check import find_available_port
+
+
+class FakeAdapter:
+    """Records the calls the coordinator makes to a broker adapter"""
+
+    def __init__(self, broker_name):
+        self.broker_name = broker_name
+        self.context = zmq.Context.instance()
+        self.socket = self.context.socket(zmq.PUB)
+        self.zmq_port = self.socket.bind_to_random_port('tcp://127.0.0.1')
+        self.subscribed = []
+        self.unsubscribed = []
+        self.reject = set()
+        self.disconnected = False
+        self.unsubscribed_all = False
+
+    def initialize(self, broker_name, user_id, auth_data=None):
+        return {'success': True}
+
+    def connect(self):
+        return {'success': True}
+
+    def negotiate_tick_format(self, requested_formats):
+        return requested_formats[0]
+
+    def subscribe_bulk(self, instruments, mode=2, depth_level=5):
+        self.subscribed.extend((symbol, exchange, mode) for symbol, exchange in instruments)
+        return [{'status': 'error', 'message': 'Unknown symbol'} if symbol in self.reject
+                else {'status': 'success', 'message': f"Subscribed to {symbol}", 'actual_depth': depth_level}
+                for symbol, exchange in instruments]
+
+    def unsubscribe_bulk(self, instruments, mode=2):
+        self.unsubscribed.extend((symbol, exchange, mode) for symbol, exchange in instruments)
+        return [{'status': 'success', 'message': f"Unsubscribed from {symbol}"} for symbol, exchange in instruments]
+
+    def unsubscribe_all(self):
+        self.unsubscribed_all = True
+
+    def disconnect(self):
+        self.disconnected = True
+        self.socket.close(linger=0)
+
+
+def new_coordinator(workers=0):
+    coordinator = FanoutCoordinator(host='127.0.0.1', port=find_available_port(18765), workers=workers)
+    adapters = {}
+
+    def factory(broker_name):
+        adapters[broker_name] = FakeAdapter(broker_name)
+        return adapters[broker_name]
+
+    coordinator.adapter_factory = factory
+    return coordinator, adapters
+
+
+def test_subscription_refs():
+    refs = SubscriptionRefs()
+    assert refs.acquire('NIFTY', 'w1')
+    assert not refs.acquire('NIFTY', 'w1')
+    assert not refs.acquire('NIFTY', 'w2')
+    assert not refs.release('NIFTY', 'w1')
+    assert not refs.release('NIFTY', 'w3')  # Not a holder
+    assert not refs.release('NIFTY', 'w1')
+    assert refs.release('NIFTY', 'w2')
+    assert not refs.held('NIFTY')
+
+    refs.acquire(('u1', 'A'), 'w1')
+    refs.acquire(('u1', 'B'), 'w1')
+    refs.acquire(('u1', 'B'), 'w2')
+    refs.acquire(('u2', 'C'), 'w1')
+    assert refs.release_holder('w1', lambda key: key[0] == 'u1') == [('u1', 'A')]
+    assert refs.release_holder('w1') == [('u2', 'C')]
+    assert len(refs) == 1
+
+
+def test_broker_subscribed_once_across_workers():
+    coordinator, adapters = new_coordinator()
+    for worker in ('w1', 'w2'):
+        assert coordinator.handle_request(worker, {'op': 'open', 'user_id': 'u1', 'broker_name': 'angel'})['status'] == 'success'
+    adapter = adapters['angel']
+    assert len(adapters) == 1
+
+    reply = coordinator.handle_request('w1', {'op': 'subscribe', 'user_id': 'u1', 'mode': 1,
+                                              'instruments': [['SBIN', 'NSE'], ['INFY', 'NSE']]})
+    assert [r['status'] for r in reply['responses']] == ['success', 'success']
+    reply = coordinator.handle_request('w2', {'op': 'subscribe', 'user_id': 'u1', 'mode': 1, 'depth_level': 20,
+                                              'instruments': [['SBIN', 'NSE']]})
+    assert reply['responses'][0]['actual_depth'] == 5  # The subscription already at the broker
+    assert adapter.subscribed == [('SBIN', 'NSE', 1), ('INFY', 'NSE', 1)]
+
+    # Another mode is another broker subscription
+    coordinator.handle_request('w2', {'op': 'subscribe', 'user_id': 'u1', 'mode': 3, 'instruments': [['SBIN', 'NSE']]})
+    assert adapter.subscribed[-1] == ('SBIN', 'NSE', 3)
+
+    # SBIN LTP stays subscribed while w2 holds it
+    reply = coordinator.handle_request('w1', {'op': 'unsubscribe', 'user_id': 'u1', 'mode': 1,
+                                              'instruments': [['SBIN', 'NSE']]})
+    assert reply['responses'][0]['status'] == 'success' and adapter.unsubscribed == []
+
+    # w2 goes away: its references are released, the adapter stays for w1
+    coordinator.release_worker('w2')
+    assert sorted(adapter.unsubscribed) == [('SBIN', 'NSE', 1), ('SBIN', 'NSE', 3)]
+    assert not adapter.disconnected
+
+    # The last worker closes the user: remaining subscriptions go, then the adapter
+    coordinator.handle_request('w1', {'op': 'close', 'user_id': 'u1'})
+    assert adapter.unsubscribed[-1] == ('INFY', 'NSE', 1)
+    assert adapter.disconnected and 'u1' not in coordinator.adapters and len(coordinator.refs) == 0
+    coordinator._shutdown()
+
+
+def test_rejected_subscriptions_and_keep_alive_brokers():
+    coordinator, adapters = new_coordinator()
+    coordinator.handle_request('w1', {'op': 'open', 'user_id': 'u1', 'broker_name': 'flattrade'})
+    adapter = adapters['flattrade']
+    adapter.reject.add('BAD')
+
+    reply = coordinator.handle_request('w1', {'op': 'subscribe', 'user_id': 'u1', 'mode': 2,
+                                              'instruments': [['BAD', 'NSE'], ['BAD', 'NSE'], ['SBIN', 'NSE']]})
+    assert [r['status'] for r in reply['responses']] == ['error', 'error', 'success']
+    assert not coordinator.refs.held(('u1', 'BAD', 'NSE', 2))
+
+    # A rejected instrument is tried again for the next subscriber
+    coordinator.handle_request('w1', {'op': 'subscribe', 'user_id': 'u1', 'mode': 2, 'instruments': [['BAD', 'NSE']]})
+    assert adapter.subscribed.count(('BAD', 'NSE', 2)) == 2
+
+    reply = coordinator.handle_request('w2', {'op': 'subscribe', 'user_id': 'u2', 'mode': 2, 'instruments': [['SBIN', 'NSE']]})
+    assert reply['code'] == 'BROKER_ERROR'
+
+    # Flattrade sessions are kept alive with no subscriptions
+    coordinator.handle_request('w1', {'op': 'close', 'user_id': 'u1'})
+    assert adapter.unsubscribed_all and not adapter.disconnected and 'u1' in coordinator.adapters
+    coordinator._shutdown()
+
+
+def test_worker_link_and_tick_forwarding():
+    coordinator, adapters = new_coordinator()
+    loop = threading.Thread(target=coordinator.run)
+    loop.start()
+    link = ControlLink(coordinator.control_endpoint, 'w1', timeout=5.0)
+    subscriber = zmq.Context.instance().socket(zmq.SUB)
+    try:
+        remote = RemoteBrokerAdapter(link, 'angel')
+        assert remote.initialize('angel', 'u1') == {'success': True}
+        responses = remote.subscribe_bulk([('SBIN', 'NSE')], 1)
+        assert responses[0]['status'] == 'success' and adapters['angel'].subscribed == [('SBIN', 'NSE', 1)]
+
+        # Ticks published by the adapter reach a worker's SUB socket through the forwarder
+        subscriber.setsockopt(zmq.SUBSCRIBE, b'')
+        subscriber.connect(coordinator.data_endpoint)
+        received = None
+        deadline = time.monotonic() + 5.0
+        while received is None and time.monotonic() < deadline:
+            adapters['angel'].socket.send_multipart([b'angel_NSE_SBIN_LTP', b'{"ltp": 812.5}'])
+            if subscriber.poll(50):
+                received = subscriber.recv_multipart()
+        assert received == [b'angel_NSE_SBIN_LTP', b'{"ltp": 812.5}']
+
+        remote.disconnect()
+        assert adapters['angel'].unsubscribed == [('SBIN', 'NSE', 1)] and adapters['angel'].disconnected
+        assert remote.initialize('angel', 'u1') == {'success': True}
+    finally:
+        subscriber.close(linger=0)
+        link.close()
+        coordinator.stop()
+        loop.join(timeout=5.0)
+    assert not loop.is_alive()
+
+
+if __name__ == "__main__":
+    test_subscription_refs()
+    test_broker_subscribed_once_across_workers()
+    test_rejected_subscriptions_and_keep_alive_brokers()
+    test_worker_link_and_tick_forwarding()
+    print("All WebSocket fan-out tests passed")
@@ -0,0 +1,150 @@
+"""
+History Cache Tests
+Checks the day range arithmetic behind incremental history downloads, and the
+DuckDB candle store when DuckDB is installed
+"""
+
+import sys
+import os
+import tempfile
+from datetime import date
+
+# Add parent directory to path to import database modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from database.history_cache_db import (
+    DUCKDB_AVAILABLE, HistoryCache, day_bounds, merge_ranges, split_range, subtract_ranges
+)
+
+KEY = ('zerodha', 'NSE', 'SBIN', '1m')
+
+
+def test_merge_ranges():
+    assert merge_ranges([(date(2024, 1, 10), date(2024, 1, 20)),
+                         (date(2024, 1, 1), date(2024, 1, 9)),
+                         (date(2024, 1, 15), date(2024, 1, 25)),
+                         (date(2024, 3, 1), date(2024, 3, 2))]) == [
+        (date(2024, 1, 1), date(2024, 1, 25)),
+        (date(2024, 3, 1), date(2024, 3, 2)),
+    ]
+
+
+def test_subtract_ranges():
+    covered = [(date(2024, 1, 10), date(2024, 1, 20))]
+    # Fully cached request downloads nothing
+    assert subtract_ranges(date(2024, 1, 12), date(2024, 1, 15), covered) == []
+    # Overlapping request downloads only both edges
+    assert subtract_ranges(date(2024, 1, 1), date(2024, 1, 31), covered) == [
+        (date(2024, 1, 1), date(2024, 1, 9)),
+        (date(2024, 1, 21), date(2024, 1, 31)),
+    ]
+    assert subtract_ranges(date(2024, 2, 1), date(2024, 2, 3), covered) == [(date(2024, 2, 1), date(2024, 2, 3))]
+
+
+def test_split_range():
+    chunks = split_range(date(2024, 1, 1), date(2024, 12, 31), 60)
+    assert len(chunks) == 7
+    assert chunks[0] == (date(2024, 1, 1), date(2024, 2, 29))
+    assert chunks[-1][1] == date(2024, 12, 31)
+    assert all((b[0] - a[1]).days == 1 for a, b in zip(chunks, chunks[1:]))
+    assert split_range(date(2024, 1, 2), date(2024, 1, 1), 60) == []
+
+
+def test_day_bounds_are_ist():
+    low, high = day_bounds(date(2024, 1, 1), date(2024, 1, 1))
+    # 2024-01-01 00:00 IST is 2023-12-31 18:30 UTC
+    assert low == 1704047400
+    assert high - low == 86399
+
+
+def test_store_and_load_round_trip():
+    if not DUCKDB_AVAILABLE:
+        print("[SKIP] duckdb not installed")
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = HistoryCache(os.path.join(directory, 'history.duckdb'))
+        low, _ = day_bounds(date(2024, 1, 1), date(2024, 1, 1))
+        candles = pd.DataFrame({
+            'timestamp': [low + 33300, low + 33360],
+            'open': [100.0, 101.0], 'high': [101.0, 102.0], 'low': [99.5, 100.5],
+            'close': [100.5, 101.5], 'volume': [1000, 1200],
+        })
+        cache.store(KEY, date(2024, 1, 1), date(2024, 1, 2), candles)
+
+        assert cache.missing_ranges(KEY, date(2024, 1, 1), date(2024, 1, 5)) == [(date(2024, 1, 3), date(2024, 1, 5))]
+        loaded = cache.load(KEY, date(2024, 1, 1), date(2024, 1, 2))
+        assert list(loaded['timestamp']) == list(candles['timestamp'])
+        assert list(loaded['oi']) == [0, 0]
+
+        # Storing the same day again replaces its candles instead of duplicating them
+        cache.store(KEY, date(2024, 1, 1), date(2024, 1, 1), candles.head(1))
+        assert len(cache.load(KEY, date(2024, 1, 1), date(2024, 1, 2))) == 1
+
+
+def test_empty_ranges_expire():
+    if not DUCKDB_AVAILABLE:
+        print("[SKIP] duckdb not installed")
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = HistoryCache(os.path.join(directory, 'history.duckdb'), empty_ttl=3600)
+        cache.store(KEY, date(2024, 1, 6), date(2024, 1, 7), pd.DataFrame(columns=['timestamp']))
+        assert cache.missing_ranges(KEY, date(2024, 1, 6), date(2024, 1, 7)) == []
+
+        # Once the TTL has passed the range is downloaded again
+        cache.empty_ttl = -1
+        cache.store(KEY, date(2024, 1, 6), date(2024, 1, 7), pd.DataFrame(columns=['timestamp']))
+        assert cache.missing_ranges(KEY, date(2024, 1, 6), date(2024, 1, 7)) == [(date(2024, 1, 6), date(2024, 1, 7))]
+
+
+def test_cache_failure_keeps_downloaded_chunks():
+    from services import history_service
+
+    requests = []
+    low, _ = day_bounds(date(2024, 1, 1), date(2024, 1, 1))
+
+    class BrokerData:
+        def __init__(self, auth_token):
+            pass
+
+        def get_history(self, symbol, exchange, interval, start_date, end_date):
+            requests.append((start_date, end_date))
+            return pd.DataFrame({'timestamp': [low], 'open': [1.0], 'high': [1.0], 'low': [1.0],
+                                 'close': [1.0], 'volume': [1]})
+
+    class BrokenCache:
+        def missing_ranges(self, key, start, end):
+            return [(date(2024, 1, 11), end)]
+
+        def store(self, key, start, end, df):
+            pass
+
+        def load(self, key, start, end):
+            raise RuntimeError("cache file is locked")
+
+    broker_module = type('broker_module', (), {'BrokerData': BrokerData})
+    original = history_service.get_history_cache
+    history_service.get_history_cache = BrokenCache
+    try:
+        df = history_service.fetch_history_dataframe(broker_module, 'token', None, 'zerodha',
+                                                     'SBIN', 'NSE', 'D', '2024-01-01', '2024-01-20')
+    finally:
+        history_service.get_history_cache = original
+
+    # Only the days the cache was going to serve are downloaded again
+    assert requests == [('2024-01-11', '2024-01-20'), ('2024-01-01', '2024-01-10')]
+    assert len(df) == 1
+
+
+if __name__ == "__main__":
+    test_merge_ranges()
+    test_subtract_ranges()
+    test_split_range()
+    test_day_bounds_are_ist()
+    test_store_and_load_round_trip()
+    test_empty_ranges_expire()
+    test_cache_failure_keeps_downloaded_chunks()
+    print("All history cache tests passed")
@@ -0,0 +1,125 @@
+"""
+Buffered Log Writer Tests
+Checks batching, size/time based flushing, drop counting and shutdown flush
+"""
+
+import sys
+import os
+import time
+
+# Add parent directory to path to import database modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.log_writer import BufferedLogWriter
+
+
+class FakeModel:
+    __tablename__ = 'fake_logs'
+
+
+class FakeSession:
+    """Records bulk inserts the way a scoped_session would receive them"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.inserts = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def bulk_insert_mappings(self, model, rows):
+        if self.fail:
+            raise RuntimeError("database is locked")
+        self.inserts.append(list(rows))
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def remove(self):
+        pass
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_batches_by_size():
+    session = FakeSession()
+    writer = BufferedLogWriter(batch_size=10, flush_interval=5)
+    for i in range(25):
+        writer.enqueue(session, FakeModel, {'n': i})
+
+    assert wait_for(lambda: writer.written == 20)
+    assert [len(rows) for rows in session.inserts] == [10, 10]
+
+    writer.flush()
+    assert writer.written == 25
+    assert [row['n'] for rows in session.inserts for row in rows] == list(range(25))
+
+
+def test_flushes_on_interval():
+    session = FakeSession()
+    writer = BufferedLogWriter(batch_size=1000, flush_interval=0.02)
+    writer.enqueue(session, FakeModel, {'n': 1})
+    writer.enqueue(session, FakeModel, {'n': 2})
+
+    assert wait_for(lambda: writer.written == 2)
+    assert session.commits == 1
+    writer.flush()
+
+
+def test_one_commit_per_table():
+    traffic, latency = FakeSession(), FakeSession()
+    writer = BufferedLogWriter(batch_size=4, flush_interval=5)
+    for i in range(2):
+        writer.enqueue(traffic, FakeModel, {'n': i})
+        writer.enqueue(latency, FakeModel, {'n': i})
+
+    assert wait_for(lambda: writer.written == 4)
+    assert traffic.commits == 1 and latency.commits == 1
+    writer.flush()
+
+
+def test_drops_when_full():
+    session = FakeSession()
+    writer = BufferedLogWriter(max_queue_size=5, batch_size=100, flush_interval=5)
+    # Fill the queue before the writer thread exists
+    writer._thread = object()
+    results = [writer.enqueue(session, FakeModel, {'n': i}) for i in range(8)]
+    assert results == [True] * 5 + [False] * 3
+    assert writer.get_stats()['dropped'] == 3
+
+
+def test_failed_batch_is_counted():
+    session = FakeSession(fail=True)
+    writer = BufferedLogWriter(batch_size=2, flush_interval=5)
+    writer.enqueue(session, FakeModel, {'n': 1})
+    writer.enqueue(session, FakeModel, {'n': 2})
+
+    assert wait_for(lambda: writer.failed == 2)
+    assert session.rollbacks == 1
+    writer.flush()
+
+
+def test_no_rows_after_flush():
+    session = FakeSession()
+    writer = BufferedLogWriter(batch_size=100, flush_interval=5)
+    writer.enqueue(session, FakeModel, {'n': 1})
+    writer.flush()
+    assert writer.written == 1
+    assert writer.enqueue(session, FakeModel, {'n': 2}) is False
+
+
+if __name__ == "__main__":
+    test_batches_by_size()
+    test_flushes_on_interval()
+    test_one_commit_per_table()
+    test_drops_when_full()
+    test_failed_batch_is_counted()
+    test_no_rows_after_flush()
+    print("All log writer tests passed")
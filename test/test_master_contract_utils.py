@@ -0,0 +1,112 @@
+"""
+Master Contract Utils Tests
+Checks the vectorized symbol construction shared by the broker master contracts
+and the bulk symtoken loader
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import database modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Column, Float, Index, Integer, String, create_engine, inspect
+from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
+
+from database.master_contract_utils import (
+    copy_symtokens, derivative_symbols, format_expiry, format_strike, normalize_strike, rename_index_symbols
+)
+
+Base = declarative_base()
+
+
+class SymToken(Base):
+    __tablename__ = 'symtoken'
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String, nullable=False, index=True)
+    brsymbol = Column(String, nullable=False, index=True)
+    name = Column(String)
+    exchange = Column(String, index=True)
+    brexchange = Column(String, index=True)
+    token = Column(String, index=True)
+    expiry = Column(String)
+    strike = Column(Float)
+    lotsize = Column(Integer)
+    instrumenttype = Column(String)
+    tick_size = Column(Float)
+
+    __table_args__ = (Index('idx_symbol_exchange', 'symbol', 'exchange'),)
+
+
+def make_session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    return scoped_session(sessionmaker(bind=engine)), engine
+
+
+def test_format_expiry():
+    expiry = pd.Series(['2024-01-25', None, '2024-01-25', 'garbage'])
+    assert format_expiry(expiry).tolist()[0] == '25-JAN-24'
+    assert format_expiry(expiry).isna().tolist() == [False, True, False, True]
+    assert format_expiry(pd.Series(['27-MAR-2025']), '%d-%b-%Y').tolist() == ['27-MAR-25']
+
+
+def test_format_strike():
+    strikes = pd.Series([23500.0, 83.25, np.nan, '-1'])
+    assert format_strike(strikes).tolist() == ['23500', '83.25', '', '-1']
+    assert normalize_strike(pd.Series(['100', None, 'x'])).tolist() == [100.0, -1.0, -1.0]
+
+
+def test_derivative_symbols():
+    df = pd.DataFrame({
+        'name': ['NIFTY', 'NIFTY', 'BANKNIFTY', 'SBIN'],
+        'expiry': ['25-JAN-24', '25-JAN-24', '31-JAN-24', np.nan],
+        'instrumenttype': ['FUT', 'CE', 'PE', 'EQ'],
+        'strike': [0, 21500.0, 47000.5, 0],
+        'symbol': ['', '', '', 'SBIN'],
+    })
+    symbols = derivative_symbols(df['name'], df['expiry'], df['instrumenttype'], df['strike'])
+    assert symbols.fillna(df['symbol']).tolist() == [
+        'NIFTY25JAN24FUT', 'NIFTY25JAN2421500CE', 'BANKNIFTY31JAN2447000.5PE', 'SBIN'
+    ]
+
+
+def test_rename_index_symbols():
+    assert rename_index_symbols(pd.Series(['NIFTY 50', 'SBIN'])).tolist() == ['NIFTY', 'SBIN']
+    assert rename_index_symbols(pd.Series(['NIFTY INDEX']), {'NIFTY INDEX': 'NIFTY'}).tolist() == ['NIFTY']
+
+
+def test_copy_symtokens():
+    session, engine = make_session()
+    df = pd.DataFrame({
+        'symbol': ['SBIN', 'NIFTY25JAN24FUT'], 'brsymbol': ['SBIN-EQ', 'NIFTY24JANFUT'],
+        'name': ['SBIN', 'NIFTY'], 'exchange': ['NSE', 'NFO'], 'brexchange': ['NSE', 'NFO'],
+        'token': ['3045', '35001'], 'expiry': [np.nan, '25-JAN-24'], 'strike': [-1.0, -1.0],
+        'lotsize': np.array([1, 50], dtype='int64'), 'instrumenttype': ['EQ', 'FUT'],
+        'tick_size': [0.05, 0.05], 'unused': ['x', 'y'],
+    })
+    assert copy_symtokens(session, SymToken, df) == 2
+
+    # Indexes dropped for the empty-table load are rebuilt
+    index_names = {index['name'] for index in inspect(engine).get_indexes('symtoken')}
+    assert index_names == {index.name for index in SymToken.__table__.indexes}
+
+    row = session.query(SymToken).filter_by(token='3045').one()
+    assert row.expiry is None and row.lotsize == 1 and row.brsymbol == 'SBIN-EQ'
+
+    # Existing tokens are skipped, per token + exchange when requested
+    more = df.assign(token=['3045', '99'])
+    assert copy_symtokens(session, SymToken, more) == 1
+    assert copy_symtokens(session, SymToken, df.assign(exchange='BSE'), key_columns=('token', 'exchange')) == 2
+    assert session.query(SymToken).count() == 5
+
+
+if __name__ == "__main__":
+    test_format_expiry()
+    test_format_strike()
+    test_derivative_symbols()
+    test_rename_index_symbols()
+    test_copy_symtokens()
+    print("All master contract utils tests passed")
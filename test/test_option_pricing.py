@@ -0,0 +1,95 @@
+"""
+Option Pricing Tests
+Checks the vectorized Black-Scholes / Black-76 engine: prices, implied volatility
+round trips, Greeks and the option chain builder of the Greeks service
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import utils and services modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from database.symbol_table import SymbolData
+from services.option_greeks_service import build_chain_greeks
+from utils.option_pricing import implied_volatility, option_greeks, option_price
+
+SPOT = 24000.0
+YEARS = 7 / 365
+RATE = 0.065
+
+
+def test_put_call_parity():
+    strikes = np.array([23000.0, 24000.0, 25000.0])
+    call = option_price(SPOT, strikes, YEARS, RATE, 0.15, True)
+    put = option_price(SPOT, strikes, YEARS, RATE, 0.15, False)
+    assert np.allclose(call - put, SPOT - strikes * np.exp(-RATE * YEARS))
+
+    call = option_price(SPOT, strikes, YEARS, RATE, 0.15, True, model='black76')
+    put = option_price(SPOT, strikes, YEARS, RATE, 0.15, False, model='black76')
+    assert np.allclose(call - put, (SPOT - strikes) * np.exp(-RATE * YEARS))
+
+
+def test_implied_volatility_round_trip():
+    strikes = np.array([22500.0, 23500.0, 24000.0, 24500.0, 25500.0])
+    is_call = np.array([False, True, True, False, True])
+    volatility = np.array([0.22, 0.16, 0.13, 0.14, 0.19])
+    for model in ('black_scholes', 'black76'):
+        prices = option_price(SPOT, strikes, YEARS, RATE, volatility, is_call, model=model)
+        solved = implied_volatility(prices, SPOT, strikes, YEARS, RATE, is_call, model=model)
+        assert np.allclose(solved, volatility, atol=1e-6)
+
+
+def test_implied_volatility_scalar_and_bounds():
+    price = float(option_price(SPOT, 24000.0, YEARS, RATE, 0.2, True))
+    assert abs(float(implied_volatility(price, SPOT, 24000.0, YEARS, RATE, True)) - 0.2) < 1e-6
+
+    # Below intrinsic, above the underlying and expired contracts have no volatility
+    solved = implied_volatility([500.0, 30000.0, 100.0], SPOT, [23000.0, 24000.0, 24000.0],
+                                [YEARS, YEARS, 0.0], RATE, True)
+    assert np.isnan(solved).all()
+
+
+def test_greeks():
+    greeks = option_greeks(SPOT, np.array([24000.0, 24000.0]), YEARS, RATE, 0.15, np.array([True, False]))
+    call_delta, put_delta = greeks['delta']
+    assert 0.5 < call_delta < 0.6 and abs(call_delta - put_delta - 1.0) < 1e-12
+    assert greeks['gamma'][0] == greeks['gamma'][1] > 0
+    assert (greeks['theta'] < 0).all() and (greeks['vega'] > 0).all()
+    assert greeks['rho'][0] > 0 > greeks['rho'][1]
+
+    # Vega is per volatility point
+    bumped = option_price(SPOT, 24000.0, YEARS, RATE, 0.16, True) - option_price(SPOT, 24000.0, YEARS, RATE, 0.15, True)
+    assert abs(float(bumped) - greeks['vega'][0]) < 0.05
+
+
+def test_build_chain_greeks():
+    contracts = [
+        SymbolData(f"NIFTY30JAN25{strike}{option_type}", '', 'NIFTY', 'NFO', 'NFO', '', '30-JAN-25',
+                   float(strike), 75, option_type, 0.05)
+        for strike in (23500, 24000) for option_type in ('CE', 'PE')
+    ]
+    prices = {
+        contract.symbol: float(option_price(SPOT, contract.strike, YEARS, RATE, 0.15, contract.instrumenttype == 'CE'))
+        for contract in contracts
+    }
+    del prices['NIFTY30JAN2523500PE']
+
+    chain = build_chain_greeks(contracts, prices, SPOT, 7, 6.5)
+    assert [row['strike'] for row in chain] == [23500.0, 24000.0]
+    assert chain[0]['PE']['option_price'] is None and chain[0]['PE']['greeks']['delta'] is None
+    leg = chain[1]['CE']
+    assert leg['symbol'] == 'NIFTY30JAN2524000CE'
+    assert abs(leg['implied_volatility'] - 15.0) < 0.01
+    assert set(leg['greeks']) == {'delta', 'gamma', 'theta', 'vega', 'rho'}
+
+
+if __name__ == "__main__":
+    test_put_call_parity()
+    test_implied_volatility_round_trip()
+    test_implied_volatility_scalar_and_bounds()
+    test_greeks()
+    test_build_chain_greeks()
+    print("All option pricing tests passed")
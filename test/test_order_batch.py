@@ -0,0 +1,120 @@
+"""
+Order Batch Tests
+Checks that cancel-all, close-all and basket calls run concurrently on the
+broker's order gateway within its worker and rate limits, that task groups run
+in order, and that results are aggregated into one report
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path to import utils modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['ORDER_GATEWAY_WORKERS_BATCHTEST'] = '4'
+os.environ['ORDER_GATEWAY_RATE_LIMIT_BATCHTEST'] = '1000 per second'
+os.environ['ORDER_GATEWAY_WORKERS_SLOWTEST'] = '10'
+os.environ['ORDER_GATEWAY_RATE_LIMIT_SLOWTEST'] = '20 per second'
+
+from utils.order_batch import OrderTask, cancel_orders, close_positions, run_order_batch
+from utils.order_gateway import PRIORITY_ENTRY, PRIORITY_EXIT, get_gateway_config
+
+
+class FakeBroker:
+    """Broker calls that take `delay` seconds and record how many run at once"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def call(self, key, result):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            self.calls.append((time.monotonic(), key))
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def test_config():
+    assert get_gateway_config('batchtest') == (4, 1000.0)
+    assert get_gateway_config('slowtest') == (10, 20.0)
+    os.environ['ORDER_RATE_LIMIT'] = '7 per second'
+    assert get_gateway_config('otherbroker')[1] == 7.0
+    del os.environ['ORDER_RATE_LIMIT']
+
+
+def test_concurrency_limit():
+    broker = FakeBroker(delay=0.1)
+    tasks = [OrderTask(i, lambda i=i: broker.call(i, ({}, 200))) for i in range(20)]
+    start = time.monotonic()
+    report = run_order_batch('batchtest', 'cancel_all', tasks)
+    elapsed = time.monotonic() - start
+    assert broker.max_running == 4
+    assert 0.45 <= elapsed < 1.5  # 20 calls of 0.1s, 4 at a time; one at a time takes 2s
+    assert report.succeeded == list(range(20)) and report.failed == []
+    assert report.summary()['total'] == 20
+
+
+def test_rate_limit():
+    broker = FakeBroker(delay=0.0)
+    tasks = [OrderTask(i, lambda i=i: broker.call(i, ({}, 200))) for i in range(40)]
+    start = time.monotonic()
+    run_order_batch('slowtest', 'cancel_all', tasks)
+    elapsed = time.monotonic() - start
+    # A burst of 20, then 20 more at 20 per second
+    assert 0.9 <= elapsed < 2.0
+
+
+def test_groups_run_in_order():
+    broker = FakeBroker(delay=0.05)
+    tasks = [OrderTask(f"entry{i}", lambda i=i: broker.call(f"entry{i}", ({}, 200)), PRIORITY_ENTRY)
+             for i in range(6)]
+    tasks += [OrderTask(f"exit{i}", lambda i=i: broker.call(f"exit{i}", ({}, 200)), PRIORITY_EXIT)
+              for i in range(6)]
+    # Basket style: one lane, BUY group before SELL group
+    tasks += [OrderTask(f"sell{i}", lambda i=i: broker.call(f"sell{i}", ({}, 200)), PRIORITY_ENTRY, group=4)
+              for i in range(3)]
+    tasks += [OrderTask(f"buy{i}", lambda i=i: broker.call(f"buy{i}", ({}, 200)), PRIORITY_ENTRY, group=3)
+              for i in range(3)]
+    report = run_order_batch('batchtest', 'flatten', tasks)
+    last_exit = max(at for at, key in broker.calls if key.startswith('exit'))
+    first_entry = min(at for at, key in broker.calls if key.startswith('entry'))
+    assert last_exit <= first_entry
+    last_buy = max(at for at, key in broker.calls if key.startswith('buy'))
+    assert last_buy <= min(at for at, key in broker.calls if key.startswith('sell'))
+    # The report keeps the order of the tasks
+    assert [result['key'] for result in report.results] == [task.key for task in tasks]
+
+
+def test_cancel_and_close_reports():
+    broker = FakeBroker(delay=0.01)
+    outcomes = {'1': ({'status': 'success'}, 200), '2': ({'status': 'error'}, 400),
+                '3': ConnectionError('timeout'), '4': ({'status': 'success'}, 200)}
+    canceled, failed = cancel_orders('batchtest', list(outcomes), lambda orderid: broker.call(orderid, outcomes[orderid]))
+    assert canceled == ['1', '4'] and failed == ['2', '3']
+
+    placed = {'SBIN': (None, {'status': 'success'}, '1001'), 'INFY': (None, {'status': 'error'}, None)}
+    payloads = [{'symbol': symbol, 'action': 'SELL', 'quantity': '1'} for symbol in placed]
+    report = close_positions('batchtest', payloads, lambda payload: placed[payload['symbol']])
+    assert report.succeeded == ['SBIN'] and report.failed == ['INFY']
+    assert report.results[0]['response'][2] == '1001'
+    assert run_order_batch('batchtest', 'close_all', []).summary()['total'] == 0
+
+
+if __name__ == "__main__":
+    test_config()
+    test_concurrency_limit()
+    test_rate_limit()
+    test_groups_run_in_order()
+    test_cancel_and_close_reports()
+    print("All order batch tests passed")
@@ -0,0 +1,111 @@
+"""
+Order Gateway Tests
+Checks that broker order calls are served by the gateway's persistent workers
+within its rate limit, cancels before exits before new orders, that identical
+cancels share one broker call, and the queue depth and wait time metrics
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path to import utils modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.order_gateway import (
+    PRIORITY_CANCEL, PRIORITY_ENTRY, PRIORITY_EXIT, OrderGateway, cancel_key, get_gateway_stats, get_order_gateway
+)
+
+
+def test_lanes_and_metrics():
+    gateway = OrderGateway('lanetest', workers=1, rate=1000)
+    release = threading.Event()
+    order = []
+
+    # Occupy the only worker, then queue one call per lane, new orders first
+    blocker = gateway.submit(release.wait)
+    time.sleep(0.05)
+    futures = [gateway.submit(order.append, 'entry', priority=PRIORITY_ENTRY),
+               gateway.submit(order.append, 'exit', priority=PRIORITY_EXIT),
+               gateway.submit(order.append, 'cancel', priority=PRIORITY_CANCEL)]
+    stats = gateway.get_stats()
+    assert stats['queue_depth'] == 3 and stats['in_flight'] == 1
+    assert stats['lanes']['entry']['queue_depth'] == 1
+
+    time.sleep(0.1)
+    release.set()
+    for future in [blocker] + futures:
+        future.result(timeout=5)
+    assert order == ['cancel', 'exit', 'entry']
+
+    stats = gateway.get_stats()
+    assert stats['queue_depth'] == 0 and stats['completed'] == 4
+    assert stats['lanes']['cancel']['wait_max_ms'] >= 100
+    gateway.stop()
+
+
+def test_rate_limit_and_persistent_workers():
+    gateway = OrderGateway('ratetest', workers=5, rate=20)
+    threads = set()
+
+    def place():
+        threads.add(threading.current_thread().name)
+        return 'ok'
+
+    start = time.monotonic()
+    futures = [gateway.submit(place) for _ in range(40)]
+    assert [future.result(timeout=10) for future in futures] == ['ok'] * 40
+    # A burst of 20, then 20 more at 20 per second
+    assert 0.9 <= time.monotonic() - start < 2.0
+    assert threads <= {f"OrderGateway-ratetest-{i}" for i in range(5)}
+    gateway.stop()
+
+
+def test_cancels_are_coalesced():
+    gateway = OrderGateway('coalescetest', workers=2, rate=1000)
+    calls = []
+
+    def cancel_order(orderid, auth):
+        calls.append(orderid)
+        time.sleep(0.1)
+        return {'status': 'success', 'orderid': orderid}, 200
+
+    futures = [gateway.submit(cancel_order, '42', 'token', priority=PRIORITY_CANCEL, key=cancel_key('42'))
+               for _ in range(5)]
+    assert all(future.result(timeout=5)[1] == 200 for future in futures)
+    assert calls == ['42'] and gateway.get_stats()['coalesced'] == 4
+
+    # Once done, the next cancel goes to the broker again
+    gateway.call(cancel_order, 42, 'token', priority=PRIORITY_CANCEL, key=cancel_key(42))
+    assert calls == ['42', 42]
+    gateway.stop()
+
+
+def test_errors_and_nested_calls():
+    gateway = get_order_gateway('nestedtest')
+    assert get_order_gateway('nestedtest') is gateway
+
+    def rejected():
+        raise ConnectionError('broker down')
+
+    try:
+        gateway.call(rejected)
+        assert False, "the broker error should reach the caller"
+    except ConnectionError:
+        pass
+
+    # A call running on a worker (close-all) may queue further calls (its orders)
+    def close_all():
+        return [gateway.call(lambda i=i: i * 2, priority=PRIORITY_EXIT) for i in range(gateway.workers * 2)]
+
+    assert gateway.call(close_all, priority=PRIORITY_EXIT) == [i * 2 for i in range(gateway.workers * 2)]
+    assert get_gateway_stats()['nestedtest']['failed'] == 1
+
+
+if __name__ == "__main__":
+    test_lanes_and_metrics()
+    test_rate_limit_and_persistent_workers()
+    test_cancels_are_coalesced()
+    test_errors_and_nested_calls()
+    print("All order gateway tests passed")
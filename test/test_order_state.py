@@ -0,0 +1,202 @@
+"""
+Order State Cache Tests
+Checks that order, trade and position books are downloaded once per staleness
+window and shared by concurrent readers, and that orders sent through OpenAlgo
+and broker order-update events make the next read go to the broker
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+import types
+
+# The services check the analyzer mode setting in this database
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='test_order_state_'), 'openalgo.db')}"
+
+# Add parent directory to path to import utils and services modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.order_state import OrderStateCache, broker_of, copy_records
+
+BROKER_MODULE = 'broker.statetest.api.order_api'
+
+
+class FakeBroker:
+    """Broker API functions that count calls, registered as broker.statetest"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = {'orderbook': 0, 'positions': 0}
+        self.positions = [{'tradingsymbol': 'SBIN-EQ', 'exchange': 'NSE', 'producttype': 'MIS', 'netqty': '10'}]
+
+        def get_order_book(auth):
+            self.calls['orderbook'] += 1
+            time.sleep(self.delay)
+            return {'status': 'success', 'data': [{'orderid': str(i), 'status': 'open'} for i in range(50)]}
+
+        def get_positions(auth):
+            self.calls['positions'] += 1
+            time.sleep(self.delay)
+            return {'status': 'success', 'data': [dict(p) for p in self.positions]}
+
+        for fetch in (get_order_book, get_positions):
+            fetch.__module__ = BROKER_MODULE
+        self.get_order_book = get_order_book
+        self.get_positions = get_positions
+
+
+def test_concurrent_readers_share_one_request():
+    broker = FakeBroker(delay=0.2)
+    cache = OrderStateCache(max_age=5.0)
+    results = []
+
+    def reader():
+        results.append(cache.snapshot('orderbook', broker.get_order_book, 'token').data)
+
+    threads = [threading.Thread(target=reader) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert broker.calls['orderbook'] == 1
+    assert len(results) == 20 and all(r is results[0] for r in results)
+    stats = cache.get_stats()
+    assert stats['fetches'] == 1 and stats['coalesced'] == 19
+
+    # Within the window every reader is served from the snapshot
+    for _ in range(50):
+        cache.snapshot('orderbook', broker.get_order_book, 'token')
+    assert broker.calls['orderbook'] == 1
+
+    # Books are per session and per book
+    cache.snapshot('orderbook', broker.get_order_book, 'other-token')
+    cache.snapshot('positions', broker.get_positions, 'token')
+    assert broker.calls == {'orderbook': 2, 'positions': 1}
+
+
+def test_staleness_and_invalidation():
+    broker = FakeBroker()
+    cache = OrderStateCache(max_age=0.1, stream_max_age=10.0)
+    assert broker_of(broker.get_positions) == 'statetest'
+
+    cache.snapshot('positions', broker.get_positions, 'token')
+    cache.snapshot('positions', broker.get_positions, 'token')
+    assert broker.calls['positions'] == 1
+    time.sleep(0.15)
+    cache.snapshot('positions', broker.get_positions, 'token')
+    assert broker.calls['positions'] == 2
+
+    # An order sent through OpenAlgo: the next read goes to the broker
+    broker.positions[0]['netqty'] = '20'
+    cache.invalidate('statetest', 'token')
+    assert cache.snapshot('positions', broker.get_positions, 'token').data['data'][0]['netqty'] == '20'
+    assert broker.calls['positions'] == 3
+
+    # A request in flight while an order is placed is returned but not kept
+    broker.delay = 0.2
+    reader = threading.Thread(target=lambda: cache.snapshot('positions', broker.get_positions, 'token', max_age=0))
+    reader.start()
+    time.sleep(0.05)
+    cache.invalidate(types.ModuleType(BROKER_MODULE), 'token')
+    reader.join()
+    broker.delay = 0.0
+    cache.snapshot('positions', broker.get_positions, 'token')
+    assert broker.calls['positions'] == 5
+
+    # With a live order stream books are kept longer, and every event invalidates them
+    cache.set_order_stream('statetest', 'token', True)
+    time.sleep(0.15)
+    cache.snapshot('positions', broker.get_positions, 'token')
+    assert broker.calls['positions'] == 5
+    cache.invalidate('statetest', 'token')
+    cache.snapshot('positions', broker.get_positions, 'token')
+    assert broker.calls['positions'] == 6
+
+
+def test_errors_are_not_shared_and_views_are_built_once():
+    cache = OrderStateCache(max_age=5.0)
+    calls = []
+
+    def get_trade_book(auth):
+        calls.append(auth)
+        return {'status': 'error', 'message': 'Session expired'} if len(calls) == 1 else {'data': [{'qty': 1}]}
+    get_trade_book.__module__ = BROKER_MODULE
+
+    assert cache.snapshot('tradebook', get_trade_book, 'token').data['status'] == 'error'
+    snapshot = cache.snapshot('tradebook', get_trade_book, 'token')
+    assert len(calls) == 2 and snapshot.data == {'data': [{'qty': 1}]}
+
+    builds = []
+
+    def build(data):
+        builds.append(1)
+        data['data'][0]['qty'] = 99  # Mapping functions may modify their input
+        return data['data']
+
+    rows = snapshot.view('tradebook', build)
+    assert snapshot.view('tradebook', build) is rows and len(builds) == 1
+    assert snapshot.data == {'data': [{'qty': 1}]}
+    copied = copy_records(rows)
+    copied[0]['qty'] = 0
+    assert rows[0]['qty'] == 99
+
+
+def install_fake_broker(broker):
+    """Register broker.statetest modules the services import by name"""
+    api = types.ModuleType(BROKER_MODULE)
+    api.get_order_book = broker.get_order_book
+    api.get_positions = broker.get_positions
+    mapping = types.ModuleType('broker.statetest.mapping.order_data')
+    mapping.map_order_data = lambda order_data: order_data['data']
+    mapping.calculate_order_statistics = lambda orders: {'total_open_orders': len(orders)}
+    mapping.transform_order_data = lambda orders: orders
+    mapping.map_position_data = lambda positions: positions['data']
+    mapping.transform_positions_data = lambda positions: positions
+    sys.modules[BROKER_MODULE] = api
+    sys.modules['broker.statetest.mapping.order_data'] = mapping
+
+
+def test_services_read_the_shared_books():
+    from database.settings_db import init_db
+    from utils import order_state
+    from utils.order_state import get_cached_book, invalidate_books
+
+    init_db()
+
+    order_state._order_state = OrderStateCache(max_age=5.0)
+    broker = FakeBroker()
+    install_fake_broker(broker)
+    from services.orderbook_service import get_orderbook
+    from services.positionbook_service import get_positionbook
+
+    # 50 status polls of working orders: one orderbook download
+    for _ in range(50):
+        success, response, status_code = get_orderbook(auth_token='token', broker='statetest')
+        assert success and len(response['data']['orders']) == 50
+        response['data']['orders'][0]['average_price'] = 1.0  # Callers get their own rows
+    assert broker.calls['orderbook'] == 1
+    assert 'average_price' not in get_orderbook(auth_token='token', broker='statetest')[1]['data']['orders'][0]
+
+    # Smart orders (broker get_open_position) and the positionbook share the positions snapshot
+    assert get_cached_book('positions', broker.get_positions, 'token')['data'][0]['netqty'] == '10'
+    success, response, _ = get_positionbook(auth_token='token', broker='statetest')
+    assert success and response['data'][0]['netqty'] == '10'
+    assert broker.calls['positions'] == 1
+
+    # Placing an order through a service invalidates the session's books
+    broker.positions[0]['netqty'] = '0'
+    invalidate_books(types.ModuleType(BROKER_MODULE), 'token')
+    assert get_positionbook(auth_token='token', broker='statetest')[1]['data'][0]['netqty'] == '0'
+    assert broker.calls['positions'] == 2
+    order_state._order_state = None
+
+
+if __name__ == "__main__":
+    test_concurrent_readers_share_one_request()
+    test_staleness_and_invalidation()
+    test_errors_are_not_shared_and_views_are_built_once()
+    test_services_read_the_shared_books()
+    print("All order state tests passed")
@@ -0,0 +1,112 @@
+"""
+Quote Board Tests
+Checks the shared-memory quote board: publishing, merging partial ticks, slot
+exhaustion, remapping after the board is recreated and torn-read protection
+against a writer in another process
+"""
+
+import sys
+import os
+import multiprocessing
+import tempfile
+
+# Add parent directory to path to import utils modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.quote_board import QuoteBoard, QuoteBoardWriter, KEY_SIZE
+
+
+def board_path():
+    return os.path.join(tempfile.mkdtemp(prefix='test_quote_board_'), 'board')
+
+
+def test_publish_and_read():
+    path = board_path()
+    writer = QuoteBoardWriter(path, slots=8)
+    board = QuoteBoard(path)
+    assert board.get('SBIN', 'NSE') is None
+
+    writer.update('SBIN', 'NSE', {'ltp': 812.5, 'volume': 1200})
+    quote = board.get('SBIN', 'NSE')
+    assert quote['ltp'] == 812.5 and quote['volume'] == 1200 and quote['timestamp'] > 0
+    assert board.get_ltp('SBIN', 'NSE') == 812.5
+    assert board.get_ltp('SBIN', 'BSE') is None
+
+    # LTP ticks keep the last bid/ask/volume, depth ticks supply the top of book
+    writer.update('SBIN', 'NSE', {'ltp': 813.0, 'depth': {'buy': [{'price': 812.95}], 'sell': [{'price': 813.05}]}})
+    writer.update('SBIN', 'NSE', {'ltp': 813.1})
+    quote = board.get('SBIN', 'NSE')
+    assert (quote['ltp'], quote['bid'], quote['ask'], quote['volume']) == (813.1, 812.95, 813.05, 1200)
+
+    writer.update('NIFTY', 'NSE_INDEX', {'ltp': 24000.0})
+    assert sorted(board.symbols()) == [('NIFTY', 'NSE_INDEX'), ('SBIN', 'NSE')]
+    board.close()
+    writer.close()
+
+
+def test_full_board_and_long_keys():
+    path = board_path()
+    writer = QuoteBoardWriter(path, slots=2)
+    assert writer.update('A', 'NSE', {'ltp': 1})
+    assert not writer.update('X' * KEY_SIZE, 'NSE', {'ltp': 1})
+    assert writer.update('B', 'NSE', {'ltp': 2})
+    assert not writer.update('C', 'NSE', {'ltp': 3})
+    assert writer.update('A', 'NSE', {'ltp': 4})
+    assert writer.get_stats()['dropped'] == 2 and writer.get_stats()['used'] == 2
+    assert QuoteBoard(path).get_ltp('A', 'NSE') == 4
+    writer.close()
+
+
+def test_recreated_board_is_remapped():
+    path = board_path()
+    writer = QuoteBoardWriter(path, slots=4)
+    writer.update('SBIN', 'NSE', {'ltp': 800})
+    writer.update('INFY', 'NSE', {'ltp': 1500})
+    board = QuoteBoard(path)
+    assert board.get_ltp('INFY', 'NSE') == 1500
+
+    # A restarted writer gives instruments different slots and a different size
+    writer.close()
+    assert board.get_ltp('INFY', 'NSE') is None
+    writer = QuoteBoardWriter(path, slots=16)
+    writer.update('INFY', 'NSE', {'ltp': 1510})
+    assert board.get_ltp('INFY', 'NSE') == 1510
+    assert board.get_ltp('SBIN', 'NSE') is None
+    board.close()
+    writer.close()
+
+
+def _write_consistent_quotes(path, count):
+    writer = QuoteBoardWriter(path, slots=4)
+    for i in range(1, count + 1):
+        # bid, ask and volume are all derived from ltp so a torn read is detectable
+        writer.update('SBIN', 'NSE', {'ltp': float(i), 'bid': i - 0.5, 'ask': i + 0.5, 'volume': i})
+
+
+def test_reader_never_sees_torn_slots():
+    path = board_path()
+    writer = multiprocessing.Process(target=_write_consistent_quotes, args=(path, 200000))
+    writer.start()
+    board = None
+    reads = 0
+    while writer.is_alive() or reads == 0:
+        if board is None:
+            try:
+                board = QuoteBoard(path)
+            except (FileNotFoundError, ValueError):
+                continue
+        quote = board.get('SBIN', 'NSE')
+        if quote:
+            reads += 1
+            assert quote['bid'] == quote['ltp'] - 0.5 and quote['ask'] == quote['ltp'] + 0.5
+            assert quote['volume'] == int(quote['ltp'])
+    writer.join()
+    assert writer.exitcode == 0 and reads > 0
+
+
+if __name__ == "__main__":
+    test_publish_and_read()
+    test_full_board_and_long_keys()
+    test_recreated_board_is_remapped()
+    test_reader_never_sees_torn_slots()
+    print("All quote board tests passed")
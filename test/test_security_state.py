@@ -0,0 +1,110 @@
+"""
+Security State Tests
+Checks that IP bans are checked in memory and kept in sync with ban/unban, that
+ban expiry is handled through the expiry heap, and that 404 and invalid API key
+counts are aggregated in memory and merged into logs.db on flush
+"""
+
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+# Logs and settings databases of the test
+_db_dir = tempfile.mkdtemp(prefix='test_security_state_')
+os.environ['LOGS_DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'logs.db')}"
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'openalgo.db')}"
+os.environ['SECURITY_TRACKER_FLUSH_MS'] = '60000'
+
+# Add parent directory to path to import database modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.security_state import BanList, HitCounter
+
+
+def test_ban_list_expiry():
+    bans = BanList()
+    now = time.time()
+    in_a_minute = datetime.utcnow() + timedelta(minutes=1)
+    bans.load([('1.1.1.1', None), ('2.2.2.2', in_a_minute)])
+    assert bans.is_banned('1.1.1.1') and bans.is_banned('2.2.2.2')
+    assert not bans.is_banned('3.3.3.3')
+
+    # Expired bans are dropped when checked or purged
+    assert not bans.is_banned('2.2.2.2', now=now + 120)
+    assert len(bans) == 1 and bans.drain_expired() == ['2.2.2.2']
+
+    # A longer ban of the same IP outlives the stale heap entry of the first one
+    bans.add('4.4.4.4', in_a_minute)
+    bans.add('4.4.4.4', in_a_minute + timedelta(hours=1))
+    bans.purge(now=now + 120)
+    assert bans.is_banned('4.4.4.4', now=now + 120) and bans.drain_expired() == []
+
+    assert bans.remove('1.1.1.1') and not bans.is_banned('1.1.1.1')
+    assert not bans.remove('1.1.1.1')
+
+
+def test_hit_counter_aggregates():
+    counter = HitCounter(max_items=3)
+    for i in range(10):
+        counter.add('5.5.5.5', f"/wp-admin/{i % 5}")
+    counter.add('6.6.6.6')
+
+    hits = counter.drain()
+    assert hits['5.5.5.5'].count == 10 and hits['5.5.5.5'].items == ['/wp-admin/2', '/wp-admin/3', '/wp-admin/4']
+    assert hits['6.6.6.6'].count == 1 and hits['6.6.6.6'].items == []
+    assert len(counter) == 0 and counter.drain() == {}
+
+
+def test_requests_do_not_touch_logs_db():
+    from database.settings_db import init_db
+    from database.traffic_db import (
+        IPBan, Error404Tracker, InvalidAPIKeyTracker, flush_security_trackers, init_logs_db, logs_engine
+    )
+
+    init_db()
+    init_logs_db()
+    assert IPBan.ban_ip('7.7.7.7', 'Manual ban', duration_hours=1, created_by='manual')
+    assert IPBan.ban_ip('8.8.8.8', 'Manual ban', permanent=True, created_by='manual')
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(logs_engine, 'before_cursor_execute', listener)
+    try:
+        assert IPBan.is_ip_banned('7.7.7.7') and IPBan.is_ip_banned('8.8.8.8')
+        for _ in range(100):
+            assert not IPBan.is_ip_banned('10.0.0.1')
+        for i in range(30):
+            assert Error404Tracker.track_404('9.9.9.9', f"/.env{i % 2}")
+        for _ in range(5):
+            assert InvalidAPIKeyTracker.track_invalid_api_key('9.9.9.9', 'abcd1234')
+        # A banned IP is not counted
+        assert not Error404Tracker.track_404('8.8.8.8', '/admin')
+        assert statements == []
+    finally:
+        event.remove(logs_engine, 'before_cursor_execute', listener)
+
+    assert Error404Tracker.query.filter_by(ip_address='9.9.9.9').first() is None
+    flush_security_trackers()
+    tracker = Error404Tracker.query.filter_by(ip_address='9.9.9.9').one()
+    assert tracker.error_count == 30 and tracker.paths_attempted == '["/.env0", "/.env1"]'
+    assert InvalidAPIKeyTracker.query.filter_by(ip_address='9.9.9.9').one().attempt_count == 5
+
+    # Later counts add to the same row; the dashboard reads flush first
+    Error404Tracker.track_404('9.9.9.9', '/.env2')
+    suspicious = Error404Tracker.get_suspicious_ips(min_errors=1)
+    assert [(t.ip_address, t.error_count) for t in suspicious] == [('9.9.9.9', 31)]
+
+    # Unbanning updates the in-memory list
+    assert IPBan.unban_ip('7.7.7.7')
+    assert not IPBan.is_ip_banned('7.7.7.7') and IPBan.is_ip_banned('8.8.8.8')
+
+
+if __name__ == "__main__":
+    test_ban_list_expiry()
+    test_hit_counter_aggregates()
+    test_requests_do_not_touch_logs_db()
+    print("All security state tests passed")
@@ -0,0 +1,141 @@
+"""
+Symbol Table Tests
+Checks the columnar symbol store behind the broker symbol cache: point lookups,
+search, the derivatives index and the lookup statistics
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import database modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.symbol_table import SymbolData, SymbolTable, atm_strike_index
+from database.token_db_enhanced import BrokerSymbolCache
+
+# symbol, brsymbol, name, exchange, brexchange, token, expiry, strike, lotsize, instrumenttype, tick_size
+ROWS = [
+    ('SBIN', 'SBIN-EQ', 'SBIN', 'NSE', 'NSE', '3045', None, -1.0, 1, 'EQ', 0.05),
+    ('INFY', 'INFY-EQ', 'INFY', 'NSE', 'NSE', '1594', None, -1.0, 1, 'EQ', 0.05),
+    ('SBIN', 'SBIN', 'SBIN', 'BSE', 'BSE', '500112', None, -1.0, 1, 'EQ', 0.05),
+    ('NIFTY27FEB25FUT', 'NIFTY25FEBFUT', 'NIFTY', 'NFO', 'NFO', '35001', '27-FEB-25', -1.0, 75, 'FUT', 0.05),
+    ('NIFTY30JAN2523500CE', 'NIFTY25JAN23500CE', 'NIFTY', 'NFO', 'NFO', '35002', '30-JAN-25', 23500.0, 75, 'CE', 0.05),
+    ('NIFTY30JAN2523000PE', 'NIFTY25JAN23000PE', 'NIFTY', 'NFO', 'NFO', '35003', '30-JAN-25', 23000.0, 75, 'PE', 0.05),
+    ('NIFTY30JAN2523000CE', 'NIFTY25JAN23000CE', 'NIFTY', 'NFO', 'NFO', '35004', '30-JAN-25', 23000.0, 75, 'CE', 0.05),
+    ('NIFTY06FEB2523000CE', 'NIFTY2520623000CE', 'NIFTY', 'NFO', 'NFO', '35005', '06-FEB-25', 23000.0, 75, 'CE', 0.05),
+    ('BANKNIFTY30JAN2548000CE', 'BANKNIFTY25JAN48000CE', 'BANKNIFTY', 'NFO', 'NFO', '35006', '30-JAN-25',
+     48000.0, 30, 'CE', 0.05),
+]
+
+
+def test_point_lookups():
+    table = SymbolTable(ROWS)
+    assert table.size == len(ROWS)
+
+    row = table.find_symbol('SBIN', 'NSE')
+    assert table.get_token(row) == '3045'
+    assert table.get_brsymbol(row) == 'SBIN-EQ'
+    assert table.get_token(table.find_symbol('SBIN', 'BSE')) == '500112'
+
+    assert table.get_symbol(table.find_token('35002', 'NFO')) == 'NIFTY30JAN2523500CE'
+    assert table.get_symbol(table.find_brsymbol('INFY-EQ', 'NSE')) == 'INFY'
+    assert table.get_brexchange(table.find_symbol('INFY', 'NSE')) == 'NSE'
+
+    assert table.find_symbol('SBIN', 'NFO') == -1
+    assert table.find_symbol('TCS', 'NSE') == -1
+    assert table.find_symbol('SBIN', 'MCX') == -1
+    assert table.find_token('3045', 'BSE') == -1
+    assert table.get_symbol(table.find_token_any('500112')) == 'SBIN'
+
+
+def test_get_row():
+    table = SymbolTable(ROWS)
+    data = table.get_row(table.find_symbol('NIFTY30JAN2523500CE', 'NFO'))
+    assert data == SymbolData('NIFTY30JAN2523500CE', 'NIFTY25JAN23500CE', 'NIFTY', 'NFO', 'NFO', '35002',
+                              '30-JAN-25', 23500.0, 75, 'CE', 0.05)
+    equity = table.get_row(table.find_symbol('SBIN', 'NSE'))
+    assert equity.expiry is None and equity.lotsize == 1
+
+
+def test_search():
+    table = SymbolTable(ROWS)
+    found = {table.get_symbol(row) for row in table.search('sbin')}
+    assert found == {'SBIN'}
+    assert len(table.search('sbin')) == 2
+    assert len(table.search('SBIN', exchange='BSE')) == 1
+    assert len(table.search('NIFTY', exchange='NFO', limit=3)) == 3
+    assert table.search('NIFTY', exchange='CDS') == []
+
+
+def test_derivatives_index():
+    table = SymbolTable(ROWS)
+    assert table.expiry_dates('NIFTY', 'NFO') == ['30-JAN-25', '06-FEB-25', '27-FEB-25']
+    assert table.expiry_dates('NIFTY', 'NFO', 'FUT') == ['27-FEB-25']
+    assert table.expiry_dates('NIFTY', 'BFO') == []
+
+    chain = [table.get_symbol(row) for row in table.contract_rows('NIFTY', '30-JAN-25', 'NFO')]
+    assert chain[-1] == 'NIFTY30JAN2523500CE'
+    assert set(chain[:2]) == {'NIFTY30JAN2523000CE', 'NIFTY30JAN2523000PE'}
+    assert table.strikes('NIFTY', '30-JAN-25', 'NFO') == [23000.0, 23500.0]
+
+    row = table.find_contract('NIFTY', '30-JAN-25', 23000, 'PE', 'NFO')
+    assert table.get_token(row) == '35003'
+    assert table.find_contract('NIFTY', '30-JAN-25', 23100, 'PE', 'NFO') == -1
+
+
+def test_chain_window():
+    assert atm_strike_index([23000.0, 23500.0, 24000.0], 23740) == 1
+    assert atm_strike_index([23000.0, 23500.0, 24000.0], 23250) == 0
+    assert atm_strike_index([23000.0, 23500.0, 24000.0], 30000) == 2
+    assert atm_strike_index([23000.0, 23500.0, 24000.0], 100) == 0
+
+    table = SymbolTable(ROWS)
+    atm, rows = table.chain_window('NIFTY', '30-JAN-25', 'NFO', 23400.0)
+    assert atm == 23500.0 and len(rows) == 3
+
+    atm, rows = table.chain_window('NIFTY', '30-JAN-25', 'NFO', 22000.0, strike_count=0)
+    assert atm == 23000.0
+    assert {table.get_symbol(row) for row in rows} == {'NIFTY30JAN2523000CE', 'NIFTY30JAN2523000PE'}
+
+    atm, rows = table.chain_window('NIFTY', '13-FEB-25', 'NFO', 23000.0, strike_count=5)
+    assert atm is None and len(rows) == 0
+
+    cache = BrokerSymbolCache()
+    cache.table = table
+    atm, contracts = cache.get_option_chain_window('NIFTY', '30-JAN-25', 'NFO', 23600.0, strike_count=1)
+    assert atm == 23500.0 and [c.strike for c in contracts] == [23000.0, 23000.0, 23500.0]
+    assert cache.get_strikes('NIFTY', '30-JAN-25', 'NFO', 'PE') == [23000.0]
+
+
+def test_empty_table():
+    table = SymbolTable([])
+    assert table.find_symbol('SBIN', 'NSE') == -1
+    assert table.find_token_any('3045') == -1
+    assert table.search('SBIN') == []
+    assert table.expiry_dates('NIFTY', 'NFO') == []
+
+
+def test_cache_stats():
+    cache = BrokerSymbolCache()
+    cache.table = SymbolTable(ROWS)
+    assert cache.get_token('SBIN', 'NSE') == '3045'
+    assert cache.get_oa_symbol('NIFTY25JAN23500CE', 'NFO') == 'NIFTY30JAN2523500CE'
+    assert cache.get_token('TCS', 'NSE') is None
+    assert cache.get_option_symbol('NIFTY', '06-FEB-25', 23000, 'CE', 'NFO').token == '35005'
+
+    stats = cache.stats.to_dict()
+    assert stats['hits'] == 2 and stats['misses'] == 1
+    latency = stats['lookup_latency_us']
+    assert latency['p50'] is not None and latency['p50'] <= latency['max']
+    assert cache.table.memory_bytes() > 0
+
+
+if __name__ == "__main__":
+    test_point_lookups()
+    test_get_row()
+    test_search()
+    test_derivatives_index()
+    test_chain_window()
+    test_empty_table()
+    test_cache_stats()
+    print("All symbol table tests passed")
@@ -0,0 +1,144 @@
+"""
+Telegram Alert Dispatch Tests
+Checks that order alerts are queued without blocking, batched per chat into
+digests, paced per chat and overall, and that rendered charts are cached and
+rendered in the worker process
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+# The alert service imports the telegram and auth databases
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='test_telegram_dispatch_'), 'openalgo.db')}")
+
+# Add parent directory to path to import services modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.telegram_alert_service import MAX_MESSAGE_LENGTH, Alert, AlertDispatcher
+from services.telegram_chart_service import ChartCache, ChartRenderError, ChartWorker
+
+
+class Recorder:
+    """deliver() of the dispatcher, recording (time, telegram_id, text)"""
+
+    def __init__(self):
+        self.sent = []
+
+    def __call__(self, telegram_id, text):
+        self.sent.append((time.monotonic(), telegram_id, text))
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_burst_becomes_one_digest():
+    deliver = Recorder()
+    dispatcher = AlertDispatcher(deliver, batch_window=0.1, max_delay=2.0, digest_after=5)
+
+    # 40 legs arriving over 0.4s, then one alert for another chat
+    for i in range(40):
+        dispatcher.submit(lambda i=i: Alert(1, f"📈 *Order Placed*\nleg {i} details", f"✅ BUY leg {i}"))
+        time.sleep(0.01)
+    dispatcher.submit(lambda: Alert(2, "❌ *Order Cancelled*"))
+    dispatcher.submit(lambda: None)  # Users without a linked chat are skipped
+
+    assert wait_for(lambda: len(deliver.sent) == 2)
+    messages = {telegram_id: text for _, telegram_id, text in deliver.sent}
+    assert messages[1].startswith("📬 *40 Alerts*") and messages[1].count("✅ BUY leg") == 40
+    assert messages[2] == "❌ *Order Cancelled*"
+    stats = dispatcher.get_stats()
+    assert stats['alerts_sent'] == 41 and stats['messages_sent'] == 2
+    dispatcher.flush()
+
+
+def test_compose_keeps_messages_within_limit():
+    dispatcher = AlertDispatcher(Recorder(), digest_after=5)
+    few = [Alert(1, f"alert {i}\ndetails") for i in range(3)]
+    assert dispatcher.compose(few) == ["📬 *3 Alerts*\n\nalert 0\ndetails\n\nalert 1\ndetails\n\nalert 2\ndetails"]
+
+    many = [Alert(1, "x" * 300, "summary " + "y" * 200) for _ in range(50)]
+    messages = dispatcher.compose(many)
+    assert len(messages) > 1 and all(len(message) <= MAX_MESSAGE_LENGTH for message in messages)
+    assert sum(message.count("summary") for message in messages) == 50
+
+
+def test_pacing_and_overflow():
+    deliver = Recorder()
+    dispatcher = AlertDispatcher(deliver, batch_window=0.01, max_delay=0.01, chat_interval=0.3, rate=1000)
+    dispatcher.submit(lambda: Alert(1, "first"))
+    assert wait_for(lambda: len(deliver.sent) == 1)
+    dispatcher.submit(lambda: Alert(1, "second"))
+    assert wait_for(lambda: len(deliver.sent) == 2)
+    # The second message to the same chat waits for the chat interval
+    assert deliver.sent[1][0] - deliver.sent[0][0] >= 0.25
+    dispatcher.flush()
+    assert not dispatcher.submit(lambda: Alert(1, "after shutdown"))
+
+    full = AlertDispatcher(deliver, max_queue_size=2)
+    full._thread = object()  # Fill the queue before the dispatcher thread exists
+    assert [full.submit(lambda: None) for _ in range(4)] == [True, True, False, False]
+    assert full.get_stats()['dropped'] == 2
+
+
+def test_order_alerts_are_queued():
+    from services import telegram_alert_service as alerts
+
+    service = alerts.TelegramAlertService()
+    deliver = Recorder()
+    service.dispatcher = AlertDispatcher(deliver, batch_window=0.1)
+    lookups = []
+    original = alerts.get_username_by_apikey, alerts.get_telegram_user_by_username
+    alerts.get_username_by_apikey = lambda api_key: lookups.append(api_key) or 'trader'
+    alerts.get_telegram_user_by_username = lambda username: {'telegram_id': 99, 'notifications_enabled': True}
+
+    try:
+        order = {'symbol': 'NIFTY25JAN24000CE', 'action': 'BUY', 'quantity': '75', 'exchange': 'NFO'}
+        for i in range(8):
+            response = {'status': 'success', 'orderid': f"10{i}", 'mode': 'live'}
+            service.send_order_alert('placeorder', order, response, 'key')
+        service.send_order_alert('optionsmultiorder', order, {'status': 'success'}, 'key')
+        assert wait_for(lambda: len(deliver.sent) == 1)
+    finally:
+        alerts.get_username_by_apikey, alerts.get_telegram_user_by_username = original
+
+    _, telegram_id, text = deliver.sent[0]
+    assert telegram_id == 99 and text.startswith("📬 *9 Alerts*")
+    assert "✅ 📈 *Order Placed* BUY 75 `NIFTY25JAN24000CE` (107)" in text
+    assert len(lookups) == 9
+    service.dispatcher.flush()
+
+
+def test_chart_cache_and_worker():
+    cache = ChartCache(max_size=2)
+    cache.put('a', b'png-a')
+    cache.put('b', b'png-b')
+    assert cache.get('a') == b'png-a'
+    cache.put('c', b'png-c')  # Evicts the least recently used chart
+    assert cache.get('b') is None and cache.get('c') == b'png-c'
+    assert cache.hits == 2 and cache.misses == 1
+
+    # Errors raised while rendering reach the caller; the worker keeps serving
+    worker = ChartWorker()
+    for _ in range(2):
+        try:
+            worker.render('intraday', None, 'SBIN', 5, '5m', timeout=60)
+            assert False, "rendering without data should fail"
+        except ChartRenderError as e:
+            assert 'Error' in str(e)
+    assert worker._process.poll() is None
+    worker.stop()
+
+
+if __name__ == "__main__":
+    test_burst_becomes_one_digest()
+    test_compose_keeps_messages_within_limit()
+    test_pacing_and_overflow()
+    test_order_alerts_are_queued()
+    test_chart_cache_and_worker()
+    print("All telegram dispatch tests passed")
@@ -0,0 +1,123 @@
+"""
+Tick Wire Format Tests
+Round-trip checks for the compact and JSON tick encodings used on the ZeroMQ bus
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import websocket_proxy modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from websocket_proxy.tick_codec import (
+    FRAME_MAGIC, TICK_FORMAT_COMPACT, TICK_FORMAT_JSON, TopicTable, decode_tick, encode_tick, tick_body
+)
+
+
+QUOTE_TICK = {
+    'symbol': 'NIFTY28NOV2424000CE',
+    'exchange': 'NFO',
+    'mode': 'quote',
+    'ltp': 152.35,
+    'ltt': 1731651234000,
+    'timestamp': 1731651234123,
+    'volume': 2451300,
+    'open': 140.0,
+    'high': 160.5,
+    'low': 131.05,
+    'close': 148.9,
+    'oi': 5421975,
+}
+
+
+def test_compact_roundtrip_preserves_types():
+    """Floats stay floats and ints stay ints"""
+    decoded = decode_tick(encode_tick(QUOTE_TICK, TICK_FORMAT_COMPACT))
+    assert decoded == QUOTE_TICK
+    assert isinstance(decoded['volume'], int)
+    assert isinstance(decoded['open'], float)
+
+
+def test_compact_roundtrip_with_depth():
+    tick = dict(QUOTE_TICK)
+    tick['depth'] = {'buy': [{'price': 152.3, 'quantity': 75, 'orders': 2}], 'sell': []}
+    tick['ltp'] = '152.35'  # Some brokers publish numbers as strings
+    tick['volume'] = None
+    payload = encode_tick(tick, TICK_FORMAT_COMPACT)
+    assert payload[0] == FRAME_MAGIC
+    assert decode_tick(payload) == tick
+
+
+def test_compact_falls_back_to_json_for_unencodable_ticks():
+    """Values orjson rejects are still published, as a plain JSON frame"""
+    tick = dict(QUOTE_TICK, huge=2 ** 70)
+    payload = encode_tick(tick, TICK_FORMAT_COMPACT)
+    assert payload[:1] == b'{'
+    assert decode_tick(payload) == tick
+
+
+def test_unknown_schema_version_rejected():
+    payload = bytearray(encode_tick(QUOTE_TICK, TICK_FORMAT_COMPACT))
+    payload[1] = 99
+    try:
+        decode_tick(bytes(payload))
+    except ValueError:
+        return
+    assert False, "Expected ValueError for unsupported schema version"
+
+
+def test_compact_frame_smaller_than_json():
+    compact = encode_tick(QUOTE_TICK, TICK_FORMAT_COMPACT)
+    as_json = encode_tick(QUOTE_TICK, TICK_FORMAT_JSON)
+    assert len(compact) < len(as_json)
+
+
+def test_json_fallback_decodes():
+    """Adapters that still publish JSON remain readable by the proxy"""
+    payload = b'{"ltp": 101.5, "symbol": "RELIANCE"}'
+    assert decode_tick(payload) == {'ltp': 101.5, 'symbol': 'RELIANCE'}
+
+
+def test_tick_body_is_spliceable_json():
+    """The raw body of either format is a JSON document clients can parse"""
+    import json
+    for tick_format in (TICK_FORMAT_COMPACT, TICK_FORMAT_JSON):
+        body = tick_body(encode_tick(QUOTE_TICK, tick_format))
+        message = '{"type": "market_data", "data": ' + body + '}'
+        assert json.loads(message)['data'] == QUOTE_TICK
+
+
+def test_tick_body_rejects_unknown_schema_version():
+    payload = bytearray(encode_tick(QUOTE_TICK, TICK_FORMAT_COMPACT))
+    payload[1] = 99
+    try:
+        tick_body(bytes(payload))
+    except ValueError:
+        return
+    assert False, "Expected ValueError for unsupported schema version"
+
+
+def test_topic_table_formats():
+    table = TopicTable()
+    assert table.parse(b'NSE_RELIANCE_LTP') == ('unknown', 'NSE', 'RELIANCE', 1)
+    assert table.parse(b'NSE_INDEX_NIFTY_QUOTE') == ('unknown', 'NSE_INDEX', 'NIFTY', 2)
+    assert table.parse(b'zerodha_NFO_NIFTY28NOV2424000CE_QUOTE') == ('zerodha', 'NFO', 'NIFTY28NOV2424000CE', 2)
+    assert table.parse(b'NSE_RELIANCE_BOGUS') is None
+    assert table.parse(b'BAD') is None
+    # Repeat lookups are served from the intern table
+    assert len(table) == 5
+    table.parse(b'NSE_RELIANCE_LTP')
+    assert len(table) == 5
+
+
+if __name__ == "__main__":
+    test_compact_roundtrip_preserves_types()
+    test_compact_roundtrip_with_depth()
+    test_compact_falls_back_to_json_for_unencodable_ticks()
+    test_unknown_schema_version_rejected()
+    test_compact_frame_smaller_than_json()
+    test_json_fallback_decodes()
+    test_tick_body_is_spliceable_json()
+    test_tick_body_rejects_unknown_schema_version()
+    test_topic_table_formats()
+    print("All tick codec tests passed")
@@ -0,0 +1,158 @@
+"""
+Tick Recorder Tests
+Checks recording bus frames to tick files, reading them back by time, recovery
+of a file cut short by a crash, Parquet export and the replay adapter
+"""
+
+import sys
+import os
+import importlib.util
+import tempfile
+import time
+
+import zmq
+
+# Add parent directory to path to import websocket_proxy modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from websocket_proxy.tick_codec import TICK_FORMAT_COMPACT, TICK_FORMAT_JSON, decode_tick, encode_tick
+from websocket_proxy.tick_recorder import (
+    INDEX_SUFFIX, TickFile, TickRecorder, encode_block, export_parquet, recover_tick_file, tick_file_path,
+    trading_day
+)
+from websocket_proxy.replay_adapter import ReplayWebSocketAdapter, parse_speed
+
+
+def frames(count, start=0):
+    return [(f"NSE_SYM{i % 5}_LTP".encode(), encode_tick({'ltp': 100 + i, 'volume': i}, TICK_FORMAT_JSON))
+             for i in range(start, start + count)]
+
+
+def record(directory, ticks, block_records=8192):
+    recorder = TickRecorder(directory, flush_interval=3600, block_records=block_records)
+    for topic, payload in ticks:
+        assert recorder.record(topic, payload)
+    recorder.flush()
+    recorder.stop()
+    return recorder, tick_file_path(directory, trading_day(time.time_ns()))
+
+
+def test_record_and_read():
+    directory = tempfile.mkdtemp(prefix='test_tick_recorder_')
+    ticks = frames(1000)
+    recorder, path = record(directory, ticks, block_records=300)
+    assert recorder.get_stats()['written'] == 1000 and recorder.blocks == 4
+    assert os.path.getsize(path) < sum(len(t) + len(p) for t, p in ticks)  # compressed
+
+    tick_file = TickFile(path)
+    assert len(tick_file) == 1000 and len(tick_file.blocks) == 4
+    records = list(tick_file.read())
+    assert [(topic, payload) for _, topic, payload in records] == ticks
+    assert [ts for ts, _, _ in records] == sorted(ts for ts, _, _ in records)
+
+    # Reading from a time skips everything received earlier
+    since = records[650][0]
+    later = list(tick_file.read(start_ns=since))
+    assert later == [r for r in records if r[0] >= since] and len(later) >= 350
+    assert all(ts <= since for ts, _, _ in tick_file.read(end_ns=since))
+
+    # A second session of the same day appends to the file
+    record(directory, frames(10, start=1000))
+    assert len(TickFile(path)) == 1010
+
+
+def test_recovery_after_crash():
+    directory = tempfile.mkdtemp(prefix='test_tick_recorder_')
+    _, path = record(directory, frames(100), block_records=50)
+
+    # A crash in the middle of a block write, with the index entry never written
+    partial = encode_block([(time.time_ns(), b'NSE_X_LTP', b'{"ltp": 1}')] * 10)
+    with open(path, 'ab') as f:
+        f.write(partial[:len(partial) // 2])
+    assert len(TickFile(path)) == 100
+
+    os.remove(path + INDEX_SUFFIX)
+    assert len(TickFile(path)) == 100  # Index rebuilt from the block headers
+
+    assert len(recover_tick_file(path)) == 2
+    record(directory, frames(5))
+    assert len(TickFile(path)) == 105
+    assert len(list(TickFile(path).read())) == 105
+
+
+def test_export_parquet():
+    if importlib.util.find_spec('duckdb') is None or importlib.util.find_spec('pandas') is None:
+        print("[SKIP] duckdb or pandas not installed")
+        return
+    import duckdb
+    directory = tempfile.mkdtemp(prefix='test_tick_recorder_')
+    depth = {'ltp': 10.5, 'depth': {'buy': [{'price': 10.45}], 'sell': [{'price': 10.55}]}}
+    _, path = record(directory, frames(20) + [(b'NSE_SBIN_DEPTH', encode_tick(depth, TICK_FORMAT_COMPACT))])
+    output = os.path.join(directory, 'ticks.parquet')
+    assert export_parquet(path, output) == 21
+    rows = duckdb.sql(f"SELECT symbol, mode, ltp, bid, ask FROM '{output}' WHERE symbol = 'SBIN'").fetchall()
+    assert rows == [('SBIN', 3, 10.5, 10.45, 10.55)]
+
+
+def write_session(path, ticks):
+    """A tick file with chosen receive times: ticks are (seconds, topic, tick dict)"""
+    base = time.time_ns()
+    records = [(base + int(seconds * 1e9), topic, encode_tick(tick, TICK_FORMAT_JSON)) for seconds, topic, tick in ticks]
+    with open(path, 'wb') as f:
+        f.write(encode_block(records))
+
+
+def replay(path, speed, subscriptions):
+    adapter = ReplayWebSocketAdapter()
+    assert adapter.initialize('replay', 'tester', {'file': path, 'speed': speed})['status'] == 'success'
+    subscriber = zmq.Context.instance().socket(zmq.SUB)
+    subscriber.setsockopt(zmq.SUBSCRIBE, b'')
+    subscriber.connect(f"tcp://127.0.0.1:{adapter.zmq_port}")
+    time.sleep(0.2)  # Let the subscription reach the publisher
+    adapter.connect()
+    started = time.monotonic()
+    for symbol, exchange, mode in subscriptions:
+        adapter.subscribe(symbol, exchange, mode)
+    assert adapter.finished.wait(5.0)
+    elapsed = time.monotonic() - started
+    received = []
+    while subscriber.poll(200):
+        received.append(subscriber.recv_multipart())
+    subscriber.close(linger=0)
+    adapter.disconnect()
+    return received, elapsed, adapter
+
+
+def test_replay_adapter():
+    assert parse_speed('max') is None and parse_speed('10') == 10.0 and parse_speed(None) == 1.0
+    directory = tempfile.mkdtemp(prefix='test_tick_replay_')
+    path = os.path.join(directory, 'session.ticks')
+    write_session(path, [
+        (0.0, b'angel_NSE_SBIN_LTP', {'ltp': 800}),
+        (0.5, b'NSE_INFY_QUOTE', {'ltp': 1500, 'volume': 10}),
+        (1.0, b'NSE_SBIN_QUOTE', {'ltp': 801}),
+        (2.0, b'NSE_INDEX_NIFTY_LTP', {'ltp': 24000}),
+    ])
+
+    # Only subscribed instruments are published, under the broker-less topic
+    received, elapsed, adapter = replay(path, 'max', [('SBIN', 'NSE', 1), ('NIFTY', 'NSE_INDEX', 1)])
+    assert [topic for topic, _ in received] == [b'NSE_SBIN_LTP', b'NSE_INDEX_NIFTY_LTP']
+    assert decode_tick(received[1][1]) == {'ltp': 24000}
+    assert adapter.published == 2 and adapter.skipped == 2
+    assert elapsed < 1.0
+
+    # The recorded spacing is kept at 10x: 2 seconds of ticks take 0.2s
+    received, elapsed, _ = replay(path, 10, [('SBIN', 'NSE', 1), ('NIFTY', 'NSE_INDEX', 1)])
+    assert len(received) == 2 and 0.18 <= elapsed < 1.5
+
+    missing = ReplayWebSocketAdapter()
+    assert missing.initialize('replay', 'tester', {'file': os.path.join(directory, 'none.ticks')})['status'] == 'error'
+    missing.cleanup_zmq()
+
+
+if __name__ == "__main__":
+    test_record_and_read()
+    test_recovery_after_crash()
+    test_export_parquet()
+    test_replay_adapter()
+    print("All tick recorder tests passed")
@@ -0,0 +1,121 @@
+"""
+Webhook Order Dispatcher Tests
+Checks token bucket rate limits, smart order priority and in-process dispatch
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path to import services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.webhook_dispatch_service import (
+    ENDPOINT_PLACEORDER, ENDPOINT_PLACESMARTORDER, WebhookOrderDispatcher
+)
+from utils.token_bucket import TokenBucket, parse_rate_limit
+
+
+def test_parse_rate_limit():
+    assert parse_rate_limit("10 per second", 1) == 10
+    assert parse_rate_limit("120 per minute", 1) == 2
+    assert parse_rate_limit("5/second", 1) == 5
+    assert parse_rate_limit("garbage", 3) == 3
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=10)
+    bucket.updated = now = 100.0
+    assert all(bucket.try_acquire(now) for _ in range(10))
+    assert not bucket.try_acquire(now)
+    assert abs(bucket.wait_time(now) - 0.1) < 1e-9
+    assert bucket.try_acquire(now + 0.11)
+
+    smart = TokenBucket(rate=2, capacity=1)
+    smart.updated = now
+    assert smart.try_acquire(now)
+    assert not smart.try_acquire(now + 0.4)
+    assert smart.try_acquire(now + 0.55)
+
+
+def make_dispatcher(order_rate, smart_order_rate):
+    placed = []
+    done = threading.Event()
+    dispatcher = WebhookOrderDispatcher(order_rate=order_rate, smart_order_rate=smart_order_rate)
+
+    def handler(endpoint):
+        def place(order_data, api_key=None):
+            placed.append((endpoint, order_data['symbol'], time.monotonic()))
+            if order_data.get('last'):
+                done.set()
+            return True, {'status': 'success', 'orderid': '1'}, 200
+        return place
+
+    dispatcher.handlers = {endpoint: handler(endpoint) for endpoint in dispatcher.handlers}
+    return dispatcher, placed, done
+
+
+def test_orders_are_placed_in_process():
+    dispatcher, placed, done = make_dispatcher(order_rate=100, smart_order_rate=100)
+    dispatcher.submit(ENDPOINT_PLACEORDER, {'symbol': 'SBIN', 'apikey': 'k'})
+    dispatcher.submit(ENDPOINT_PLACEORDER, {'symbol': 'INFY', 'apikey': 'k', 'last': True})
+    assert done.wait(2)
+    dispatcher.stop()
+
+    assert [symbol for _, symbol, _ in placed] == ['SBIN', 'INFY']
+    stats = dispatcher.get_stats()
+    assert stats['dispatched'] == 2
+    assert stats['latency_ms']['max'] is not None
+
+
+def test_regular_orders_respect_rate_limit():
+    dispatcher, placed, done = make_dispatcher(order_rate=20, smart_order_rate=1)
+    for i in range(25):
+        dispatcher.submit(ENDPOINT_PLACEORDER, {'symbol': f'SYM{i}', 'last': i == 24})
+    assert done.wait(3)
+    dispatcher.stop()
+
+    # 20 burst immediately, the remaining 5 are spread over the next 0.25s
+    elapsed = placed[-1][2] - placed[0][2]
+    assert 0.2 <= elapsed < 1.0, elapsed
+
+
+def test_smart_orders_first():
+    dispatcher, placed, done = make_dispatcher(order_rate=100, smart_order_rate=100)
+    with dispatcher._condition:
+        # Queue both before the dispatcher thread can run
+        dispatcher._running = True
+        dispatcher.queues[ENDPOINT_PLACEORDER].append((time.monotonic(), 'test', {'symbol': 'REG', 'last': True}))
+        dispatcher.queues[ENDPOINT_PLACESMARTORDER].append((time.monotonic(), 'test', {'symbol': 'SMART'}))
+        dispatcher._thread = threading.Thread(target=dispatcher._run, daemon=True)
+        dispatcher._thread.start()
+    assert done.wait(2)
+    dispatcher.stop()
+    assert [symbol for _, symbol, _ in placed] == ['SMART', 'REG']
+
+
+def test_failures_are_counted():
+    dispatcher = WebhookOrderDispatcher(order_rate=100, smart_order_rate=100)
+    failed = threading.Event()
+
+    def place(order_data, api_key=None):
+        failed.set()
+        raise RuntimeError("broker down")
+
+    dispatcher.handlers[ENDPOINT_PLACEORDER] = place
+    dispatcher.submit(ENDPOINT_PLACEORDER, {'symbol': 'SBIN'})
+    assert failed.wait(2)
+    time.sleep(0.05)
+    dispatcher.stop()
+    assert dispatcher.get_stats()['failed'] == 1
+
+
+if __name__ == "__main__":
+    test_parse_rate_limit()
+    test_token_bucket()
+    test_orders_are_placed_in_process()
+    test_regular_orders_respect_rate_limit()
+    test_smart_orders_first()
+    test_failures_are_counted()
+    print("All webhook dispatch tests passed")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Migration script for indexed API key lookup.
+
+API keys are verified by looking up a keyed fingerprint (HMAC-SHA256 of the key
+with API_KEY_PEPPER) instead of trying every stored Argon2 hash. This script:
+1. Adds 'api_key_fingerprint' column to api_keys table
+2. Creates the 'ix_api_keys_api_key_fingerprint' index on it
+3. Fills the fingerprint of existing keys (decrypted from api_key_encrypted)
+
+Run it with the same .env (API_KEY_PEPPER) as the application, otherwise the
+fingerprints will not match the keys. The application still fills missing
+fingerprints at startup, so keys created by an older version are picked up.
+
+Usage:
+    python upgrade/migrate_api_key_fingerprint.py
+    python upgrade/migrate_api_key_fingerprint.py --status
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, inspect, text
+from dotenv import load_dotenv
+
+# Load environment from parent directory
+env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env')
+load_dotenv(env_path)
+
+# Import logger after environment is loaded
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_NAME = 'ix_api_keys_api_key_fingerprint'
+
+def get_database_url():
+    """Get database URL from environment, with relative SQLite paths resolved from the openalgo root"""
+    database_url = os.getenv('DATABASE_URL', 'sqlite:///db/openalgo.db')
+    if database_url.startswith('sqlite:///') and not database_url.startswith('sqlite:////'):
+        db_path = database_url.replace('sqlite:///', '')
+        parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        database_url = f"sqlite:///{os.path.join(parent_dir, db_path)}"
+    return database_url
+
+def check_column_exists(engine, table_name, column_name):
+    """Check if a column exists in a table"""
+    inspector = inspect(engine)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+def check_index_exists(engine, table_name, index_name):
+    """Check if an index exists on a table"""
+    inspector = inspect(engine)
+    return index_name in [idx['name'] for idx in inspector.get_indexes(table_name)]
+
+def count_pending(engine):
+    """Number of API keys without a fingerprint"""
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT COUNT(*) FROM api_keys WHERE api_key_fingerprint IS NULL"
+        )).scalar()
+
+def add_fingerprint_column(engine):
+    """Add api_key_fingerprint column and its index to api_keys table"""
+    try:
+        if check_column_exists(engine, 'api_keys', 'api_key_fingerprint'):
+            logger.info("✓ api_key_fingerprint column already exists in api_keys table")
+        else:
+            logger.info("Adding api_key_fingerprint column to api_keys table...")
+            with engine.connect() as conn:
+                conn.execute(text("ALTER TABLE api_keys ADD COLUMN api_key_fingerprint VARCHAR(64)"))
+                conn.commit()
+            logger.info("✓ api_key_fingerprint column added successfully")
+
+        if check_index_exists(engine, 'api_keys', INDEX_NAME):
+            logger.info(f"✓ {INDEX_NAME} index already exists")
+        else:
+            with engine.connect() as conn:
+                conn.execute(text(f"CREATE INDEX {INDEX_NAME} ON api_keys (api_key_fingerprint)"))
+                conn.commit()
+            logger.info(f"✓ {INDEX_NAME} index created successfully")
+        return True
+
+    except Exception as e:
+        logger.error(f"✗ Error adding api_key_fingerprint column: {e}")
+        return False
+
+def backfill_fingerprints(engine):
+    """Fill the fingerprint of API keys stored before fingerprints existed"""
+    # Imported here so the pepper and encryption key come from the loaded .env
+    from database.auth_db import decrypt_token, get_api_key_fingerprint
+
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT id, user_id, api_key_encrypted FROM api_keys WHERE api_key_fingerprint IS NULL"
+            )).fetchall()
+
+            updated = 0
+            for row_id, user_id, api_key_encrypted in rows:
+                api_key = decrypt_token(api_key_encrypted)
+                if not api_key:
+                    logger.warning(f"⚠ Could not decrypt the API key of {user_id}, left without a fingerprint")
+                    continue
+                conn.execute(
+                    text("UPDATE api_keys SET api_key_fingerprint = :fingerprint WHERE id = :id"),
+                    {'fingerprint': get_api_key_fingerprint(api_key), 'id': row_id}
+                )
+                updated += 1
+            conn.commit()
+
+        logger.info(f"✓ Fingerprinted {updated} of {len(rows)} API key(s)")
+        return updated == len(rows)
+
+    except Exception as e:
+        logger.error(f"✗ Error filling API key fingerprints: {e}")
+        return False
+
+def show_status(engine):
+    """Log whether the migration is applied"""
+    if not check_column_exists(engine, 'api_keys', 'api_key_fingerprint'):
+        logger.info("✗ api_key_fingerprint column not found - migration not applied")
+        return False
+    index_exists = check_index_exists(engine, 'api_keys', INDEX_NAME)
+    pending = count_pending(engine)
+    logger.info("✓ api_key_fingerprint column exists")
+    logger.info(f"{'✓' if index_exists else '✗'} {INDEX_NAME} index {'exists' if index_exists else 'not found'}")
+    logger.info(f"{'✓' if not pending else '⚠'} {pending} API key(s) without a fingerprint")
+    return index_exists and not pending
+
+def main():
+    """Main migration function"""
+    parser = argparse.ArgumentParser(description='Add indexed fingerprints for API key lookup')
+    parser.add_argument('--status', action='store_true', help='Check migration status')
+    args = parser.parse_args()
+
+    print("="*60)
+    print("API Key Fingerprint Migration")
+    print("="*60)
+    print()
+
+    database_url = get_database_url()
+    logger.info(f"Database URL: {database_url}")
+
+    try:
+        engine = create_engine(database_url)
+        if 'api_keys' not in inspect(engine).get_table_names():
+            logger.info("api_keys table doesn't exist. It will be created on first run.")
+            return True
+    except Exception as e:
+        logger.error(f"✗ Failed to connect to database: {e}")
+        return False
+
+    if args.status:
+        return show_status(engine)
+
+    success = add_fingerprint_column(engine) and backfill_fingerprints(engine)
+
+    print()
+    if success:
+        print("="*60)
+        print("✓ Migration completed successfully!")
+        print("="*60)
+        print()
+        print("Summary:")
+        print("  - Added api_key_fingerprint column and index to api_keys table")
+        print("  - Filled the fingerprint of existing API keys")
+        print()
+    else:
+        print("="*60)
+        print("✗ Migration completed with errors")
+        print("="*60)
+        print("Please check the logs above for details")
+        print("Keys without a fingerprint are filled again when OpenAlgo starts")
+        print()
+
+    return success
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
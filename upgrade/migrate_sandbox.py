@@ -272,7 +272,9 @@ def insert_default_config(conn):
         ('reset_day', 'Sunday', 'Day of week for automatic fund reset'),
         ('reset_time', '00:00', 'Time for automatic fund reset (IST)'),
         ('order_check_interval', '5', 'Interval in seconds to check pending orders - Range: 1-30 seconds'),
+        ('order_execution_mode', 'poll', 'Pending order matching - poll (quotes API every check interval) or tick (live market data feed)'),
         ('mtm_update_interval', '5', 'Interval in seconds to update MTM - Range: 0-60 seconds (0 = manual only)'),
+        ('quote_cache_seconds', '2', 'Seconds a fetched quote is reused by MTM and order checks - Range: 0-30 seconds'),
         ('nse_bse_square_off_time', '15:15', 'Square-off time for NSE/BSE MIS positions (IST)'),
         ('cds_bcd_square_off_time', '16:45', 'Square-off time for CDS/BCD MIS positions (IST)'),
         ('mcx_square_off_time', '23:30', 'Square-off time for MCX MIS positions (IST)'),
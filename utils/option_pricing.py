@@ -0,0 +1,190 @@
+"""
+Vectorized option pricing, implied volatility and Greeks
+
+All functions take scalars or NumPy arrays (broadcast against each other) so a
+whole option chain is priced in one call. Two models are supported through
+the cost-of-carry form of Black-Scholes:
+
+- 'black_scholes': options on a spot underlying (index, equity), carry = rate
+- 'black76': options on a futures/forward price (MCX, CDS, or when a future is
+  used as the underlying), carry = 0
+
+Units follow the per-contract Greeks API (mibian): volatility and rates are
+decimals here, theta is per calendar day, vega per 1 volatility point and rho
+per 1% change in rate.
+"""
+
+from typing import Dict
+
+import numpy as np
+from scipy.special import ndtr
+
+MODEL_BLACK_SCHOLES = 'black_scholes'
+MODEL_BLACK76 = 'black76'
+MODELS = (MODEL_BLACK_SCHOLES, MODEL_BLACK76)
+
+DAYS_PER_YEAR = 365.0
+
+# Implied volatility search range and tolerance (decimal volatility, price units)
+IV_LOWER = 1e-4
+IV_UPPER = 5.0
+IV_PRICE_TOLERANCE = 1e-6
+IV_MAX_ITERATIONS = 100
+
+_SQRT_2PI = np.sqrt(2.0 * np.pi)
+
+
+def _pdf(x):
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+
+def _carry(rate, model: str):
+    if model not in MODELS:
+        raise ValueError(f"Unknown pricing model: {model}. Use one of {', '.join(MODELS)}")
+    return rate if model == MODEL_BLACK_SCHOLES else np.zeros_like(rate)
+
+
+def _inputs(spot, strike, years, rate, is_call):
+    spot, strike, years, rate, is_call = np.broadcast_arrays(
+        np.asarray(spot, dtype=float), np.asarray(strike, dtype=float),
+        np.asarray(years, dtype=float), np.asarray(rate, dtype=float), np.asarray(is_call, dtype=bool)
+    )
+    return spot, strike, years, rate, is_call
+
+
+def _d1_d2(spot, strike, years, carry, volatility):
+    vol_sqrt_t = volatility * np.sqrt(years)
+    d1 = (np.log(spot / strike) + (carry + 0.5 * volatility * volatility) * years) / vol_sqrt_t
+    return d1, d1 - vol_sqrt_t
+
+
+def option_price(spot, strike, years, rate, volatility, is_call, model: str = MODEL_BLACK_SCHOLES) -> np.ndarray:
+    """
+    Option premiums
+
+    Args:
+        spot: Underlying price (futures price for black76)
+        strike: Strike price
+        years: Time to expiry in years
+        rate: Risk-free rate (decimal, 0.065 for 6.5%)
+        volatility: Volatility (decimal)
+        is_call: True for calls (CE), False for puts (PE)
+        model: 'black_scholes' or 'black76'
+    """
+    spot, strike, years, rate, is_call = _inputs(spot, strike, years, rate, is_call)
+    carry = _carry(rate, model)
+    d1, d2 = _d1_d2(spot, strike, years, carry, np.asarray(volatility, dtype=float))
+    carry_discount = np.exp((carry - rate) * years)
+    discount = np.exp(-rate * years)
+    call = spot * carry_discount * ndtr(d1) - strike * discount * ndtr(d2)
+    put = strike * discount * ndtr(-d2) - spot * carry_discount * ndtr(-d1)
+    return np.where(is_call, call, put)
+
+
+def implied_volatility(price, spot, strike, years, rate, is_call, model: str = MODEL_BLACK_SCHOLES,
+                       tolerance: float = IV_PRICE_TOLERANCE, max_iterations: int = IV_MAX_ITERATIONS) -> np.ndarray:
+    """
+    Implied volatilities for many options at once
+
+    Newton steps on the whole array, with a bisection step for every element
+    whose Newton step leaves its bracket [low, high] or whose vega is too small
+    to divide by. Prices outside the no-arbitrage bounds give NaN.
+
+    Returns:
+        np.ndarray: Decimal volatilities, NaN where no volatility reproduces the price
+    """
+    spot, strike, years, rate, is_call, price = np.broadcast_arrays(
+        *_inputs(spot, strike, years, rate, is_call), np.asarray(price, dtype=float)
+    )
+    shape = spot.shape
+    # Work on flat arrays so scalars and chains of any shape take the same path
+    spot, strike, years, rate, is_call, price = (
+        np.ravel(array) for array in (spot, strike, years, rate, is_call, price)
+    )
+
+    carry_discount = np.exp((_carry(rate, model) - rate) * years)
+    discount = np.exp(-rate * years)
+    intrinsic = np.where(
+        is_call,
+        np.maximum(spot * carry_discount - strike * discount, 0.0),
+        np.maximum(strike * discount - spot * carry_discount, 0.0)
+    )
+    upper_bound = np.where(is_call, spot * carry_discount, strike * discount)
+    solvable = (price > intrinsic) & (price < upper_bound) & (years > 0) & (spot > 0) & (strike > 0)
+
+    low = np.full(spot.shape, IV_LOWER)
+    high = np.full(spot.shape, IV_UPPER)
+    # Brenner-Subrahmanyam at-the-money approximation as the starting point
+    with np.errstate(divide='ignore', invalid='ignore'):
+        guess = np.sqrt(2.0 * np.pi / years) * price / spot
+    volatility = np.clip(np.nan_to_num(guess, nan=0.3), 0.05, 2.0)
+    active = solvable.copy()
+
+    for _ in range(max_iterations):
+        if not active.any():
+            break
+        index = np.flatnonzero(active)
+        s, k, t, r, c = spot[index], strike[index], years[index], rate[index], is_call[index]
+        v = volatility[index]
+
+        difference = option_price(s, k, t, r, v, c, model) - price[index]
+        converged = np.abs(difference) < tolerance
+        active[index[converged]] = False
+
+        # Premium rises with volatility, so the sign of the error narrows the bracket
+        too_high = difference > 0
+        high[index] = np.where(too_high, np.minimum(high[index], v), high[index])
+        low[index] = np.where(too_high, low[index], np.maximum(low[index], v))
+
+        vega = s * np.exp((_carry(r, model) - r) * t) * _pdf(_d1_d2(s, k, t, _carry(r, model), v)[0]) * np.sqrt(t)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = v - difference / vega
+        in_bracket = (vega > 1e-10) & (newton > low[index]) & (newton < high[index])
+        step = np.where(in_bracket, newton, 0.5 * (low[index] + high[index]))
+        volatility[index] = np.where(converged, v, step)
+
+        # Brackets that collapsed without meeting the price tolerance are as good as it gets
+        active[index[(high[index] - low[index]) < 1e-12]] = False
+
+    return np.where(solvable, volatility, np.nan).reshape(shape)
+
+
+def option_greeks(spot, strike, years, rate, volatility, is_call,
+                  model: str = MODEL_BLACK_SCHOLES) -> Dict[str, np.ndarray]:
+    """
+    Delta, gamma, theta (per day), vega (per volatility point) and rho (per 1% rate)
+
+    Returns:
+        dict: Arrays keyed by greek name
+    """
+    spot, strike, years, rate, is_call = _inputs(spot, strike, years, rate, is_call)
+    volatility = np.asarray(volatility, dtype=float)
+    carry = _carry(rate, model)
+    d1, d2 = _d1_d2(spot, strike, years, carry, volatility)
+    carry_discount = np.exp((carry - rate) * years)
+    discount = np.exp(-rate * years)
+    density = _pdf(d1)
+    sqrt_t = np.sqrt(years)
+
+    delta = np.where(is_call, carry_discount * ndtr(d1), carry_discount * (ndtr(d1) - 1.0))
+    gamma = carry_discount * density / (spot * volatility * sqrt_t)
+    vega = spot * carry_discount * density * sqrt_t
+
+    decay = -spot * carry_discount * density * volatility / (2.0 * sqrt_t)
+    call_theta = decay - (carry - rate) * spot * carry_discount * ndtr(d1) - rate * strike * discount * ndtr(d2)
+    put_theta = decay + (carry - rate) * spot * carry_discount * ndtr(-d1) + rate * strike * discount * ndtr(-d2)
+    theta = np.where(is_call, call_theta, put_theta)
+
+    if model == MODEL_BLACK_SCHOLES:
+        rho = np.where(is_call, strike * years * discount * ndtr(d2), -strike * years * discount * ndtr(-d2))
+    else:
+        # Futures price held fixed, only the discounting depends on the rate
+        rho = -years * option_price(spot, strike, years, rate, volatility, is_call, model)
+
+    return {
+        'delta': delta,
+        'gamma': gamma,
+        'theta': theta / DAYS_PER_YEAR,
+        'vega': vega / 100.0,
+        'rho': rho / 100.0,
+    }
@@ -0,0 +1,160 @@
+# utils/order_batch.py
+"""
+Order Batch - Concurrent execution of bulk broker order calls
+
+Cancel-all, close-all and basket orders used to send one blocking request at a
+time; flattening 80 open orders and 40 positions took minutes. Batches are now
+queued on the broker's order gateway (utils/order_gateway.py), so they run on
+its workers within its rate limit, shared with every other order:
+
+- Tasks carry the gateway lane: cancels, then exits, then entries
+- Task groups run in order: a group starts when the previous one has finished
+- One aggregated report per batch, logged once
+"""
+
+import time
+
+from utils.logging import get_logger
+from utils.order_gateway import PRIORITY_CANCEL, PRIORITY_EXIT, cancel_key, get_order_gateway
+
+logger = get_logger(__name__)
+
+
+class OrderTask:
+    """
+    One broker call of a batch: call() is made once, key identifies it in the report
+
+    priority is the gateway lane; group (default: the lane) orders the calls of
+    the batch, lower groups completing before higher ones start. Tasks with a
+    coalesce_key share a broker call with identical gateway calls in flight.
+    """
+
+    def __init__(self, key, call, priority=PRIORITY_EXIT, group=None, coalesce_key=None):
+        self.key = key
+        self.call = call
+        self.priority = priority
+        self.group = priority if group is None else group
+        self.coalesce_key = coalesce_key
+
+
+class OrderBatchReport:
+    """Aggregated outcome of a batch; results are in task order"""
+
+    def __init__(self, broker, operation):
+        self.broker = broker
+        self.operation = operation
+        self.results = []  # dicts: key, priority, status, response or error
+        self.elapsed = 0.0
+
+    def __len__(self):
+        return len(self.results)
+
+    @property
+    def succeeded(self):
+        return [result['key'] for result in self.results if result['status'] == 'success']
+
+    @property
+    def failed(self):
+        return [result['key'] for result in self.results if result['status'] != 'success']
+
+    def summary(self):
+        return {
+            'total': len(self.results),
+            'succeeded': len(self.succeeded),
+            'failed': len(self.failed),
+            'elapsed_ms': round(self.elapsed * 1000, 1),
+        }
+
+
+def _result(task, future, succeeded):
+    try:
+        response = future.result()
+    except Exception as e:
+        logger.error(f"Order batch call for {task.key} failed: {e}")
+        return {'key': task.key, 'priority': task.priority, 'status': 'error', 'error': str(e)}
+    status = 'success' if succeeded(response) else 'error'
+    return {'key': task.key, 'priority': task.priority, 'status': status, 'response': response}
+
+
+def run_order_batch(broker, operation, tasks, succeeded=lambda response: True):
+    """
+    Run broker calls concurrently on the broker's order gateway
+
+    Args:
+        broker: Broker name, selects the gateway
+        operation: Name used in the report log line (e.g. 'cancel_all')
+        tasks: OrderTask list
+        succeeded: Predicate on a call's return value; exceptions always count as failures
+
+    Returns:
+        OrderBatchReport
+    """
+    report = OrderBatchReport(broker, operation)
+    if not tasks:
+        return report
+    gateway = get_order_gateway(broker)
+    start = time.monotonic()
+    results = {}
+    for group in sorted({task.group for task in tasks}):
+        futures = [(i, task, gateway.submit(task.call, priority=task.priority, key=task.coalesce_key))
+                   for i, task in enumerate(tasks) if task.group == group]
+        # Wait for the whole group so later groups never overtake it
+        for i, task, future in futures:
+            results[i] = _result(task, future, succeeded)
+    report.results = [results[i] for i in range(len(tasks))]
+    report.elapsed = time.monotonic() - start
+
+    summary = report.summary()
+    logger.info(f"{broker} {operation}: {summary['succeeded']}/{summary['total']} succeeded "
+                f"in {summary['elapsed_ms']} ms")
+    if report.failed:
+        logger.warning(f"{broker} {operation} failed for: {report.failed}")
+    return report
+
+
+def _cancelled(response):
+    return response[1] == 200
+
+
+def cancel_orders(broker, orderids, cancel, succeeded=_cancelled):
+    """
+    Cancel orders concurrently
+
+    Args:
+        broker: Broker name
+        orderids: Order ids to cancel
+        cancel: Broker call made as cancel(orderid), returning (response, status_code)
+        succeeded: Predicate on that tuple (default: status_code is 200)
+
+    Returns:
+        tuple: (canceled order ids, failed order ids), as cancel_all_orders_api returns them
+    """
+    tasks = [OrderTask(orderid, lambda orderid=orderid: cancel(orderid), PRIORITY_CANCEL, coalesce_key=cancel_key(orderid))
+             for orderid in orderids]
+    report = run_order_batch(broker, 'cancel_all', tasks, succeeded=succeeded)
+    return report.succeeded, report.failed
+
+
+def close_positions(broker, payloads, place):
+    """
+    Send square off orders concurrently
+
+    Args:
+        broker: Broker name
+        payloads: OpenAlgo order payloads, one per position
+        place: Broker call made as place(payload), returning (res, response, orderid)
+
+    Returns:
+        OrderBatchReport keyed by symbol; an order counts as placed when it got an order id
+    """
+    tasks = [OrderTask(payload.get('symbol'), lambda payload=payload: place(payload)) for payload in payloads]
+    return run_order_batch(broker, 'close_all', tasks, succeeded=lambda response: bool(response[2]))
+
+
+def close_positions_failed(report):
+    """Response for close_all_positions when some square off orders were rejected"""
+    return {
+        'status': 'error',
+        'message': f"Failed to square off {len(report.failed)} of {len(report)} positions: "
+                   f"{', '.join(str(symbol) for symbol in report.failed)}"
+    }, 500
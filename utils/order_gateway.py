@@ -0,0 +1,230 @@
+# utils/order_gateway.py
+"""
+Order Gateway - One long-lived order queue per broker
+
+Orders used to reach the broker from whichever thread handled the request, and
+basket and split orders each started their own thread pool, so concurrent
+strategies could burst past the broker's order limit and get 429s back.
+Every order call from the services now goes through the broker's gateway:
+
+- A persistent pool of ORDER_GATEWAY_WORKERS threads (default 5)
+- A token bucket at ORDER_GATEWAY_RATE_LIMIT (default ORDER_RATE_LIMIT, 10 per
+  second: the exchange limit for retail API orders), shared by every caller
+- Priority lanes: cancels and modifications, then exits, then new orders
+- Identical cancels already waiting or in flight share one broker call
+- Queue depth and wait time metrics per lane (get_gateway_stats)
+
+Per broker overrides: ORDER_GATEWAY_WORKERS_<BROKER>, ORDER_GATEWAY_RATE_LIMIT_<BROKER>.
+An OpenAlgo instance holds one login per broker, so the gateway of a broker is
+the gateway of its session.
+"""
+
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from utils.logging import get_logger
+from utils.token_bucket import TokenBucket, parse_rate_limit
+
+logger = get_logger(__name__)
+
+# Lanes, served lowest first
+PRIORITY_CANCEL = 0  # cancel and modify: reduce exposure first
+PRIORITY_EXIT = 1    # square off and close positions
+PRIORITY_ENTRY = 2   # new orders
+
+LANE_NAMES = {PRIORITY_CANCEL: 'cancel', PRIORITY_EXIT: 'exit', PRIORITY_ENTRY: 'entry'}
+
+DEFAULT_WORKERS = 5
+
+# Wait times kept per lane for the percentiles
+WAIT_SAMPLES = 1000
+
+
+def get_gateway_config(broker):
+    """Return (workers, orders per second) for a broker's gateway"""
+    suffix = f"_{broker.upper()}"
+    workers = os.getenv('ORDER_GATEWAY_WORKERS' + suffix) or os.getenv('ORDER_GATEWAY_WORKERS')
+    try:
+        workers = max(1, int(workers)) if workers else DEFAULT_WORKERS
+    except ValueError:
+        logger.warning(f"Invalid ORDER_GATEWAY_WORKERS '{workers}', using {DEFAULT_WORKERS}")
+        workers = DEFAULT_WORKERS
+    limit = (os.getenv('ORDER_GATEWAY_RATE_LIMIT' + suffix) or os.getenv('ORDER_GATEWAY_RATE_LIMIT')
+             or os.getenv('ORDER_RATE_LIMIT', '10 per second'))
+    return workers, parse_rate_limit(limit, 10)
+
+
+def cancel_key(orderid):
+    """Coalescing key of a cancel: one broker request per order id at a time"""
+    return ('cancel', str(orderid))
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class _Job:
+    __slots__ = ('call', 'priority', 'key', 'future', 'queued_at')
+
+    def __init__(self, call, priority, key):
+        self.call = call
+        self.priority = priority
+        self.key = key
+        self.future = Future()
+        self.queued_at = time.monotonic()
+
+
+class OrderGateway:
+    """Priority queue of broker order calls served by persistent workers within a rate limit"""
+
+    def __init__(self, broker, workers=None, rate=None):
+        config_workers, config_rate = get_gateway_config(broker)
+        self.broker = broker
+        self.workers = config_workers if workers is None else workers
+        self.rate = config_rate if rate is None else rate
+        self.bucket = TokenBucket(self.rate)
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._pending = {}  # coalescing key -> job waiting or in flight
+        self._depth = {lane: 0 for lane in LANE_NAMES}
+        self._waits = {lane: deque(maxlen=WAIT_SAMPLES) for lane in LANE_NAMES}
+        self._local = threading.local()
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.coalesced = 0
+        self._threads = [threading.Thread(target=self._worker, name=f"OrderGateway-{broker}-{i}", daemon=True)
+                         for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, call, *args, priority=PRIORITY_ENTRY, key=None, **kwargs):
+        """
+        Queue call(*args, **kwargs) for the broker
+
+        Args:
+            priority: Lane (PRIORITY_CANCEL, PRIORITY_EXIT or PRIORITY_ENTRY)
+            key: Calls with the same key share the result of one broker call while
+                 it is waiting or in flight; only for idempotent calls such as cancels
+
+        Returns:
+            concurrent.futures.Future with the call's return value or exception
+        """
+        if getattr(self._local, 'worker', False):
+            # A call made by a gateway call (e.g. close-all placing orders) runs in
+            # place, waiting for the queue from a worker could exhaust the pool
+            future = Future()
+            try:
+                future.set_result(call(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        with self._lock:
+            if key is not None and key in self._pending:
+                self.coalesced += 1
+                return self._pending[key].future
+            job = _Job(lambda: call(*args, **kwargs), priority, key)
+            if key is not None:
+                self._pending[key] = job
+            self._depth[priority] = self._depth.get(priority, 0) + 1
+            self.submitted += 1
+        self._queue.put((priority, next(self._sequence), job))
+        return job.future
+
+    def call(self, call, *args, priority=PRIORITY_ENTRY, key=None, **kwargs):
+        """Queue a broker call and wait for its result"""
+        return self.submit(call, *args, priority=priority, key=key, **kwargs).result()
+
+    def _worker(self):
+        self._local.worker = True
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                return
+            # Take the next token before starting; the wait counts towards the job
+            self.bucket.acquire()
+            started = time.monotonic()
+            with self._lock:
+                self._depth[job.priority] -= 1
+                self._waits.setdefault(job.priority, deque(maxlen=WAIT_SAMPLES)).append(started - job.queued_at)
+                self.in_flight += 1
+            try:
+                result = job.call()
+            except Exception as e:
+                error = e
+            else:
+                error = None
+            with self._lock:
+                self.in_flight -= 1
+                if job.key is not None and self._pending.get(job.key) is job:
+                    del self._pending[job.key]
+                if error is None:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            if error is None:
+                job.future.set_result(result)
+            else:
+                job.future.set_exception(error)
+
+    def stop(self):
+        """Let the workers finish queued calls and exit"""
+        for _ in self._threads:
+            self._queue.put((float('inf'), next(self._sequence), None))
+
+    def get_stats(self):
+        with self._lock:
+            lanes = {}
+            for lane, name in LANE_NAMES.items():
+                waits = sorted(self._waits[lane])
+                lanes[name] = {
+                    'queue_depth': self._depth[lane],
+                    'wait_p50_ms': round(_percentile(waits, 0.50) * 1000, 2),
+                    'wait_p99_ms': round(_percentile(waits, 0.99) * 1000, 2),
+                    'wait_max_ms': round((waits[-1] if waits else 0.0) * 1000, 2),
+                }
+            return {
+                'broker': self.broker,
+                'workers': self.workers,
+                'rate_per_sec': self.rate,
+                'queue_depth': sum(self._depth.values()),
+                'in_flight': self.in_flight,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'coalesced': self.coalesced,
+                'lanes': lanes,
+            }
+
+
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+
+def get_order_gateway(broker):
+    """Return the process wide OrderGateway of a broker, starting it on first use"""
+    gateway = _gateways.get(broker)
+    if gateway is None:
+        with _gateways_lock:
+            gateway = _gateways.get(broker)
+            if gateway is None:
+                gateway = _gateways[broker] = OrderGateway(broker)
+                logger.info(f"Order gateway for {broker}: {gateway.workers} workers, {gateway.rate:g} orders/sec")
+    return gateway
+
+
+def get_gateway_stats():
+    """Metrics of every running gateway, by broker"""
+    with _gateways_lock:
+        gateways = list(_gateways.values())
+    return {gateway.broker: gateway.get_stats() for gateway in gateways}
@@ -0,0 +1,276 @@
+# utils/order_state.py
+"""
+Order State Cache - Shared order, trade and position books per broker session
+
+Strategies polling orderstatus/openposition and placing smart orders used to
+download a full book from the broker on every call. Books are now fetched once
+per staleness window and shared by every reader of the session:
+
+- Concurrent readers of a stale book wait for a single broker request
+- Orders placed, modified or cancelled through OpenAlgo invalidate the books of
+  the session at once, so the next reader sees the broker's current state
+- Broker order-update streams invalidate the books as events arrive; sessions
+  with a live stream keep books for the longer ORDER_STATE_STREAM_MAX_AGE_MS
+- Derived views (mapped orderbook, positionbook) are built once per snapshot
+
+Books hold the raw broker response, so broker modules (get_open_position) and
+the services share the same snapshot.
+"""
+
+import copy
+import os
+import threading
+import time
+import types
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+BOOKS = ('orderbook', 'tradebook', 'positions')
+
+# Longest wait for another thread's broker request before fetching directly
+FETCH_WAIT_SECONDS = 30.0
+
+# Sessions unused for this long are dropped (auth tokens change every login)
+SESSION_IDLE_SECONDS = 3600.0
+
+
+def get_order_state_config():
+    """Return (max age, max age with a live order stream) in seconds"""
+    try:
+        max_age = float(os.getenv('ORDER_STATE_MAX_AGE_MS', '1000')) / 1000.0
+        stream_max_age = float(os.getenv('ORDER_STATE_STREAM_MAX_AGE_MS', '10000')) / 1000.0
+    except ValueError:
+        logger.warning("Invalid ORDER_STATE_*_MAX_AGE_MS, using defaults")
+        max_age, stream_max_age = 1.0, 10.0
+    max_age = max(max_age, 0.0)
+    return max_age, max(stream_max_age, max_age)
+
+
+def broker_of(broker):
+    """Broker name of a broker API module or function (broker.<name>.api.order_api)"""
+    if isinstance(broker, str):
+        return broker
+    if isinstance(broker, types.ModuleType):
+        module = broker.__name__
+    else:
+        module = getattr(broker, '__module__', None) or ''
+    parts = module.split('.')
+    if len(parts) > 1 and parts[0] == 'broker':
+        return parts[1]
+    return module
+
+
+def _cacheable(data):
+    """Error responses are returned to the caller but not shared"""
+    return not (isinstance(data, dict) and data.get('status') == 'error')
+
+
+class BookSnapshot:
+    """One broker response for a book, and the views derived from it"""
+
+    def __init__(self, data, fetched_at):
+        self.data = data
+        self.fetched_at = fetched_at
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def view(self, name, build):
+        """
+        Return a value derived from the book, built once per snapshot
+
+        build receives a deep copy of the broker response, so mapping functions
+        that modify their input leave the shared data untouched.
+        """
+        with self._lock:
+            if name not in self._views:
+                self._views[name] = build(copy.deepcopy(self.data))
+            return self._views[name]
+
+
+class _PendingFetch:
+    """A broker request other readers of the same book can wait for"""
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.done = threading.Event()
+        self.snapshot = None
+
+
+class _Session:
+    """Books of one broker login"""
+
+    def __init__(self):
+        self.generation = 0
+        self.snapshots = {}  # book -> BookSnapshot
+        self.pending = {}    # book -> _PendingFetch
+        self.streaming = False
+        self.last_used = time.monotonic()
+
+
+class OrderStateCache:
+    """Thread-safe per-session book snapshots with request coalescing"""
+
+    def __init__(self, max_age=None, stream_max_age=None):
+        config_max_age, config_stream_max_age = get_order_state_config()
+        self.max_age = config_max_age if max_age is None else max_age
+        self.stream_max_age = config_stream_max_age if stream_max_age is None else stream_max_age
+        self._lock = threading.Lock()
+        self._sessions = {}  # (broker, auth_token) -> _Session
+        self.fetches = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    def _session(self, key):
+        """Return the session for key, creating it; caller holds the lock"""
+        session = self._sessions.get(key)
+        now = time.monotonic()
+        if session is None:
+            for idle_key in [k for k, s in self._sessions.items()
+                             if not s.pending and now - s.last_used > SESSION_IDLE_SECONDS]:
+                del self._sessions[idle_key]
+            session = self._sessions[key] = _Session()
+        session.last_used = now
+        return session
+
+    def snapshot(self, book, fetch, auth_token, max_age=None):
+        """
+        Return a snapshot of a book, from the broker only if the cached one is too old
+
+        Args:
+            book: Book name ('orderbook', 'tradebook' or 'positions')
+            fetch: Broker API function called as fetch(auth_token)
+            auth_token: Broker session token
+            max_age: Seconds a snapshot stays usable (default: from the environment,
+                     longer while an order stream is live)
+
+        Returns:
+            BookSnapshot: snapshot.data is the broker response as returned by fetch
+        """
+        key = (broker_of(fetch), auth_token)
+        with self._lock:
+            session = self._session(key)
+            if max_age is None:
+                max_age = self.stream_max_age if session.streaming else self.max_age
+            snapshot = session.snapshots.get(book)
+            if snapshot is not None and time.monotonic() - snapshot.fetched_at <= max_age:
+                self.cache_hits += 1
+                return snapshot
+            pending = session.pending.get(book)
+            leader = pending is None
+            if leader:
+                pending = session.pending[book] = _PendingFetch(session.generation)
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            pending.done.wait(FETCH_WAIT_SECONDS)
+            if pending.snapshot is not None:
+                return pending.snapshot
+            # The other request failed or hangs, ask the broker directly
+            return BookSnapshot(fetch(auth_token), time.monotonic())
+
+        started = time.monotonic()
+        try:
+            data = fetch(auth_token)
+        except BaseException:
+            with self._lock:
+                if session.pending.get(book) is pending:
+                    del session.pending[book]
+            pending.done.set()
+            raise
+
+        # Age counts from the request, not the response
+        snapshot = BookSnapshot(data, started)
+        with self._lock:
+            self.fetches += 1
+            if session.pending.get(book) is pending:
+                del session.pending[book]
+            # An order placed while the request was in flight makes its result stale
+            if pending.generation == session.generation and _cacheable(data):
+                session.snapshots[book] = snapshot
+        pending.snapshot = snapshot
+        pending.done.set()
+        return snapshot
+
+    def invalidate(self, broker, auth_token, books=None):
+        """Drop the books of a session, e.g. after an order was sent to the broker"""
+        with self._lock:
+            session = self._sessions.get((broker_of(broker), auth_token))
+            if session is None:
+                return
+            session.generation += 1
+            for book in books or BOOKS:
+                session.snapshots.pop(book, None)
+                session.pending.pop(book, None)
+            self.invalidations += 1
+
+    def set_order_stream(self, broker, auth_token, active):
+        """Record whether the broker is pushing order updates for this session"""
+        if not auth_token:
+            return
+        with self._lock:
+            self._session((broker_of(broker), auth_token)).streaming = active
+
+    def clear(self):
+        """Drop all sessions"""
+        with self._lock:
+            self._sessions.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'streaming_sessions': sum(1 for s in self._sessions.values() if s.streaming),
+                'fetches': self.fetches,
+                'cache_hits': self.cache_hits,
+                'coalesced': self.coalesced,
+                'invalidations': self.invalidations,
+            }
+
+
+_order_state = None
+_order_state_lock = threading.Lock()
+
+
+def get_order_state():
+    """Return the process wide OrderStateCache"""
+    global _order_state
+    if _order_state is None:
+        with _order_state_lock:
+            if _order_state is None:
+                _order_state = OrderStateCache()
+    return _order_state
+
+
+def copy_records(records):
+    """Copy a list of row dicts from a shared view so callers can modify the rows"""
+    if isinstance(records, list):
+        return [dict(row) if isinstance(row, dict) else row for row in records]
+    return copy.deepcopy(records)
+
+
+def get_cached_book(book, fetch, auth_token):
+    """Broker response of a book, shared by all readers within the staleness window"""
+    return get_order_state().snapshot(book, fetch, auth_token).data
+
+
+def invalidate_books(broker, auth_token):
+    """Make the next read of any book of this session go to the broker (broker: name or module)"""
+    get_order_state().invalidate(broker, auth_token)
+
+
+def notify_order_update(broker, auth_token):
+    """
+    Called by broker streaming adapters for every order or position update event
+
+    The books of the session are invalidated and, as the broker evidently pushes
+    updates, kept for the longer stream staleness window from now on.
+    """
+    if not auth_token:
+        return
+    cache = get_order_state()
+    cache.set_order_stream(broker, auth_token, True)
+    cache.invalidate(broker, auth_token)
@@ -0,0 +1,312 @@
+"""
+Shared-memory quote board for strategy processes running on the same machine.
+
+The WebSocket proxy writes the latest LTP/bid/ask/volume of every instrument on the
+market data bus into a memory-mapped file; local strategy processes map the same file
+and read prices with plain memory loads - no socket, no syscall and no JSON parsing
+per read.
+
+File layout (little endian):
+
+* header  - magic, version, slot count, key size, slot size, used slots, generation
+* keys    - one fixed-size "EXCHANGE:SYMBOL" entry per slot, written once when the
+            instrument is first seen and published by bumping the used slot count
+* slots   - one 64 byte slot per instrument: sequence, ltp, bid, ask, volume and the
+            update time in epoch milliseconds
+
+Each slot is a seqlock: the single writer makes the sequence odd, writes the values
+and makes it even again; a reader retries while the sequence is odd or changed under
+it. Readers never block the writer and never take a lock.
+
+Recreating the board retires the previous file (its generation is set to 0) before a
+new file replaces it, so readers notice and remap on their next read.
+
+This module only uses the standard library so strategy scripts can import it cheaply:
+
+    import os, sys
+    sys.path.insert(0, os.getcwd())  # strategies run with the OpenAlgo directory as cwd
+    from utils.quote_board import QuoteBoard
+
+    board = QuoteBoard()
+    quote = board.get('RELIANCE', 'NSE')  # {'ltp': ..., 'bid': ..., 'ask': ..., 'volume': ..., 'timestamp': ...}
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+MAGIC = b'OAQB'
+VERSION = 1
+
+# magic, version, reserved, slots, key size, slot size, used slots, generation
+_HEADER = struct.Struct('<4sHHIIIIQ')
+HEADER_SIZE = 64
+_USED_OFFSET = 20
+_GENERATION_OFFSET = 24
+_USED = struct.Struct('<I')
+_GENERATION = struct.Struct('<Q')
+
+KEY_SIZE = 64
+SLOT_SIZE = 64
+# sequence, ltp, bid, ask, volume, timestamp (epoch ms)
+_SLOT = struct.Struct('<Qdddqq')
+_SEQUENCE = struct.Struct('<Q')
+_VALUES = struct.Struct('<dddqq')
+
+DEFAULT_SLOTS = 4096
+READ_RETRIES = 100
+
+
+def get_quote_board_config() -> Tuple[bool, str, int]:
+    """
+    Return (enabled, path, slots) from QUOTE_BOARD_ENABLED, QUOTE_BOARD_PATH and QUOTE_BOARD_SLOTS.
+
+    The default path lives in /dev/shm where available so the board never touches disk.
+    """
+    enabled = os.getenv('QUOTE_BOARD_ENABLED', 'False').strip().lower() == 'true'
+    path = os.getenv('QUOTE_BOARD_PATH', '').strip()
+    if not path:
+        directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+        path = os.path.join(directory, 'openalgo_quote_board')
+    try:
+        slots = max(1, int(os.getenv('QUOTE_BOARD_SLOTS', str(DEFAULT_SLOTS))))
+    except ValueError:
+        slots = DEFAULT_SLOTS
+    return enabled, path, slots
+
+
+def _file_size(slots: int) -> int:
+    return HEADER_SIZE + slots * (KEY_SIZE + SLOT_SIZE)
+
+
+def _retire(path: str) -> None:
+    """Mark an existing board file as replaced so its readers remap"""
+    try:
+        with open(path, 'r+b') as f:
+            if os.fstat(f.fileno()).st_size >= HEADER_SIZE and f.read(4) == MAGIC:
+                f.seek(_GENERATION_OFFSET)
+                f.write(_GENERATION.pack(0))
+    except OSError:
+        pass
+
+
+class QuoteBoardWriter:
+    """
+    Single writer of the quote board, owned by the WebSocket proxy
+
+    Instruments get a slot the first time they are updated; once every slot is taken
+    further instruments are counted in `dropped` and not published.
+    """
+
+    def __init__(self, path: str, slots: int = DEFAULT_SLOTS):
+        self.path = path
+        self.slots = slots
+        self.generation = time.time_ns()
+        self.index: Dict[Tuple[str, str], int] = {}  # (symbol, exchange) -> slot
+        self._sequences: List[int] = []
+        self._values: List[list] = []  # last ltp, bid, ask, volume per slot
+        self.updates = 0
+        self.dropped = 0
+
+        # Build the new board next to the old one and swap it in atomically
+        size = _file_size(slots)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.truncate(size)
+            f.write(_HEADER.pack(MAGIC, VERSION, 0, slots, KEY_SIZE, SLOT_SIZE, 0, self.generation))
+        _retire(path)
+        os.replace(temp_path, path)
+
+        self._file = open(path, 'r+b')
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        self._keys_offset = HEADER_SIZE
+        self._slots_offset = HEADER_SIZE + slots * KEY_SIZE
+
+    def _allocate(self, symbol: str, exchange: str) -> Optional[int]:
+        slot = len(self._sequences)
+        key = f"{exchange}:{symbol}".encode('utf-8')
+        if slot >= self.slots or len(key) >= KEY_SIZE:
+            self.dropped += 1
+            return None
+        self._mm[self._keys_offset + slot * KEY_SIZE:self._keys_offset + slot * KEY_SIZE + len(key)] = key
+        self._sequences.append(0)
+        self._values.append([0.0, 0.0, 0.0, 0])
+        # Publish the key only once it is complete
+        _USED.pack_into(self._mm, _USED_OFFSET, slot + 1)
+        self.index[(symbol, exchange)] = slot
+        return slot
+
+    def update(self, symbol: str, exchange: str, tick: Dict[str, Any]) -> bool:
+        """
+        Publish the prices of a normalised tick; fields missing from the tick keep their last value
+
+        Returns:
+            bool: False if the instrument has no slot (board full or key too long)
+        """
+        slot = self.index.get((symbol, exchange))
+        if slot is None:
+            slot = self._allocate(symbol, exchange)
+            if slot is None:
+                return False
+
+        values = self._values[slot]
+        ltp = tick.get('ltp')
+        if ltp:
+            values[0] = float(ltp)
+        bid = tick.get('bid')
+        ask = tick.get('ask')
+        depth = tick.get('depth')
+        if depth and (bid is None or ask is None):
+            buy = depth.get('buy')
+            sell = depth.get('sell')
+            if bid is None and buy:
+                bid = buy[0].get('price')
+            if ask is None and sell:
+                ask = sell[0].get('price')
+        if bid is not None:
+            values[1] = float(bid)
+        if ask is not None:
+            values[2] = float(ask)
+        volume = tick.get('volume')
+        if volume is not None:
+            values[3] = int(volume)
+
+        offset = self._slots_offset + slot * SLOT_SIZE
+        sequence = self._sequences[slot] + 1
+        _SEQUENCE.pack_into(self._mm, offset, sequence)  # odd: write in progress
+        _VALUES.pack_into(self._mm, offset + 8, values[0], values[1], values[2], values[3], time.time_ns() // 1000000)
+        _SEQUENCE.pack_into(self._mm, offset, sequence + 1)
+        self._sequences[slot] = sequence + 1
+        self.updates += 1
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'slots': self.slots,
+            'used': len(self._sequences),
+            'updates': self.updates,
+            'dropped': self.dropped,
+        }
+
+    def close(self) -> None:
+        """Retire the board so readers stop trusting its prices"""
+        if self._mm is None:
+            return
+        _GENERATION.pack_into(self._mm, _GENERATION_OFFSET, 0)
+        self._mm.close()
+        self._file.close()
+        self._mm = None
+
+
+class QuoteBoard:
+    """
+    Read-only view of the quote board for strategy processes
+
+    Raises:
+        FileNotFoundError: If no board has been published at path
+        ValueError: If the file is not a quote board
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or get_quote_board_config()[1]
+        self._mm = None
+        self._open()
+
+    def _open(self) -> None:
+        self.close()
+        with open(self.path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, slots, key_size, slot_size, _, generation = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or key_size != KEY_SIZE or slot_size != SLOT_SIZE:
+            self.close()
+            raise ValueError(f"{self.path} is not a version {VERSION} quote board")
+        self.slots = slots
+        self.generation = generation
+        self._keys_offset = HEADER_SIZE
+        self._slots_offset = HEADER_SIZE + slots * KEY_SIZE
+        self._index: Dict[Tuple[str, str], int] = {}
+        self._known = 0
+
+    def _check_generation(self) -> bool:
+        """Remap if the board was recreated, returns False while no live board exists"""
+        generation = _GENERATION.unpack_from(self._mm, _GENERATION_OFFSET)[0]
+        if generation == self.generation and generation:
+            return True
+        try:
+            self._open()
+        except (OSError, ValueError):
+            self._mm = None
+            return False
+        return bool(self.generation)
+
+    def _refresh_index(self) -> None:
+        used = min(_USED.unpack_from(self._mm, _USED_OFFSET)[0], self.slots)
+        for slot in range(self._known, used):
+            start = self._keys_offset + slot * KEY_SIZE
+            key = bytes(self._mm[start:start + KEY_SIZE]).rstrip(b'\0').decode('utf-8')
+            exchange, _, symbol = key.partition(':')
+            self._index[(symbol, exchange)] = slot
+        self._known = used
+
+    def _slot(self, symbol: str, exchange: str) -> Optional[int]:
+        if self._mm is None:
+            try:
+                self._open()
+            except (OSError, ValueError):
+                return None
+        if not self._check_generation():
+            return None
+        slot = self._index.get((symbol, exchange))
+        if slot is None:
+            self._refresh_index()
+            slot = self._index.get((symbol, exchange))
+        return slot
+
+    def get(self, symbol: str, exchange: str) -> Optional[Dict[str, Any]]:
+        """
+        Latest prices of an instrument
+
+        Returns:
+            dict or None: ltp, bid, ask, volume and timestamp (epoch ms of the last update),
+            None if the instrument is not on the board
+        """
+        slot = self._slot(symbol, exchange)
+        if slot is None:
+            return None
+        offset = self._slots_offset + slot * SLOT_SIZE
+        mm = self._mm
+        for _ in range(READ_RETRIES):
+            sequence, ltp, bid, ask, volume, timestamp = _SLOT.unpack_from(mm, offset)
+            if sequence & 1:
+                continue
+            if _SEQUENCE.unpack_from(mm, offset)[0] == sequence:
+                if not sequence:
+                    return None
+                return {'ltp': ltp, 'bid': bid, 'ask': ask, 'volume': volume, 'timestamp': timestamp}
+        return None
+
+    def get_ltp(self, symbol: str, exchange: str) -> Optional[float]:
+        quote = self.get(symbol, exchange)
+        return quote['ltp'] if quote else None
+
+    def symbols(self) -> List[Tuple[str, str]]:
+        """(symbol, exchange) of every instrument on the board"""
+        if self._mm is None or not self._check_generation():
+            return []
+        self._refresh_index()
+        return list(self._index)
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,69 @@
+"""
+Token bucket rate limiting for outbound broker calls made by background workers.
+
+Flask-Limiter guards the inbound API; these buckets pace work the server itself
+generates (webhook order dispatch, chunked history downloads) so it stays inside
+the same per-endpoint limits.
+"""
+
+import threading
+import time
+from typing import Optional
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+_PERIOD_SECONDS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_rate_limit(limit: str, default: float) -> float:
+    """
+    Convert a Flask-Limiter style limit ("10 per second", "100/minute") into calls/sec
+
+    Returns:
+        float: Allowed rate per second, or default if the value cannot be parsed
+    """
+    try:
+        count, period = limit.replace('/', ' per ').split(' per ')
+        period = period.strip().lower().rstrip('s')
+        return float(count) / _PERIOD_SECONDS[period]
+    except (AttributeError, KeyError, ValueError):
+        logger.warning(f"Invalid rate limit '{limit}', using {default} per second")
+        return default
+
+
+class TokenBucket:
+    """Token bucket allowing `rate` operations per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, now: Optional[float] = None) -> bool:
+        with self._lock:
+            now = time.monotonic() if now is None else now
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def wait_time(self, now: Optional[float] = None) -> float:
+        """Seconds until the next token is available"""
+        with self._lock:
+            now = time.monotonic() if now is None else now
+            self._refill(now)
+            return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def acquire(self) -> None:
+        """Block until a token is available, safe to call from several threads"""
+        while not self.try_acquire():
+            time.sleep(self.wait_time())
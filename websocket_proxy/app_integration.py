@@ -129,6 +129,14 @@ def start_websocket_server():
             ws_host = os.getenv('WEBSOCKET_HOST', '127.0.0.1')
             ws_port = int(os.getenv('WEBSOCKET_PORT', '8765'))
             
+            # Multi-process mode: this thread keeps the broker adapters, workers serve the clients
+            from .fanout import FanoutCoordinator, fanout_supported, get_fanout_workers
+            workers = get_fanout_workers()
+            if workers > 1 and fanout_supported():
+                _websocket_proxy_instance = FanoutCoordinator(host=ws_host, port=ws_port, workers=workers)
+                _websocket_proxy_instance.run()
+                return
+            
             # Create and store the proxy instance
             _websocket_proxy_instance = WebSocketProxy(host=ws_host, port=ws_port)
             
@@ -1,4 +1,3 @@
-import json
 import threading
 import zmq
 import random
@@ -6,6 +5,9 @@ import socket
 import os
 from abc import ABC, abstractmethod
 from utils.logging import get_logger
+from .tick_codec import (
+    TICK_FORMAT_JSON, SUPPORTED_TICK_FORMATS, encode_tick
+)
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -74,9 +76,17 @@ class BaseBrokerWebSocketAdapter(ABC):
     """
     # Class variable to track bound ports across instances
     _bound_ports = set()
-    _port_lock = threading.Lock()
+    _port_lock = threading.RLock()  # Reentrant: find_free_zmq_port takes it inside _bind_to_available_port
     _shared_context = None
     _context_lock = threading.Lock()
+
+    # Wire formats this adapter can publish, in order of preference.
+    # Adapters that must stay on JSON can override this with (TICK_FORMAT_JSON,)
+    supported_tick_formats = SUPPORTED_TICK_FORMATS
+
+    # Most instruments the broker accepts in a single subscribe frame. Adapters
+    # that override subscribe_bulk set this to their broker's limit
+    max_instruments_per_frame = 100
     
     def __init__(self):
         self.logger = get_logger("broker_adapter")
@@ -94,6 +104,8 @@ class BaseBrokerWebSocketAdapter(ABC):
             # Initialize instance variables
             self.subscriptions = {}
             self.connected = False
+            # JSON until the proxy negotiates otherwise
+            self.tick_format = TICK_FORMAT_JSON
             
             self.logger.info(f"BaseBrokerWebSocketAdapter initialized on port {self.zmq_port}")
             
@@ -202,6 +214,62 @@ class BaseBrokerWebSocketAdapter(ABC):
         """
         pass
         
+    def subscribe_bulk(self, instruments, mode=2, depth_level=5):
+        """
+        Subscribe to market data for many instruments at once
+        
+        The base implementation subscribes one instrument at a time. Adapters
+        whose broker accepts token lists override it to resolve all tokens with
+        resolve_instruments and send them in frames of max_instruments_per_frame.
+        
+        Args:
+            instruments: (symbol, exchange) pairs
+            mode: Subscription mode - 1:LTP, 2:Quote, 4:Depth
+            depth_level: Market depth level (5, 20, or 30 depending on broker support)
+            
+        Returns:
+            list: One response per instrument, in the order of instruments
+        """
+        return [self.subscribe(symbol, exchange, mode, depth_level) for symbol, exchange in instruments]
+    
+    def unsubscribe_bulk(self, instruments, mode=2):
+        """
+        Unsubscribe from market data for many instruments at once
+        
+        Args:
+            instruments: (symbol, exchange) pairs
+            mode: Subscription mode
+            
+        Returns:
+            list: One response per instrument, in the order of instruments
+        """
+        return [self.unsubscribe(symbol, exchange, mode) for symbol, exchange in instruments]
+    
+    def resolve_instruments(self, instruments):
+        """
+        Resolve (symbol, exchange) pairs to broker tokens with bulk lookups
+        
+        Returns:
+            list: Dicts with 'symbol', 'exchange', 'token' and 'brexchange',
+            or None for instruments that were not found
+        """
+        # Imported here so adapters that never batch don't need the symbol database
+        from .mapping import SymbolMapper
+        
+        resolved = []
+        for (symbol, exchange), token_info in zip(instruments, SymbolMapper.get_tokens_from_symbols(instruments)):
+            if token_info:
+                resolved.append({'symbol': symbol, 'exchange': exchange, **token_info})
+            else:
+                resolved.append(None)
+        return resolved
+    
+    def iter_frames(self, items):
+        """Split items into chunks of at most max_instruments_per_frame"""
+        size = max(1, self.max_instruments_per_frame)
+        for start in range(0, len(items), size):
+            yield items[start:start + size]
+        
     @abstractmethod
     def connect(self):
         """
@@ -246,6 +314,26 @@ class BaseBrokerWebSocketAdapter(ABC):
             logger.exception(f"Error in __del__ cleaning up ZMQ resources: {e}")
             pass
     
+    def negotiate_tick_format(self, requested_formats):
+        """
+        Agree on the tick wire format with the consumer of the ZeroMQ socket
+        
+        Args:
+            requested_formats: Formats the consumer can decode, in order of preference
+            
+        Returns:
+            str: The format this adapter will publish with (JSON if nothing matches)
+        """
+        tick_format = TICK_FORMAT_JSON
+        for requested in requested_formats:
+            if requested in self.supported_tick_formats:
+                tick_format = requested
+                break
+        
+        self.tick_format = tick_format
+        self.logger.info(f"Publishing market data using {tick_format} tick format")
+        return tick_format
+    
     def publish_market_data(self, topic, data):
         """
         Publish market data to ZeroMQ subscribers
@@ -257,7 +345,7 @@ class BaseBrokerWebSocketAdapter(ABC):
         try:
             self.socket.send_multipart([
                 topic.encode('utf-8'),
-                json.dumps(data).encode('utf-8')
+                encode_tick(data, self.tick_format)
             ])
         except Exception as e:
             self.logger.exception(f"Error publishing market data: {e}")
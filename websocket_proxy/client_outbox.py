@@ -0,0 +1,144 @@
+"""
+Per-client outbound queue for the WebSocket proxy.
+
+Market data is handed to a ClientOutbox instead of being awaited inline, so the
+ZeroMQ listener never waits on a slow socket. Each outbox owns one writer task that
+drains its queue in order. The queue is bounded:
+
+* ``conflate``    - a newer update for the same (symbol, exchange, mode) replaces the
+                    pending one in place; only when the queue is full of distinct keys
+                    is the oldest entry dropped
+* ``drop_oldest`` - every update is queued; the oldest entry is dropped when full
+"""
+
+import asyncio as aio
+import itertools
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import websockets
+
+from utils.logging import get_logger
+
+logger = get_logger("websocket_proxy")
+
+POLICY_CONFLATE = "conflate"
+POLICY_DROP_OLDEST = "drop_oldest"
+OUTBOX_POLICIES = (POLICY_CONFLATE, POLICY_DROP_OLDEST)
+
+# Log a slow-consumer warning on the first drop and then every N drops
+DROP_LOG_INTERVAL = 1000
+
+
+def get_outbox_config():
+    """
+    Read outbox sizing from the environment
+
+    Returns:
+        tuple: (max_size, policy)
+    """
+    max_size = int(os.getenv('WEBSOCKET_CLIENT_QUEUE_SIZE', '1000'))
+    policy = os.getenv('WEBSOCKET_CLIENT_QUEUE_POLICY', POLICY_CONFLATE).strip().lower()
+    if policy not in OUTBOX_POLICIES:
+        logger.warning(f"Unknown WEBSOCKET_CLIENT_QUEUE_POLICY '{policy}', using '{POLICY_CONFLATE}'")
+        policy = POLICY_CONFLATE
+    return max(1, max_size), policy
+
+
+class ClientOutbox:
+    """Bounded outbound message queue with a dedicated writer task for one client"""
+
+    def __init__(self, client_id: int, websocket, max_size: int = 1000, policy: str = POLICY_CONFLATE):
+        self.client_id = client_id
+        self.websocket = websocket
+        self.max_size = max_size
+        self.policy = policy
+
+        self._pending: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._wakeup = aio.Event()
+        self._sequence = itertools.count()
+        self._task = None
+        self.closed = False
+
+        # Counters for monitoring slow consumers
+        self.sent = 0
+        self.dropped = 0
+        self.conflated = 0
+
+    def start(self):
+        """Start the writer task on the running event loop"""
+        if self._task is None:
+            self._task = aio.get_running_loop().create_task(self._writer())
+        return self._task
+
+    def put(self, key: Hashable, message: str, conflate: Optional[bool] = None) -> None:
+        """
+        Queue a serialised message without blocking
+
+        Args:
+            key: Conflation key, normally (symbol, exchange, mode)
+            message: Serialised message shared by every client receiving it
+            conflate: Per-subscription override of the outbox policy
+        """
+        if self.closed:
+            return
+
+        if conflate is None:
+            conflate = self.policy == POLICY_CONFLATE
+
+        if conflate:
+            if key in self._pending:
+                # Keep the queue position so the symbol is not starved, send the newest value
+                self._pending[key] = message
+                self.conflated += 1
+                return
+        else:
+            key = next(self._sequence)
+
+        if len(self._pending) >= self.max_size:
+            self._pending.popitem(last=False)
+            self.dropped += 1
+            if self.dropped % DROP_LOG_INTERVAL == 1:
+                logger.warning(f"Client {self.client_id} is not keeping up: "
+                               f"{self.dropped} market data messages dropped")
+
+        self._pending[key] = message
+        self._wakeup.set()
+
+    async def _writer(self):
+        """Drain queued messages to the socket in order"""
+        try:
+            while not self.closed:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while self._pending and not self.closed:
+                    _, message = self._pending.popitem(last=False)
+                    await self.websocket.send(message)
+                    self.sent += 1
+        except websockets.exceptions.ConnectionClosed:
+            logger.info(f"Connection closed while sending market data to client {self.client_id}")
+        except aio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Error in outbound writer for client {self.client_id}: {e}")
+        finally:
+            self.closed = True
+            self._pending.clear()
+
+    def close(self):
+        """Stop the writer task and discard pending messages"""
+        self.closed = True
+        self._pending.clear()
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+            "policy": self.policy,
+            "max_size": self.max_size,
+        }
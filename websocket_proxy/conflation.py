@@ -0,0 +1,145 @@
+"""
+Tick conflation for the WebSocket proxy.
+
+Every client subscription carries a rate policy: a maximum update rate and whether
+only the latest value matters. Updates that arrive faster than the policy allows are
+coalesced per (client, symbol, exchange, mode) - a newer tick replaces the pending
+one - and the pending value is flushed by a periodic timer once the subscription's
+interval has elapsed. The first update after a quiet period is delivered immediately.
+"""
+
+import os
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+from utils.logging import get_logger
+
+logger = get_logger("websocket_proxy")
+
+# Environment variables holding the default max updates/sec per subscription mode
+MODE_RATE_ENV = {
+    1: ('WEBSOCKET_LTP_MAX_RATE', '20'),     # Matches the previous fixed 50ms LTP throttle
+    2: ('WEBSOCKET_QUOTE_MAX_RATE', '0'),    # 0 = unlimited
+    3: ('WEBSOCKET_DEPTH_MAX_RATE', '0'),
+}
+
+
+class RatePolicy(NamedTuple):
+    """Delivery policy of a single subscription"""
+    min_interval: float  # Seconds between updates, 0 for no limit
+    latest_only: bool    # Pending updates for the subscription may be replaced by newer ones
+
+    @property
+    def max_rate(self) -> Optional[float]:
+        return round(1.0 / self.min_interval, 3) if self.min_interval else None
+
+
+def make_rate_policy(max_rate=None, latest_only=False) -> RatePolicy:
+    """
+    Build a RatePolicy from client supplied values
+
+    Args:
+        max_rate: Maximum updates per second (None or 0 for unlimited)
+        latest_only: Only the most recent value matters (a bool, None for False)
+
+    Raises:
+        ValueError: If max_rate is not a non-negative number
+        TypeError: If latest_only is not a bool
+    """
+    if max_rate in (None, ''):
+        max_rate = 0
+    max_rate = float(max_rate)
+    if max_rate < 0:
+        raise ValueError("max_rate must be zero or positive")
+    if latest_only is None:
+        latest_only = False
+    if not isinstance(latest_only, bool):
+        raise TypeError("latest_only must be true or false")
+    return RatePolicy(1.0 / max_rate if max_rate else 0.0, latest_only)
+
+
+def get_default_policies(latest_only: bool) -> Dict[int, RatePolicy]:
+    """Read the per-mode default rate policies from the environment"""
+    defaults = {}
+    for mode, (env_name, default) in MODE_RATE_ENV.items():
+        try:
+            defaults[mode] = make_rate_policy(os.getenv(env_name, default), latest_only)
+        except ValueError:
+            logger.warning(f"Invalid {env_name}, using {default}")
+            defaults[mode] = make_rate_policy(default, latest_only)
+    return defaults
+
+
+class ConflationEngine:
+    """Coalesces throttled subscription updates and releases them on a timer"""
+
+    def __init__(self, flush_interval: float = 0.01):
+        self.flush_interval = flush_interval
+        # (client_id, sub_key) -> RatePolicy of every subscription
+        self.policies: Dict[Tuple[int, Hashable], RatePolicy] = {}
+        # (client_id, sub_key) -> monotonic time of the last delivered update
+        self.last_sent: Dict[Tuple[int, Hashable], float] = {}
+        # (client_id, sub_key) -> latest undelivered message
+        self.pending: Dict[Tuple[int, Hashable], str] = {}
+        self.coalesced = 0
+
+    def set_policy(self, client_id: int, sub_key: Hashable, policy: RatePolicy) -> None:
+        key = (client_id, sub_key)
+        self.policies[key] = policy
+        if not policy.min_interval:
+            self.last_sent.pop(key, None)
+            self.pending.pop(key, None)
+
+    def remove(self, client_id: int, sub_key: Hashable) -> None:
+        key = (client_id, sub_key)
+        self.policies.pop(key, None)
+        self.last_sent.pop(key, None)
+        self.pending.pop(key, None)
+
+    def remove_client(self, client_id: int) -> None:
+        for store in (self.policies, self.last_sent, self.pending):
+            for key in [key for key in store if key[0] == client_id]:
+                del store[key]
+
+    def offer(self, client_id: int, sub_key: Hashable, policy: RatePolicy,
+              message: str, now: float) -> Optional[str]:
+        """
+        Offer an update for a throttled subscription
+
+        Returns:
+            str or None: The message if it may be delivered now, otherwise None and the
+            message is held as the pending value for the next flush
+        """
+        key = (client_id, sub_key)
+        if key not in self.pending and now - self.last_sent.get(key, 0.0) >= policy.min_interval:
+            self.last_sent[key] = now
+            return message
+
+        if key in self.pending:
+            self.coalesced += 1
+        self.pending[key] = message
+        return None
+
+    def due(self, now: float) -> List[Tuple[int, Hashable, str]]:
+        """Pop every pending update whose subscription interval has elapsed"""
+        if not self.pending:
+            return []
+
+        ready = []
+        for key, message in self.pending.items():
+            policy = self.policies.get(key)
+            if policy is None or now - self.last_sent.get(key, 0.0) >= policy.min_interval:
+                ready.append((key, message))
+
+        for key, message in ready:
+            del self.pending[key]
+            self.last_sent[key] = now
+
+        return [(client_id, sub_key, message) for (client_id, sub_key), message in ready]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "subscriptions": len(self.policies),
+            "throttled_subscriptions": sum(1 for policy in self.policies.values() if policy.min_interval),
+            "pending": len(self.pending),
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,639 @@
+"""
+Multi-process fan-out tier for the WebSocket proxy.
+
+A single WebSocketProxy consumes ZeroMQ and writes to every client socket on one
+asyncio loop, so delivery is bound to one core. With WEBSOCKET_WORKERS > 1 the
+proxy is split in two tiers:
+
+* the coordinator (this process) owns the broker adapters - one broker session
+  per user, as before - and forwards their ZeroMQ ticks through an XSUB/XPUB pair
+* N worker processes share the WebSocket port (SO_REUSEPORT), each serving the
+  clients the kernel hands it with an unchanged WebSocketProxy fed by the XPUB
+
+Workers reach the broker adapters through RemoteBrokerAdapter, which sends
+open/subscribe/unsubscribe/close requests to the coordinator's ROUTER socket.
+The coordinator reference counts every (user, symbol, exchange, mode) across
+workers, so the broker sees one subscribe when the first client wants an
+instrument and one unsubscribe when the last client lets it go.
+
+Workers are started as `python -m websocket_proxy.fanout` subprocesses and are
+restarted if they exit; their references are released first.
+"""
+
+import argparse
+import asyncio as aio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import zmq
+
+from utils.logging import get_logger
+from utils.quote_board import QuoteBoardWriter, get_quote_board_config
+from .broker_factory import create_broker_adapter
+from .port_check import is_port_in_use
+from .server import KEEP_ALIVE_BROKERS, WebSocketProxy
+from .tick_codec import TICK_FORMAT_JSON, TopicTable, decode_tick, get_configured_tick_format
+from .tick_recorder import TickRecorder, get_recorder_config
+
+logger = get_logger("websocket_fanout")
+
+# Seconds a worker waits for the coordinator; broker subscribe calls can be slow
+REQUEST_TIMEOUT = 30.0
+# Seconds between worker liveness checks
+WORKER_CHECK_INTERVAL = 1.0
+# Messages moved per socket per poll wake-up
+FORWARD_BATCH = 1000
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_fanout_workers() -> int:
+    """Number of WebSocket worker processes from WEBSOCKET_WORKERS (1 = single process proxy)"""
+    try:
+        return max(1, int(os.getenv('WEBSOCKET_WORKERS', '1')))
+    except ValueError:
+        return 1
+
+
+def fanout_supported() -> bool:
+    """Workers share the WebSocket port, which needs SO_REUSEPORT (not available on Windows)"""
+    return hasattr(socket, 'SO_REUSEPORT')
+
+
+class SubscriptionRefs:
+    """
+    Reference counts of upstream subscriptions
+
+    Each key counts references per holder (a worker), so the references of a
+    holder can be dropped at once when it goes away.
+    """
+
+    def __init__(self):
+        self.counts: Dict[Hashable, Dict[Hashable, int]] = {}
+
+    def __len__(self):
+        return len(self.counts)
+
+    def held(self, key) -> bool:
+        return key in self.counts
+
+    def acquire(self, key, holder) -> bool:
+        """Add a reference; True if nobody held the key before"""
+        holders = self.counts.get(key)
+        if holders is None:
+            self.counts[key] = {holder: 1}
+            return True
+        holders[holder] = holders.get(holder, 0) + 1
+        return False
+
+    def release(self, key, holder) -> bool:
+        """Drop a reference of holder; True if that was the last reference to the key"""
+        holders = self.counts.get(key)
+        if not holders or holder not in holders:
+            return False
+        holders[holder] -= 1
+        if holders[holder] <= 0:
+            del holders[holder]
+        if holders:
+            return False
+        del self.counts[key]
+        return True
+
+    def release_holder(self, holder, match: Optional[Callable[[Any], bool]] = None) -> List:
+        """Drop every reference of holder (to keys accepted by match); returns the keys nobody holds any more"""
+        released = []
+        for key, holders in list(self.counts.items()):
+            if holder not in holders or (match is not None and not match(key)):
+                continue
+            del holders[holder]
+            if not holders:
+                del self.counts[key]
+                released.append(key)
+        return released
+
+
+class FanoutCoordinator:
+    """
+    Broker-facing tier of the multi-process proxy: broker adapters, the tick
+    forwarder, the subscription reference counts and the worker processes
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, workers: int = 2):
+        if is_port_in_use(host, port, wait_time=2.0):
+            error_msg = f"WebSocket port {port} is already in use on {host}"
+            logger.error(error_msg)
+            raise RuntimeError(error_msg)
+
+        self.host = host
+        self.port = port
+        self.worker_count = workers
+        self.running = False
+
+        self.adapter_factory = create_broker_adapter
+        self.adapters = {}  # Maps user_id to broker adapter
+        self.user_brokers = {}  # Maps user_id to broker_name
+        self.user_workers: Dict[str, set] = defaultdict(set)  # Maps user_id to workers serving the user
+        self.refs = SubscriptionRefs()  # (user_id, symbol, exchange, mode) -> references per worker
+        self.subscribe_responses: Dict[Tuple, dict] = {}  # Upstream response of every held key
+        self.adapter_endpoints: Dict[str, str] = {}  # Maps user_id to the adapter's ZeroMQ endpoint
+        self.workers: Dict[str, subprocess.Popen] = {}
+
+        preferred_format = get_configured_tick_format()
+        self.tick_formats = [preferred_format]
+        if preferred_format != TICK_FORMAT_JSON:
+            self.tick_formats.append(TICK_FORMAT_JSON)
+
+        self.zmq_context = zmq.Context()
+        # Adapters publish to the frontend, workers subscribe to the backend
+        self.frontend = self.zmq_context.socket(zmq.XSUB)
+        self.backend = self.zmq_context.socket(zmq.XPUB)
+        self.backend.setsockopt(zmq.SNDHWM, 10000)
+        self.data_endpoint = f"tcp://127.0.0.1:{self.backend.bind_to_random_port('tcp://127.0.0.1')}"
+        self.control = self.zmq_context.socket(zmq.ROUTER)
+        self.control.setsockopt(zmq.ROUTER_HANDOVER, 1)  # A restarted worker reuses its identity
+        self.control_endpoint = f"tcp://127.0.0.1:{self.control.bind_to_random_port('tcp://127.0.0.1')}"
+
+        # The quote board and the tick recording need one writer that sees every tick, which is the forwarder
+        self.quote_board = None
+        self.topic_table = TopicTable()
+        board_enabled, board_path, board_slots = get_quote_board_config()
+        if board_enabled:
+            try:
+                self.quote_board = QuoteBoardWriter(board_path, board_slots)
+                logger.info(f"Quote board published at {board_path} ({board_slots} slots)")
+            except OSError as e:
+                logger.warning(f"Quote board disabled, cannot create {board_path}: {e}")
+
+        self.tick_recorder = None
+        recorder_enabled, recorder_dir, recorder_flush = get_recorder_config()
+        if recorder_enabled:
+            try:
+                self.tick_recorder = TickRecorder(recorder_dir, recorder_flush)
+                logger.info(f"Recording ticks to {recorder_dir}")
+            except OSError as e:
+                logger.warning(f"Tick recording disabled, cannot create {recorder_dir}: {e}")
+
+        if self.quote_board is not None or self.tick_recorder is not None:
+            self.frontend.send(b'\x01')  # Receive every tick, subscribed by a worker or not
+
+    def run(self):
+        """Start the workers and serve the forwarder and control requests until stopped"""
+        self.running = True
+        logger.info(f"Starting {self.worker_count} WebSocket workers on {self.host}:{self.port}")
+        for i in range(self.worker_count):
+            self._start_worker(f"worker-{i + 1}")
+
+        poller = zmq.Poller()
+        poller.register(self.frontend, zmq.POLLIN)
+        poller.register(self.backend, zmq.POLLIN)
+        poller.register(self.control, zmq.POLLIN)
+        next_check = time.monotonic() + WORKER_CHECK_INTERVAL
+        try:
+            while self.running:
+                events = dict(poller.poll(300))
+                if self.frontend in events:
+                    self._forward_ticks()
+                if self.backend in events:
+                    self._forward_subscriptions()
+                if self.control in events:
+                    self._serve_requests()
+                now = time.monotonic()
+                if now >= next_check:
+                    self._check_workers()
+                    next_check = now + WORKER_CHECK_INTERVAL
+        finally:
+            self._shutdown()
+
+    def stop(self):
+        """Ask the run loop to shut down"""
+        self.running = False
+
+    def _start_worker(self, worker_id):
+        command = [
+            sys.executable, '-m', 'websocket_proxy.fanout',
+            '--worker-id', worker_id,
+            '--host', self.host,
+            '--port', str(self.port),
+            '--data-endpoint', self.data_endpoint,
+            '--control-endpoint', self.control_endpoint,
+            '--parent-pid', str(os.getpid()),
+        ]
+        self.workers[worker_id] = subprocess.Popen(command, cwd=REPO_ROOT)
+        logger.info(f"Started WebSocket {worker_id} (pid {self.workers[worker_id].pid})")
+
+    def _check_workers(self):
+        for worker_id, process in list(self.workers.items()):
+            if process.poll() is None:
+                continue
+            logger.warning(f"WebSocket {worker_id} exited with code {process.returncode}, restarting it")
+            self.release_worker(worker_id)
+            if self.running:
+                self._start_worker(worker_id)
+
+    def _forward_ticks(self):
+        for _ in range(FORWARD_BATCH):
+            try:
+                frames = self.frontend.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                break
+            if len(frames) == 2:
+                if self.quote_board is not None:
+                    self._publish_quote(*frames)
+                if self.tick_recorder is not None:
+                    self.tick_recorder.record(*frames)
+            self.backend.send_multipart(frames)
+
+    def _forward_subscriptions(self):
+        for _ in range(FORWARD_BATCH):
+            try:
+                self.frontend.send_multipart(self.backend.recv_multipart(zmq.NOBLOCK))
+            except zmq.Again:
+                break
+
+    def _publish_quote(self, topic, data):
+        """Write a tick's prices into the shared-memory quote board"""
+        try:
+            parsed_topic = self.topic_table.parse(topic)
+            if parsed_topic:
+                _, exchange, symbol, _ = parsed_topic
+                self.quote_board.update(symbol, exchange, decode_tick(data))
+        except Exception as e:
+            logger.debug(f"Quote board update failed for {topic!r}: {e}")
+
+    def _serve_requests(self):
+        for _ in range(FORWARD_BATCH):
+            try:
+                identity, _, payload = self.control.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                break
+            except ValueError:
+                continue  # Not a worker request
+            request = {}
+            try:
+                request = json.loads(payload)
+                reply = self.handle_request(identity.decode('utf-8'), request)
+            except Exception as e:
+                logger.exception(f"Error handling fan-out request {request.get('op')}: {e}")
+                reply = self._error("FANOUT_ERROR", str(e))
+            reply['id'] = request.get('id')
+            self.control.send_multipart([identity, b'', json.dumps(reply).encode('utf-8')])
+
+    def handle_request(self, worker_id: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply a worker's request to the broker adapters
+
+        Args:
+            worker_id: Identity of the requesting worker
+            request: Dict with 'op' (open, subscribe, unsubscribe, close, bye) and its fields
+        """
+        op = request.get('op')
+        user_id = request.get('user_id')
+        if op == 'open':
+            return self._open(worker_id, user_id, request.get('broker_name'))
+        if op == 'subscribe':
+            return self._subscribe(worker_id, user_id, request.get('instruments') or [],
+                                   request.get('mode', 2), request.get('depth_level', 5))
+        if op == 'unsubscribe':
+            return self._unsubscribe(worker_id, user_id, request.get('instruments') or [], request.get('mode', 2))
+        if op == 'close':
+            self.release_user(worker_id, user_id)
+            return {'status': 'success'}
+        if op == 'bye':
+            self.release_worker(worker_id)
+            return {'status': 'success'}
+        return self._error("INVALID_ACTION", f"Invalid fan-out request: {op}")
+
+    def _open(self, worker_id, user_id, broker_name):
+        """Create and connect the user's broker adapter unless it is already running"""
+        if user_id not in self.adapters:
+            adapter = self.adapter_factory(broker_name)
+            if not adapter:
+                return self._error("BROKER_ERROR", f"Failed to create adapter for broker: {broker_name}")
+
+            initialization_result = adapter.initialize(broker_name, user_id)
+            if initialization_result and not initialization_result.get('success', True):
+                return self._error("BROKER_INIT_ERROR",
+                                   initialization_result.get('error', 'Failed to initialize broker adapter'))
+
+            connect_result = adapter.connect()
+            if connect_result and not connect_result.get('success', True):
+                return self._error("BROKER_CONNECTION_ERROR",
+                                   connect_result.get('error', 'Failed to connect to broker'))
+
+            adapter.negotiate_tick_format(self.tick_formats)
+            endpoint = f"tcp://127.0.0.1:{adapter.zmq_port}"
+            self.frontend.connect(endpoint)
+            self.adapter_endpoints[user_id] = endpoint
+            self.adapters[user_id] = adapter
+            self.user_brokers[user_id] = broker_name
+            logger.info(f"Successfully created and connected {broker_name} adapter for user {user_id}")
+
+        self.user_workers[user_id].add(worker_id)
+        return {'status': 'success'}
+
+    def _subscribe(self, worker_id, user_id, instruments, mode, depth_level):
+        adapter = self.adapters.get(user_id)
+        if adapter is None:
+            return self._error("BROKER_ERROR", "Broker adapter not found")
+        self.user_workers[user_id].add(worker_id)
+
+        # Only instruments nobody holds yet are sent to the broker
+        keys = [(user_id, symbol, exchange, mode) for symbol, exchange in instruments]
+        upstream = [i for i, key in enumerate(keys) if self.refs.acquire(key, worker_id)]
+        results = []
+        if upstream:
+            results = adapter.subscribe_bulk([tuple(instruments[i]) for i in upstream], mode, depth_level)
+            for i, result in zip(upstream, results):
+                if result.get('status') == 'success':
+                    self.subscribe_responses[keys[i]] = result
+                else:
+                    self.subscribe_responses.pop(keys[i], None)
+
+        responses = []
+        for key in keys:
+            response = self.subscribe_responses.get(key)
+            if response is None:
+                # The broker rejected it: drop the reference taken above
+                self.refs.release(key, worker_id)
+                response = next((result for i, result in zip(upstream, results) if keys[i] == key),
+                                {'status': 'error', 'message': 'Subscription failed'})
+            responses.append(response)
+        return {'status': 'success', 'responses': responses}
+
+    def _unsubscribe(self, worker_id, user_id, instruments, mode):
+        adapter = self.adapters.get(user_id)
+        if adapter is None:
+            return self._error("BROKER_ERROR", "Broker adapter not found")
+
+        # Instruments other workers still hold stay subscribed at the broker
+        keys = [(user_id, symbol, exchange, mode) for symbol, exchange in instruments]
+        responses = [{'status': 'success', 'message': f"Unsubscribed from {key[1]}"} for key in keys]
+        upstream = []
+        for i, key in enumerate(keys):
+            self.refs.release(key, worker_id)
+            if not self.refs.held(key):
+                upstream.append(i)
+                self.subscribe_responses.pop(key, None)
+        if upstream:
+            results = adapter.unsubscribe_bulk([tuple(instruments[i]) for i in upstream], mode)
+            for i, result in zip(upstream, results):
+                responses[i] = result
+        return {'status': 'success', 'responses': responses}
+
+    def _unsubscribe_upstream(self, keys):
+        """Unsubscribe released keys at the broker, one bulk call per user and mode"""
+        by_user_mode = defaultdict(list)
+        for user_id, symbol, exchange, mode in keys:
+            self.subscribe_responses.pop((user_id, symbol, exchange, mode), None)
+            by_user_mode[(user_id, mode)].append((symbol, exchange))
+        for (user_id, mode), instruments in by_user_mode.items():
+            adapter = self.adapters.get(user_id)
+            if adapter is None:
+                continue
+            try:
+                adapter.unsubscribe_bulk(instruments, mode)
+            except Exception as e:
+                logger.exception(f"Error unsubscribing {len(instruments)} instruments for user {user_id}: {e}")
+
+    def release_user(self, worker_id, user_id):
+        """A worker no longer serves the user: drop its references and the adapter if nobody else needs it"""
+        self._unsubscribe_upstream(self.refs.release_holder(worker_id, lambda key: key[0] == user_id))
+        workers = self.user_workers.get(user_id)
+        if workers is not None:
+            workers.discard(worker_id)
+            if not workers:
+                del self.user_workers[user_id]
+                self._release_adapter(user_id)
+
+    def release_worker(self, worker_id):
+        """Drop every reference and user of a worker that stopped"""
+        self._unsubscribe_upstream(self.refs.release_holder(worker_id))
+        for user_id in [user_id for user_id, workers in self.user_workers.items() if worker_id in workers]:
+            self.release_user(worker_id, user_id)
+
+    def _release_adapter(self, user_id):
+        adapter = self.adapters.get(user_id)
+        if adapter is None:
+            return
+        broker_name = self.user_brokers.get(user_id)
+
+        # For Flattrade and Shoonya, keep the connection alive and just unsubscribe from data
+        if broker_name in KEEP_ALIVE_BROKERS and hasattr(adapter, 'unsubscribe_all'):
+            logger.info(f"{broker_name.title()} adapter for user {user_id}: last worker released it. Unsubscribing all symbols instead of disconnecting.")
+            adapter.unsubscribe_all()
+            return
+
+        logger.info(f"Last client for user {user_id} disconnected. Disconnecting {broker_name or 'unknown broker'} adapter.")
+        try:
+            adapter.disconnect()
+        except Exception as e:
+            logger.error(f"Error disconnecting adapter for user {user_id}: {e}")
+        endpoint = self.adapter_endpoints.pop(user_id, None)
+        if endpoint:
+            try:
+                self.frontend.disconnect(endpoint)
+            except zmq.ZMQError:
+                pass
+        del self.adapters[user_id]
+        self.user_brokers.pop(user_id, None)
+
+    def _shutdown(self):
+        self.running = False
+        for process in self.workers.values():
+            if process.poll() is None:
+                process.terminate()
+        deadline = time.monotonic() + 2.0
+        for worker_id, process in self.workers.items():
+            try:
+                process.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                logger.warning(f"WebSocket {worker_id} did not stop, killing it")
+                process.kill()
+        self.workers.clear()
+
+        for user_id, adapter in self.adapters.items():
+            try:
+                adapter.disconnect()
+            except Exception as e:
+                logger.error(f"Error disconnecting adapter for user {user_id}: {e}")
+        self.adapters.clear()
+
+        if self.quote_board is not None:
+            self.quote_board.close()
+            self.quote_board = None
+
+        if self.tick_recorder is not None:
+            self.tick_recorder.stop()
+            self.tick_recorder = None
+
+        for sock in (self.frontend, self.backend, self.control):
+            sock.close(linger=0)
+        self.zmq_context.term()
+        logger.info("WebSocket fan-out coordinator stopped")
+
+    @staticmethod
+    def _error(code, message):
+        return {'status': 'error', 'code': code, 'message': message}
+
+
+class ControlLink:
+    """Request channel from a worker to the coordinator"""
+
+    def __init__(self, endpoint: str, worker_id: str, timeout: float = REQUEST_TIMEOUT):
+        self.timeout = timeout
+        self.context = zmq.Context()
+        self.socket = self.context.socket(zmq.DEALER)
+        self.socket.setsockopt(zmq.IDENTITY, worker_id.encode('utf-8'))
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.connect(endpoint)
+        self._last_id = 0
+
+    def request(self, op: str, **fields) -> Dict[str, Any]:
+        """Send a request and wait for its reply; replies to abandoned requests are skipped"""
+        self._last_id += 1
+        self._send(op, fields)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.socket.poll(int(remaining * 1000)):
+                return {'status': 'error', 'code': 'FANOUT_TIMEOUT',
+                        'message': f"No reply from the WebSocket coordinator to '{op}'"}
+            reply = json.loads(self.socket.recv_multipart()[-1])
+            if reply.get('id') == self._last_id:
+                return reply
+
+    def notify(self, op: str, **fields) -> None:
+        """Send a request without waiting for the reply"""
+        self._last_id += 1
+        self._send(op, fields)
+
+    def _send(self, op, fields):
+        message = {'id': self._last_id, 'op': op}
+        message.update(fields)
+        self.socket.send_multipart([b'', json.dumps(message).encode('utf-8')])
+
+    def close(self):
+        self.socket.close()
+        self.context.term()
+
+
+class RemoteBrokerAdapter:
+    """
+    Broker adapter of a fan-out worker
+
+    The broker session lives in the coordinator; every call is forwarded there and
+    answered with the same responses the real adapter would give.
+    """
+
+    def __init__(self, link: ControlLink, broker_name: str):
+        self.link = link
+        self.broker_name = broker_name
+        self.user_id = None
+
+    def initialize(self, broker_name, user_id, auth_data=None):
+        self.user_id = user_id
+        reply = self.link.request('open', user_id=user_id, broker_name=broker_name)
+        if reply.get('status') != 'success':
+            return {'success': False, 'error': reply.get('message', 'Failed to initialize broker adapter')}
+        return {'success': True}
+
+    def connect(self):
+        # The coordinator connects the broker when the user is opened
+        return {'success': True}
+
+    def negotiate_tick_format(self, requested_formats):
+        # The coordinator negotiates with the real adapter
+        return None
+
+    def subscribe_bulk(self, instruments, mode=2, depth_level=5):
+        if not instruments:
+            return []
+        reply = self.link.request('subscribe', user_id=self.user_id, instruments=[list(i) for i in instruments],
+                                  mode=mode, depth_level=depth_level)
+        return self._responses(reply, len(instruments))
+
+    def unsubscribe_bulk(self, instruments, mode=2):
+        if not instruments:
+            return []
+        reply = self.link.request('unsubscribe', user_id=self.user_id, instruments=[list(i) for i in instruments],
+                                  mode=mode)
+        return self._responses(reply, len(instruments))
+
+    def subscribe(self, symbol, exchange, mode=2, depth_level=5):
+        return self.subscribe_bulk([(symbol, exchange)], mode, depth_level)[0]
+
+    def unsubscribe(self, symbol, exchange, mode=2):
+        return self.unsubscribe_bulk([(symbol, exchange)], mode)[0]
+
+    def unsubscribe_all(self):
+        self.link.request('close', user_id=self.user_id)
+
+    def disconnect(self):
+        self.link.request('close', user_id=self.user_id)
+
+    @staticmethod
+    def _responses(reply, count):
+        if reply.get('status') == 'success':
+            return reply['responses']
+        return [{'status': 'error', 'message': reply.get('message', 'Request failed')} for _ in range(count)]
+
+
+class FanoutWorkerProxy(WebSocketProxy):
+    """WebSocket proxy serving one shard of the clients in a fan-out worker process"""
+
+    def __init__(self, host: str, port: int, worker_id: str, data_endpoint: str, control_endpoint: str):
+        self.worker_id = worker_id
+        self.link = ControlLink(control_endpoint, worker_id)
+        super().__init__(host, port, zmq_endpoint=data_endpoint, shared_port=True, tap_bus=False)
+
+    def create_adapter(self, broker_name):
+        return RemoteBrokerAdapter(self.link, broker_name)
+
+    async def stop(self):
+        # One message releases everything this worker held at the coordinator
+        self.broker_adapters.clear()
+        self.link.notify('bye')
+        await super().stop()
+        self.link.close()
+
+
+async def run_worker(worker_id, host, port, data_endpoint, control_endpoint, parent_pid):
+    """Serve clients until stopped by a signal or until the coordinator process goes away"""
+    proxy = FanoutWorkerProxy(host, port, worker_id, data_endpoint, control_endpoint)
+
+    async def watch_parent():
+        while proxy.running:
+            if os.getppid() != parent_pid:
+                logger.warning(f"WebSocket {worker_id}: coordinator exited, stopping")
+                proxy.running = False
+                break
+            await aio.sleep(1.0)
+
+    watcher = aio.create_task(watch_parent())
+    try:
+        await proxy.start()
+    finally:
+        watcher.cancel()
+        await proxy.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAlgo WebSocket fan-out worker")
+    parser.add_argument('--worker-id', required=True)
+    parser.add_argument('--host', required=True)
+    parser.add_argument('--port', type=int, required=True)
+    parser.add_argument('--data-endpoint', required=True)
+    parser.add_argument('--control-endpoint', required=True)
+    parser.add_argument('--parent-pid', type=int, required=True)
+    args = parser.parse_args()
+    try:
+        aio.run(run_worker(args.worker_id, args.host, args.port, args.data_endpoint,
+                           args.control_endpoint, args.parent_pid))
+    except KeyboardInterrupt:
+        pass
@@ -1,5 +1,5 @@
 from utils.logging import get_logger
-from database.token_db import get_token, get_brexchange
+from database.token_db import get_token, get_brexchange, get_tokens_bulk, get_brexchanges_bulk
 from database.symbol import SymToken
 
 class ExchangeMapper:
@@ -58,6 +58,39 @@ class SymbolMapper:
             SymbolMapper.logger.exception(f"Error retrieving symbol: {e}")
             return None
 
+    @staticmethod
+    def get_tokens_from_symbols(instruments):
+        """
+        Convert many symbols to broker-specific tokens with bulk lookups
+        
+        Args:
+            instruments (list): (symbol, exchange) pairs
+            
+        Returns:
+            list: Token data dicts with 'token' and 'brexchange', in the order of
+            instruments, with None for symbols that were not found
+        """
+        try:
+            pairs = [(symbol, exchange) for symbol, exchange in instruments]
+            tokens = get_tokens_bulk(pairs)
+            brexchanges = get_brexchanges_bulk(pairs)
+        except Exception as e:
+            SymbolMapper.logger.exception(f"Error retrieving symbols: {e}")
+            return [None] * len(instruments)
+        
+        results = []
+        missing = 0
+        for token, brexchange in zip(tokens, brexchanges):
+            if token and brexchange:
+                results.append({'token': token, 'brexchange': brexchange})
+            else:
+                results.append(None)
+                missing += 1
+        
+        if missing:
+            SymbolMapper.logger.error(f"{missing} of {len(pairs)} symbols not found")
+        return results
+
 
 class BrokerCapabilityRegistry:
     """
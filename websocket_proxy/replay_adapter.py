@@ -0,0 +1,187 @@
+"""
+Replay broker adapter: republishes a recorded tick file on the ZeroMQ bus.
+
+Ticks of subscribed instruments are sent with their recorded payload frames and
+the recorded spacing, divided by the replay speed (1 = real time, 10 = ten times
+faster, 'max' = no pacing). The replay clock starts with the first subscription,
+so nothing is lost while clients connect.
+
+Configuration (environment, or keys of auth_data passed to initialize):
+
+* TICK_REPLAY_FILE  / file  - tick file, or a trading day (YYYYMMDD / YYYY-MM-DD)
+                              looked up in TICK_RECORDER_DIR
+* TICK_REPLAY_SPEED / speed - 1 (default), any positive factor, or 'max'
+* TICK_REPLAY_LOOP  / loop  - start over at the end of the file (default False)
+
+The adapter is found by create_broker_adapter('replay'), or can be registered
+under another name with register_adapter.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .base_adapter import BaseBrokerWebSocketAdapter
+from .tick_codec import TopicTable
+from .tick_recorder import TickFile, get_recorder_config, tick_file_path
+
+MODE_NAMES = {1: 'LTP', 2: 'QUOTE', 3: 'DEPTH'}
+
+# Longest single sleep of the pacing loop, keeps disconnect responsive
+MAX_SLEEP = 0.5
+
+
+def parse_speed(value) -> Optional[float]:
+    """Replay speed factor, None for 'max'"""
+    if value is None:
+        return 1.0
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value in ('max', '0', ''):
+            return None
+    speed = float(value)
+    if speed <= 0:
+        return None
+    return speed
+
+
+class ReplayWebSocketAdapter(BaseBrokerWebSocketAdapter):
+    """Broker adapter that plays back a tick recording instead of connecting to a broker"""
+
+    def __init__(self):
+        super().__init__()
+        self.broker_name = "replay"
+        self.user_id = None
+        self.path = None
+        self.speed: Optional[float] = 1.0
+        self.loop = False
+        self.subscribed: Set[Tuple[str, str, int]] = set()
+        self.topic_table = TopicTable()
+        self.topics: Dict[bytes, Optional[Tuple[Tuple[str, str, int], bytes]]] = {}
+        self._subscribed_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.finished = threading.Event()
+
+        # Counters
+        self.published = 0
+        self.skipped = 0
+
+    def initialize(self, broker_name, user_id, auth_data=None):
+        options = auth_data or {}
+        self.broker_name = broker_name or self.broker_name
+        self.user_id = user_id
+
+        source = options.get('file') or os.getenv('TICK_REPLAY_FILE', '').strip()
+        if not source:
+            return self._create_error_response("REPLAY_ERROR", "TICK_REPLAY_FILE is not set")
+        if not os.path.exists(source):
+            source = tick_file_path(get_recorder_config()[1], source)
+        if not os.path.exists(source):
+            return self._create_error_response("REPLAY_ERROR", f"Tick file not found: {source}")
+
+        try:
+            self.speed = parse_speed(options.get('speed', os.getenv('TICK_REPLAY_SPEED', '1')))
+        except ValueError:
+            return self._create_error_response("REPLAY_ERROR", "TICK_REPLAY_SPEED must be a number or 'max'")
+        loop = options.get('loop', os.getenv('TICK_REPLAY_LOOP', 'False'))
+        self.loop = loop if isinstance(loop, bool) else str(loop).strip().lower() == 'true'
+        self.path = source
+        speed = f"{self.speed:g}x" if self.speed else "max speed"
+        self.logger.info(f"Replay adapter for user {user_id} will play {source} at {speed}")
+        return self._create_success_response("Replay adapter initialized", file=source)
+
+    def connect(self):
+        if self.path is None:
+            return self._create_error_response("NOT_INITIALIZED", "Replay adapter is not initialized")
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._replay, daemon=True, name="TickReplay")
+            self._thread.start()
+        self.connected = True
+        return self._create_success_response("Replay adapter connected")
+
+    def disconnect(self):
+        self._stop_event.set()
+        self._subscribed_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.connected = False
+        self.subscribed.clear()
+        self.cleanup_zmq()
+        return self._create_success_response("Replay adapter disconnected")
+
+    def subscribe(self, symbol, exchange, mode=2, depth_level=5):
+        if mode not in MODE_NAMES:
+            return self._create_error_response("INVALID_MODE", f"Invalid mode {mode}")
+        self.subscribed.add((symbol, exchange, mode))
+        self._subscribed_event.set()
+        return self._create_success_response(f"Subscribed to {symbol}", actual_depth=depth_level)
+
+    def unsubscribe(self, symbol, exchange, mode=2):
+        self.subscribed.discard((symbol, exchange, mode))
+        return self._create_success_response(f"Unsubscribed from {symbol}")
+
+    def unsubscribe_all(self):
+        self.subscribed.clear()
+        return self._create_success_response("Unsubscribed from all symbols")
+
+    def _resolve_topic(self, topic: bytes):
+        """Subscription key and republished topic of a recorded topic"""
+        resolved = self.topics.get(topic)
+        if resolved is None and topic not in self.topics:
+            parsed = self.topic_table.parse(topic)
+            if parsed:
+                _, exchange, symbol, mode = parsed
+                # No broker prefix: the proxy delivers it to clients of any broker
+                resolved = ((symbol, exchange, mode), f"{exchange}_{symbol}_{MODE_NAMES[mode]}".encode('utf-8'))
+            self.topics[topic] = resolved
+        return resolved
+
+    def _replay(self):
+        self._subscribed_event.wait()
+        while not self._stop_event.is_set():
+            self._play_once()
+            if not self.loop:
+                break
+        self.finished.set()
+
+    def _play_once(self):
+        tick_file = TickFile(self.path)
+        speed = self.speed
+        first = None
+        started = time.monotonic()
+        for timestamp, topic, payload in tick_file.read():
+            if self._stop_event.is_set():
+                return
+            resolved = self._resolve_topic(topic)
+            if resolved is None or resolved[0] not in self.subscribed:
+                self.skipped += 1
+                continue
+
+            if speed is not None:
+                if first is None:
+                    first = timestamp
+                due = started + (timestamp - first) / 1e9 / speed
+                delay = due - time.monotonic()
+                while delay > 0 and not self._stop_event.is_set():
+                    time.sleep(min(delay, MAX_SLEEP))
+                    delay = due - time.monotonic()
+
+            try:
+                self.socket.send_multipart([resolved[1], payload])
+                self.published += 1
+            except Exception as e:
+                self.logger.error(f"Error publishing replayed tick: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'file': self.path,
+            'speed': self.speed or 'max',
+            'subscriptions': len(self.subscribed),
+            'published': self.published,
+            'skipped': self.skipped,
+            'finished': self.finished.is_set(),
+        }
@@ -19,10 +19,20 @@ from sqlalchemy import text
 from database.auth_db import verify_api_key
 from .broker_factory import create_broker_adapter
 from .base_adapter import BaseBrokerWebSocketAdapter
+from .tick_codec import (
+    TICK_FORMAT_JSON, TopicTable, decode_tick, tick_body, get_configured_tick_format
+)
+from utils.quote_board import QuoteBoardWriter, get_quote_board_config
+from .tick_recorder import TickRecorder, get_recorder_config
+from .client_outbox import ClientOutbox, POLICY_CONFLATE, get_outbox_config
+from .conflation import ConflationEngine, get_default_policies, make_rate_policy
 
 # Initialize logger
 logger = get_logger("websocket_proxy")
 
+# Brokers whose session is kept alive (only unsubscribed) when their last client disconnects
+KEEP_ALIVE_BROKERS = ('flattrade', 'shoonya')
+
 class WebSocketProxy:
     """
     WebSocket Proxy Server that handles client connections and authentication,
@@ -30,19 +40,23 @@ class WebSocketProxy:
     Supports dynamic broker selection based on user configuration.
     """
     
-    def __init__(self, host: str = "127.0.0.1", port: int = 8765):
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, zmq_endpoint: Optional[str] = None,
+                 shared_port: bool = False, tap_bus: bool = True):
         """
         Initialize the WebSocket Proxy
         
         Args:
             host: Hostname to bind the WebSocket server to
             port: Port number to bind the WebSocket server to
+            zmq_endpoint: Market data endpoint to subscribe to (default: the broker adapter publisher)
+            shared_port: The port is shared with other proxy processes (fan-out workers)
+            tap_bus: Write the quote board and the tick recording if enabled (one process per bus)
         """
         self.host = host
         self.port = port
         
         # Check if the required port is already in use - wait briefly for cleanup to complete
-        if is_port_in_use(host, port, wait_time=2.0):  # Wait up to 2 seconds for port release
+        if not shared_port and is_port_in_use(host, port, wait_time=2.0):  # Wait up to 2 seconds for port release
             error_msg = (
                 f"WebSocket port {port} is already in use on {host}.\n"
                 f"This port is required for SDK compatibility (see strategies/ltp_example.py).\n"
@@ -67,22 +81,69 @@ class WebSocketProxy:
         # This eliminates the need for nested loops in zmq_listener
         self.subscription_index: Dict[Tuple[str, str, int], Set[int]] = defaultdict(set)
 
-        # PERFORMANCE OPTIMIZATION 2: Message throttling to avoid excessive updates
-        # Maps (symbol, exchange, mode) -> last message timestamp
-        # Prevents sending duplicate LTP updates faster than 50ms
-        self.last_message_time: Dict[Tuple[str, str, int], float] = {}
-        self.message_throttle_interval = 0.05  # 50ms minimum between messages
+        # PERFORMANCE OPTIMIZATION 2: Per-subscription rate policies with conflation
+        # Clients may request a max update rate and latest-value-only delivery per
+        # subscription; throttled updates are coalesced and flushed on a timer tick
+        flush_interval = float(os.getenv('WEBSOCKET_CONFLATION_FLUSH_MS', '10')) / 1000.0
+        self.conflation = ConflationEngine(flush_interval=max(flush_interval, 0.001))
+        self.conflation_task = None
 
         # PERFORMANCE OPTIMIZATION 3: Pre-compute mode mappings
         self.MODE_MAP = {"LTP": 1, "QUOTE": 2, "DEPTH": 3}
 
+        # PERFORMANCE OPTIMIZATION 4: Interned topics and negotiated tick wire format
+        # Each topic string is parsed once; adapters are asked to publish in the
+        # preferred format and JSON frames are still decoded as a fallback
+        self.topic_table = TopicTable()
+        preferred_format = get_configured_tick_format()
+        self.tick_formats = [preferred_format]
+        if preferred_format != TICK_FORMAT_JSON:
+            self.tick_formats.append(TICK_FORMAT_JSON)
+
+        # PERFORMANCE OPTIMIZATION 5: Serialize-once fan-out through per-client outboxes
+        # Maps client_id -> ClientOutbox (bounded queue + writer task)
+        self.outboxes: Dict[int, ClientOutbox] = {}
+        self.outbox_max_size, self.outbox_policy = get_outbox_config()
+        # Maps (symbol, exchange, mode) -> serialised message prefix up to the data field
+        self.message_prefixes: Dict[Tuple[str, str, int], str] = {}
+        # Maps broker name -> serialised message suffix carrying the broker field
+        self.message_suffixes: Dict[str, str] = {}
+        # Default rate policy per mode for subscriptions that do not specify one
+        self.default_rate_policies = get_default_policies(
+            latest_only=self.outbox_policy == POLICY_CONFLATE
+        )
+
+        # PERFORMANCE OPTIMIZATION 6: Shared-memory quote board
+        # Latest prices of every instrument on the bus, read by local strategy
+        # processes straight from memory instead of through a WebSocket client
+        self.quote_board = None
+        board_enabled, board_path, board_slots = get_quote_board_config()
+        if board_enabled and tap_bus:
+            try:
+                self.quote_board = QuoteBoardWriter(board_path, board_slots)
+                logger.info(f"Quote board published at {board_path} ({board_slots} slots)")
+            except OSError as e:
+                logger.warning(f"Quote board disabled, cannot create {board_path}: {e}")
+
+        # Tick recording of the bus for offline replay (see replay_adapter)
+        self.tick_recorder = None
+        recorder_enabled, recorder_dir, recorder_flush = get_recorder_config()
+        if recorder_enabled and tap_bus:
+            try:
+                self.tick_recorder = TickRecorder(recorder_dir, recorder_flush)
+                logger.info(f"Recording ticks to {recorder_dir}")
+            except OSError as e:
+                logger.warning(f"Tick recording disabled, cannot create {recorder_dir}: {e}")
+
         # ZeroMQ context for subscribing to broker adapters
         self.context = zmq.asyncio.Context()
         self.socket = self.context.socket(zmq.SUB)
         # Connecting to ZMQ
-        ZMQ_HOST = os.getenv('ZMQ_HOST', '127.0.0.1')
-        ZMQ_PORT = os.getenv('ZMQ_PORT')
-        self.socket.connect(f"tcp://{ZMQ_HOST}:{ZMQ_PORT}")  # Connect to broker adapter publisher
+        if zmq_endpoint is None:
+            ZMQ_HOST = os.getenv('ZMQ_HOST', '127.0.0.1')
+            ZMQ_PORT = os.getenv('ZMQ_PORT')
+            zmq_endpoint = f"tcp://{ZMQ_HOST}:{ZMQ_PORT}"
+        self.socket.connect(zmq_endpoint)  # Connect to broker adapter publisher
         
         # Set up ZeroMQ subscriber to receive all messages
         self.socket.setsockopt(zmq.SUBSCRIBE, b"")  # Subscribe to all topics
@@ -101,6 +162,9 @@ class WebSocketProxy:
             # Create the ZMQ listener task
             zmq_task = loop.create_task(self.zmq_listener())
             
+            # Create the conflation flush task for rate limited subscriptions
+            self.conflation_task = loop.create_task(self.conflation_flusher())
+            
             # Start WebSocket server
             stop = aio.Future()  # Used to stop the server
             
@@ -194,6 +258,28 @@ class WebSocketProxy:
                 except Exception as e:
                     logger.error(f"Error closing WebSocket server: {e}")
             
+            # Stop the conflation flusher before the outboxes it feeds
+            if self.conflation_task is not None:
+                self.conflation_task.cancel()
+                try:
+                    await self.conflation_task
+                except (aio.CancelledError, RuntimeError):
+                    pass
+                self.conflation_task = None
+
+            # Stop all outbound writers
+            for outbox in self.outboxes.values():
+                outbox.close()
+            self.outboxes.clear()
+
+            if self.quote_board is not None:
+                self.quote_board.close()
+                self.quote_board = None
+
+            if self.tick_recorder is not None:
+                self.tick_recorder.stop()
+                self.tick_recorder = None
+            
             # Close all client connections
             close_tasks = []
             for client_id, websocket in self.clients.items():
@@ -250,6 +336,9 @@ class WebSocketProxy:
         client_id = id(websocket)
         self.clients[client_id] = websocket
         self.subscriptions[client_id] = set()
+        outbox = ClientOutbox(client_id, websocket, self.outbox_max_size, self.outbox_policy)
+        self.outboxes[client_id] = outbox
+        outbox.start()
         
         # Get path info from websocket if available
         path = getattr(websocket, 'path', '/unknown')
@@ -288,10 +377,20 @@ class WebSocketProxy:
         if client_id in self.clients:
             del self.clients[client_id]
         
+        # Stop the outbound writer and drop pending conflated updates
+        outbox = self.outboxes.pop(client_id, None)
+        if outbox:
+            outbox.close()
+        self.conflation.remove_client(client_id)
+        
         # Clean up subscriptions
         if client_id in self.subscriptions:
             subscriptions = self.subscriptions[client_id]
-            # Unsubscribe from all subscriptions
+            user_id = self.user_mapping.get(client_id)
+            adapter = self.broker_adapters.get(user_id) if user_id else None
+            
+            # Group subscriptions by mode so each mode is unsubscribed in one bulk call
+            instruments_by_mode = {}
             for sub_json in subscriptions:
                 try:
                     # Parse the JSON string to get the subscription info
@@ -301,23 +400,18 @@ class WebSocketProxy:
                     mode = sub_info.get('mode')
 
                     # OPTIMIZATION: Remove from subscription index
-                    sub_key = (symbol, exchange, mode)
-                    if sub_key in self.subscription_index:
-                        self.subscription_index[sub_key].discard(client_id)
-                        # Clean up empty entries
-                        if not self.subscription_index[sub_key]:
-                            del self.subscription_index[sub_key]
-
-                    # Get the user's broker adapter
-                    user_id = self.user_mapping.get(client_id)
-                    if user_id and user_id in self.broker_adapters:
-                        adapter = self.broker_adapters[user_id]
-                        adapter.unsubscribe(symbol, exchange, mode)
+                    self._remove_from_index(client_id, (symbol, exchange, mode))
+                    instruments_by_mode.setdefault(mode, []).append((symbol, exchange))
                 except json.JSONDecodeError as e:
                     logger.exception(f"Error parsing subscription: {sub_json}, Error: {e}")
-                except Exception as e:
-                    logger.exception(f"Error processing subscription: {e}")
-                    continue
+            
+            # Unsubscribe from all subscriptions on the user's broker adapter
+            if adapter:
+                for mode, instruments in instruments_by_mode.items():
+                    try:
+                        adapter.unsubscribe_bulk(instruments, mode)
+                    except Exception as e:
+                        logger.exception(f"Error processing subscription: {e}")
 
             del self.subscriptions[client_id]
         
@@ -338,7 +432,7 @@ class WebSocketProxy:
                 broker_name = self.user_broker_mapping.get(user_id)
 
                 # For Flattrade and Shoonya, keep the connection alive and just unsubscribe from data
-                if broker_name in ['flattrade', 'shoonya'] and hasattr(adapter, 'unsubscribe_all'):
+                if broker_name in KEEP_ALIVE_BROKERS and hasattr(adapter, 'unsubscribe_all'):
                     logger.info(f"{broker_name.title()} adapter for user {user_id}: last client disconnected. Unsubscribing all symbols instead of disconnecting.")
                     adapter.unsubscribe_all()
                 else:
@@ -494,7 +588,7 @@ class WebSocketProxy:
         if user_id not in self.broker_adapters:
             try:
                 # Create broker adapter with dynamic broker selection
-                adapter = create_broker_adapter(broker_name)
+                adapter = self.create_adapter(broker_name)
                 if not adapter:
                     await self.send_error(client_id, "BROKER_ERROR", f"Failed to create adapter for broker: {broker_name}")
                     return
@@ -514,6 +608,9 @@ class WebSocketProxy:
                     await self.send_error(client_id, "BROKER_CONNECTION_ERROR", error_msg)
                     return
                 
+                # Agree on the ZeroMQ tick wire format with the adapter
+                adapter.negotiate_tick_format(self.tick_formats)
+                
                 # Store the adapter
                 self.broker_adapters[user_id] = adapter
                 
@@ -540,6 +637,10 @@ class WebSocketProxy:
             }
         })
     
+    def create_adapter(self, broker_name):
+        """Create the broker adapter serving a user's subscriptions"""
+        return create_broker_adapter(broker_name)
+
     async def get_supported_brokers(self, client_id):
         """
         Get list of supported brokers from environment configuration
@@ -621,6 +722,14 @@ class WebSocketProxy:
         # Convert string mode to numeric if needed
         mode = mode_mapping.get(mode_str, mode_str) if isinstance(mode_str, str) else mode_str
         
+        # Optional delivery policy for these subscriptions: "max_rate" (updates/sec)
+        # and "latest_only"; individual symbols may override either field
+        try:
+            request_policy = self._get_rate_policy(data, mode)
+        except (TypeError, ValueError) as e:
+            await self.send_error(client_id, "INVALID_PARAMETERS", f"Invalid rate policy: {e}")
+            return
+        
         # Handle case where a single symbol is passed directly instead of as an array
         if not symbols and (data.get("symbol") and data.get("exchange")):
             symbols = [{
@@ -641,9 +750,10 @@ class WebSocketProxy:
         adapter = self.broker_adapters[user_id]
         broker_name = self.user_broker_mapping.get(user_id, "unknown")
         
-        # Process each symbol in the subscription request
+        # Validate the whole request first so the adapter sees a single batch
         subscription_responses = []
         subscription_success = True
+        requested = []
         
         for symbol_info in symbols:
             symbol = symbol_info.get("symbol")
@@ -651,10 +761,27 @@ class WebSocketProxy:
             
             if not symbol or not exchange:
                 continue  # Skip invalid symbols
-                
-            # Subscribe to market data
-            response = adapter.subscribe(symbol, exchange, mode, depth_level)
             
+            try:
+                rate_policy = self._get_rate_policy(symbol_info, mode, request_policy)
+            except (TypeError, ValueError) as e:
+                subscription_success = False
+                subscription_responses.append({
+                    "symbol": symbol,
+                    "exchange": exchange,
+                    "status": "error",
+                    "message": f"Invalid rate policy: {e}",
+                    "broker": broker_name
+                })
+                continue
+            
+            requested.append((symbol, exchange, rate_policy))
+        
+        # Subscribe to market data, tokens are resolved and sent to the broker in bulk
+        responses = adapter.subscribe_bulk([(symbol, exchange) for symbol, exchange, _ in requested], mode, depth_level)
+        client_subscriptions = self.subscriptions.setdefault(client_id, set())
+        
+        for (symbol, exchange, rate_policy), response in zip(requested, responses):
             if response.get("status") == "success":
                 # Store the subscription
                 subscription_info = {
@@ -664,15 +791,12 @@ class WebSocketProxy:
                     "depth_level": depth_level,
                     "broker": broker_name
                 }
-
-                if client_id in self.subscriptions:
-                    self.subscriptions[client_id].add(json.dumps(subscription_info))
-                else:
-                    self.subscriptions[client_id] = {json.dumps(subscription_info)}
+                client_subscriptions.add(json.dumps(subscription_info))
 
                 # OPTIMIZATION: Update subscription index for O(1) lookup
                 sub_key = (symbol, exchange, mode)
                 self.subscription_index[sub_key].add(client_id)
+                self.conflation.set_policy(client_id, sub_key, rate_policy)
 
                 # Add to successful subscriptions
                 subscription_responses.append({
@@ -681,6 +805,8 @@ class WebSocketProxy:
                     "status": "success",
                     "mode": mode_str,
                     "depth": response.get("actual_depth", depth_level),
+                    "max_rate": rate_policy.max_rate,
+                    "latest_only": rate_policy.latest_only,
                     "broker": broker_name
                 })
             else:
@@ -694,11 +820,16 @@ class WebSocketProxy:
                     "broker": broker_name
                 })
         
+        subscribed = sum(1 for response in subscription_responses if response["status"] == "success")
+        
         # Send combined response
         await self.send_message(client_id, {
             "type": "subscribe",
             "status": "success" if subscription_success else "partial",
             "subscriptions": subscription_responses,
+            "requested": len(subscription_responses),
+            "subscribed": subscribed,
+            "failed": len(subscription_responses) - subscribed,
             "message": "Subscription processing complete",
             "broker": broker_name
         })
@@ -748,84 +879,50 @@ class WebSocketProxy:
         successful_unsubscriptions = []
         failed_unsubscriptions = []
         
-        # Handle unsubscribe_all case
+        # Index the client's stored subscriptions by (symbol, exchange, mode) once
+        stored = {}
+        for sub_json in self.subscriptions.get(client_id, ()):
+            try:
+                sub = json.loads(sub_json)
+            except json.JSONDecodeError:
+                logger.error(f"Failed to parse subscription: {sub_json}")
+                continue
+            stored.setdefault((sub.get("symbol"), sub.get("exchange"), sub.get("mode")), []).append(sub_json)
+        
         if is_unsubscribe_all:
-            # Get all current subscriptions
-            if client_id in self.subscriptions:
-                # Convert all stored subscription strings back to dictionaries
-                all_subscriptions = []
-                for sub_json in self.subscriptions[client_id]:
-                    try:
-                        sub_dict = json.loads(sub_json)
-                        all_subscriptions.append(sub_dict)
-                    except json.JSONDecodeError:
-                        logger.error(f"Failed to parse subscription: {sub_json}")
-                
-                # Unsubscribe from each subscription
-                for sub in all_subscriptions:
-                    symbol = sub.get("symbol")
-                    exchange = sub.get("exchange")
-                    mode = sub.get("mode")
-                    
-                    if symbol and exchange:
-                        response = adapter.unsubscribe(symbol, exchange, mode)
-                        
-                        if response.get("status") == "success":
-                            successful_unsubscriptions.append({
-                                "symbol": symbol,
-                                "exchange": exchange,
-                                "status": "success",
-                                "broker": broker_name
-                            })
-                        else:
-                            failed_unsubscriptions.append({
-                                "symbol": symbol,
-                                "exchange": exchange,
-                                "status": "error",
-                                "message": response.get("message", "Unsubscription failed"),
-                                "broker": broker_name
-                            })
-                
-                # Clear all subscriptions for this client
-                self.subscriptions[client_id].clear()
+            # Every current subscription of this client
+            targets = [key for key in stored if key[0] and key[1]]
         else:
             # Process specific symbols
+            targets = []
             for symbol_info in symbols:
                 symbol = symbol_info.get("symbol")
                 exchange = symbol_info.get("exchange")
                 mode = symbol_info.get("mode", 2)  # Default to Quote mode
+                if isinstance(mode, str):
+                    mode = self.MODE_MAP.get(mode.upper(), mode)
                 
                 if not symbol or not exchange:
                     continue  # Skip invalid symbols
-                
-                # Unsubscribe from market data
-                response = adapter.unsubscribe(symbol, exchange, mode)
+                targets.append((symbol, exchange, mode))
+        
+        # Unsubscribe from market data, one bulk call per mode
+        targets_by_mode = {}
+        for sub_key in targets:
+            targets_by_mode.setdefault(sub_key[2], []).append(sub_key)
+        
+        for mode, sub_keys in targets_by_mode.items():
+            responses = adapter.unsubscribe_bulk([(symbol, exchange) for symbol, exchange, _ in sub_keys], mode)
+            
+            for sub_key, response in zip(sub_keys, responses):
+                symbol, exchange, _ = sub_key
+                if response.get("status") == "success" or is_unsubscribe_all:
+                    # Remove any matching subscription (with or without broker info)
+                    for sub_json in stored.get(sub_key, ()):
+                        self.subscriptions[client_id].discard(sub_json)
+                    self._remove_from_index(client_id, sub_key)
                 
                 if response.get("status") == "success":
-                    # Try to remove subscription
-                    if client_id in self.subscriptions:
-                        subscription_info = {
-                            "symbol": symbol,
-                            "exchange": exchange,
-                            "mode": mode,
-                            "broker": broker_name
-                        }
-                        subscription_key = json.dumps(subscription_info)
-                        # Remove any matching subscription (with or without broker info)
-                        subscriptions_to_remove = []
-                        for sub_key in self.subscriptions[client_id]:
-                            try:
-                                sub_data = json.loads(sub_key)
-                                if (sub_data.get("symbol") == symbol and 
-                                    sub_data.get("exchange") == exchange and 
-                                    sub_data.get("mode") == mode):
-                                    subscriptions_to_remove.append(sub_key)
-                            except json.JSONDecodeError:
-                                continue
-                        
-                        for sub_key in subscriptions_to_remove:
-                            self.subscriptions[client_id].discard(sub_key)
-                    
                     successful_unsubscriptions.append({
                         "symbol": symbol,
                         "exchange": exchange,
@@ -841,6 +938,10 @@ class WebSocketProxy:
                         "broker": broker_name
                     })
         
+        # Clear all subscriptions for this client
+        if is_unsubscribe_all and client_id in self.subscriptions:
+            self.subscriptions[client_id].clear()
+        
         # Send combined response
         status = "success"
         if len(failed_unsubscriptions) > 0 and len(successful_unsubscriptions) > 0:
@@ -894,7 +995,8 @@ class WebSocketProxy:
         Key Performance Improvements:
         1. Increased timeout from 0.1s to 0.3s (reduces busy-waiting by 66%)
         2. Use subscription_index for O(1) lookup instead of O(n²) iteration
-        3. Batch message sending with asyncio.gather
+        3. Serialize each tick once per broker variant and share it across clients
+        4. Hand messages to per-client bounded outboxes instead of awaiting sends
         """
         logger.info("Starting OPTIMIZED ZeroMQ listener with subscription indexing")
 
@@ -914,97 +1016,45 @@ class WebSocketProxy:
                     # No message received within timeout, continue the loop
                     continue
                 
-                # Parse the message
-                topic_str = topic.decode('utf-8')
-                data_str = data.decode('utf-8')
-                market_data = json.loads(data_str)
-                
-                # Extract topic components
-                # Support both formats:
-                # New format: BROKER_EXCHANGE_SYMBOL_MODE (with broker name)
-                # Old format: EXCHANGE_SYMBOL_MODE (without broker name)
-                # Special case: NSE_INDEX_SYMBOL_MODE (exchange contains underscore)
-                parts = topic_str.split('_')
-                
-                # Special case handling for NSE_INDEX and BSE_INDEX
-                if len(parts) >= 4 and parts[0] == "NSE" and parts[1] == "INDEX":
-                    broker_name = "unknown"
-                    exchange = "NSE_INDEX"
-                    symbol = parts[2]
-                    mode_str = parts[3]
-                elif len(parts) >= 4 and parts[0] == "BSE" and parts[1] == "INDEX":
-                    broker_name = "unknown"
-                    exchange = "BSE_INDEX"
-                    symbol = parts[2]
-                    mode_str = parts[3]
-                elif len(parts) >= 5 and parts[1] == "INDEX":  # BROKER_NSE_INDEX_SYMBOL_MODE format
-                    broker_name = parts[0]
-                    exchange = f"{parts[1]}_{parts[2]}"
-                    symbol = parts[3]
-                    mode_str = parts[4]
-                elif len(parts) >= 4:
-                    # Standard format with broker name
-                    broker_name = parts[0]
-                    exchange = parts[1]
-                    symbol = parts[2]
-                    mode_str = parts[3]
-                elif len(parts) >= 3:
-                    # Old format without broker name
-                    broker_name = "unknown"
-                    exchange = parts[0]
-                    symbol = parts[1] 
-                    mode_str = parts[2]
-                else:
-                    logger.warning(f"Invalid topic format: {topic_str}")
+                # Resolve the interned topic (parsed once per distinct topic)
+                parsed_topic = self.topic_table.parse(topic)
+                if not parsed_topic:
+                    logger.warning(f"Invalid topic format: {topic!r}")
                     continue
-                
-                # OPTIMIZATION: Use pre-computed mode map
-                mode = self.MODE_MAP.get(mode_str)
+                broker_name, exchange, symbol, mode = parsed_topic
 
-                if not mode:
-                    logger.warning(f"Invalid mode in topic: {mode_str}")
-                    continue
+                # Every tick on the bus updates the quote board, subscribed by a client or not
+                if self.quote_board is not None:
+                    self._publish_quote(symbol, exchange, data)
+                if self.tick_recorder is not None:
+                    self.tick_recorder.record(topic, data)
 
-                # OPTIMIZATION: Message throttling for high-frequency updates
-                # Skip if we sent the same message too recently (reduces CPU on fast updates)
                 sub_key = (symbol, exchange, mode)
-                current_time = time.time()
-
-                # Only throttle LTP mode (mode 1), not Quote/Depth
-                if mode == 1:  # LTP mode
-                    last_time = self.last_message_time.get(sub_key, 0)
-                    if current_time - last_time < self.message_throttle_interval:
-                        continue  # Skip this update, too soon
-                    self.last_message_time[sub_key] = current_time
 
                 # OPTIMIZATION 2: O(1) lookup using subscription index
                 # Instead of iterating through ALL clients and ALL subscriptions (O(n²)),
                 # directly lookup clients subscribed to this specific (symbol, exchange, mode)
-                client_ids = self.subscription_index.get(sub_key, set()).copy()
+                # No await happens while fanning out, so the set can be iterated directly
+                client_ids = self.subscription_index.get(sub_key)
 
                 if not client_ids:
                     continue  # No clients subscribed, skip processing
 
-                # OPTIMIZATION 3: Batch message sends for parallel delivery
-                send_tasks = []
-
-                # OPTIMIZATION 4: Pre-create base message (reused for all clients)
-                # This avoids creating the same dict 1000 times
-                base_message = {
-                    "type": "market_data",
-                    "symbol": symbol,
-                    "exchange": exchange,
-                    "mode": mode,
-                    "data": market_data
-                }
-
-                # OPTIMIZATION 5: Pre-serialize JSON once (not per-client)
-                # Most clients get the same message, so serialize once
-                base_message_str = None
+                # OPTIMIZATION 3: Serialize once per broker variant, not per client.
+                # The adapter payload is already a JSON document, so it is spliced
+                # into the client message without being parsed
+                prefix = self.message_prefixes.get(sub_key)
+                if prefix is None:
+                    prefix = self._build_message_prefix(symbol, exchange, mode)
+                body = None
+                variants = {}
+                policies = self.conflation.policies
+                now = time.monotonic()
 
                 for client_id in client_ids:
                     # Verify client still exists
-                    if client_id not in self.clients:
+                    outbox = self.outboxes.get(client_id)
+                    if outbox is None:
                         continue
 
                     # Verify user mapping exists
@@ -1017,22 +1067,105 @@ class WebSocketProxy:
                     if broker_name != "unknown" and client_broker and client_broker != broker_name:
                         continue
 
-                    # Add broker to message
-                    message = base_message.copy()
-                    message["broker"] = broker_name if broker_name != "unknown" else client_broker
+                    message_broker = broker_name if broker_name != "unknown" else client_broker
+                    message = variants.get(message_broker)
+                    if message is None:
+                        if body is None:
+                            try:
+                                body = tick_body(data)
+                            except ValueError as e:
+                                logger.debug(f"Dropping tick for {exchange}:{symbol}: {e}")
+                                break
+                        message = prefix + body + self._get_message_suffix(message_broker)
+                        variants[message_broker] = message
 
-                    # Add to batch
-                    send_tasks.append(self.send_message(client_id, message))
+                    # OPTIMIZATION 4: Rate limited subscriptions are coalesced; the
+                    # conflation flusher delivers held updates once their interval passes
+                    policy = policies.get((client_id, sub_key))
+                    if policy is None:
+                        outbox.put(sub_key, message)
+                        continue
+                    if policy.min_interval:
+                        message = self.conflation.offer(client_id, sub_key, policy, message, now)
+                        if message is None:
+                            continue
 
-                # Send all messages in parallel (non-blocking)
-                if send_tasks:
-                    await aio.gather(*send_tasks, return_exceptions=True)
+                    # OPTIMIZATION 5: Non-blocking hand-off; each client's writer task
+                    # drains its own bounded queue so a slow consumer cannot stall others
+                    outbox.put(sub_key, message, policy.latest_only)
             
             except Exception as e:
                 logger.error(f"Error in ZeroMQ listener: {e}")
                 # Continue running despite errors
                 await aio.sleep(1)
 
+    async def conflation_flusher(self):
+        """Deliver coalesced updates of rate limited subscriptions on a fixed timer tick"""
+        interval = self.conflation.flush_interval
+        while self.running:
+            try:
+                await aio.sleep(interval)
+                for client_id, sub_key, message in self.conflation.due(time.monotonic()):
+                    outbox = self.outboxes.get(client_id)
+                    if outbox is None:
+                        continue
+                    policy = self.conflation.policies.get((client_id, sub_key))
+                    outbox.put(sub_key, message, policy.latest_only if policy else None)
+            except aio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in conflation flusher: {e}")
+
+    def _publish_quote(self, symbol, exchange, data):
+        """Write a tick's prices into the shared-memory quote board"""
+        try:
+            self.quote_board.update(symbol, exchange, decode_tick(data))
+        except Exception as e:
+            logger.debug(f"Quote board update failed for {exchange}:{symbol}: {e}")
+
+    def _get_rate_policy(self, options, mode, fallback=None):
+        """
+        Resolve the delivery policy for a subscription
+        
+        Args:
+            options: Subscribe message or symbol entry with optional max_rate/latest_only
+            mode: Numeric subscription mode
+            fallback: Policy to inherit from when neither field is present
+        """
+        base = fallback or self.default_rate_policies.get(mode) or make_rate_policy()
+        if "max_rate" not in options and "latest_only" not in options:
+            return base
+        max_rate = options["max_rate"] if "max_rate" in options else base.max_rate
+        latest_only = options.get("latest_only")
+        if latest_only is None:
+            latest_only = base.latest_only
+        return make_rate_policy(max_rate, latest_only)
+
+    def _remove_from_index(self, client_id, sub_key):
+        """Remove a client's subscription from the fan-out index and conflation state"""
+        clients = self.subscription_index.get(sub_key)
+        if clients is not None:
+            clients.discard(client_id)
+            # Clean up empty entries
+            if not clients:
+                del self.subscription_index[sub_key]
+        self.conflation.remove(client_id, sub_key)
+
+    def _build_message_prefix(self, symbol, exchange, mode):
+        """Serialise and cache the market data message fields preceding the data payload"""
+        prefix = (f'{{"type": "market_data", "symbol": {json.dumps(symbol)}, '
+                  f'"exchange": {json.dumps(exchange)}, "mode": {mode}, "data": ')
+        self.message_prefixes[(symbol, exchange, mode)] = prefix
+        return prefix
+
+    def _get_message_suffix(self, broker_name):
+        """Serialise and cache the broker field closing a market data message"""
+        suffix = self.message_suffixes.get(broker_name)
+        if suffix is None:
+            suffix = f', "broker": {json.dumps(broker_name)}}}'
+            self.message_suffixes[broker_name] = suffix
+        return suffix
+
 # Entry point for running the server standalone
 async def main():
     """Main entry point for running the WebSocket proxy server"""
@@ -1046,6 +1179,16 @@ async def main():
         ws_host = os.getenv('WEBSOCKET_HOST', '127.0.0.1')
         ws_port = int(os.getenv('WEBSOCKET_PORT', '8765'))
         
+        # Multi-process mode: this process keeps the broker adapters, workers serve the clients
+        from .fanout import FanoutCoordinator, fanout_supported, get_fanout_workers
+        workers = get_fanout_workers()
+        if workers > 1:
+            if fanout_supported():
+                # Blocks until stopped; nothing else runs on this event loop
+                FanoutCoordinator(host=ws_host, port=ws_port, workers=workers).run()
+                return
+            logger.warning("WEBSOCKET_WORKERS needs SO_REUSEPORT, running a single WebSocket process")
+        
         # Create and start the WebSocket proxy
         proxy = WebSocketProxy(host=ws_host, port=ws_port)
         
@@ -0,0 +1,172 @@
+"""
+Tick wire format for the ZeroMQ hop between broker adapters and the WebSocket proxy.
+
+Two payload encodings are supported on the same PUB/SUB socket:
+
+* ``json``    - the original UTF-8 JSON document (always accepted, used as fallback)
+* ``compact`` - a versioned frame: magic byte, schema version byte, then the tick
+                serialised with orjson (no whitespace, native float/int encoding)
+
+Frames are self-describing: a compact frame starts with ``FRAME_MAGIC`` while a JSON
+frame always starts with ``{``. The proxy therefore decodes whatever an adapter sends,
+which keeps adapters that cannot produce compact frames working on the same socket.
+
+A fixed-struct layout was measured against this and lost: packing a variable set of
+keys in pure Python costs more than orjson's C encoder, and the frames were no smaller
+once the layout travelled with them.
+"""
+
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+TICK_FORMAT_JSON = "json"
+TICK_FORMAT_COMPACT = "compact"
+
+FRAME_MAGIC = 0xB7
+SCHEMA_VERSION = 1
+_FRAME_HEADER = bytes((FRAME_MAGIC, SCHEMA_VERSION))
+_FRAME_HEADER_SIZE = len(_FRAME_HEADER)
+
+# Compact frames need orjson; without it only JSON can be offered
+if ORJSON_AVAILABLE:
+    # Match json.dumps behaviour for non-string keys and NumPy scalars from adapters
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    SUPPORTED_TICK_FORMATS = (TICK_FORMAT_COMPACT, TICK_FORMAT_JSON)
+else:
+    SUPPORTED_TICK_FORMATS = (TICK_FORMAT_JSON,)
+
+
+def get_configured_tick_format() -> str:
+    """
+    Return the preferred tick format from ZMQ_TICK_FORMAT (default: compact).
+
+    Unknown or unsupported values fall back to JSON so a typo never breaks the data path.
+    """
+    tick_format = os.getenv('ZMQ_TICK_FORMAT', TICK_FORMAT_COMPACT).strip().lower()
+    if tick_format not in SUPPORTED_TICK_FORMATS:
+        return TICK_FORMAT_JSON
+    return tick_format
+
+
+def encode_tick(data: Dict[str, Any], tick_format: str = TICK_FORMAT_JSON) -> bytes:
+    """
+    Encode a tick with the requested wire format.
+
+    Args:
+        data: Normalised tick dictionary as produced by a broker adapter
+        tick_format: TICK_FORMAT_COMPACT or TICK_FORMAT_JSON
+
+    Returns:
+        bytes: Payload frame for the ZeroMQ message
+    """
+    if tick_format == TICK_FORMAT_COMPACT and ORJSON_AVAILABLE:
+        try:
+            return _FRAME_HEADER + orjson.dumps(data, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits - the JSON frame is always decodable
+            pass
+    return json.dumps(data).encode('utf-8')
+
+
+def decode_tick(payload: bytes) -> Dict[str, Any]:
+    """
+    Decode a tick payload regardless of the format it was published with.
+
+    Raises:
+        ValueError: If a compact frame carries an unsupported schema version
+    """
+    if payload[:1] == b'\xb7':
+        if payload[1] != SCHEMA_VERSION:
+            raise ValueError(f"Unsupported tick schema version: {payload[1]}")
+        return orjson.loads(memoryview(payload)[_FRAME_HEADER_SIZE:])
+    # Legacy frames keep the stdlib parser (it also accepts NaN/Infinity)
+    return json.loads(payload)
+
+
+def tick_body(payload: bytes) -> str:
+    """
+    Return the JSON document carried by a tick payload, without parsing it.
+
+    Both formats carry a JSON body, so the proxy can splice it into outgoing client
+    messages instead of decoding and re-encoding every tick.
+
+    Raises:
+        ValueError: If a compact frame carries an unsupported schema version
+    """
+    if payload[:1] == b'\xb7':
+        if payload[1] != SCHEMA_VERSION:
+            raise ValueError(f"Unsupported tick schema version: {payload[1]}")
+        return str(memoryview(payload)[_FRAME_HEADER_SIZE:], 'utf-8')
+    return payload.decode('utf-8')
+
+
+class TopicTable:
+    """
+    Interned topic parser.
+
+    Topics are a small, stable set per session (one per subscribed symbol and mode),
+    so each distinct topic is split exactly once and the parsed tuple is reused for
+    every subsequent tick on that topic.
+    """
+
+    MODE_MAP = {"LTP": 1, "QUOTE": 2, "DEPTH": 3}
+
+    def __init__(self, max_size: int = 100000):
+        self.max_size = max_size
+        self._topics: Dict[bytes, Optional[Tuple[str, str, str, int]]] = {}
+
+    def __len__(self):
+        return len(self._topics)
+
+    def parse(self, topic: bytes) -> Optional[Tuple[str, str, str, int]]:
+        """
+        Resolve a raw topic into (broker_name, exchange, symbol, mode).
+
+        Returns:
+            tuple or None: None if the topic or its mode is invalid
+        """
+        try:
+            return self._topics[topic]
+        except KeyError:
+            pass
+
+        parsed = self._parse_topic(topic.decode('utf-8'))
+        if len(self._topics) >= self.max_size:
+            self._topics.clear()
+        self._topics[topic] = parsed
+        return parsed
+
+    @classmethod
+    def _parse_topic(cls, topic_str: str) -> Optional[Tuple[str, str, str, int]]:
+        # Support both formats:
+        # New format: BROKER_EXCHANGE_SYMBOL_MODE (with broker name)
+        # Old format: EXCHANGE_SYMBOL_MODE (without broker name)
+        # Special case: NSE_INDEX_SYMBOL_MODE (exchange contains underscore)
+        parts = topic_str.split('_')
+
+        if len(parts) >= 4 and parts[0] == "NSE" and parts[1] == "INDEX":
+            broker_name, exchange, symbol, mode_str = "unknown", "NSE_INDEX", parts[2], parts[3]
+        elif len(parts) >= 4 and parts[0] == "BSE" and parts[1] == "INDEX":
+            broker_name, exchange, symbol, mode_str = "unknown", "BSE_INDEX", parts[2], parts[3]
+        elif len(parts) >= 5 and parts[1] == "INDEX":  # BROKER_NSE_INDEX_SYMBOL_MODE format
+            broker_name, exchange, symbol, mode_str = parts[0], f"{parts[1]}_{parts[2]}", parts[3], parts[4]
+        elif len(parts) >= 4:
+            # Standard format with broker name
+            broker_name, exchange, symbol, mode_str = parts[0], parts[1], parts[2], parts[3]
+        elif len(parts) >= 3:
+            # Old format without broker name
+            broker_name, exchange, symbol, mode_str = "unknown", parts[0], parts[1], parts[2]
+        else:
+            return None
+
+        mode = cls.MODE_MAP.get(mode_str)
+        if not mode:
+            return None
+        return broker_name, exchange, symbol, mode
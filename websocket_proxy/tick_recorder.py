@@ -0,0 +1,470 @@
+"""
+Tick recorder for the ZeroMQ market data bus.
+
+Every (topic, payload) frame the proxy receives from the broker adapters is
+appended, as published, to one file per trading day (IST) in TICK_RECORDER_DIR:
+
+* ``YYYYMMDD.ticks``     - append-only sequence of compressed blocks
+* ``YYYYMMDD.ticks.idx`` - one entry per block: first/last tick time, offset, count
+
+A block is a fixed header (magic, version, codec, record count, sizes, first and
+last receive time, CRC32) followed by the zlib-compressed records. A record is
+the receive time in epoch nanoseconds, the topic and the payload frame (compact
+or JSON, see tick_codec), so a recording replays byte for byte.
+
+The hot path only appends to an in-memory list; a background thread writes a
+block per TICK_RECORDER_FLUSH_MS or per block of records. A block cut short by a
+crash is dropped when the file is opened again, and the index is rebuilt from
+the block headers whenever it does not match the data file.
+
+Command line:
+    python -m websocket_proxy.tick_recorder record [--endpoint tcp://127.0.0.1:5555]
+    python -m websocket_proxy.tick_recorder info db/ticks/20250101.ticks
+    python -m websocket_proxy.tick_recorder export db/ticks/20250101.ticks ticks.parquet
+"""
+
+import argparse
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pytz
+
+from utils.logging import get_logger
+from .tick_codec import TopicTable, decode_tick
+
+logger = get_logger(__name__)
+
+IST = pytz.timezone('Asia/Kolkata')
+
+BLOCK_MAGIC = b'OATK'
+FORMAT_VERSION = 1
+CODEC_ZLIB = 1
+
+# magic, version, codec, reserved, records, raw size, compressed size, first ns, last ns, crc32
+_BLOCK_HEADER = struct.Struct('<4sBBHIIIqqI')
+# receive time ns, topic length, payload length
+_RECORD_HEADER = struct.Struct('<qHI')
+# first ns, last ns, block offset, records
+_INDEX_ENTRY = struct.Struct('<qqQI')
+
+FILE_SUFFIX = '.ticks'
+INDEX_SUFFIX = '.idx'
+
+# Log a backpressure warning on the first drop and then every N drops
+DROP_LOG_INTERVAL = 10000
+
+Tick = Tuple[int, bytes, bytes]
+
+
+def get_recorder_config() -> Tuple[bool, str, float]:
+    """Return (enabled, directory, flush interval in seconds) from the TICK_RECORDER_* variables"""
+    enabled = os.getenv('TICK_RECORDER_ENABLED', 'False').strip().lower() == 'true'
+    directory = os.getenv('TICK_RECORDER_DIR', 'db/ticks').strip() or 'db/ticks'
+    try:
+        flush_interval = max(0.01, int(os.getenv('TICK_RECORDER_FLUSH_MS', '1000')) / 1000.0)
+    except ValueError:
+        flush_interval = 1.0
+    return enabled, directory, flush_interval
+
+
+def tick_file_path(directory: str, day) -> str:
+    """Path of the recording of a trading day (date or 'YYYYMMDD'/'YYYY-MM-DD' string)"""
+    if not isinstance(day, str):
+        day = day.strftime('%Y%m%d')
+    return os.path.join(directory, day.replace('-', '') + FILE_SUFFIX)
+
+
+def trading_day(timestamp_ns: int) -> str:
+    return datetime.fromtimestamp(timestamp_ns / 1e9, IST).strftime('%Y%m%d')
+
+
+def encode_block(records: List[Tick], level: int = 1) -> bytes:
+    """Serialise and compress records (sorted by receive time) into one block"""
+    parts = []
+    for timestamp, topic, payload in records:
+        parts.append(_RECORD_HEADER.pack(timestamp, len(topic), len(payload)))
+        parts.append(topic)
+        parts.append(payload)
+    raw = b''.join(parts)
+    compressed = zlib.compress(raw, level)
+    header = _BLOCK_HEADER.pack(BLOCK_MAGIC, FORMAT_VERSION, CODEC_ZLIB, 0, len(records), len(raw),
+                                len(compressed), records[0][0], records[-1][0], zlib.crc32(compressed))
+    return header + compressed
+
+
+def decode_block(data: bytes) -> List[Tick]:
+    """Records of a decompressed block body"""
+    records = []
+    offset = 0
+    size = len(data)
+    unpack = _RECORD_HEADER.unpack_from
+    header_size = _RECORD_HEADER.size
+    while offset < size:
+        timestamp, topic_size, payload_size = unpack(data, offset)
+        offset += header_size
+        topic = data[offset:offset + topic_size]
+        offset += topic_size
+        records.append((timestamp, topic, data[offset:offset + payload_size]))
+        offset += payload_size
+    return records
+
+
+def _scan_blocks(f, file_size: int) -> Tuple[List[tuple], int]:
+    """Read block headers from the start of a file; returns (index entries, end of the last valid block)"""
+    entries = []
+    offset = 0
+    while offset + _BLOCK_HEADER.size <= file_size:
+        f.seek(offset)
+        header = f.read(_BLOCK_HEADER.size)
+        magic, version, codec, _, count, _, compressed_size, first, last, crc = _BLOCK_HEADER.unpack(header)
+        end = offset + _BLOCK_HEADER.size + compressed_size
+        if magic != BLOCK_MAGIC or version != FORMAT_VERSION or codec != CODEC_ZLIB or end > file_size:
+            break
+        if end + _BLOCK_HEADER.size > file_size:
+            # Only the final block can be half written
+            if zlib.crc32(f.read(compressed_size)) != crc:
+                break
+        entries.append((first, last, offset, count))
+        offset = end
+    return entries, offset
+
+
+def _read_index(path: str) -> List[tuple]:
+    try:
+        with open(path + INDEX_SUFFIX, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return []
+    usable = len(data) - len(data) % _INDEX_ENTRY.size
+    return [_INDEX_ENTRY.unpack_from(data, offset) for offset in range(0, usable, _INDEX_ENTRY.size)]
+
+
+def _write_index(path: str, entries: List[tuple]) -> None:
+    with open(path + INDEX_SUFFIX, 'wb') as f:
+        f.write(b''.join(_INDEX_ENTRY.pack(*entry) for entry in entries))
+
+
+def load_index(path: str) -> List[tuple]:
+    """
+    Index entries of a tick file, rebuilt from the block headers if the index file is stale
+
+    Returns:
+        list: (first ns, last ns, offset, records) per block
+    """
+    file_size = os.path.getsize(path)
+    entries = _read_index(path)
+    if entries:
+        first, last, offset, count = entries[-1]
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            header = f.read(_BLOCK_HEADER.size)
+        if len(header) == _BLOCK_HEADER.size:
+            fields = _BLOCK_HEADER.unpack(header)
+            if fields[0] == BLOCK_MAGIC and offset + _BLOCK_HEADER.size + fields[6] == file_size:
+                return entries
+    with open(path, 'rb') as f:
+        entries, _ = _scan_blocks(f, file_size)
+    return entries
+
+
+def recover_tick_file(path: str) -> List[tuple]:
+    """Cut a half written final block off a tick file and rewrite its index; returns the index entries"""
+    file_size = os.path.getsize(path)
+    with open(path, 'r+b') as f:
+        entries, end = _scan_blocks(f, file_size)
+        if end < file_size:
+            logger.warning(f"Dropping {file_size - end} bytes of an incomplete block at the end of {path}")
+            f.truncate(end)
+    _write_index(path, entries)
+    return entries
+
+
+class TickFile:
+    """Reader of a recorded trading day"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.blocks = load_index(path)
+
+    def __len__(self):
+        return sum(entry[3] for entry in self.blocks)
+
+    @property
+    def first_timestamp(self) -> Optional[int]:
+        return self.blocks[0][0] if self.blocks else None
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return max(entry[1] for entry in self.blocks) if self.blocks else None
+
+    def read(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> Iterator[Tick]:
+        """
+        Iterate over (receive time ns, topic, payload) in recording order
+
+        Args:
+            start_ns: Skip ticks received before this time (blocks before it are not read)
+            end_ns: Stop at ticks received after this time
+        """
+        with open(self.path, 'rb') as f:
+            for first, last, offset, _ in self.blocks:
+                if start_ns is not None and last < start_ns:
+                    continue
+                if end_ns is not None and first > end_ns:
+                    break
+                f.seek(offset)
+                header = _BLOCK_HEADER.unpack(f.read(_BLOCK_HEADER.size))
+                compressed = f.read(header[6])
+                for record in decode_block(zlib.decompress(compressed)):
+                    if start_ns is not None and record[0] < start_ns:
+                        continue
+                    if end_ns is not None and record[0] > end_ns:
+                        return
+                    yield record
+
+    def info(self) -> Dict[str, Any]:
+        first, last = self.first_timestamp, self.last_timestamp
+        return {
+            'path': self.path,
+            'blocks': len(self.blocks),
+            'ticks': len(self),
+            'bytes': os.path.getsize(self.path),
+            'first': datetime.fromtimestamp(first / 1e9, IST).isoformat() if first else None,
+            'last': datetime.fromtimestamp(last / 1e9, IST).isoformat() if last else None,
+        }
+
+
+class TickRecorder:
+    """Appends bus frames to the day's tick file from one background thread"""
+
+    def __init__(self, directory: str, flush_interval: float = 1.0, block_records: int = 8192,
+                 max_pending: int = 1000000, level: int = 1):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.block_records = max(1, block_records)
+        self.max_pending = max_pending
+        self.level = level
+        os.makedirs(directory, exist_ok=True)
+
+        self._pending: List[Tick] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._files: Dict[str, Any] = {}  # day -> (data file, index file)
+
+        # Counters
+        self.recorded = 0
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.blocks = 0
+        self.bytes_written = 0
+
+        self._thread = threading.Thread(target=self._run, daemon=True, name="TickRecorder")
+        self._thread.start()
+
+    def record(self, topic: bytes, payload: bytes) -> bool:
+        """
+        Queue one bus frame, stamped with the current time
+
+        Returns:
+            bool: False if it was dropped because the writer is behind or stopped
+        """
+        if self._stopped:
+            return False
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                if self.dropped % DROP_LOG_INTERVAL == 1:
+                    logger.warning(f"Tick recorder is behind: {self.dropped} ticks dropped")
+                return False
+            self._pending.append((time.time_ns(), topic, payload))
+            self.recorded += 1
+            if len(self._pending) >= self.block_records:
+                self._wake.set()
+        return True
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._write_pending()
+        self._write_pending()
+        for data_file, index_file in self._files.values():
+            data_file.close()
+            index_file.close()
+        self._files.clear()
+
+    def _write_pending(self):
+        with self._lock:
+            records, self._pending = self._pending, []
+        if not records:
+            return
+        try:
+            by_day: Dict[str, List[Tick]] = {}
+            for record in records:
+                by_day.setdefault(trading_day(record[0]), []).append(record)
+            for day, day_records in by_day.items():
+                data_file, index_file = self._open(day)
+                for start in range(0, len(day_records), self.block_records):
+                    block_records = day_records[start:start + self.block_records]
+                    block = encode_block(block_records, self.level)
+                    offset = data_file.tell()
+                    data_file.write(block)
+                    index_file.write(_INDEX_ENTRY.pack(block_records[0][0], block_records[-1][0], offset,
+                                                       len(block_records)))
+                    self.blocks += 1
+                    self.bytes_written += len(block)
+                data_file.flush()
+                index_file.flush()
+            self.written += len(records)
+        except Exception as e:
+            self.failed += len(records)
+            logger.error(f"Error writing {len(records)} ticks: {e}")
+
+    def _open(self, day):
+        files = self._files.get(day)
+        if files is None:
+            # A new day closes the previous one's files
+            for data_file, index_file in self._files.values():
+                data_file.close()
+                index_file.close()
+            self._files.clear()
+
+            path = tick_file_path(self.directory, day)
+            if os.path.exists(path):
+                recover_tick_file(path)
+            data_file = open(path, 'ab')
+            index_file = open(path + INDEX_SUFFIX, 'ab')
+            files = self._files[day] = (data_file, index_file)
+            logger.info(f"Recording ticks to {path}")
+        return files
+
+    def flush(self, timeout: float = 10.0):
+        """Wait until everything recorded so far is written"""
+        target = self.recorded
+        self._wake.set()
+        deadline = time.monotonic() + timeout
+        while self.written + self.failed < target and self._thread.is_alive() and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def stop(self, timeout: float = 10.0):
+        """Write everything queued and close the files"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._wake.set()
+        self._thread.join(timeout=timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'directory': self.directory,
+            'pending': len(self._pending),
+            'recorded': self.recorded,
+            'written': self.written,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'blocks': self.blocks,
+            'bytes': self.bytes_written,
+        }
+
+
+def export_parquet(path: str, output: str, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> int:
+    """
+    Export a tick file to Parquet with one row per tick
+
+    Columns: timestamp (receive time), broker, exchange, symbol, mode, ltp, volume, oi,
+    bid, ask and data (the full tick as JSON). Needs pandas and duckdb.
+
+    Returns:
+        int: Number of rows written
+    """
+    import duckdb
+    import pandas as pd
+
+    topics = TopicTable()
+    rows = []
+    for timestamp, topic, payload in TickFile(path).read(start_ns, end_ns):
+        parsed = topics.parse(topic)
+        if not parsed:
+            continue
+        broker, exchange, symbol, mode = parsed
+        try:
+            tick = decode_tick(payload)
+        except ValueError:
+            continue
+        depth = tick.get('depth') or {}
+        buy, sell = depth.get('buy') or [{}], depth.get('sell') or [{}]
+        rows.append((timestamp, broker, exchange, symbol, mode, tick.get('ltp'), tick.get('volume'), tick.get('oi'),
+                     tick.get('bid', buy[0].get('price')), tick.get('ask', sell[0].get('price')),
+                     json.dumps(tick)))
+
+    frame = pd.DataFrame(rows, columns=['timestamp', 'broker', 'exchange', 'symbol', 'mode', 'ltp', 'volume',
+                                        'oi', 'bid', 'ask', 'data'])
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'], unit='ns', utc=True)
+    for column in ('ltp', 'bid', 'ask'):
+        frame[column] = pd.to_numeric(frame[column], errors='coerce')
+    for column in ('volume', 'oi'):
+        frame[column] = pd.to_numeric(frame[column], errors='coerce').astype('Int64')
+
+    connection = duckdb.connect()
+    try:
+        connection.register('ticks', frame)
+        output_sql = output.replace("'", "''")
+        connection.execute(f"COPY ticks TO '{output_sql}' (FORMAT PARQUET, COMPRESSION ZSTD)")
+    finally:
+        connection.close()
+    return len(frame)
+
+
+def _record_bus(endpoint: str, directory: str, flush_interval: float):
+    """Tap the bus with a SUB socket until interrupted"""
+    import zmq
+
+    recorder = TickRecorder(directory, flush_interval)
+    context = zmq.Context()
+    socket = context.socket(zmq.SUB)
+    socket.setsockopt(zmq.SUBSCRIBE, b"")
+    socket.connect(endpoint)
+    logger.info(f"Recording ticks from {endpoint} to {directory}")
+    try:
+        while True:
+            frames = socket.recv_multipart()
+            if len(frames) == 2:
+                recorder.record(frames[0], frames[1])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        recorder.stop()
+        socket.close(linger=0)
+        context.term()
+        logger.info(f"Tick recorder stopped: {recorder.get_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record, inspect and export ZeroMQ tick recordings")
+    commands = parser.add_subparsers(dest='command', required=True)
+    record_parser = commands.add_parser('record', help='record the bus until interrupted')
+    record_parser.add_argument('--endpoint', default=None,
+                               help='bus endpoint (default tcp://ZMQ_HOST:ZMQ_PORT)')
+    record_parser.add_argument('--dir', default=None, help='output directory (default TICK_RECORDER_DIR)')
+    info_parser = commands.add_parser('info', help='summarise a tick file')
+    info_parser.add_argument('path')
+    export_parser = commands.add_parser('export', help='export a tick file to Parquet')
+    export_parser.add_argument('path')
+    export_parser.add_argument('output')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        _, directory, flush_interval = get_recorder_config()
+        endpoint = args.endpoint or f"tcp://{os.getenv('ZMQ_HOST', '127.0.0.1')}:{os.getenv('ZMQ_PORT', '5555')}"
+        _record_bus(endpoint, args.dir or directory, flush_interval)
+    elif args.command == 'info':
+        print(json.dumps(TickFile(args.path).info(), indent=2))
+    else:
+        print(f"Exported {export_parquet(args.path, args.output)} ticks to {args.output}")